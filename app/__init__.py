@@ -10,15 +10,10 @@ Autor: JSP Soluções
 Data: 2025
 """
 
-# Importa a factory function
+# Importa a factory function. A instância global usada pelo Gunicorn
+# (app.app:app) é criada no primeiro acesso, não na importação do pacote:
+# processos auxiliares (ex.: renderização de PDF) importam módulos de app
+# sem executar a factory
 from app.app import create_app
 
-# Cria a instância Flask global para o Gunicorn
-app = create_app()
-
-# Log de inicialização para o Render (sem emojis para compatibilidade)
-print("ERP JSP iniciado com sucesso!")
-print(f"Configuracao: {app.config.get('ENV', 'production')}")
-print(f"Debug: {app.config.get('DEBUG', False)}")
-
 # Marca este diretório como um pacote Python
\ No newline at end of file
@@ -109,12 +109,17 @@ def create_app(config_name=None):
     # Configura context processors
     register_context_processors(app)
 
-    # Cria as tabelas do banco de dados se não existirem (necessário para Render/Gunicorn)
+    # Instrumentação de desempenho (opt-in: METRICAS_HABILITADAS=1)
+    if app.config.get('METRICAS_HABILITADAS'):
+        from app.services.metricas_service import instalar_metricas
+        instalar_metricas(app)
+
+    # Registra todos os modelos no metadata (relacionamentos e migrações)
     with app.app_context():
         try:
             from app.extensoes import db
             
-            # Importa todos os modelos para db.create_all() funcionar
+            # Importa os modelos que nenhum blueprint importa
             try:
                 from app.kits_distribuidor.kits_model import KitFotovoltaico
                 print("[OK] Modelo KitFotovoltaico importado")
@@ -140,6 +145,13 @@ def create_app(config_name=None):
             except Exception as e:
                 print(f" ⚠ Erro ao importar modelo Equipamento: {e}")
             
+            # Importa calendário de feriados (folha de colaboradores)
+            try:
+                from app.colaborador.feriado_model import Feriado
+                print("[OK] Modelo Feriado importado")
+            except Exception as e:
+                print(f" ⚠ Erro ao importar modelo Feriado: {e}")
+            
             # Importa modelos Financeiros Avançados
             try:
                 from app.financeiro.financeiro_model import (
@@ -157,271 +169,8 @@ def create_app(config_name=None):
                 print("[OK] Modelos Financeiros Avançados importados (9 tabelas)")
             except Exception as e:
                 print(f" ⚠ Erro ao importar modelos Financeiros: {e}")
-            
-            db.create_all()
-            print("[OK] Tabelas do banco de dados verificadas/criadas!")
-            
-            # === MIGRAÇÕES AUTOMÁTICAS ===
-            print("\n🔧 Executando migrações automáticas...")
-            
-            # ===== MIGRAÇÃO ENERGIA SOLAR REMOVIDA (APP SEPARADO) =====
-            # Migração: Adicionar coluna numero_projeto em calculo_energia_solar (PRIORIDADE MÁXIMA)
-            # try:
-            #     from sqlalchemy import text, inspect
-            #     inspector = inspect(db.engine)
-            #     
-            #     print("📋 Verificando tabela calculo_energia_solar...")
-            #     if 'calculo_energia_solar' in inspector.get_table_names():
-            #         colunas = [c['name'] for c in inspector.get_columns('calculo_energia_solar')]
-            #         print(f"   Colunas existentes: {len(colunas)}")
-            #         
-            #         # Adiciona coluna 'numero_projeto' se não existir
-            #         if 'numero_projeto' not in colunas:
-            #             print("   🔧 Adicionando coluna 'numero_projeto'...")
-            #             db.session.execute(text("ALTER TABLE calculo_energia_solar ADD COLUMN numero_projeto VARCHAR(50)"))
-            #             db.session.commit()
-            #             print("   ✅ Coluna 'numero_projeto' adicionada em calculo_energia_solar")
-            #         else:
-            #             print("   ✓ Coluna 'numero_projeto' já existe")
-            #     else:
-            #         print("   ⚠️ Tabela calculo_energia_solar não encontrada")
-            # except Exception as e:
-            #     db.session.rollback()
-            #     print(f"   ❌ ERRO na migração calculo_energia_solar: {e}")
-            #     import traceback
-            #     traceback.print_exc()
-            
-            # Migração: Adicionar colunas faltantes em orcamento_itens (v3.0)
-            try:
-                from sqlalchemy import text, inspect
-                inspector = inspect(db.engine)
-                
-                if 'orcamento_itens' in inspector.get_table_names():
-                    colunas = [c['name'] for c in inspector.get_columns('orcamento_itens')]
-                    
-                    # Adiciona coluna 'categoria' se não existir
-                    if 'categoria' not in colunas:
-                        db.session.execute(text("ALTER TABLE orcamento_itens ADD COLUMN categoria VARCHAR(50)"))
-                        db.session.commit()
-                        print("[OK] Coluna 'categoria' adicionada em orcamento_itens")
-                    
-                    # Adiciona coluna 'ordem' se não existir
-                    if 'ordem' not in colunas:
-                        db.session.execute(text("ALTER TABLE orcamento_itens ADD COLUMN ordem INTEGER DEFAULT 0"))
-                        db.session.commit()
-                        print("[OK] Coluna 'ordem' adicionada em orcamento_itens")
-                    
-                    # Adiciona coluna 'criado_em' se não existir
-                    if 'criado_em' not in colunas:
-                        db.session.execute(text("ALTER TABLE orcamento_itens ADD COLUMN criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP"))
-                        db.session.commit()
-                        print("[OK] Coluna 'criado_em' adicionada em orcamento_itens")
-            except Exception as e:
-                db.session.rollback()
-                print(f"⚠️ Aviso na migração orcamento_itens: {e}")
-            
-            print("✅ Migrações automáticas concluídas!\n")
-            
-            # Migração: Adicionar colunas de auditoria em lancamentos_financeiros
-            try:
-                from sqlalchemy import text, inspect
-                inspector = inspect(db.engine)
-                
-                if 'lancamentos_financeiros' in inspector.get_table_names():
-                    colunas = [c['name'] for c in inspector.get_columns('lancamentos_financeiros')]
-                    print("📋 Verificando colunas em lancamentos_financeiros...")
-                    
-                    # Adiciona colunas de auditoria se não existirem
-                    if 'usuario_criador' not in colunas:
-                        print("   🔧 Adicionando coluna 'usuario_criador'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN usuario_criador VARCHAR(100)"))
-                        db.session.commit()
-                    
-                    if 'usuario_editor' not in colunas:
-                        print("   🔧 Adicionando coluna 'usuario_editor'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN usuario_editor VARCHAR(100)"))
-                        db.session.commit()
-                    
-                    if 'data_criacao_auditoria' not in colunas:
-                        print("   🔧 Adicionando coluna 'data_criacao_auditoria'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN data_criacao_auditoria TIMESTAMP DEFAULT CURRENT_TIMESTAMP"))
-                        db.session.commit()
-                    
-                    if 'data_edicao_auditoria' not in colunas:
-                        print("   🔧 Adicionando coluna 'data_edicao_auditoria'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN data_edicao_auditoria TIMESTAMP"))
-                        db.session.commit()
-                    
-                    # Adiciona colunas de gestão financeira avançada
-                    if 'conta_bancaria_id' not in colunas:
-                        print("   🔧 Adicionando coluna 'conta_bancaria_id'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN conta_bancaria_id INTEGER REFERENCES contas_bancarias(id)"))
-                        db.session.commit()
-                    
-                    if 'centro_custo_id' not in colunas:
-                        print("   🔧 Adicionando coluna 'centro_custo_id'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN centro_custo_id INTEGER REFERENCES centros_custo(id)"))
-                        db.session.commit()
-                    
-                    if 'comprovante_anexo' not in colunas:
-                        print("   🔧 Adicionando coluna 'comprovante_anexo'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN comprovante_anexo VARCHAR(255)"))
-                        db.session.commit()
-                    
-                    if 'numero_parcela' not in colunas:
-                        print("   🔧 Adicionando coluna 'numero_parcela'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN numero_parcela VARCHAR(20)"))
-                        db.session.commit()
-                    
-                    if 'valor_original' not in colunas:
-                        print("   🔧 Adicionando coluna 'valor_original'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN valor_original NUMERIC(12, 2)"))
-                        db.session.commit()
-                    
-                    if 'juros' not in colunas:
-                        print("   🔧 Adicionando coluna 'juros'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN juros NUMERIC(12, 2) DEFAULT 0"))
-                        db.session.commit()
-                    
-                    if 'desconto' not in colunas:
-                        print("   🔧 Adicionando coluna 'desconto'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN desconto NUMERIC(12, 2) DEFAULT 0"))
-                        db.session.commit()
-                    
-                    if 'multa' not in colunas:
-                        print("   🔧 Adicionando coluna 'multa'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN multa NUMERIC(12, 2) DEFAULT 0"))
-                        db.session.commit()
-                    
-                    if 'plano_conta_id' not in colunas:
-                        print("   🔧 Adicionando coluna 'plano_conta_id'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN plano_conta_id INTEGER REFERENCES plano_contas(id)"))
-                        db.session.commit()
-                    
-                    # 🎯 RASTREABILIDADE - Campos de origem do lançamento
-                    if 'origem' not in colunas:
-                        print("   🔧 Adicionando coluna 'origem'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN origem VARCHAR(50) DEFAULT 'MANUAL'"))
-                        db.session.commit()
-                        # Atualizar registros existentes
-                        db.session.execute(text("UPDATE lancamentos_financeiros SET origem = 'MANUAL' WHERE origem IS NULL"))
-                        db.session.commit()
-                        print("   ✅ Coluna 'origem' adicionada e registros atualizados!")
-                    
-                    if 'custo_fixo_id' not in colunas:
-                        print("   🔧 Adicionando coluna 'custo_fixo_id'...")
-                        db.session.execute(text("ALTER TABLE lancamentos_financeiros ADD COLUMN custo_fixo_id INTEGER REFERENCES custos_fixos(id)"))
-                        db.session.commit()
-                        print("   ✅ Coluna 'custo_fixo_id' adicionada!")
-                    
-                    print("   ✅ Colunas verificadas/criadas!")
-            except Exception as e:
-                db.session.rollback()
-                print(f"   ⚠️ Erro na migração de colunas financeiras: {e}")
-            
-            # Migração completa para PlanoContas
-            try:
-                print("\n🔍 Verificando tabela plano_contas...")
-                
-                # Verifica se a tabela existe
-                resultado_plano = db.session.execute(text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'plano_contas'
-                """))
-                colunas_plano = {row[0] for row in resultado_plano}
-                
-                if not colunas_plano:
-                    print("   ⚠️ Tabela plano_contas não existe, será criada pelo create_all()")
-                else:
-                    print(f"   📊 Tabela encontrada com {len(colunas_plano)} colunas")
-                    
-                    # Adiciona colunas faltantes
-                    if 'descricao' not in colunas_plano:
-                        print("   🔧 Adicionando coluna 'descricao'...")
-                        db.session.execute(text("ALTER TABLE plano_contas ADD COLUMN descricao TEXT"))
-                        db.session.commit()
-                    
-                    if 'nivel' not in colunas_plano:
-                        print("   🔧 Adicionando coluna 'nivel'...")
-                        db.session.execute(text("ALTER TABLE plano_contas ADD COLUMN nivel INTEGER DEFAULT 1"))
-                        db.session.commit()
-                    
-                    if 'conta_pai_id' not in colunas_plano:
-                        print("   🔧 Adicionando coluna 'conta_pai_id'...")
-                        db.session.execute(text("ALTER TABLE plano_contas ADD COLUMN conta_pai_id INTEGER REFERENCES plano_contas(id)"))
-                        db.session.commit()
-                    
-                    if 'aceita_lancamento' not in colunas_plano:
-                        print("   🔧 Adicionando coluna 'aceita_lancamento'...")
-                        db.session.execute(text("ALTER TABLE plano_contas ADD COLUMN aceita_lancamento BOOLEAN DEFAULT true"))
-                        db.session.commit()
-                    
-                    if 'ativa' not in colunas_plano:
-                        print("   🔧 Adicionando coluna 'ativa'...")
-                        db.session.execute(text("ALTER TABLE plano_contas ADD COLUMN ativa BOOLEAN DEFAULT true"))
-                        db.session.commit()
-                    
-                    if 'natureza' not in colunas_plano:
-                        print("   🔧 Adicionando coluna 'natureza'...")
-                        db.session.execute(text("ALTER TABLE plano_contas ADD COLUMN natureza VARCHAR(20)"))
-                        db.session.commit()
-                    
-                    if 'ordem' not in colunas_plano:
-                        print("   🔧 Adicionando coluna 'ordem'...")
-                        db.session.execute(text("ALTER TABLE plano_contas ADD COLUMN ordem INTEGER DEFAULT 0"))
-                        db.session.commit()
-                    
-                    print("   ✅ Colunas do plano_contas verificadas/criadas!")
-            except Exception as e:
-                db.session.rollback()
-                print(f"   ⚠️ Erro na migração de plano_contas: {e}")
-
-            # Migração: Adicionar coluna salario_mensal em colaborador
-            try:
-                inspector = inspect(db.engine)
-                if 'colaborador' in inspector.get_table_names():
-                    colunas_colab = [c['name'] for c in inspector.get_columns('colaborador')]
-                    if 'salario_mensal' not in colunas_colab:
-                        db.session.execute(text("ALTER TABLE colaborador ADD COLUMN salario_mensal NUMERIC(10,2) DEFAULT 0"))
-                        db.session.commit()
-                        print("[OK] Coluna 'salario_mensal' adicionada em colaborador!")
-            except Exception as e:
-                db.session.rollback()
-                print(f"   ⚠️ Erro na migração salario_mensal: {e}")
-
-            # Migração: Adicionar coluna conteudo (BLOB) em ordem_servico_anexos
-            try:
-                inspector = inspect(db.engine)
-                if 'ordem_servico_anexos' in inspector.get_table_names():
-                    colunas_anexos = [c['name'] for c in inspector.get_columns('ordem_servico_anexos')]
-                    if 'conteudo' not in colunas_anexos:
-                        db.session.execute(text("ALTER TABLE ordem_servico_anexos ADD COLUMN conteudo BYTEA"))
-                        db.session.commit()
-                        print("[OK] Coluna 'conteudo' (BLOB) adicionada em ordem_servico_anexos!")
-            except Exception as e:
-                db.session.rollback()
-                print(f"   ⚠️ Erro na migração conteudo (anexos): {e}")
-
-            print("✅ Todas as migrações concluídas!\n")
-            
-            # Cria usuário admin padrão se não existir nenhum usuário
-            from app.auth.usuario_model import Usuario
-            if Usuario.query.count() == 0:
-                admin = Usuario(
-                    nome='Administrador',
-                    email='admin@jsp.com',
-                    usuario='admin',
-                    tipo_usuario='admin',
-                    ativo=True,
-                    email_confirmado=True
-                )
-                admin.set_password('admin123')
-                db.session.add(admin)
-                db.session.commit()
-                print("[OK] Usuario admin padrao criado! (admin / admin123)")
         except Exception as e:
-            print(f" ⚠ Aviso na criação de tabelas: {e}")
+            print(f" ⚠ Aviso ao importar modelos: {e}")
         
         # Popula banco com dados iniciais se estiver vazio
         # TEMPORARIAMENTE DESABILITADO PARA CRIAR BANCO LIMPO
@@ -438,293 +187,46 @@ def create_app(config_name=None):
         # except Exception as e:
         #     print(f" ⚠ Aviso na correção global de 'ativo': {e}")
         
-        # Migração automática: aumentar tamanho dos campos de proposta
-        try:
-            from sqlalchemy import text, inspect
-            inspector = inspect(db.engine)
-            
-            # Verifica se a tabela propostas existe
-            if 'propostas' in inspector.get_table_names():
-                # Tenta aplicar migração (ignora se já foi aplicada)
-                try:
-                    db.session.execute(text("ALTER TABLE propostas ALTER COLUMN forma_pagamento TYPE VARCHAR(500)"))
-                    db.session.execute(text("ALTER TABLE propostas ALTER COLUMN prazo_execucao TYPE VARCHAR(500)"))
-                    db.session.execute(text("ALTER TABLE propostas ALTER COLUMN garantia TYPE VARCHAR(500)"))
-                    db.session.commit()
-                    print("[OK] Migração de campos de proposta aplicada!")
-                except Exception as e:
-                    db.session.rollback()
-                    # Se já foi aplicada ou não precisa, apenas ignora
-                    if 'already exists' not in str(e).lower():
-                        pass  # Silenciosamente ignora
-        except Exception as e:
-            print(f" ⚠ Aviso na migração de campos de proposta: {e}")
+        # Corrige ordens de serviço (migração automática de status)
+        # TEMPORARIAMENTE DESABILITADO PARA CRIAR BANCO LIMPO
+        # try:
+        #     from scripts.corrigir_ordens_servico_render import corrigir_ordens_servico
+        #     corrigir_ordens_servico()
+        # except Exception as e:
+        #     print(f" ⚠ Aviso na correção de OS: {e}")
 
-        # Migração: corrigir horas_normais/horas_extras de varchar para numeric (banco local)
-        # No Render já são numeric; localmente podem ter sido criadas como varchar
+    # Esquema do banco: migrações versionadas (migrations/) aplicadas pelo
+    # runner. Em produção roda uma vez por deploy (scripts/migrar_banco.py),
+    # fora dos workers; aqui só em desenvolvimento/testes
+    if app.config.get('MIGRAR_BANCO_NA_INICIALIZACAO'):
         try:
-            from sqlalchemy import text, inspect
-            inspector = inspect(db.engine)
-            if 'ordem_servico' in inspector.get_table_names():
-                colunas_os = {col['name']: col for col in inspector.get_columns('ordem_servico')}
-                for col_name in ('horas_normais', 'horas_extras'):
-                    col_info = colunas_os.get(col_name)
-                    if col_info and 'varchar' in str(col_info.get('type', '')).lower():
-                        # Converte "8h 48min" → decimal antes de alterar o tipo
-                        db.session.execute(text(f"""
-                            UPDATE ordem_servico SET {col_name} = NULL
-                            WHERE {col_name} IS NOT NULL
-                              AND {col_name} !~ '^[0-9]+(\.[0-9]+)?$'
-                        """))
-                        db.session.execute(text(f"""
-                            ALTER TABLE ordem_servico
-                            ALTER COLUMN {col_name} TYPE numeric(10,2)
-                            USING NULLIF(TRIM({col_name}), '')::numeric
-                        """))
-                        db.session.commit()
-                        print(f"[OK] Coluna {col_name} convertida de varchar para numeric!")
+            from app.services.migracoes_service import migrar_banco
+            with app.app_context():
+                resultado = migrar_banco()
+            print(f"[OK] Banco na revisão {resultado['para']} ({resultado['acao']})")
         except Exception as e:
-            db.session.rollback()
-            print(f" ⚠ Aviso na migração de horas varchar->numeric: {e}")
+            print(f" ⚠ Aviso nas migrações do banco: {e}")
 
-        # Migração: adicionar colunas de assinaturas digitais e demais campos em ordem_servico
+    # Tarefas só de worker web (SERVICOS_WORKER_NA_INICIALIZACAO): testes e
+    # scripts de linha de comando não carregam o índice nem iniciam a thread
+    if app.config.get('SERVICOS_WORKER_NA_INICIALIZACAO'):
+        # Índice em memória do autocomplete da OS (sem a pré-carga, é
+        # carregado no primeiro uso)
         try:
-            from sqlalchemy import text, inspect
-            inspector = inspect(db.engine)
-            if 'ordem_servico' in inspector.get_table_names():
-                colunas_os = [col['name'] for col in inspector.get_columns('ordem_servico')]
-                # Todas as colunas que podem estar faltando no Render
-                colunas_ordem_servico = {
-                    # Assinaturas digitais
-                    'assinatura_cliente': 'TEXT',
-                    'assinatura_cliente_nome': 'VARCHAR(200)',
-                    'assinatura_cliente_data': 'TIMESTAMP',
-                    'assinatura_tecnico': 'TEXT',
-                    'assinatura_tecnico_nome': 'VARCHAR(200)',
-                    'assinatura_tecnico_data': 'TIMESTAMP',
-                    # Tipo de OS e modo operacional
-                    'tipo_os': "VARCHAR(20) DEFAULT 'comercial'",
-                    # Campos de tempo detalhado
-                    'intervalo_almoco': 'INTEGER DEFAULT 60',
-                    'hora_entrada_manha': 'TIME',
-                    'hora_saida_almoco': 'TIME',
-                    'hora_retorno_almoco': 'TIME',
-                    'hora_saida': 'TIME',
-                    'hora_entrada_extra': 'TIME',
-                    'hora_saida_extra': 'TIME',
-                    # Campos de solicitação
-                    'solicitante': 'VARCHAR(200)',
-                    'descricao_problema': 'TEXT',
-                    'diagnostico_tecnico': 'TEXT',
-                    'solucao': 'TEXT',
-                    # Campos financeiros extras
-                    'valor_entrada': 'NUMERIC(10,2) DEFAULT 0',
-                    'data_primeira_parcela': 'DATE',
-                    'data_vencimento_pagamento': 'DATE',
-                    'descricao_pagamento': 'TEXT',
-                    'status_pagamento': "VARCHAR(20) DEFAULT 'pendente'",
-                    'observacoes_anexos': 'TEXT',
-                    # Controle de KM
-                    'km_inicial': 'INTEGER',
-                    'km_final': 'INTEGER',
-                    'total_km': 'VARCHAR(20)',
-                    # Proposta vinculada
-                    'proposta_id': 'INTEGER',
-                    # Preferência de relatório
-                    'incluir_imagens_relatorio': 'BOOLEAN DEFAULT FALSE',
-                    # Data de abertura (pode estar faltando em DBs antigas)
-                    'data_abertura': 'DATE',
-                }
-                for col_name, col_type in colunas_ordem_servico.items():
-                    if col_name not in colunas_os:
-                        try:
-                            db.session.execute(text(f"ALTER TABLE ordem_servico ADD COLUMN {col_name} {col_type}"))
-                            db.session.commit()
-                            print(f"[OK] Coluna {col_name} adicionada em ordem_servico!")
-                        except Exception as col_err:
-                            db.session.rollback()
-                            print(f" ⚠ Não foi possível adicionar {col_name}: {col_err}")
+            from app.ordem_servico.autocomplete_service import obter_indice_autocomplete
+            with app.app_context():
+                obter_indice_autocomplete().carregar()
+            print("[OK] Índice de autocomplete da OS carregado")
         except Exception as e:
-            db.session.rollback()
-            print(f" ⚠ Aviso na migração de colunas de ordem_servico: {e}")
+            print(f" ⚠ Aviso ao carregar índice de autocomplete: {e}")
 
-        # Corrige sequências de ID (PostgreSQL)
+        # Varredura periódica de alertas financeiros (ALERTAS_INTERVALO_MINUTOS)
         try:
-            from sqlalchemy import text
-            tabelas = ['propostas', 'clientes', 'fornecedores', 'produtos', 'ordem_servico', 
-                      'usuarios', 'proposta_produto', 'proposta_servico', 'proposta_parcela']
-            
-            for tabela in tabelas:
-                try:
-                    query = f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), COALESCE((SELECT MAX(id) FROM {tabela}), 1), true)"
-                    db.session.execute(text(query))
-                    db.session.commit()
-                except Exception:
-                    db.session.rollback()
-                    pass  # Ignora se tabela não existe ou não tem sequência
-            print("[OK] Sequências de ID verificadas/corrigidas!")
+            from app.financeiro.alertas_agendador import iniciar_agendador_alertas
+            if iniciar_agendador_alertas(app):
+                print(f"[OK] Varredura de alertas a cada {app.config['ALERTAS_INTERVALO_MINUTOS']} min")
         except Exception as e:
-            print(f" ⚠ Aviso na correção de sequências: {e}")
-        
-        # Migração: adicionar colunas de precificação
-        try:
-            from sqlalchemy import text, inspect
-            inspector = inspect(db.engine)
-            
-            if 'config_precificacao' in inspector.get_table_names():
-                colunas_existentes = [col['name'] for col in inspector.get_columns('config_precificacao')]
-                
-                # Adicionar colunas se não existirem
-                if 'percentual_encargos' not in colunas_existentes:
-                    db.session.execute(text("ALTER TABLE config_precificacao ADD COLUMN percentual_encargos FLOAT DEFAULT 80.0"))
-                    db.session.commit()
-                    print("[OK] Coluna percentual_encargos adicionada!")
-                
-                if 'percentual_impostos' not in colunas_existentes:
-                    db.session.execute(text("ALTER TABLE config_precificacao ADD COLUMN percentual_impostos FLOAT DEFAULT 13.33"))
-                    db.session.commit()
-                    print("[OK] Coluna percentual_impostos adicionada!")
-        except Exception as e:
-            print(f" ⚠ Aviso na migração de precificação: {e}")
-        
-        # Migração: adicionar colunas faltantes em projeto_solar (v3.0)
-        try:
-            from sqlalchemy import text, inspect
-            inspector = inspect(db.engine)
-            
-            if 'projeto_solar' in inspector.get_table_names():
-                colunas_existentes = [col['name'] for col in inspector.get_columns('projeto_solar')]
-                
-                # Lista de campos necessários com seus tipos
-                campos_necessarios = {
-                    'numero': "VARCHAR(20)",
-                    'tipo_instalacao': "VARCHAR(20) DEFAULT 'monofasica'",
-                    'circuito': "VARCHAR(20)",
-                    'status_orcamento': "VARCHAR(20) DEFAULT 'pendente'",
-                    'taxa_disponibilidade': "DOUBLE PRECISION",
-                    'economia_mensal': "DOUBLE PRECISION",
-                    'tempo_retorno': "DOUBLE PRECISION",
-                    'iluminacao_publica': "DOUBLE PRECISION DEFAULT 0",
-                    'demais_custos': "DOUBLE PRECISION DEFAULT 0",
-                    'reajuste_anual_energia': "DOUBLE PRECISION DEFAULT 10.0",
-                    'aplicar_pis_te': "BOOLEAN DEFAULT TRUE",
-                    'aplicar_cofins_te': "BOOLEAN DEFAULT TRUE",
-                    'aplicar_icms_te': "BOOLEAN DEFAULT TRUE",
-                    'aplicar_pis_tusd': "BOOLEAN DEFAULT TRUE",
-                    'aplicar_cofins_tusd': "BOOLEAN DEFAULT TRUE",
-                    'aplicar_icms_tusd': "BOOLEAN DEFAULT TRUE",
-                    'economia_25_anos': "DOUBLE PRECISION",
-                    'economia_anual': "DOUBLE PRECISION",
-                    'payback_anos': "DOUBLE PRECISION",
-                    'modalidade_gd': "VARCHAR(50)",
-                    'aliquota_fio_b': "DOUBLE PRECISION",
-                    'usuario_criador': "VARCHAR(100)",
-                    'data_criacao': "TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
-                    'data_atualizacao': "TIMESTAMP",
-                    'perda_eficiencia_anual': "DOUBLE PRECISION DEFAULT 0.8",
-                    'usar_micro_inversor': "BOOLEAN DEFAULT FALSE",
-                    'largura_area': "DOUBLE PRECISION",
-                    'comprimento_area': "DOUBLE PRECISION",
-                    'protecao_cc_tipo': "VARCHAR(50)",
-                    'protecao_cc_corrente': "VARCHAR(20)",
-                    'protecao_ca_tipo': "VARCHAR(50)",
-                    'protecao_ca_corrente': "VARCHAR(20)",
-                    'qtd_fases': "INTEGER",
-                    'cabo_fase_bitola': "VARCHAR(20)",
-                    'cabo_neutro_bitola': "VARCHAR(20)",
-                    'qtd_terra': "INTEGER",
-                    'cabo_terra_bitola': "VARCHAR(20)",
-                    'padrao_observacoes': "VARCHAR(200)"
-                }
-                
-                # Adicionar campos que não existem
-                campos_adicionados = []
-                for campo, tipo in campos_necessarios.items():
-                    if campo not in colunas_existentes:
-                        try:
-                            db.session.execute(text(f"ALTER TABLE projeto_solar ADD COLUMN {campo} {tipo}"))
-                            campos_adicionados.append(campo)
-                        except Exception:
-                            pass
-                
-                if campos_adicionados:
-                    db.session.commit()
-                    print(f"[OK] {len(campos_adicionados)} colunas adicionadas em projeto_solar: {', '.join(campos_adicionados)}")
-                
-                # Sincronizar circuito com tipo_instalacao para dados existentes
-                if 'circuito' in campos_adicionados or 'tipo_instalacao' in campos_adicionados:
-                    try:
-                        db.session.execute(text("""
-                            UPDATE projeto_solar 
-                            SET circuito = CASE 
-                                WHEN tipo_instalacao = 'monofasica' THEN 'Monofásico'
-                                WHEN tipo_instalacao = 'bifasica' THEN 'Bifásico'
-                                WHEN tipo_instalacao = 'trifasica' THEN 'Trifásico'
-                                ELSE circuito
-                            END
-                            WHERE circuito IS NULL AND tipo_instalacao IS NOT NULL
-                        """))
-                        db.session.commit()
-                    except Exception:
-                        pass
-                        
-        except Exception as e:
-            db.session.rollback()
-            print(f" ⚠ Aviso na migração de projeto_solar: {e}")
-        
-        # Migração: adicionar colunas largura e comprimento em placa_solar
-        try:
-            from sqlalchemy import text, inspect
-            inspector = inspect(db.engine)
-            
-            if 'placa_solar' in inspector.get_table_names():
-                colunas_existentes = [col['name'] for col in inspector.get_columns('placa_solar')]
-                
-                campos_dimensoes = {
-                    'largura': 'DOUBLE PRECISION',
-                    'comprimento': 'DOUBLE PRECISION'
-                }
-                
-                campos_adicionados = []
-                for campo, tipo in campos_dimensoes.items():
-                    if campo not in colunas_existentes:
-                        try:
-                            db.session.execute(text(f"ALTER TABLE placa_solar ADD COLUMN {campo} {tipo}"))
-                            campos_adicionados.append(campo)
-                        except Exception:
-                            pass
-                
-                if campos_adicionados:
-                    db.session.commit()
-                    print(f"[OK] {len(campos_adicionados)} colunas de dimensão adicionadas em placa_solar: {', '.join(campos_adicionados)}")
-                        
-        except Exception as e:
-            db.session.rollback()
-            print(f" ⚠ Aviso na migração de placa_solar: {e}")
-        
-        # Migração: adicionar coluna horas_improdutivas_percentual
-        try:
-            from sqlalchemy import text, inspect
-            inspector = inspect(db.engine)
-            
-            if 'config_precificacao' in inspector.get_table_names():
-                colunas_existentes = [col['name'] for col in inspector.get_columns('config_precificacao')]
-                
-                if 'horas_improdutivas_percentual' not in colunas_existentes:
-                    db.session.execute(text("ALTER TABLE config_precificacao ADD COLUMN horas_improdutivas_percentual FLOAT DEFAULT 20.0"))
-                    db.session.commit()
-                    print("[OK] Coluna horas_improdutivas_percentual adicionada!")
-        except Exception as e:
-            db.session.rollback()
-            print(f" ⚠ Aviso na migração de precificação: {e}")
-        
-        # Corrige ordens de serviço (migração automática de status)
-        # TEMPORARIAMENTE DESABILITADO PARA CRIAR BANCO LIMPO
-        # try:
-        #     from scripts.corrigir_ordens_servico_render import corrigir_ordens_servico
-        #     corrigir_ordens_servico()
-        # except Exception as e:
-        #     print(f" ⚠ Aviso na correção de OS: {e}")
+            print(f" ⚠ Aviso ao iniciar agendador de alertas: {e}")
 
     return app
 
@@ -1151,6 +653,16 @@ def register_context_processors(app):
         return {'safe_url_for': safe_url_for}
 
 
-# Cria a instância da aplicação para Gunicorn/WSGI
-# Gunicorn importa: app.app:app
-app = create_app()
\ No newline at end of file
+# Instância da aplicação para Gunicorn/WSGI (Gunicorn importa: app.app:app),
+# criada no primeiro acesso: importar o módulo não executa a factory
+def __getattr__(nome):
+    if nome != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    global app
+    app = create_app()
+
+    # Log de inicialização para o Render (sem emojis para compatibilidade)
+    print("ERP JSP iniciado com sucesso!")
+    print(f"Configuracao: {app.config.get('ENV', 'production')}")
+    print(f"Debug: {app.config.get('DEBUG', False)}")
+    return app
@@ -116,18 +116,11 @@ def login():
                 
             else:
                 # Login bem-sucedido
-                print(f"🔐 Tentando login_user para: {usuario.usuario} (ID: {usuario.id})")
-                print(f"🔐 Usuario ativo: {usuario.ativo}")
-                print(f"🔐 Usuario pode_fazer_login: {usuario.pode_fazer_login}")
-                
                 # Define sessão como permanente
-                from flask import session
                 session.permanent = True
                 
                 resultado = login_user(usuario, remember=lembrar)
-                print(f"🔐 Resultado login_user: {resultado}")
-                print(f"🔐 current_user.is_authenticated: {current_user.is_authenticated}")
-                print(f"🔐 current_user.id: {current_user.id if current_user.is_authenticated else 'N/A'}")
+                current_app.logger.info(f'identidade evento=login usuario_id={usuario.id} sucesso={resultado}')
                 
                 usuario.registrar_login()
                 sucesso = True
@@ -186,7 +179,7 @@ def perfil():
     """
     Página de perfil do usuário.
     """
-    return render_template('auth/perfil.html', usuario=current_user)
+    return render_template('auth/perfil.html', usuario=current_user.modelo())
 
 
 @auth_bp.route('/alterar-senha', methods=['GET', 'POST'])
@@ -208,7 +201,7 @@ def alterar_senha():
             flash('Por favor, preencha todos os campos.', 'error')
             return render_template('auth/alterar_senha.html')
         
-        if not current_user.verificar_senha(senha_atual):
+        if not current_user.modelo().verificar_senha(senha_atual):
             flash('Senha atual incorreta.', 'error')
             return render_template('auth/alterar_senha.html')
         
@@ -222,9 +215,12 @@ def alterar_senha():
         
         # Altera senha
         try:
-            current_user.set_senha(nova_senha)
-            current_user.primeiro_login = False
-            current_user.save()
+            usuario = current_user.modelo()
+            usuario.set_senha(nova_senha)
+            usuario.primeiro_login = False
+            usuario.save()
+            # A troca de senha revoga as sessões abertas; esta segue com a nova versão
+            login_user(usuario)
             
             flash('Senha alterada com sucesso!', 'success')
             return redirect(url_for('auth.perfil'))
@@ -271,9 +267,12 @@ def primeiro_login():
         
         # Altera senha
         try:
-            current_user.set_senha(nova_senha)
-            current_user.primeiro_login = False
-            current_user.save()
+            usuario = current_user.modelo()
+            usuario.set_senha(nova_senha)
+            usuario.primeiro_login = False
+            usuario.save()
+            # A troca de senha revoga as sessões abertas; esta segue com a nova versão
+            login_user(usuario)
             
             flash('Senha definida com sucesso! Bem-vindo ao ERP JSP.', 'success')
             return redirect(url_for('painel.dashboard'))
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+ERP JSP v3.0 - Identidade da Sessão
+===================================
+
+Carregamento do usuário logado (user_loader do Flask-Login) sem ir ao
+banco a cada requisição.
+
+- O usuário logado é representado por IdentidadeUsuario, um snapshot
+  imutável com os dados usados nas telas e as permissões já resolvidas
+  (PERMISSOES_POR_TIPO). Cada worker guarda os snapshots em memória por
+  IDENTIDADE_CACHE_SEGUNDOS.
+- A sessão guarda '<id>:<versao_sessao>' (Usuario.get_id). A troca de
+  senha, perfil ou ativação incrementa a versão no banco. Sessões e
+  cookies "lembrar" emitidos antes da troca são recusados assim que o
+  snapshot é relido. Ids sem versão (emitidos antes do versionamento)
+  valem como versão 1 e caem na primeira troca.
+- Qualquer UPDATE no usuário descarta o snapshot do próprio worker na
+  hora (evento em usuario_model). Os outros workers relêem ao fim do TTL.
+- Campos fora do snapshot (telefone, ultimo_login...) e operações de
+  escrita usam o modelo completo: identidade.modelo().
+
+O log das cargas é estruturado (chave=valor) e amostrado por
+IDENTIDADE_LOG_AMOSTRAGEM. Sessões revogadas e erros são sempre
+registrados.
+
+Autor: JSP Soluções
+Data: 2026
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+from flask import current_app, has_app_context
+
+from app.extensoes import db
+
+logger = logging.getLogger(__name__)
+
+CHAVE_EXTENSAO = 'identidade_sessao'
+
+# Versão inicial (server_default de usuarios.versao_sessao)
+VERSAO_INICIAL = 1
+
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class IdentidadeUsuario:
+    """Snapshot imutável do usuário logado e das suas permissões."""
+
+    id: int
+    usuario: str
+    nome: str
+    email: str
+    tipo_usuario: str
+    ativo: bool
+    primeiro_login: bool
+    tema_preferido: Optional[str]
+    versao: int
+    permissoes: FrozenSet[str]
+
+    # Interface do Flask-Login
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.ativo)
+
+    def get_id(self) -> str:
+        return f'{self.id}:{self.versao}'
+
+    def tem_permissao(self, permissao) -> bool:
+        """Mesma regra de Usuario.tem_permissao, sem consultar o banco."""
+        return self.tipo_usuario == 'admin' or permissao in self.permissoes
+
+    def modelo(self):
+        """Usuario completo (uma consulta por requisição), para escrita e campos fora do snapshot."""
+        from app.auth.usuario_model import Usuario
+        return db.session.get(Usuario, self.id)
+
+    def __getattr__(self, nome):
+        # Chamado só para atributos fora do snapshot: delega ao modelo
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        modelo = self.modelo()
+        if modelo is None:
+            raise AttributeError(nome)
+        return getattr(modelo, nome)
+
+    @classmethod
+    def do_usuario(cls, usuario) -> 'IdentidadeUsuario':
+        from app.auth.usuario_model import PERMISSOES_POR_TIPO
+        return cls(
+            id=usuario.id,
+            usuario=usuario.usuario,
+            nome=usuario.nome,
+            email=usuario.email,
+            tipo_usuario=usuario.tipo_usuario,
+            ativo=bool(usuario.ativo),
+            primeiro_login=bool(usuario.primeiro_login),
+            tema_preferido=usuario.tema_preferido,
+            versao=usuario.versao_sessao or VERSAO_INICIAL,
+            permissoes=frozenset(PERMISSOES_POR_TIPO.get(usuario.tipo_usuario, ())),
+        )
+
+
+# ===== CACHE =====
+
+def _cache() -> dict:
+    """{usuario_id: (IdentidadeUsuario, expira_em)} da aplicação atual."""
+    return current_app.extensions.setdefault(CHAVE_EXTENSAO, {})
+
+
+def invalidar_identidade(usuario_id=None):
+    """Descarta o snapshot de um usuário (ou de todos) neste worker."""
+    if not has_app_context():
+        return
+    with _lock:
+        if usuario_id is None:
+            _cache().clear()
+        else:
+            _cache().pop(usuario_id, None)
+
+
+def _registrar(evento, nivel=logging.DEBUG, amostrado=True, **campos):
+    if amostrado and random.random() >= current_app.config.get('IDENTIDADE_LOG_AMOSTRAGEM', 0.0):
+        return
+    if logger.isEnabledFor(nivel):
+        detalhes = ' '.join(f'{chave}={valor}' for chave, valor in campos.items())
+        logger.log(nivel, f'identidade evento={evento} {detalhes}')
+
+
+def _separar_id(valor):
+    """'5:3' -> (5, 3); '5' (sessões anteriores à versão) -> (5, VERSAO_INICIAL)."""
+    texto = str(valor)
+    if ':' in texto:
+        usuario_id, versao = texto.split(':', 1)
+        return int(usuario_id), int(versao)
+    return int(texto), VERSAO_INICIAL
+
+
+def carregar_identidade(valor) -> Optional[IdentidadeUsuario]:
+    """
+    user_loader do Flask-Login.
+
+    Returns:
+        IdentidadeUsuario, ou None se o usuário não existe, está inativo
+        ou a sessão é de uma versão anterior (senha/perfil trocados).
+    """
+    try:
+        usuario_id, versao = _separar_id(valor)
+    except (TypeError, ValueError):
+        return None
+
+    agora = time.monotonic()
+    entrada = _cache().get(usuario_id)
+    origem = 'cache'
+    # Sessão mais nova que o snapshot: a versão mudou em outro worker
+    if entrada is None or entrada[1] < agora or entrada[0].versao < versao:
+        origem = 'banco'
+        try:
+            from app.auth.usuario_model import Usuario
+            usuario = db.session.get(Usuario, usuario_id)
+        except Exception:
+            logger.exception(f'identidade evento=erro_carga usuario_id={usuario_id}')
+            return None
+        if usuario is None:
+            invalidar_identidade(usuario_id)
+            _registrar('nao_encontrado', logging.INFO, amostrado=False, usuario_id=usuario_id)
+            return None
+        identidade = IdentidadeUsuario.do_usuario(usuario)
+        with _lock:
+            _cache()[usuario_id] = (identidade, agora + current_app.config.get('IDENTIDADE_CACHE_SEGUNDOS', 30))
+    else:
+        identidade = entrada[0]
+
+    if identidade.versao != versao:
+        _registrar('sessao_revogada', logging.INFO, amostrado=False, usuario_id=usuario_id,
+                   versao_sessao=versao, versao_atual=identidade.versao)
+        return None
+    if not identidade.ativo:
+        _registrar('usuario_inativo', logging.INFO, amostrado=False, usuario_id=usuario_id)
+        return None
+
+    _registrar('carregada', usuario_id=usuario_id, origem=origem, versao=identidade.versao)
+    return identidade
@@ -17,6 +17,42 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
 
+# Permissões por tipo de usuário (admin tem todas)
+PERMISSOES_POR_TIPO = {
+    'usuario': [
+        'visualizar_clientes', 'criar_clientes', 'editar_clientes',
+        'visualizar_propostas', 'criar_propostas', 'editar_propostas',
+        'visualizar_ordem_servico', 'criar_ordem_servico', 'editar_ordem_servico',
+        'visualizar_produtos', 'criar_produtos', 'editar_produtos',
+        'visualizar_fornecedores', 'criar_fornecedores', 'editar_fornecedores',
+        'visualizar_financeiro', 'criar_financeiro', 'editar_financeiro',
+        'visualizar_pedidos_compra', 'criar_pedidos_compra', 'editar_pedidos_compra',
+        'cancelar_pedidos_compra', 'receber_pedidos_compra'
+    ],
+    'operador': [
+        'visualizar_clientes', 'criar_clientes', 'editar_clientes',
+        'visualizar_propostas', 'criar_propostas', 'editar_propostas',
+        'visualizar_ordem_servico', 'criar_ordem_servico', 'editar_ordem_servico',
+        'visualizar_produtos', 'visualizar_fornecedores',
+        'visualizar_pedidos_compra', 'criar_pedidos_compra', 'editar_pedidos_compra',
+        'receber_pedidos_compra'
+    ],
+    'readonly': [
+        'visualizar_clientes', 'visualizar_propostas', 'visualizar_ordem_servico',
+        'visualizar_produtos', 'visualizar_fornecedores', 'visualizar_financeiro',
+        'visualizar_pedidos_compra'
+    ],
+    'colaborador': [
+        'visualizar_ordem_servico_proprias',  # Apenas suas OS
+        'editar_ordem_servico_proprias',      # Preencher horas e atividades
+        'upload_anexos_os'                      # Adicionar fotos
+    ]
+}
+
+# Campos cuja alteração invalida a identidade das sessões abertas
+CAMPOS_VERSAO_SESSAO = ('senha_hash', 'tipo_usuario', 'ativo')
+
+
 class Usuario(BaseModel, UserMixin):
     """
     Model para usuários do sistema.
@@ -56,6 +92,10 @@ class Usuario(BaseModel, UserMixin):
     idioma = db.Column(db.String(5), default='pt-BR')
     timezone = db.Column(db.String(50), default='America/Sao_Paulo')
     
+    # Incrementada a cada troca de senha, perfil ou ativação (CAMPOS_VERSAO_SESSAO):
+    # sessões e cookies "lembrar" emitidos com a versão anterior deixam de valer
+    versao_sessao = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    
     # Meta campos herdados de BaseModel:
     # id, data_criacao, data_atualizacao, ativo, usuario_criacao, usuario_atualizacao
     
@@ -65,6 +105,14 @@ class Usuario(BaseModel, UserMixin):
     def __str__(self):
         return f'{self.nome} ({self.usuario})'
     
+    def get_id(self):
+        """Id gravado na sessão do Flask-Login: '<id>:<versao_sessao>'."""
+        return f'{self.id}:{self.versao_sessao or 1}'
+    
+    def modelo(self):
+        """O próprio usuário (mesma interface de IdentidadeUsuario.modelo)."""
+        return self
+    
     @property
     def tipo_usuario_formatado(self):
         """Retorna tipo de usuário formatado para exibição."""
@@ -176,39 +224,7 @@ class Usuario(BaseModel, UserMixin):
         if self.tipo_usuario == 'admin':
             return True
         
-        # Permissões por tipo de usuário
-        permissoes = {
-            'usuario': [
-                'visualizar_clientes', 'criar_clientes', 'editar_clientes',
-                'visualizar_propostas', 'criar_propostas', 'editar_propostas',
-                'visualizar_ordem_servico', 'criar_ordem_servico', 'editar_ordem_servico',
-                'visualizar_produtos', 'criar_produtos', 'editar_produtos',
-                'visualizar_fornecedores', 'criar_fornecedores', 'editar_fornecedores',
-                'visualizar_financeiro', 'criar_financeiro', 'editar_financeiro',
-                'visualizar_pedidos_compra', 'criar_pedidos_compra', 'editar_pedidos_compra',
-                'cancelar_pedidos_compra', 'receber_pedidos_compra'
-            ],
-            'operador': [
-                'visualizar_clientes', 'criar_clientes', 'editar_clientes',
-                'visualizar_propostas', 'criar_propostas', 'editar_propostas',
-                'visualizar_ordem_servico', 'criar_ordem_servico', 'editar_ordem_servico',
-                'visualizar_produtos', 'visualizar_fornecedores',
-                'visualizar_pedidos_compra', 'criar_pedidos_compra', 'editar_pedidos_compra',
-                'receber_pedidos_compra'
-            ],
-            'readonly': [
-                'visualizar_clientes', 'visualizar_propostas', 'visualizar_ordem_servico',
-                'visualizar_produtos', 'visualizar_fornecedores', 'visualizar_financeiro',
-                'visualizar_pedidos_compra'
-            ],
-            'colaborador': [
-                'visualizar_ordem_servico_proprias',  # Apenas suas OS
-                'editar_ordem_servico_proprias',      # Preencher horas e atividades
-                'upload_anexos_os'                      # Adicionar fotos
-            ]
-        }
-        
-        return permissao in permissoes.get(self.tipo_usuario, [])
+        return permissao in PERMISSOES_POR_TIPO.get(self.tipo_usuario, ())
     
     @classmethod
     def buscar_por_email(cls, email):
@@ -291,6 +307,21 @@ class Usuario(BaseModel, UserMixin):
         }
 
 
+@db.event.listens_for(Usuario, 'before_update')
+def _incrementar_versao_sessao(_mapper, _connection, target):
+    """Troca de senha, perfil ou ativação invalida as sessões abertas do usuário."""
+    estado = db.inspect(target)
+    if any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_VERSAO_SESSAO):
+        target.versao_sessao = (target.versao_sessao or 1) + 1
+
+
+@db.event.listens_for(Usuario, 'after_update')
+@db.event.listens_for(Usuario, 'after_delete')
+def _invalidar_identidade(_mapper, _connection, target):
+    from app.auth.identidade_service import invalidar_identidade
+    invalidar_identidade(target.id)
+
+
 class LogLogin(BaseModel):
     """
     Model para log de tentativas de login.
@@ -10,7 +10,7 @@ Data: 2026
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from flask_login import login_required, current_user
+from flask_login import login_required, login_user, current_user
 from functools import wraps
 from app.extensoes import db
 from app.auth.usuario_model import Usuario
@@ -136,6 +136,9 @@ def editar(id):
                 usuario.set_senha(nova_senha)
             
             usuario.save()
+            # Edição do próprio usuário: mantém a sessão na nova versão
+            if usuario.id == current_user.id:
+                login_user(usuario)
             
             flash(f'Usuário {usuario.nome} atualizado com sucesso!', 'success')
             return redirect(url_for('usuario.listar'))
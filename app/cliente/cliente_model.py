@@ -11,9 +11,9 @@ Data: 2025
 """
 
 from app.extensoes import db
-from app.models import BaseModel
+from app.models import BaseModel, BuscavelMixin
 
-class Cliente(BaseModel):
+class Cliente(BuscavelMixin, BaseModel):
     """
     Model para representar clientes do sistema.
     
@@ -23,6 +23,11 @@ class Cliente(BaseModel):
     🆕 Melhorado com campos profissionais completos
     """
     __tablename__ = 'clientes'
+    # Paginação por cursor da listagem (app.services.paginacao_service)
+    __table_args__ = (db.Index('ix_clientes_nome_id', 'nome', 'id'),)
+
+    # Campos indexados na busca textual (app.services.busca_service)
+    CAMPOS_BUSCA = ('nome', 'nome_fantasia', 'razao_social', 'cpf_cnpj')
     
     # === DADOS PRINCIPAIS ===
     nome = db.Column(db.String(150), nullable=False, index=True)
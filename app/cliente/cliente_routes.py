@@ -12,7 +12,6 @@ Data: 2025
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort
-import requests
 import re
 from datetime import datetime
 from sqlalchemy import inspect
@@ -106,30 +105,39 @@ def erro_interno_cliente(e):
 @cliente_bp.route('/')
 @cliente_bp.route('/listar')
 def listar():
-    """Lista todos os clientes ativos."""
+    """Lista os clientes ativos, paginados por cursor (ordem alfabética)."""
+    from app.services.paginacao_service import paginar, parametros_paginacao, quer_json
     busca = request.args.get('busca', '').strip()
     
+    query = Cliente.query.filter(Cliente.ativo == True)
     if busca:
-        clientes = Cliente.query.filter(
-            db.or_(
-                Cliente.nome.ilike(f'%{busca}%'),
-                Cliente.cpf_cnpj.ilike(f'%{busca}%')
-            ),
-            Cliente.ativo == True
-        ).order_by(Cliente.nome).all()
-    else:
-        clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
+        from app.services.busca_service import condicao_busca
+        query = query.filter(condicao_busca(Cliente, busca))
     
-    # Debug: verificar se Cliente 11 está na lista
-    cliente11_na_lista = any(c.id == 11 for c in clientes)
-    print(f"DEBUG LISTAGEM: {len(clientes)} clientes encontrados")
-    print(f"DEBUG: Cliente 11 na lista: {cliente11_na_lista}")
-    if not cliente11_na_lista:
-        cliente11_direto = Cliente.query.filter_by(id=11).first()
-        if cliente11_direto:
-            print(f"DEBUG: Cliente 11 existe no banco - Nome: {cliente11_direto.nome}, Ativo: {cliente11_direto.ativo}")
+    # Cards de PF/PJ: uma contagem agrupada, que também dá o total da paginação
+    por_tipo = dict(query.with_entities(Cliente.tipo, db.func.count(Cliente.id)).group_by(Cliente.tipo).all())
+    stats = {
+        'total': sum(por_tipo.values()),
+        'pf': por_tipo.get('PF', 0),
+        'pj': por_tipo.get('PJ', 0),
+    }
     
-    return render_template('cliente/listar.html', clientes=clientes, busca=busca)
+    cursor, por_pagina = parametros_paginacao(request.args)
+    pagina = paginar(query, [Cliente.nome, Cliente.id], decrescente=False,
+                     cursor=cursor, por_pagina=por_pagina, total=stats['total'])
+    
+    if quer_json(request.args):
+        return jsonify(pagina.para_dict(lambda cliente: {
+            'id': cliente.id,
+            'nome': cliente.nome,
+            'tipo': cliente.tipo,
+            'documento': cliente.documento_formatado,
+            'email': cliente.email or '',
+            'url': url_for('cliente.visualizar', id=cliente.id),
+        }))
+    
+    return render_template('cliente/listar.html', clientes=pagina.itens, pagina=pagina,
+                           stats=stats, busca=busca)
 
 @cliente_bp.route('/novo', methods=['GET', 'POST'])
 def novo():
@@ -492,13 +500,8 @@ def api_buscar():
     if not termo or len(termo) < 2:
         return jsonify([])
     
-    clientes = Cliente.query.filter(
-        db.or_(
-            Cliente.nome.ilike(f'%{termo}%'),
-            Cliente.cpf_cnpj.ilike(f'%{termo}%')
-        ),
-        Cliente.ativo == True
-    ).limit(10).all()
+    from app.services.busca_service import buscar
+    clientes = buscar(Cliente, termo, limite=10, filtros=[Cliente.ativo == True])
 
     resultado = []
     for cliente in clientes:
@@ -517,135 +520,13 @@ def api_buscar():
 
 @cliente_bp.route('/api/consultar-cnpj/<cnpj>')
 def consultar_cnpj(cnpj):
-    """Consulta dados da empresa via CNPJ usando múltiplas APIs."""
-    try:
-        # Remove formatação do CNPJ
-        cnpj_limpo = re.sub(r'[^0-9]', '', cnpj)
-        
-        if len(cnpj_limpo) != 14:
-            return jsonify({'success': False, 'error': 'CNPJ deve ter 14 dígitos'}), 400
-        
-        # Tenta primeira API - ReceitaWS
-        try:
-            print(f"Consultando CNPJ {cnpj_limpo} na ReceitaWS...")
-            url = f'https://www.receitaws.com.br/v1/cnpj/{cnpj_limpo}'
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('status') != 'ERROR':
-                    # Formata os dados para retornar
-                    resultado = {
-                        'success': True,
-                        'data': {
-                            'nome': data.get('nome', ''),  # Razão Social
-                            'fantasia': data.get('fantasia', ''),  # Nome Fantasia
-                            'cnpj': data.get('cnpj', ''),
-                            'situacao': data.get('situacao', ''),
-                            'email': data.get('email', ''),
-                            'telefone': data.get('telefone', ''),
-                            'atividade_principal': data.get('atividade_principal', [{}])[0].get('text', '') if data.get('atividade_principal') else '',
-                            'endereco': {
-                                'logradouro': data.get('logradouro', ''),
-                                'numero': data.get('numero', ''),
-                                'complemento': data.get('complemento', ''),
-                                'bairro': data.get('bairro', ''),
-                                'cidade': data.get('municipio', ''),
-                                'uf': data.get('uf', ''),
-                                'cep': data.get('cep', '')
-                            }
-                        }
-                    }
-                    print(f" Dados encontrados na ReceitaWS!")
-                    return jsonify(resultado)
-        
-        except Exception as e:
-            print(f"⚠️  ReceitaWS falhou: {e}")
-        
-        # Se chegou aqui, tenta segunda API - BrasilAPI  
-        try:
-            print(f"Tentando BrasilAPI...")
-            url = f'https://brasilapi.com.br/api/cnpj/v1/{cnpj_limpo}'
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                resultado = {
-                    'success': True,
-                    'data': {
-                        'nome': data.get('legal_name', ''),  # Razão Social  
-                        'fantasia': data.get('trade_name', ''),  # Nome Fantasia
-                        'cnpj': data.get('cnpj', ''),
-                        'situacao': data.get('registration_status', ''),
-                        'email': data.get('email', ''),
-                        'telefone': '',  # BrasilAPI não tem telefone
-                        'atividade_principal': data.get('main_activity', {}).get('text', ''),
-                        'endereco': {
-                            'logradouro': data.get('address', {}).get('street', ''),
-                            'numero': data.get('address', {}).get('number', ''),
-                            'complemento': data.get('address', {}).get('details', ''),
-                            'bairro': data.get('address', {}).get('district', ''),
-                            'cidade': data.get('address', {}).get('city', ''),
-                            'uf': data.get('address', {}).get('state', ''),
-                            'cep': data.get('address', {}).get('zip_code', '')
-                        }
-                    }
-                }
-                print(f" Dados encontrados na BrasilAPI!")
-                return jsonify(resultado)
-                
-        except Exception as e:
-            print(f"⚠️  BrasilAPI falhou: {e}")
-        
-        # Se ambas falharam
-        return jsonify({
-            'success': False, 
-            'error': 'CNPJ não encontrado ou serviços temporariamente indisponíveis. Tente novamente em alguns instantes.'
-        }), 404
-        
-    except Exception as e:
-        print(f" Erro geral na consulta CNPJ: {e}")
-        return jsonify({'success': False, 'error': 'Erro interno do servidor'}), 500
+    """Consulta dados da empresa via CNPJ (ReceitaWS e BrasilAPI em paralelo, com cache)."""
+    from app.services.consulta_cadastro_service import responder_consulta
+    return responder_consulta('cnpj', cnpj)
 
 
 @cliente_bp.route('/api/consultar-cep/<cep>')
 def consultar_cep(cep):
-    """Consulta endereço via CEP usando a API ViaCEP."""
-    try:
-        # Remove formatação do CEP
-        cep_limpo = re.sub(r'[^0-9]', '', cep)
-        
-        if len(cep_limpo) != 8:
-            return jsonify({'success': False, 'error': 'CEP deve ter 8 dígitos'}), 400
-        
-        # Consulta API ViaCEP
-        url = f'https://viacep.com.br/ws/{cep_limpo}/json/'
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code != 200:
-            return jsonify({'success': False, 'error': 'Erro ao consultar CEP'}), 500
-        
-        data = response.json()
-        
-        if data.get('erro'):
-            return jsonify({'success': False, 'error': 'CEP não encontrado'}), 404
-        
-        # Formata os dados para retornar
-        resultado = {
-            'success': True,
-            'data': {
-                'cep': data.get('cep', ''),
-                'logradouro': data.get('logradouro', ''),
-                'complemento': data.get('complemento', ''),
-                'bairro': data.get('bairro', ''),
-                'cidade': data.get('localidade', ''),
-                'uf': data.get('uf', '')
-            }
-        }
-        
-        return jsonify(resultado)
-        
-    except Exception as e:
-        return jsonify({'success': False, 'error': 'Erro interno do servidor'}), 500
\ No newline at end of file
+    """Consulta endereço via CEP (ViaCEP e BrasilAPI em paralelo, com cache)."""
+    from app.services.consulta_cadastro_service import responder_consulta
+    return responder_consulta('cep', cep)
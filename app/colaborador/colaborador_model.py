@@ -12,7 +12,7 @@ Data: 2025
 
 from app.extensoes import db
 from app.models import BaseModel
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, date, time
 
 # Constantes para padronização
@@ -124,7 +124,7 @@ class OrdemServicoColaborador(BaseModel):
     colaborador = db.relationship('Colaborador', backref='trabalhos_os')
     
     # === DADOS DO TRABALHO ===
-    data_trabalho = db.Column(db.Date, default=date.today, nullable=False)
+    data_trabalho = db.Column(db.Date, default=date.today, nullable=False, index=True)
     
     # Controle de horas detalhado por colaborador
     hora_inicio = db.Column(db.Time)
@@ -260,24 +260,12 @@ class OrdemServicoColaborador(BaseModel):
         return 0
     
     def eh_feriado(self):
-        """Verifica se a data de trabalho é feriado."""
+        """Verifica se a data de trabalho é feriado (calendário da tabela `feriados`)."""
         if not self.data_trabalho:
             return False
-        
-        # Lista de feriados nacionais (simplificada)
-        feriados_fixos = [
-            (1, 1),   # Ano Novo
-            (4, 21),  # Tiradentes
-            (5, 1),   # Dia do Trabalho
-            (9, 7),   # Independência
-            (10, 12), # Nossa Senhora Aparecida
-            (11, 2),  # Finados
-            (11, 15), # Proclamação da República
-            (12, 25), # Natal
-        ]
-        
-        mes_dia = (self.data_trabalho.month, self.data_trabalho.day)
-        return mes_dia in feriados_fixos
+
+        from app.colaborador.feriado_model import Feriado
+        return Feriado.nome_do_feriado(self.data_trabalho) is not None
     
     def eh_domingo(self):
         """Verifica se a data de trabalho é domingo."""
@@ -381,8 +369,9 @@ class OrdemServicoColaborador(BaseModel):
             valor_hora_cliente: Valor/hora cobrado do cliente
         """
         custo, receita, _, _ = self.calcular_valores_com_adicional(salario_mensal, valor_hora_cliente)
-        self.valor_hora_custo = custo
-        self.valor_hora_receita = receita
+        # Na escala da coluna (2 casas): recalcular sem mudança não gera UPDATE
+        self.valor_hora_custo = custo.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        self.valor_hora_receita = receita.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
     
     @property
     def descricao_adicional(self):
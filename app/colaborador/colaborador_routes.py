@@ -305,15 +305,18 @@ def relatorio_pagamento(id):
         mes, ano = hoje.month, hoje.year
 
     # Busca todos os registros de trabalho do colaborador no período
-    from app.colaborador.colaborador_model import OrdemServicoColaborador
-    from sqlalchemy import extract
+    # (intervalo de datas em vez de extract(): usa o índice de data_trabalho)
+    from app.colaborador.folha_service import intervalo_mes
+    if not 1 <= mes <= 12:
+        mes = hoje.month
+    inicio, fim = intervalo_mes(ano, mes)
     trabalhos = (
         OrdemServicoColaborador.query
         .filter_by(colaborador_id=colaborador.id, ativo=True)
         .join(OrdemServicoColaborador.ordem_servico)
         .filter(
-            extract('month', OrdemServicoColaborador.data_trabalho) == mes,
-            extract('year', OrdemServicoColaborador.data_trabalho) == ano
+            OrdemServicoColaborador.data_trabalho >= inicio,
+            OrdemServicoColaborador.data_trabalho < fim
         )
         .order_by(OrdemServicoColaborador.data_trabalho.asc())
         .all()
@@ -343,7 +346,7 @@ def relatorio_pagamento(id):
         ano=ano,
         mes_nome=MESES[mes],
         config=config,
-        now=dt,
+        now=dt.now,
     )
 
     # Auto-print
@@ -362,6 +365,53 @@ def relatorio_pagamento(id):
     return response
 
 
+@colaborador_bp.route('/folha')
+@colaborador_bp.route('/folha/<formato>')
+def folha_mensal(formato='html'):
+    """
+    Folha do mês de todos os colaboradores (fechamento mensal).
+    Aceita ?mes=MM&ano=AAAA; formato 'html' (impressão) ou 'csv'.
+    Admin only.
+    """
+    from flask_login import current_user
+    from flask import Response, make_response
+    from app.configuracao.configuracao_utils import get_config
+    from app.colaborador.folha_service import calcular_folha, gerar_csv_folha
+
+    if current_user.tipo_usuario != 'admin':
+        flash('Acesso restrito ao administrador.', 'error')
+        return redirect(url_for('colaborador.listar'))
+    if formato not in ('html', 'csv'):
+        abort(404)
+
+    hoje = datetime.today()
+    try:
+        mes = int(request.args.get('mes', hoje.month))
+        ano = int(request.args.get('ano', hoje.year))
+    except (ValueError, TypeError):
+        mes, ano = hoje.month, hoje.year
+    if not 1 <= mes <= 12:
+        mes = hoje.month
+
+    folha = calcular_folha(ano, mes)
+
+    if formato == 'csv':
+        return Response(
+            gerar_csv_folha(folha),
+            mimetype='text/csv; charset=utf-8',
+            headers={'Content-Disposition': f'attachment; filename="Folha_{ano}_{mes:02d}.csv"'}
+        )
+
+    response = make_response(render_template(
+        'colaborador/folha_mensal.html',
+        folha=folha,
+        config=get_config(),
+        now=datetime.now,
+    ))
+    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    return response
+
+
 # === ROTA DE SEGURANÇA: captura qualquer URL inválida no blueprint ===
 @colaborador_bp.route('/<path:qualquer_coisa>')
 def rota_invalida(qualquer_coisa):
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+ERP JSP v3.0 - Calendário de Feriados
+=====================================
+
+Tabela `feriados` pré-calculada por ano: feriados nacionais fixos, móveis
+(Carnaval, Sexta-feira Santa e Corpus Christi, derivados da Páscoa) e os
+estaduais/municipais configurados em FERIADOS_MUNICIPAIS ("DD/MM Nome; ...").
+Feriados avulsos podem ser cadastrados direto na tabela; um registro
+inativo anula o feriado calculado da mesma data.
+
+A consulta por data usa um cache por ano no worker, de modo que o cálculo
+de adicionais não consulta o banco a cada apontamento de horas.
+
+Autor: JSP Soluções
+Data: 2026
+"""
+
+import time
+from datetime import date, timedelta
+
+from flask import current_app
+
+from app.extensoes import db
+from app.models import BaseModel
+
+ABRANGENCIA_CHOICES = [
+    ('nacional', 'Nacional'),
+    ('estadual', 'Estadual'),
+    ('municipal', 'Municipal'),
+]
+
+# (mês, dia, nome)
+FERIADOS_FIXOS = [
+    (1, 1, 'Confraternização Universal'),
+    (4, 21, 'Tiradentes'),
+    (5, 1, 'Dia do Trabalho'),
+    (9, 7, 'Independência do Brasil'),
+    (10, 12, 'Nossa Senhora Aparecida'),
+    (11, 2, 'Finados'),
+    (11, 15, 'Proclamação da República'),
+    (11, 20, 'Dia Nacional de Zumbi e da Consciência Negra'),
+    (12, 25, 'Natal'),
+]
+
+# (dias a partir do domingo de Páscoa, nome)
+FERIADOS_MOVEIS = [
+    (-48, 'Carnaval (segunda-feira)'),
+    (-47, 'Carnaval'),
+    (-2, 'Sexta-feira Santa'),
+    (60, 'Corpus Christi'),
+]
+
+# Validade do cache de feriados por ano em cada worker
+CACHE_SEGUNDOS = 600
+
+_cache_anos = {}
+
+
+def calcular_pascoa(ano):
+    """Domingo de Páscoa do ano (algoritmo de Meeus/Jones/Butcher)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def _feriados_configurados():
+    """Lê FERIADOS_MUNICIPAIS ("20/01 São Sebastião; 09/07 Revolução") em [(mês, dia, nome)]."""
+    texto = current_app.config.get('FERIADOS_MUNICIPAIS') or ''
+    feriados = []
+    for item in texto.split(';'):
+        item = item.strip()
+        if not item:
+            continue
+        data_texto, _, nome = item.partition(' ')
+        try:
+            dia, mes = (int(parte) for parte in data_texto.split('/'))
+        except ValueError:
+            print(f"⚠️ FERIADOS_MUNICIPAIS: item ignorado '{item}'")
+            continue
+        feriados.append((mes, dia, nome.strip() or 'Feriado municipal'))
+    return feriados
+
+
+def feriados_calculados(ano):
+    """
+    Feriados do ano sem consultar o banco.
+
+    Returns:
+        list: [(data, nome, abrangencia, movel)] ordenada por data
+    """
+    feriados = [(date(ano, mes, dia), nome, 'nacional', False) for mes, dia, nome in FERIADOS_FIXOS]
+    pascoa = calcular_pascoa(ano)
+    feriados += [(pascoa + timedelta(days=dias), nome, 'nacional', True) for dias, nome in FERIADOS_MOVEIS]
+    for mes, dia, nome in _feriados_configurados():
+        try:
+            feriados.append((date(ano, mes, dia), nome, 'municipal', False))
+        except ValueError:
+            continue  # 29/02 fora de ano bissexto
+    return sorted(feriados)
+
+
+def limpar_cache_feriados():
+    """Descarta o cache de feriados do worker (após alterar o calendário)."""
+    _cache_anos.clear()
+
+
+class Feriado(BaseModel):
+    """Feriado do calendário usado na folha e nos adicionais de horas."""
+
+    __tablename__ = 'feriados'
+
+    ABRANGENCIA_CHOICES = ABRANGENCIA_CHOICES
+
+    data = db.Column(db.Date, nullable=False, unique=True, index=True)
+    nome = db.Column(db.String(100), nullable=False)
+    abrangencia = db.Column(db.String(20), default='nacional', nullable=False)  # nacional, estadual, municipal
+    movel = db.Column(db.Boolean, default=False, nullable=False)
+
+    def __repr__(self):
+        return f'<Feriado {self.data} {self.nome}>'
+
+    @classmethod
+    def gerar_ano(cls, ano):
+        """
+        Grava na tabela os feriados calculados do ano que ainda não existem.
+
+        Registros já presentes (inclusive os desativados) não são alterados.
+
+        Returns:
+            int: quantidade de feriados incluídos
+        """
+        existentes = {
+            data for (data,) in db.session.query(cls.data).filter(
+                cls.data >= date(ano, 1, 1), cls.data < date(ano + 1, 1, 1)
+            )
+        }
+        novos = 0
+        for data, nome, abrangencia, movel in feriados_calculados(ano):
+            if data in existentes:
+                continue
+            db.session.add(cls(data=data, nome=nome, abrangencia=abrangencia, movel=movel))
+            existentes.add(data)
+            novos += 1
+        if novos:
+            db.session.commit()
+            limpar_cache_feriados()
+        return novos
+
+    @classmethod
+    def do_ano(cls, ano):
+        """
+        Feriados do ano como {data: nome}, com cache por worker.
+
+        Parte do calendário calculado e aplica os registros da tabela:
+        ativos incluem/renomeiam a data, inativos a removem.
+        """
+        em_cache = _cache_anos.get(ano)
+        if em_cache and em_cache[0] > time.monotonic():
+            return em_cache[1]
+
+        feriados = {data: nome for data, nome, _, _ in feriados_calculados(ano)}
+        with db.session.no_autoflush:
+            registros = db.session.query(cls.data, cls.nome, cls.ativo).filter(
+                cls.data >= date(ano, 1, 1), cls.data < date(ano + 1, 1, 1)
+            ).all()
+        for data, nome, ativo in registros:
+            if ativo:
+                feriados[data] = nome
+            else:
+                feriados.pop(data, None)
+
+        _cache_anos[ano] = (time.monotonic() + CACHE_SEGUNDOS, feriados)
+        return feriados
+
+    @classmethod
+    def do_periodo(cls, inicio, fim):
+        """Feriados em [inicio, fim) como {data: nome}."""
+        feriados = {}
+        for ano in range(inicio.year, fim.year + 1):
+            feriados.update({
+                data: nome for data, nome in cls.do_ano(ano).items() if inicio <= data < fim
+            })
+        return feriados
+
+    @classmethod
+    def nome_do_feriado(cls, data):
+        """Nome do feriado na data, ou None se for dia comum."""
+        if not data:
+            return None
+        return cls.do_ano(data.year).get(data)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+ERP JSP v3.0 - Folha Mensal de Colaboradores
+============================================
+
+Fechamento do mês para toda a equipe de uma vez:
+
+- uma única consulta agrupada por colaborador e dia sobre
+  `data_trabalho >= início AND data_trabalho < fim` (intervalo aberto,
+  atendido pelo índice de data_trabalho — extract(month/year) não usa
+  índice);
+- cada dia é classificado pelo calendário de feriados (Feriado.do_periodo),
+  carregado uma vez para o mês inteiro;
+- valores: horas × custo/hora (salário ÷ 220, igual ao relatório individual)
+  mais adicionais — 100% em domingos e feriados, 50% aos sábados e 50%
+  sobre as horas extras dos dias úteis.
+
+Autor: JSP Soluções
+Data: 2026
+"""
+
+import csv
+import io
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import func, or_
+
+from app.colaborador.colaborador_model import Colaborador, OrdemServicoColaborador
+from app.colaborador.feriado_model import Feriado
+from app.extensoes import db
+
+MESES = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+         'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+
+HORAS_MES = Decimal('220')
+ADICIONAL_DOMINGO_FERIADO = Decimal('1.00')
+ADICIONAL_SABADO = Decimal('0.50')
+ADICIONAL_HORA_EXTRA = Decimal('0.50')
+
+CENTAVO = Decimal('0.01')
+
+
+def intervalo_mes(ano, mes):
+    """Retorna (primeiro dia do mês, primeiro dia do mês seguinte)."""
+    inicio = date(ano, mes, 1)
+    fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    return inicio, fim
+
+
+def _decimal(valor):
+    return Decimal(str(valor)) if valor is not None else Decimal('0')
+
+
+def _novo_resumo(colaborador):
+    salario = _decimal(colaborador.salario_mensal)
+    return {
+        'colaborador': colaborador,
+        'salario': salario,
+        'custo_hora': salario / HORAS_MES if salario > 0 else Decimal('0'),
+        'dias_trabalhados': 0,
+        'registros': 0,
+        'horas_normais': Decimal('0'),
+        'horas_extras': Decimal('0'),
+        'horas_extras_dia_util': Decimal('0'),
+        'horas_sabado': Decimal('0'),
+        'horas_domingo_feriado': Decimal('0'),
+        'total_horas': Decimal('0'),
+        'feriados_trabalhados': [],
+    }
+
+
+def calcular_folha(ano, mes, colaborador_id=None):
+    """
+    Calcula a folha do mês de todos os colaboradores (ou de um só).
+
+    Entram os colaboradores com horas no mês e os ativos no período, mesmo
+    sem horas apontadas.
+
+    Returns:
+        dict: {'ano', 'mes', 'mes_nome', 'inicio', 'fim', 'feriados',
+               'colaboradores': [resumo por colaborador], 'totais'}
+    """
+    inicio, fim = intervalo_mes(ano, mes)
+    feriados = Feriado.do_periodo(inicio, fim)
+
+    consulta = db.session.query(
+        OrdemServicoColaborador.colaborador_id,
+        OrdemServicoColaborador.data_trabalho,
+        func.count(OrdemServicoColaborador.id),
+        func.sum(OrdemServicoColaborador.horas_normais),
+        func.sum(OrdemServicoColaborador.horas_extras),
+        func.sum(OrdemServicoColaborador.total_horas),
+    ).filter(
+        OrdemServicoColaborador.ativo.is_(True),
+        OrdemServicoColaborador.data_trabalho >= inicio,
+        OrdemServicoColaborador.data_trabalho < fim,
+    )
+    if colaborador_id is not None:
+        consulta = consulta.filter(OrdemServicoColaborador.colaborador_id == colaborador_id)
+    dias = consulta.group_by(
+        OrdemServicoColaborador.colaborador_id, OrdemServicoColaborador.data_trabalho
+    ).all()
+
+    ids_com_horas = {linha[0] for linha in dias}
+    colaboradores = Colaborador.query.filter(
+        or_(
+            Colaborador.id.in_(ids_com_horas),
+            Colaborador.ativo.is_(True)
+            & (Colaborador.data_admissao.is_(None) | (Colaborador.data_admissao < fim))
+            & (Colaborador.data_demissao.is_(None) | (Colaborador.data_demissao >= inicio)),
+        )
+    )
+    if colaborador_id is not None:
+        colaboradores = colaboradores.filter(Colaborador.id == colaborador_id)
+    resumos = {c.id: _novo_resumo(c) for c in colaboradores.order_by(Colaborador.nome)}
+
+    for colab_id, data_trabalho, registros, normais, extras, total in dias:
+        resumo = resumos.get(colab_id)
+        if resumo is None:
+            continue
+        normais, extras, total = _decimal(normais), _decimal(extras), _decimal(total)
+        resumo['dias_trabalhados'] += 1
+        resumo['registros'] += registros
+        resumo['horas_normais'] += normais
+        resumo['horas_extras'] += extras
+        resumo['total_horas'] += total
+        if data_trabalho.weekday() == 6 or data_trabalho in feriados:
+            resumo['horas_domingo_feriado'] += total
+            if data_trabalho in feriados:
+                resumo['feriados_trabalhados'].append(data_trabalho)
+        elif data_trabalho.weekday() == 5:
+            resumo['horas_sabado'] += total
+        else:
+            resumo['horas_extras_dia_util'] += extras
+
+    totais = {'total_horas': Decimal('0'), 'valor_horas': Decimal('0'),
+              'valor_adicionais': Decimal('0'), 'valor_total': Decimal('0')}
+    for resumo in resumos.values():
+        custo_hora = resumo['custo_hora']
+        adicionais = custo_hora * (
+            resumo['horas_domingo_feriado'] * ADICIONAL_DOMINGO_FERIADO
+            + resumo['horas_sabado'] * ADICIONAL_SABADO
+            + resumo['horas_extras_dia_util'] * ADICIONAL_HORA_EXTRA
+        )
+        resumo['valor_horas'] = (resumo['total_horas'] * custo_hora).quantize(CENTAVO, ROUND_HALF_UP)
+        resumo['valor_adicionais'] = adicionais.quantize(CENTAVO, ROUND_HALF_UP)
+        resumo['valor_total'] = resumo['valor_horas'] + resumo['valor_adicionais']
+        for chave in totais:
+            totais[chave] += resumo[chave]
+
+    return {
+        'ano': ano,
+        'mes': mes,
+        'mes_nome': MESES[mes],
+        'inicio': inicio,
+        'fim': fim,
+        'feriados': feriados,
+        'colaboradores': list(resumos.values()),
+        'totais': totais,
+    }
+
+
+COLUNAS_CSV = [
+    ('nome', 'Colaborador'),
+    ('cpf', 'CPF'),
+    ('cargo', 'Cargo'),
+    ('dias_trabalhados', 'Dias trabalhados'),
+    ('horas_normais', 'Horas normais'),
+    ('horas_extras', 'Horas extras'),
+    ('horas_sabado', 'Horas sábado'),
+    ('horas_domingo_feriado', 'Horas domingo/feriado'),
+    ('total_horas', 'Total horas'),
+    ('salario', 'Salário'),
+    ('custo_hora', 'Custo/hora'),
+    ('valor_horas', 'Valor horas'),
+    ('valor_adicionais', 'Adicionais'),
+    ('valor_total', 'Total a pagar'),
+]
+
+
+def _formatar_csv(valor):
+    if isinstance(valor, Decimal):
+        return f'{valor.quantize(CENTAVO, ROUND_HALF_UP)}'.replace('.', ',')
+    return '' if valor is None else str(valor)
+
+
+def gerar_csv_folha(folha):
+    """CSV da folha (separador ';', BOM UTF-8) com uma linha por colaborador e a linha de totais."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=';')
+
+    buffer.write('\ufeff')
+    escritor.writerow([rotulo for _, rotulo in COLUNAS_CSV])
+    for resumo in folha['colaboradores']:
+        colaborador = resumo['colaborador']
+        linha = dict(resumo, nome=colaborador.nome, cpf=colaborador.cpf,
+                     cargo=colaborador.cargo_formatado if colaborador.cargo else '')
+        escritor.writerow([_formatar_csv(linha.get(chave)) for chave, _ in COLUNAS_CSV])
+    linha_total = dict(folha['totais'], nome='TOTAL')
+    escritor.writerow([_formatar_csv(linha_total.get(chave)) for chave, _ in COLUNAS_CSV])
+    return buffer.getvalue()
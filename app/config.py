@@ -52,6 +52,66 @@ class Config:
     DISTRIBUIDOR_API_URL = os.getenv("DISTRIBUIDOR_API_URL", "https://api.distribuidor.com/v1")
     DISTRIBUIDOR_API_TOKEN = os.getenv("DISTRIBUIDOR_API_TOKEN", "")
     DISTRIBUIDOR_API_TIMEOUT = int(os.getenv("DISTRIBUIDOR_API_TIMEOUT", "30"))
+    # Tentativas por GET (falhas transitórias) e validade do cache do catálogo
+    DISTRIBUIDOR_API_TENTATIVAS = int(os.getenv("DISTRIBUIDOR_API_TENTATIVAS", "3"))
+    DISTRIBUIDOR_API_CACHE_SEGUNDOS = int(os.getenv("DISTRIBUIDOR_API_CACHE_SEGUNDOS", "300"))
+    
+    # Consultas externas de CNPJ/CEP: prazo total por consulta (provedores em
+    # paralelo) e validade do cache em banco
+    CONSULTA_TIMEOUT_SEGUNDOS = float(os.getenv("CONSULTA_TIMEOUT_SEGUNDOS", "6"))
+    CONSULTA_CACHE_CNPJ_DIAS = int(os.getenv("CONSULTA_CACHE_CNPJ_DIAS", "30"))
+    CONSULTA_CACHE_CEP_DIAS = int(os.getenv("CONSULTA_CACHE_CEP_DIAS", "180"))
+    
+    # Feriados estaduais/municipais do calendário da folha ("DD/MM Nome; DD/MM Nome")
+    FERIADOS_MUNICIPAIS = os.getenv("FERIADOS_MUNICIPAIS", "")
+    
+    # Varredura periódica de alertas financeiros (0 desativa)
+    ALERTAS_INTERVALO_MINUTOS = int(os.getenv("ALERTAS_INTERVALO_MINUTOS", "60"))
+    
+    # Renderização de PDF (pool de processos WeasyPrint; 0 = no próprio processo)
+    PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+    
+    # Autocomplete da OS: índice em memória por worker, recarregado do banco
+    # a cada N minutos para incluir OS salvas por outros workers (0 = nunca)
+    AUTOCOMPLETE_RECARGA_MINUTOS = int(os.getenv("AUTOCOMPLETE_RECARGA_MINUTOS", "15"))
+    
+    # Armazenamento de arquivos endereçado por SHA-256 (anexos de OS, XML/PDF de NF):
+    # 'banco' mantém BLOB/base64 no próprio banco (padrão; disco do Render é efêmero),
+    # 'local' grava em ARMAZENAMENTO_DIR (disco persistente), 's3' em bucket S3/MinIO
+    ARMAZENAMENTO_BACKEND = os.getenv("ARMAZENAMENTO_BACKEND", "banco")
+    ARMAZENAMENTO_DIR = os.getenv(
+        "ARMAZENAMENTO_DIR",
+        os.path.join(os.path.abspath(os.path.dirname(os.path.dirname(__file__))), "uploads", "armazenamento"),
+    )
+    ARMAZENAMENTO_S3_BUCKET = os.getenv("ARMAZENAMENTO_S3_BUCKET", "")
+    ARMAZENAMENTO_S3_ENDPOINT = os.getenv("ARMAZENAMENTO_S3_ENDPOINT", "")  # ex.: http://localhost:9000 (MinIO)
+    ARMAZENAMENTO_S3_PREFIXO = os.getenv("ARMAZENAMENTO_S3_PREFIXO", "arquivos/")
+    
+    # Identidade da sessão (Flask-Login): snapshot do usuário e das permissões
+    # em memória por worker, relido do banco após N segundos; a troca de
+    # senha/perfil no próprio worker invalida na hora
+    IDENTIDADE_CACHE_SEGUNDOS = int(os.getenv("IDENTIDADE_CACHE_SEGUNDOS", "30"))
+    # Fração das cargas de identidade registradas no log (0 a 1)
+    IDENTIDADE_LOG_AMOSTRAGEM = float(os.getenv("IDENTIDADE_LOG_AMOSTRAGEM", "0.01"))
+
+    # Métricas de desempenho em /status/metrics (formato Prometheus). Desligadas
+    # por padrão; exigem METRICAS_TOKEN ("Authorization: Bearer <token>")
+    METRICAS_HABILITADAS = os.getenv("METRICAS_HABILITADAS", "0") == "1"
+    METRICAS_TOKEN = os.getenv("METRICAS_TOKEN")
+    # Mesmo comando SQL repetido N vezes numa requisição conta como N+1
+    METRICAS_LIMITE_N_MAIS_1 = int(os.getenv("METRICAS_LIMITE_N_MAIS_1", "10"))
+    # Requisições acima do limite têm uma fração (amostragem) registrada em detalhe
+    METRICAS_LENTA_SEGUNDOS = float(os.getenv("METRICAS_LENTA_SEGUNDOS", "1.0"))
+    METRICAS_AMOSTRAGEM_LENTAS = float(os.getenv("METRICAS_AMOSTRAGEM_LENTAS", "0.1"))
+
+    # Migrações do banco no create_app (desenvolvimento/testes). Em produção
+    # rodam uma vez por deploy: python scripts/migrar_banco.py
+    MIGRAR_BANCO_NA_INICIALIZACAO = os.getenv("MIGRAR_BANCO_NA_INICIALIZACAO", "1") == "1"
+    
+    # Tarefas de worker web no create_app: pré-carga do índice de autocomplete
+    # e agendador de alertas. Desligadas em testes e em scripts de linha de
+    # comando (ex.: scripts/migrar_banco.py), que só precisam do contexto
+    SERVICOS_WORKER_NA_INICIALIZACAO = os.getenv("SERVICOS_WORKER_NA_INICIALIZACAO", "1") == "1"
     
     # Configurações gerais
     DEBUG = False
@@ -95,6 +155,7 @@ class ProductionConfig(Config):
     DEBUG = False
     SESSION_COOKIE_SECURE = True
     WTF_CSRF_ENABLED = True
+    MIGRAR_BANCO_NA_INICIALIZACAO = os.getenv("MIGRAR_BANCO_NA_INICIALIZACAO", "0") == "1"
     
     # Configurações específicas de produção
     _BASE_ENGINE_OPTIONS = {
@@ -114,6 +175,9 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    ALERTAS_INTERVALO_MINUTOS = 0
+    PDF_WORKERS = 0
+    SERVICOS_WORKER_NA_INICIALIZACAO = False
 
     # Sobrescrever engine options para SQLite (sem parâmetros PostgreSQL)
     SQLALCHEMY_ENGINE_OPTIONS = {
@@ -2,6 +2,7 @@
 # Fornece função `get_config()` para uso em templates e outros módulos
 
 from app.configuracao.configuracao_model import Configuracao
+from app.extensoes import db
 from datetime import datetime, timedelta
 
 _cached = None
@@ -29,6 +30,12 @@ def get_config(force_reload=False):
     
     if needs_reload:
         _cached = Configuracao.get_solo()
+        if db.inspect(_cached).expired_attributes:
+            db.session.refresh(_cached)
+        # Fora da sessão: um commit na mesma requisição não expira a instância
+        # em cache, que continua legível nas requisições seguintes (cada uma
+        # com sua própria sessão)
+        db.session.expunge(_cached)
         _cache_time = datetime.now()
     
     return _cached
@@ -24,6 +24,8 @@ class Equipamento(BaseModel):
     ✨ Evita retrabalho ao cadastrar equipamentos em múltiplas OS
     """
     __tablename__ = 'equipamentos'
+    # Paginação por cursor da listagem (app.services.paginacao_service)
+    __table_args__ = (db.Index('ix_equipamentos_nome_id', 'nome', 'id'),)
     
     # === DADOS PRINCIPAIS ===
     nome = db.Column(db.String(200), nullable=False, index=True)
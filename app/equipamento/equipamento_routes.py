@@ -41,12 +41,22 @@ def listar():
     if cliente_id:
         query = query.filter_by(cliente_id=cliente_id)
     
-    equipamentos = query.order_by(Equipamento.nome).all()
-    clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
-    
+    from sqlalchemy.orm import joinedload
+    from app.services.paginacao_service import paginar, parametros_paginacao, quer_json
+
+    cursor, por_pagina = parametros_paginacao(request.args)
+    pagina = paginar(query, [Equipamento.nome, Equipamento.id], decrescente=False,
+                     cursor=cursor, por_pagina=por_pagina, opcoes=[joinedload(Equipamento.cliente)])
+    if quer_json(request.args):
+        return jsonify(pagina.para_dict(Equipamento.to_dict))
+
+    # Filtro de cliente: só o selecionado; os demais vêm da busca AJAX
+    cliente_selecionado = db.session.get(Cliente, int(cliente_id)) if cliente_id.isdigit() else None
+
     return render_template('equipamento/listar.html', 
-                         equipamentos=equipamentos, 
-                         clientes=clientes,
+                         equipamentos=pagina.itens, 
+                         pagina=pagina,
+                         cliente_selecionado=cliente_selecionado,
                          busca=busca,
                          cliente_id_filtro=cliente_id)
 
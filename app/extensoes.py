@@ -41,23 +41,12 @@ def init_extensions(app):
     login_manager.session_protection = 'strong'  # Proteção forte de sessão
     login_manager.refresh_view = 'auth.login'
     
-    # User loader para Flask-Login
+    # User loader para Flask-Login: snapshot da identidade em cache por worker
+    # (app.auth.identidade_service), sem consulta ao banco a cada requisição
     @login_manager.user_loader
     def load_user(user_id):
-        try:
-            from app.auth.usuario_model import Usuario
-            print(f"🔍 Carregando user ID: {user_id}")
-            user = Usuario.query.get(int(user_id))
-            if user:
-                print(f"✅ Usuário encontrado: {user.usuario} (ID: {user.id}, Ativo: {user.ativo})")
-            else:
-                print(f"❌ Usuário ID {user_id} NÃO encontrado no banco")
-            return user
-        except Exception as e:
-            print(f"⚠️ ERRO no load_user: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+        from app.auth.identidade_service import carregar_identidade
+        return carregar_identidade(user_id)
     
     # Cria diretório do banco se necessário (para SQLite)
     import os
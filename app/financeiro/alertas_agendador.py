@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Agendador da Varredura de Alertas
+=================================
+
+Executa `Notificacao.verificar_todas()` periodicamente em uma thread de
+segundo plano, em vez de depender do botão "Verificar alertas".
+
+O intervalo vem de ALERTAS_INTERVALO_MINUTOS (0 desativa). Com vários
+workers (gunicorn), cada processo tem sua thread; no PostgreSQL um
+advisory lock garante que apenas um deles execute cada varredura. Em
+ambientes sem thread persistente, use scripts/verificar_alertas.py no cron.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.extensoes import db
+
+# Chave arbitrária do advisory lock da varredura (PostgreSQL)
+_CHAVE_LOCK_VARREDURA = 731_001
+
+_thread: Optional[threading.Thread] = None
+_parar = threading.Event()
+
+
+def executar_varredura() -> int:
+    """
+    Executa uma varredura completa de alertas.
+
+    Returns:
+        int: Notificações criadas (0 se outro processo detém a varredura)
+    """
+    from app.financeiro.financeiro_model import Notificacao
+
+    if db.engine.dialect.name == 'postgresql':
+        # Trava e liberação na mesma conexão dedicada: os commits da sessão
+        # devolvem a conexão dela ao pool, e o unlock cairia em outra
+        with db.engine.connect() as conexao:
+            obteve = conexao.execute(
+                text('SELECT pg_try_advisory_lock(:chave)'), {'chave': _CHAVE_LOCK_VARREDURA}
+            ).scalar()
+            conexao.commit()
+            if not obteve:
+                return 0
+            try:
+                return Notificacao.verificar_todas()
+            finally:
+                conexao.rollback()
+                conexao.execute(text('SELECT pg_advisory_unlock(:chave)'), {'chave': _CHAVE_LOCK_VARREDURA})
+                conexao.commit()
+
+    return Notificacao.verificar_todas()
+
+
+def _laco(app, intervalo_segundos: float):
+    while not _parar.wait(intervalo_segundos):
+        with app.app_context():
+            try:
+                criadas = executar_varredura()
+                if criadas:
+                    print(f" 🔔 Varredura de alertas: {criadas} notificação(ões) criada(s)")
+            except Exception as e:
+                db.session.rollback()
+                print(f" ⚠ Erro na varredura de alertas: {e}")
+            finally:
+                db.session.remove()
+
+
+def iniciar_agendador_alertas(app) -> bool:
+    """
+    Inicia a thread da varredura periódica (uma por processo).
+
+    Returns:
+        bool: True se o agendador foi iniciado nesta chamada
+    """
+    global _thread
+
+    intervalo = int(app.config.get('ALERTAS_INTERVALO_MINUTOS') or 0)
+    if intervalo <= 0 or app.testing:
+        return False
+    if _thread is not None and _thread.is_alive():
+        return False
+
+    _parar.clear()
+    _thread = threading.Thread(
+        target=_laco, args=(app, intervalo * 60), name='varredura-alertas', daemon=True
+    )
+    _thread.start()
+    return True
+
+
+def parar_agendador_alertas():
+    """Sinaliza a thread para encerrar após a varredura em andamento."""
+    _parar.set()
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Conciliação Bancária Automática
+==========================================
+
+Casa extratos pendentes com lançamentos em aberto de uma conta:
+
+1. carrega extratos e candidatos com duas consultas (colunas simples);
+2. indexa os candidatos por (sentido, valor em centavos), de modo que cada
+   extrato só compara com lançamentos de mesmo valor;
+3. filtra pela janela de tolerância de datas e pontua cada par por
+   proximidade de data, similaridade da descrição e número do documento;
+4. atribui os pares de maior pontuação primeiro, um para um.
+
+As sugestões podem ser apenas exibidas ou aplicadas em massa com um
+único UPDATE em lote.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, func
+
+from app.extensoes import db
+from app.financeiro.financeiro_compat import TIPOS_DESPESA, TIPOS_RECEITA
+from app.financeiro.financeiro_model import ExtratoBancario, LancamentoFinanceiro
+
+TOLERANCIA_DIAS_PADRAO = 3
+PONTUACAO_MINIMA_PADRAO = 0.6
+
+# Pesos da pontuação (somam 1.0)
+PESO_DATA = 0.45
+PESO_DESCRICAO = 0.35
+PESO_DOCUMENTO = 0.20
+
+_STATUS_IGNORADOS = ('cancelado', 'cancelada')
+_PALAVRAS_IGNORADAS = {'de', 'da', 'do', 'das', 'dos', 'e', 'a', 'o', 'para', 'pgto', 'pag', 'ted', 'doc', 'pix'}
+
+
+@dataclass(frozen=True)
+class SugestaoConciliacao:
+    """Par extrato/lançamento proposto pelo motor de conciliação."""
+    extrato_id: int
+    lancamento_id: int
+    pontuacao: float
+    diferenca_dias: int
+    extrato_descricao: str
+    lancamento_descricao: str
+    valor: Decimal
+
+    def to_dict(self) -> dict:
+        return {
+            'extrato_id': self.extrato_id,
+            'lancamento_id': self.lancamento_id,
+            'pontuacao': round(self.pontuacao, 3),
+            'diferenca_dias': self.diferenca_dias,
+            'extrato_descricao': self.extrato_descricao,
+            'lancamento_descricao': self.lancamento_descricao,
+            'valor': float(self.valor),
+        }
+
+
+def normalizar_descricao(texto: Optional[str]) -> str:
+    """Remove acentos, pontuação e palavras genéricas de uma descrição."""
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    palavras = re.findall(r'[a-z0-9]+', texto.lower())
+    return ' '.join(p for p in palavras if p not in _PALAVRAS_IGNORADAS)
+
+
+def similaridade_descricao(a: str, b: str) -> float:
+    """Similaridade 0..1 entre descrições já normalizadas."""
+    if not a or not b:
+        return 0.0
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    jaccard = len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+    return max(jaccard, SequenceMatcher(None, a, b).ratio())
+
+
+def _centavos(valor) -> int:
+    return int((Decimal(str(valor or 0)) * 100).quantize(Decimal('1')))
+
+
+def _normalizado(coluna):
+    return func.lower(func.trim(func.coalesce(coluna, '')))
+
+
+@dataclass
+class _Candidato:
+    id: int
+    data: date
+    descricao: str
+    documento: str
+    descricao_original: str
+
+
+def _carregar_extratos(conta_id: int, extrato_ids=None):
+    query = db.session.query(
+        ExtratoBancario.id, ExtratoBancario.data_movimento, ExtratoBancario.valor,
+        ExtratoBancario.tipo_movimento, ExtratoBancario.descricao, ExtratoBancario.documento,
+    ).filter(
+        ExtratoBancario.conta_bancaria_id == conta_id,
+        ExtratoBancario.conciliado.isnot(True),
+        ExtratoBancario.ativo.is_(True),
+    )
+    if extrato_ids:
+        query = query.filter(ExtratoBancario.id.in_(list(extrato_ids)))
+    return query.all()
+
+
+def _indexar_candidatos(conta_id: int, data_min: date, data_max: date) -> Dict[tuple, List[_Candidato]]:
+    """Carrega lançamentos em aberto da janela e indexa por (sentido, centavos)."""
+    lanc = LancamentoFinanceiro
+    data_ref = func.coalesce(lanc.data_pagamento, lanc.data_vencimento, lanc.data_lancamento)
+    ja_conciliados = db.session.query(ExtratoBancario.lancamento_id).filter(
+        ExtratoBancario.lancamento_id.isnot(None)
+    )
+    linhas = db.session.query(
+        lanc.id, data_ref, lanc.valor, _normalizado(lanc.tipo), lanc.descricao, lanc.numero_documento,
+    ).filter(
+        lanc.ativo.is_(True),
+        (lanc.conta_bancaria_id == conta_id) | lanc.conta_bancaria_id.is_(None),
+        ~_normalizado(lanc.status).in_(_STATUS_IGNORADOS),
+        data_ref >= data_min,
+        data_ref <= data_max,
+        ~lanc.id.in_(ja_conciliados),
+    ).all()
+
+    indice = defaultdict(list)
+    for lanc_id, data_lanc, valor, tipo, descricao, documento in linhas:
+        if tipo in TIPOS_RECEITA:
+            sentido = 'credito'
+        elif tipo in TIPOS_DESPESA:
+            sentido = 'debito'
+        else:
+            continue
+        indice[(sentido, _centavos(valor))].append(_Candidato(
+            id=lanc_id,
+            data=data_lanc,
+            descricao=normalizar_descricao(descricao),
+            documento=(documento or '').strip().upper(),
+            descricao_original=descricao or '',
+        ))
+
+    for candidatos in indice.values():
+        candidatos.sort(key=lambda c: c.data)
+    return indice
+
+
+def sugerir_conciliacoes(conta_id: int, tolerancia_dias: int = TOLERANCIA_DIAS_PADRAO,
+                         pontuacao_minima: float = PONTUACAO_MINIMA_PADRAO,
+                         extrato_ids=None) -> List[SugestaoConciliacao]:
+    """
+    Propõe pares extrato/lançamento para uma conta bancária.
+
+    Args:
+        conta_id: ID da ContaBancaria
+        tolerancia_dias: Diferença máxima entre data do extrato e do lançamento
+        pontuacao_minima: Pontuação mínima (0..1) para sugerir o par
+        extrato_ids: Restringe a extratos específicos (None = todos pendentes)
+
+    Returns:
+        list[SugestaoConciliacao]: Pares um-para-um, do mais confiável ao menos
+    """
+    extratos = _carregar_extratos(conta_id, extrato_ids)
+    if not extratos:
+        return []
+
+    janela = timedelta(days=tolerancia_dias)
+    data_min = min(e.data_movimento for e in extratos) - janela
+    data_max = max(e.data_movimento for e in extratos) + janela
+    indice = _indexar_candidatos(conta_id, data_min, data_max)
+
+    datas_por_chave = {chave: [c.data for c in candidatos] for chave, candidatos in indice.items()}
+
+    pares = []
+    for extrato in extratos:
+        chave = (extrato.tipo_movimento, _centavos(abs(extrato.valor)))
+        candidatos = indice.get(chave)
+        if not candidatos:
+            continue
+
+        datas = datas_por_chave[chave]
+        inicio = bisect_left(datas, extrato.data_movimento - janela)
+        fim = bisect_right(datas, extrato.data_movimento + janela)
+        descricao_extrato = normalizar_descricao(extrato.descricao)
+        documento_extrato = (extrato.documento or '').strip().upper()
+
+        for candidato in candidatos[inicio:fim]:
+            diferenca = abs((candidato.data - extrato.data_movimento).days)
+            nota_data = 1 - diferenca / (tolerancia_dias + 1)
+            pontuacao = (
+                PESO_DATA * nota_data
+                + PESO_DESCRICAO * similaridade_descricao(descricao_extrato, candidato.descricao)
+            )
+            if documento_extrato and candidato.documento:
+                if documento_extrato == candidato.documento:
+                    pontuacao += PESO_DOCUMENTO
+            else:
+                # Documento ausente em um dos lados (ou nos dois): o critério não
+                # pode ser comparado, então não pesa contra o par; a nota de
+                # data + descrição é reescalada para 0..1
+                pontuacao /= (PESO_DATA + PESO_DESCRICAO)
+            if pontuacao >= pontuacao_minima:
+                pares.append((pontuacao, -diferenca, extrato, candidato))
+
+    # Atribuição gulosa: maior pontuação primeiro, cada lado usado uma vez
+    pares.sort(key=lambda p: (p[0], p[1], -p[2].id, -p[3].id), reverse=True)
+    usados_extrato, usados_lancamento = set(), set()
+    sugestoes = []
+    for pontuacao, menos_diferenca, extrato, candidato in pares:
+        if extrato.id in usados_extrato or candidato.id in usados_lancamento:
+            continue
+        usados_extrato.add(extrato.id)
+        usados_lancamento.add(candidato.id)
+        sugestoes.append(SugestaoConciliacao(
+            extrato_id=extrato.id,
+            lancamento_id=candidato.id,
+            pontuacao=pontuacao,
+            diferenca_dias=-menos_diferenca,
+            extrato_descricao=extrato.descricao,
+            lancamento_descricao=candidato.descricao_original,
+            valor=abs(Decimal(str(extrato.valor))),
+        ))
+    return sugestoes
+
+
+def aplicar_conciliacoes(sugestoes: List[SugestaoConciliacao]) -> int:
+    """
+    Grava as conciliações em um único UPDATE em lote.
+
+    Extratos conciliados por outro usuário nesse intervalo não são
+    sobrescritos.
+
+    Returns:
+        int: Quantidade de extratos conciliados
+    """
+    if not sugestoes:
+        return 0
+
+    tabela = ExtratoBancario.__table__
+    agora = datetime.utcnow()
+    stmt = tabela.update().where(
+        tabela.c.id == bindparam('b_extrato_id'),
+        tabela.c.conciliado.isnot(True),
+    ).values(
+        conciliado=True,
+        lancamento_id=bindparam('b_lancamento_id'),
+        data_conciliacao=agora,
+        atualizado_em=agora,
+    )
+    resultado = db.session.execute(stmt, [
+        {'b_extrato_id': s.extrato_id, 'b_lancamento_id': s.lancamento_id} for s in sugestoes
+    ])
+    db.session.commit()
+    return resultado.rowcount if resultado.rowcount is not None and resultado.rowcount >= 0 else len(sugestoes)
+
+
+def conciliar_automaticamente(conta_id: int, **kwargs) -> int:
+    """Sugere e aplica as conciliações de uma conta em uma única chamada."""
+    return aplicar_conciliacoes(sugerir_conciliacoes(conta_id, **kwargs))
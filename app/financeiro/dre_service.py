@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de DRE (Demonstrativo de Resultados do Exercício)
+=========================================================
+
+Classifica lançamentos nas linhas do DRE via MapeamentoDRE (categoria ou
+plano de contas → linha) e agrega no banco com um único GROUP BY por
+(ano, mês, linha). Vários períodos mensais alinhados (mês atual, mês
+anterior, ano anterior, os 12 meses do ano) saem da mesma consulta,
+sem carregar lançamentos em memória.
+"""
+
+from __future__ import annotations
+
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, case, func, literal
+
+from app.extensoes import db
+from app.financeiro.financeiro_compat import TIPOS_DESPESA, TIPOS_RECEITA
+from app.financeiro.financeiro_model import LancamentoFinanceiro, MapeamentoDRE
+
+# Período mensal alinhado: (data_inicio, data_fim) inclusivo
+Periodo = Tuple[date, date]
+
+_STATUS_IGNORADOS = ('cancelado', 'cancelada')
+
+
+def periodo_mes(ano: int, mes: int) -> Periodo:
+    """Retorna o primeiro e o último dia do mês."""
+    return date(ano, mes, 1), date(ano, mes, monthrange(ano, mes)[1])
+
+
+def periodo_ano(ano: int) -> Periodo:
+    """Retorna o primeiro e o último dia do ano."""
+    return date(ano, 1, 1), date(ano, 12, 31)
+
+
+def mes_anterior(ano: int, mes: int) -> Tuple[int, int]:
+    """Retorna (ano, mês) do mês anterior."""
+    return (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+
+
+def _normalizado(coluna):
+    return func.lower(func.trim(func.coalesce(coluna, '')))
+
+
+def _expressao_linha(regras: List[dict]):
+    """Monta o CASE que classifica cada lançamento em uma linha do DRE."""
+    lanc = LancamentoFinanceiro
+    tipo = _normalizado(lanc.tipo)
+    eh_receita = tipo.in_(TIPOS_RECEITA)
+    eh_despesa = tipo.in_(TIPOS_DESPESA)
+    categoria = func.coalesce(lanc.categoria, '')
+
+    clausulas = []
+    for regra in regras:
+        condicoes = [eh_receita if regra['tipo'] == 'receita' else eh_despesa]
+        if regra.get('plano_conta_id'):
+            condicoes.append(lanc.plano_conta_id == regra['plano_conta_id'])
+        if regra.get('categoria'):
+            if regra.get('correspondencia') == 'contem':
+                condicoes.append(categoria.contains(regra['categoria'], autoescape=True))
+            else:
+                condicoes.append(categoria == regra['categoria'])
+        if len(condicoes) == 1:
+            continue  # regra sem critério além do tipo não é aplicável
+        clausulas.append((and_(*condicoes), literal(regra['linha_dre'])))
+
+    clausulas.append((eh_receita, literal('receita_bruta')))
+    clausulas.append((eh_despesa, literal('despesas_operacionais')))
+    return case(*clausulas, else_=None)
+
+
+def agregar_linhas_dre(data_inicio: date, data_fim: date, regras=None) -> Dict[Tuple[int, int], Dict[str, Decimal]]:
+    """
+    Soma os lançamentos por (ano, mês, linha do DRE) em uma única consulta.
+
+    Args:
+        data_inicio/data_fim: Intervalo (inclusivo) de data_lancamento
+        regras: Regras de mapeamento (None = MapeamentoDRE.regras_ativas())
+
+    Returns:
+        dict: {(ano, mes): {linha_dre: Decimal}}
+    """
+    lanc = LancamentoFinanceiro
+    if regras is None:
+        regras = MapeamentoDRE.regras_ativas()
+
+    # Subconsulta: o CASE fica em uma coluna rotulada e o GROUP BY externo
+    # referencia o rótulo (evita repetir parâmetros do CASE no GROUP BY)
+    base = db.session.query(
+        func.extract('year', lanc.data_lancamento).label('ano'),
+        func.extract('month', lanc.data_lancamento).label('mes'),
+        _expressao_linha(regras).label('linha'),
+        lanc.valor.label('valor'),
+    ).filter(
+        lanc.ativo.is_(True),
+        lanc.data_lancamento >= data_inicio,
+        lanc.data_lancamento <= data_fim,
+        ~_normalizado(lanc.status).in_(_STATUS_IGNORADOS),
+    ).subquery()
+
+    linhas = db.session.query(
+        base.c.ano, base.c.mes, base.c.linha, func.sum(base.c.valor),
+    ).filter(base.c.linha.isnot(None)).group_by(base.c.ano, base.c.mes, base.c.linha).all()
+
+    resultado = defaultdict(lambda: defaultdict(Decimal))
+    for ano, mes, linha, total in linhas:
+        resultado[(int(ano), int(mes))][linha] += Decimal(str(total or 0))
+    return resultado
+
+
+def montar_dre(valores: Dict[str, Decimal]) -> dict:
+    """
+    Calcula subtotais e margens a partir dos valores por linha.
+
+    Args:
+        valores: {linha_dre: Decimal}
+
+    Returns:
+        dict: Estrutura do DRE usada pelo dashboard e pela exportação
+    """
+    linha = {nome: Decimal(str(valores.get(nome, 0) or 0)) for nome in MapeamentoDRE.LINHAS}
+
+    receita_liquida = linha['receita_bruta'] - linha['deducoes']
+    lucro_bruto = receita_liquida - linha['custos']
+    lucro_operacional = lucro_bruto - linha['despesas_operacionais']
+    resultado_financeiro = linha['receitas_financeiras'] - linha['despesas_financeiras']
+    lucro_liquido = lucro_operacional + resultado_financeiro
+
+    # Margens (%)
+    margem_bruta = (lucro_bruto / receita_liquida * 100) if receita_liquida > 0 else 0
+    margem_operacional = (lucro_operacional / receita_liquida * 100) if receita_liquida > 0 else 0
+    margem_liquida = (lucro_liquido / receita_liquida * 100) if receita_liquida > 0 else 0
+
+    return {
+        'receita_bruta': linha['receita_bruta'],
+        'deducoes': linha['deducoes'],
+        'receita_liquida': receita_liquida,
+        'custos': linha['custos'],
+        'lucro_bruto': lucro_bruto,
+        'despesas_operacionais': linha['despesas_operacionais'],
+        'lucro_operacional': lucro_operacional,
+        'receitas_financeiras': linha['receitas_financeiras'],
+        'despesas_financeiras': linha['despesas_financeiras'],
+        'resultado_financeiro': resultado_financeiro,
+        'lucro_liquido': lucro_liquido,
+        'margem_bruta': margem_bruta,
+        'margem_operacional': margem_operacional,
+        'margem_liquida': margem_liquida
+    }
+
+
+def calcular_dre_periodos(periodos: Dict[str, Periodo], regras=None) -> Dict[str, dict]:
+    """
+    Calcula o DRE de vários períodos mensais alinhados com uma única consulta.
+
+    Args:
+        periodos: {chave: (data_inicio, data_fim)}, com início no dia 1 e
+            fim no último dia de um mês
+        regras: Regras de mapeamento (None = tabela/padrão)
+
+    Returns:
+        dict: {chave: dre} no formato de `montar_dre`
+    """
+    if not periodos:
+        return {}
+
+    inicio = min(p[0] for p in periodos.values())
+    fim = max(p[1] for p in periodos.values())
+    por_mes = agregar_linhas_dre(inicio, fim, regras=regras)
+
+    resultado = {}
+    for chave, (data_inicio, data_fim) in periodos.items():
+        valores = defaultdict(Decimal)
+        for (ano, mes), linhas in por_mes.items():
+            if data_inicio <= date(ano, mes, 1) <= data_fim:
+                for linha, total in linhas.items():
+                    valores[linha] += total
+        resultado[chave] = montar_dre(valores)
+    return resultado
+
+
+def calcular_variacoes(dre_atual: dict, dre_anterior: dict) -> dict:
+    """Variação absoluta e percentual de cada campo entre dois DREs."""
+    variacoes = {}
+    for key in dre_atual.keys():
+        valor_atual = dre_atual[key]
+        valor_anterior = dre_anterior[key]
+
+        if valor_anterior != 0:
+            variacao_percentual = ((valor_atual - valor_anterior) / abs(valor_anterior)) * 100
+        else:
+            variacao_percentual = 100 if valor_atual > 0 else 0
+
+        variacoes[key] = {
+            'valor': valor_atual - valor_anterior,
+            'percentual': variacao_percentual
+        }
+    return variacoes
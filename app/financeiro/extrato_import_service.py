@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Importação de Extratos Bancários
+===========================================
+
+Importa extratos CSV e OFX de forma incremental:
+- o arquivo é lido linha a linha direto do stream do upload (sem carregar
+  o conteúdo inteiro em memória);
+- as linhas válidas são gravadas em lotes com INSERT em massa;
+- cada movimento recebe um hash de (conta, data, valor, documento,
+  ocorrência), e hashes já gravados são ignorados, tornando a reimportação
+  do mesmo arquivo idempotente;
+- erros são reportados por linha, em vez de descartados silenciosamente.
+
+A ocorrência diferencia movimentos idênticos legítimos dentro do mesmo
+arquivo (ex.: duas tarifas iguais no mesmo dia).
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Iterator, List, Optional, Tuple
+
+from app.extensoes import db
+from app.financeiro.financeiro_model import ExtratoBancario
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE_PADRAO = 1000
+
+# Quantidade máxima de erros detalhados devolvidos ao usuário
+LIMITE_ERROS_DETALHADOS = 100
+
+_DESCRICAO_MAX = 255
+_DOCUMENTO_MAX = 50
+
+
+@dataclass
+class MovimentoExtrato:
+    """Movimento normalizado, independente do formato de origem."""
+    linha: int
+    data_movimento: date
+    descricao: str
+    valor: Decimal  # positivo = crédito, negativo = débito
+    documento: str = ''
+    saldo: Optional[Decimal] = None
+
+    @property
+    def tipo_movimento(self) -> str:
+        return 'debito' if self.valor < 0 else 'credito'
+
+
+@dataclass
+class ResultadoImportacaoExtrato:
+    """Resumo de uma importação de extrato."""
+    importados: int = 0
+    duplicados: int = 0
+    total_erros: int = 0
+    erros: List[Tuple[int, str]] = field(default_factory=list)
+
+    def registrar_erro(self, linha: int, mensagem: str):
+        self.total_erros += 1
+        if len(self.erros) < LIMITE_ERROS_DETALHADOS:
+            self.erros.append((linha, mensagem))
+
+
+class ErroLinhaExtrato(ValueError):
+    """Linha de extrato inválida (reportada sem interromper a importação)."""
+
+    def __init__(self, linha: int, mensagem: str):
+        super().__init__(mensagem)
+        self.linha = linha
+
+
+# ===== CONVERSÕES =====
+
+def converter_valor_extrato(valor_str: str) -> Decimal:
+    """
+    Converte valores nos formatos '1.234,56', '1234,56', '1234.56' e '-1,5'.
+
+    Raises:
+        ValueError: Valor vazio ou inválido
+    """
+    texto = (valor_str or '').replace('R$', '').replace(' ', '').strip()
+    if not texto:
+        raise ValueError('valor vazio')
+
+    negativo = texto.startswith('-') or (texto.startswith('(') and texto.endswith(')'))
+    texto = texto.strip('-()+')
+
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    elif texto.count('.') > 1 or re.search(r'\.\d{3}$', texto):
+        texto = texto.replace('.', '')  # apenas separador de milhar
+
+    try:
+        valor = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f'valor inválido: {valor_str!r}')
+    return -valor if negativo else valor
+
+
+def converter_data_extrato(data_str: str) -> date:
+    """Aceita DD/MM/AAAA, AAAA-MM-DD e o formato OFX AAAAMMDD[hhmmss...]."""
+    texto = (data_str or '').strip()
+    for formato in ('%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            pass
+    if len(texto) >= 8 and texto[:8].isdigit():
+        return datetime.strptime(texto[:8], '%Y%m%d').date()
+    raise ValueError(f'data inválida: {data_str!r}')
+
+
+# ===== LEITORES =====
+
+def _linhas_texto(stream) -> Iterator[str]:
+    """Decodifica um stream binário linha a linha (UTF-8 com fallback cp1252)."""
+    for bruta in stream:
+        try:
+            yield bruta.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            yield bruta.decode('cp1252', errors='replace')
+
+
+def ler_movimentos_csv(stream) -> Iterator[MovimentoExtrato]:
+    """
+    Lê um CSV (data, descricao, documento, valor, tipo[, saldo]) incrementalmente.
+
+    O separador (',' ou ';') é detectado pelo cabeçalho. Linhas inválidas
+    geram ErroLinhaExtrato, que o chamador registra e segue adiante.
+    """
+    linhas = _linhas_texto(stream)
+    cabecalho = next(linhas, '')
+    separador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+    campos = [c.strip().lower() for c in next(csv.reader([cabecalho], delimiter=separador), [])]
+
+    leitor = csv.DictReader(linhas, fieldnames=campos, delimiter=separador)
+    for numero, row in enumerate(leitor, start=2):
+        if not any((v or '').strip() for v in row.values() if isinstance(v, str)):
+            continue  # linha em branco
+        try:
+            descricao = (row.get('descricao') or '').strip()
+            if not descricao:
+                raise ValueError('descrição vazia')
+
+            valor = converter_valor_extrato(row.get('valor'))
+            tipo = (row.get('tipo') or '').strip().lower()
+            if tipo in ('debito', 'débito', 'd'):
+                valor = -abs(valor)
+            elif tipo in ('credito', 'crédito', 'c'):
+                valor = abs(valor)
+
+            saldo = row.get('saldo')
+            yield MovimentoExtrato(
+                linha=numero,
+                data_movimento=converter_data_extrato(row.get('data')),
+                descricao=descricao[:_DESCRICAO_MAX],
+                valor=valor,
+                documento=(row.get('documento') or '').strip()[:_DOCUMENTO_MAX],
+                saldo=converter_valor_extrato(saldo) if saldo and saldo.strip() else None,
+            )
+        except ValueError as e:
+            yield ErroLinhaExtrato(numero, str(e))
+
+
+_TAG_OFX = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def ler_movimentos_ofx(stream) -> Iterator[MovimentoExtrato]:
+    """
+    Lê transações (<STMTTRN>) de arquivos OFX 1.x (SGML) ou 2.x (XML).
+
+    O arquivo é percorrido tag a tag; apenas a transação corrente fica em
+    memória. O FITID (ou CHECKNUM) é usado como documento.
+    """
+    transacao = None
+    inicio = 0
+    for numero, texto in enumerate(_linhas_texto(stream), start=1):
+        for fechamento, tag, conteudo in _TAG_OFX.findall(texto):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if not fechamento:
+                    transacao, inicio = {}, numero
+                    continue
+                if transacao is not None:
+                    yield _movimento_ofx(transacao, inicio)
+                transacao = None
+            elif transacao is not None and not fechamento:
+                transacao[tag] = conteudo.strip()
+
+
+def _valor_ofx(valor_str: str) -> Decimal:
+    """TRNAMT usa ponto decimal (alguns bancos brasileiros usam vírgula)."""
+    try:
+        return Decimal((valor_str or '').strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f'valor inválido: {valor_str!r}')
+
+
+def _movimento_ofx(transacao: dict, linha: int):
+    try:
+        descricao = transacao.get('MEMO') or transacao.get('NAME') or transacao.get('TRNTYPE') or ''
+        if not descricao:
+            raise ValueError('descrição vazia')
+        return MovimentoExtrato(
+            linha=linha,
+            data_movimento=converter_data_extrato(transacao.get('DTPOSTED')),
+            descricao=descricao[:_DESCRICAO_MAX],
+            valor=_valor_ofx(transacao.get('TRNAMT')),
+            documento=(transacao.get('FITID') or transacao.get('CHECKNUM') or '')[:_DOCUMENTO_MAX],
+        )
+    except ValueError as e:
+        return ErroLinhaExtrato(linha, str(e))
+
+
+def detectar_formato(nome_arquivo: str) -> str:
+    """Retorna 'ofx' ou 'csv' a partir da extensão."""
+    return 'ofx' if (nome_arquivo or '').lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+
+# ===== IMPORTAÇÃO =====
+
+def calcular_hash_movimento(conta_id: int, movimento: MovimentoExtrato, ocorrencia: int) -> str:
+    """Hash estável de (conta, data, valor, documento, ocorrência)."""
+    chave = '|'.join((
+        str(conta_id),
+        movimento.data_movimento.isoformat(),
+        str(movimento.valor.quantize(Decimal('0.01'))),
+        movimento.documento.strip().upper(),
+        str(ocorrencia),
+    ))
+    return hashlib.sha256(chave.encode('utf-8')).hexdigest()
+
+
+def _gravar_lote(lote: List[dict], resultado: ResultadoImportacaoExtrato):
+    """Descarta hashes já gravados e insere o restante em massa."""
+    if not lote:
+        return
+    hashes = [item['hash_movimento'] for item in lote]
+    existentes = {
+        h for (h,) in db.session.query(ExtratoBancario.hash_movimento).filter(
+            ExtratoBancario.hash_movimento.in_(hashes)
+        )
+    }
+    novos = [item for item in lote if item['hash_movimento'] not in existentes]
+    resultado.duplicados += len(lote) - len(novos)
+    if novos:
+        db.session.execute(ExtratoBancario.__table__.insert(), novos)
+        resultado.importados += len(novos)
+
+
+def importar_extrato(conta_id: int, stream, nome_arquivo: str = '', formato: Optional[str] = None,
+                     tamanho_lote: int = TAMANHO_LOTE_PADRAO) -> ResultadoImportacaoExtrato:
+    """
+    Importa um extrato bancário para a conta informada.
+
+    Args:
+        conta_id: ID da ContaBancaria
+        stream: Stream binário iterável por linhas (ex.: FileStorage.stream)
+        nome_arquivo: Nome original (gravado em arquivo_origem)
+        formato: 'csv' ou 'ofx' (None = detectar pela extensão)
+        tamanho_lote: Linhas por INSERT em massa
+
+    Returns:
+        ResultadoImportacaoExtrato
+    """
+    formato = formato or detectar_formato(nome_arquivo)
+    leitor = ler_movimentos_ofx if formato == 'ofx' else ler_movimentos_csv
+    if isinstance(stream, (bytes, bytearray)):
+        stream = io.BytesIO(stream)
+
+    resultado = ResultadoImportacaoExtrato()
+    ocorrencias = {}
+    lote = []
+    agora = datetime.utcnow()
+
+    try:
+        for item in leitor(stream):
+            if isinstance(item, ErroLinhaExtrato):
+                resultado.registrar_erro(item.linha, str(item))
+                continue
+
+            chave = (item.data_movimento, item.valor, item.documento.strip().upper())
+            ocorrencias[chave] = ocorrencias.get(chave, 0) + 1
+            hash_mov = calcular_hash_movimento(conta_id, item, ocorrencias[chave])
+            lote.append({
+                'conta_bancaria_id': conta_id,
+                'data_movimento': item.data_movimento,
+                'descricao': item.descricao,
+                'documento': item.documento or None,
+                'valor': abs(item.valor),
+                'tipo_movimento': item.tipo_movimento,
+                'saldo': item.saldo,
+                'conciliado': False,
+                'arquivo_origem': (nome_arquivo or '')[:255] or None,
+                'data_importacao': agora,
+                'hash_movimento': hash_mov,
+            })
+            if len(lote) >= tamanho_lote:
+                _gravar_lote(lote, resultado)
+                lote = []
+
+        _gravar_lote(lote, resultado)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f'extrato evento=importado conta_id={conta_id} arquivo="{nome_arquivo}" '
+                f'importados={resultado.importados} duplicados={resultado.duplicados} '
+                f'erros={resultado.total_erros}')
+    return resultado
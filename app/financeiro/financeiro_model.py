@@ -10,7 +10,7 @@ Autor: JSP Soluções
 Data: 2025
 """
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from decimal import Decimal
 from app.extensoes import db
 from app.models import BaseModel
@@ -268,46 +268,29 @@ class LancamentoFinanceiro(BaseModel):
         if not ano:
             ano = date.today().year
         
-        # Filtro por mês/ano - usar data_vencimento ou data_lancamento
-        filtro_data = db.and_(
-            db.or_(
-                db.and_(
-                    db.extract('month', cls.data_vencimento) == mes,
-                    db.extract('year', cls.data_vencimento) == ano
-                ),
-                db.and_(
-                    cls.data_vencimento.is_(None),
-                    db.extract('month', cls.data_lancamento) == mes,
-                    db.extract('year', cls.data_lancamento) == ano
-                )
-            ),
-            cls.ativo == True
+        # Lê o rollup mensal (competência = vencimento, ou lançamento sem vencimento)
+        from app.financeiro.saldo_mensal_model import SaldoMensalLancamento
+
+        total_receitas, qtd_receitas = SaldoMensalLancamento.somar(
+            'competencia', ano=ano, mes=mes,
+            tipos=['receita', 'conta_receber'],
+            status=['recebido', 'pendente'],
         )
-        
-        # Receitas (incluindo pendentes)
-        receitas = cls.query.filter(
-            filtro_data,
-            cls.tipo.in_(['receita', 'conta_receber']),
-            cls.status.in_(['recebido', 'pendente'])
-        ).all()
-        
-        # Despesas (incluindo pendentes)
-        despesas = cls.query.filter(
-            filtro_data,
-            cls.tipo.in_(['despesa', 'conta_pagar']),
-            cls.status.in_(['pago', 'pendente'])
-        ).all()
-        
-        total_receitas = sum(float(r.valor) for r in receitas)
-        total_despesas = sum(float(d.valor) for d in despesas)
+        total_despesas, qtd_despesas = SaldoMensalLancamento.somar(
+            'competencia', ano=ano, mes=mes,
+            tipos=['despesa', 'conta_pagar'],
+            status=['pago', 'pendente'],
+        )
+        total_receitas = float(total_receitas)
+        total_despesas = float(total_despesas)
         saldo = total_receitas - total_despesas
         
         return {
             'total_receitas': total_receitas,
             'total_despesas': total_despesas,
             'saldo': saldo,
-            'qtd_receitas': len(receitas),
-            'qtd_despesas': len(despesas)
+            'qtd_receitas': qtd_receitas,
+            'qtd_despesas': qtd_despesas
         }
     
     def marcar_como_pago(self, data_pagamento=None, usuario=None):
@@ -640,6 +623,8 @@ class ExtratoBancario(BaseModel):
     # Importação
     arquivo_origem = db.Column(db.String(255))
     data_importacao = db.Column(db.DateTime, default=datetime.utcnow)
+    # sha256 de (conta, data, valor, documento, ocorrência) - impede reimportação
+    hash_movimento = db.Column(db.String(64), unique=True, index=True)
     
     # Observações
     observacoes = db.Column(db.Text)
@@ -1091,45 +1076,69 @@ class OrcamentoAnual(BaseModel):
         """Retorna ícone baseado no tipo."""
         return 'fas fa-arrow-up text-success' if self.tipo == 'RECEITA' else 'fas fa-arrow-down text-danger'
     
-    def calcular_realizado(self):
-        """Calcula valor realizado no período."""
-        from datetime import datetime
-        
-        # Data inicial e final do mês
-        data_inicio = datetime(self.ano, self.mes, 1)
-        if self.mes == 12:
-            data_fim = datetime(self.ano + 1, 1, 1)
-        else:
-            data_fim = datetime(self.ano, self.mes + 1, 1)
-        
-        # Busca lançamentos do período
-        query = LancamentoFinanceiro.query.filter(
-            LancamentoFinanceiro.data_vencimento >= data_inicio,
-            LancamentoFinanceiro.data_vencimento < data_fim,
-            LancamentoFinanceiro.tipo == self.tipo
+    # Tipos de lançamento que realizam cada tipo de orçamento
+    TIPOS_LANCAMENTO_POR_TIPO = {
+        'RECEITA': ('receita', 'conta_receber'),
+        'DESPESA': ('despesa', 'conta_pagar'),
+    }
+    
+    def _aceita_saldo(self, saldo):
+        """Indica se uma linha do rollup mensal compõe o realizado deste orçamento."""
+        tipos = self.TIPOS_LANCAMENTO_POR_TIPO.get((self.tipo or '').upper(), ())
+        return (
+            saldo.mes == self.mes
+            and saldo.tipo in tipos
+            and saldo.status != 'cancelado'
+            and (not self.centro_custo_id or saldo.centro_custo_id == self.centro_custo_id)
+            and (not self.plano_conta_id or saldo.plano_conta_id == self.plano_conta_id)
         )
+    
+    def calcular_realizado(self, saldos=None):
+        """
+        Calcula valor realizado no período a partir do rollup mensal.
         
-        # Filtra por centro de custo se definido
-        if self.centro_custo_id:
-            query = query.filter(LancamentoFinanceiro.centro_custo_id == self.centro_custo_id)
-        
-        # Filtra por plano de contas se definido
-        if self.plano_conta_id:
-            query = query.filter(LancamentoFinanceiro.plano_conta_id == self.plano_conta_id)
+        Args:
+            saldos: Linhas de SaldoMensalLancamento do ano já carregadas
+                (evita uma consulta por orçamento em listagens)
+        """
+        from app.financeiro.saldo_mensal_model import SaldoMensalLancamento
         
-        # Soma valores
-        total = db.session.query(
-            db.func.sum(LancamentoFinanceiro.valor)
-        ).filter(
-            LancamentoFinanceiro.id.in_([l.id for l in query.all()])
-        ).scalar() or 0
+        if saldos is None:
+            saldos = SaldoMensalLancamento.query.filter_by(
+                referencia='competencia', ano=self.ano, mes=self.mes
+            ).all()
         
+        total = sum((Decimal(str(s.valor_total or 0)) for s in saldos if self._aceita_saldo(s)), Decimal('0'))
         return float(total)
     
+    @classmethod
+    def carregar_realizados(cls, orcamentos):
+        """
+        Pré-calcula `valor_realizado` de vários orçamentos com uma consulta por ano.
+        
+        Args:
+            orcamentos: Lista de OrcamentoAnual
+            
+        Returns:
+            list: A mesma lista, com o realizado já memorizado
+        """
+        from app.financeiro.saldo_mensal_model import SaldoMensalLancamento
+        
+        saldos_por_ano = {}
+        for orcamento in orcamentos:
+            if orcamento.ano not in saldos_por_ano:
+                saldos_por_ano[orcamento.ano] = SaldoMensalLancamento.linhas_do_ano(orcamento.ano)
+            orcamento._valor_realizado = orcamento.calcular_realizado(saldos_por_ano[orcamento.ano])
+        return orcamentos
+    
     @property
     def valor_realizado(self):
-        """Property para valor realizado."""
-        return self.calcular_realizado()
+        """Property para valor realizado (memorizado por instância)."""
+        valor = getattr(self, '_valor_realizado', None)
+        if valor is None:
+            valor = self.calcular_realizado()
+            self._valor_realizado = valor
+        return valor
     
     @property
     def percentual_executado(self):
@@ -1210,6 +1219,96 @@ class OrcamentoAnual(BaseModel):
         return orcamentos_criados
 
 
+class MapeamentoDRE(BaseModel):
+    """
+    Model para Mapeamento de Lançamentos nas Linhas do DRE.
+    
+    Cada regra associa uma categoria (igual ou contendo um trecho) e/ou um
+    plano de contas a uma linha do DRE. As regras são avaliadas pela ordem;
+    sem regra aplicável, receitas vão para receita bruta e despesas para
+    despesas operacionais.
+    """
+    
+    __tablename__ = 'mapeamentos_dre'
+    
+    LINHAS = (
+        'receita_bruta', 'deducoes', 'custos', 'despesas_operacionais',
+        'receitas_financeiras', 'despesas_financeiras',
+    )
+    
+    # Critérios
+    tipo = db.Column(db.String(20), nullable=False)  # receita, despesa
+    categoria = db.Column(db.String(100))
+    correspondencia = db.Column(db.String(10), nullable=False, default='igual')  # igual, contem
+    plano_conta_id = db.Column(db.Integer, db.ForeignKey('plano_contas.id'), nullable=True)
+    
+    # Destino
+    linha_dre = db.Column(db.String(30), nullable=False)
+    ordem = db.Column(db.Integer, nullable=False, default=100)
+    
+    plano_conta = db.relationship('PlanoContas', foreign_keys=[plano_conta_id])
+    
+    def __repr__(self):
+        return f'<MapeamentoDRE {self.tipo}:{self.categoria or self.plano_conta_id} -> {self.linha_dre}>'
+    
+    @classmethod
+    def regras_ativas(cls):
+        """
+        Retorna as regras ativas ordenadas, ou as regras padrão se a tabela estiver vazia.
+        
+        Returns:
+            list[dict]: Regras com tipo, categoria, correspondencia, plano_conta_id e linha_dre
+        """
+        regras = cls.query.filter_by(ativo=True).order_by(cls.ordem, cls.id).all()
+        if not regras:
+            return [dict(regra) for regra in MAPEAMENTO_DRE_PADRAO]
+        return [
+            {
+                'tipo': r.tipo,
+                'categoria': r.categoria,
+                'correspondencia': r.correspondencia or 'igual',
+                'plano_conta_id': r.plano_conta_id,
+                'linha_dre': r.linha_dre,
+            }
+            for r in regras
+        ]
+    
+    @classmethod
+    def criar_mapeamento_padrao(cls):
+        """
+        Grava as regras padrão na tabela (para edição posterior).
+        
+        Returns:
+            int: Quantidade de regras criadas
+        """
+        if cls.query.first() is not None:
+            return 0
+        for ordem, regra in enumerate(MAPEAMENTO_DRE_PADRAO, start=1):
+            db.session.add(cls(ordem=ordem * 10, **regra))
+        db.session.commit()
+        return len(MAPEAMENTO_DRE_PADRAO)
+
+
+def _regras_dre(tipo, linha, categorias, correspondencia='igual'):
+    return [
+        {'tipo': tipo, 'categoria': c, 'correspondencia': correspondencia,
+         'plano_conta_id': None, 'linha_dre': linha}
+        for c in categorias
+    ]
+
+
+# Regras padrão do DRE (equivalentes às listas fixas usadas anteriormente)
+MAPEAMENTO_DRE_PADRAO = (
+    _regras_dre('receita', 'deducoes', ['Impostos sobre Vendas', 'Devoluções', 'Descontos Concedidos'])
+    + _regras_dre('receita', 'receitas_financeiras', ['Juros Pagos', 'Juros Recebidos', 'Despesas Bancárias'])
+    + _regras_dre('receita', 'receitas_financeiras', ['Juros Recebidos'], 'contem')
+    + _regras_dre('despesa', 'custos', ['Custo de Mercadorias', 'Custo de Serviços', 'Matéria-Prima'])
+    + _regras_dre('despesa', 'despesas_financeiras', ['Juros Pagos', 'Juros Recebidos', 'Despesas Bancárias'])
+    + _regras_dre('despesa', 'despesas_financeiras', ['Juros', 'Bancár'], 'contem')
+    + _regras_dre('despesa', 'deducoes', ['Impostos sobre Vendas', 'Devoluções', 'Descontos Concedidos'])
+)
+
+
 class NotaFiscal(BaseModel):
     """
     Model para Gestão de Notas Fiscais.
@@ -1271,6 +1370,9 @@ class NotaFiscal(BaseModel):
     arquivo_pdf = db.Column(db.Text)  # Caminho ou conteúdo base64
     arquivo_xml_nome = db.Column(db.String(255))
     arquivo_pdf_nome = db.Column(db.String(255))
+    # Presença dos arquivos calculada no banco (ver query_sem_arquivos)
+    tem_xml = db.query_expression()
+    tem_pdf = db.query_expression()
     
     # Observações
     observacoes = db.Column(db.Text)
@@ -1313,15 +1415,37 @@ class NotaFiscal(BaseModel):
         }
         return badges.get(self.status, 'secondary')
     
+    @classmethod
+    def query_sem_arquivos(cls):
+        """
+        Query para listagens: não carrega XML/PDF (base64 de centenas de KB
+        por nota), apenas se eles existem.
+        """
+        def presente(coluna):
+            return db.case((db.func.coalesce(db.func.length(coluna), 0) > 0, True), else_=False)
+
+        return cls.query.options(
+            db.defer(cls.arquivo_xml),
+            db.defer(cls.arquivo_pdf),
+            db.with_expression(cls.tem_xml, presente(cls.arquivo_xml)),
+            db.with_expression(cls.tem_pdf, presente(cls.arquivo_pdf)),
+        )
+
+    def _possui_arquivo(self, coluna, expressao):
+        if coluna not in db.inspect(self).unloaded:
+            return bool(getattr(self, coluna))
+        presente = getattr(self, expressao)
+        return bool(presente) if presente is not None else bool(getattr(self, coluna))
+
     @property
     def possui_xml(self):
         """Verifica se possui arquivo XML."""
-        return bool(self.arquivo_xml)
+        return self._possui_arquivo('arquivo_xml', 'tem_xml')
     
     @property
     def possui_pdf(self):
         """Verifica se possui arquivo PDF."""
-        return bool(self.arquivo_pdf)
+        return self._possui_arquivo('arquivo_pdf', 'tem_pdf')
     
     @property
     def empresa(self):
@@ -1541,6 +1665,9 @@ class Notificacao(BaseModel):
     email_enviado = db.Column(db.Boolean, default=False)
     data_envio_email = db.Column(db.DateTime)
     
+    # Nome usado pelas listagens e templates para a data de criação
+    data_criacao = db.synonym('criado_em')
+    
     def __repr__(self):
         return f'<Notificacao {self.id}: {self.titulo}>'
     
@@ -1651,232 +1778,222 @@ class Notificacao(BaseModel):
             query = query.filter_by(usuario=usuario)
         return query.count()
     
+    # ===== VARREDURA DE ALERTAS =====
+    #
+    # Cada verificação faz uma consulta com anti-join (NOT EXISTS) contra as
+    # notificações não lidas e grava todas as novas em um único INSERT em
+    # lote: o custo não depende da quantidade de lançamentos ou contas.
+    
+    @classmethod
+    def _sem_notificacao_aberta(cls, entidade_tipo, tipo, entidade_id_col, desde=None):
+        """Condição NOT EXISTS: entidade sem notificação não lida do tipo."""
+        condicoes = [
+            cls.entidade_tipo == entidade_tipo,
+            cls.entidade_id == entidade_id_col,
+            cls.tipo == tipo,
+            cls.lida.isnot(True),
+            cls.ativo.is_(True),
+        ]
+        if desde is not None:
+            condicoes.append(cls.criado_em >= desde)
+        return ~db.session.query(cls.id).filter(*condicoes).exists()
+    
+    @classmethod
+    def _inserir_em_lote(cls, registros):
+        """Grava notificações com um único INSERT (executemany)."""
+        if not registros:
+            return 0
+        agora = datetime.utcnow()
+        for registro in registros:
+            registro.setdefault('lida', False)
+            registro.setdefault('ativo', True)
+            registro.setdefault('criado_em', agora)
+            registro.setdefault('atualizado_em', agora)
+        db.session.execute(cls.__table__.insert(), registros)
+        db.session.commit()
+        return len(registros)
+    
     @classmethod
     def verificar_vencimentos(cls):
         """
-        Verifica lançamentos vencendo e cria notificações.
-        Executa verificação de:
-        - Vencimentos hoje
-        - Vencimentos próximos 3 dias
-        - Vencimentos próximos 7 dias
+        Cria notificações de lançamentos pendentes vencendo hoje e em 3 dias.
+        
+        Returns:
+            int: Quantidade de notificações criadas
         """
-        from datetime import timedelta
+        from app.financeiro.financeiro_compat import valor_em_moeda
         
         hoje = date.today()
         em_3_dias = hoje + timedelta(days=3)
-        em_7_dias = hoje + timedelta(days=7)
-        
-        notificacoes_criadas = []
+        lanc = LancamentoFinanceiro
         
-        # Vencendo hoje
-        vencendo_hoje = LancamentoFinanceiro.query.filter(
-            LancamentoFinanceiro.data_vencimento == hoje,
-            LancamentoFinanceiro.status == 'pendente',
-            LancamentoFinanceiro.ativo == True
+        pendentes = db.session.query(
+            lanc.id, lanc.descricao, lanc.valor, lanc.data_vencimento
+        ).filter(
+            lanc.data_vencimento.in_([hoje, em_3_dias]),
+            db.func.lower(db.func.trim(db.func.coalesce(lanc.status, ''))) == 'pendente',
+            lanc.ativo.is_(True),
+            cls._sem_notificacao_aberta('LancamentoFinanceiro', 'VENCIMENTO', lanc.id),
         ).all()
         
-        for lanc in vencendo_hoje:
-            # Verifica se já existe notificação
-            existe = cls.query.filter_by(
-                entidade_tipo='LancamentoFinanceiro',
-                entidade_id=lanc.id,
-                tipo='VENCIMENTO',
-                lida=False
-            ).first()
-            
-            if not existe:
-                notif = cls.criar_notificacao(
-                    titulo=f'💰 Vencimento HOJE: {lanc.descricao}',
-                    mensagem=f'O lançamento "{lanc.descricao}" vence hoje! Valor: {lanc.valor_formatado}',
-                    tipo='VENCIMENTO',
-                    prioridade='URGENTE',
-                    entidade_tipo='LancamentoFinanceiro',
-                    entidade_id=lanc.id,
-                    acao_url=f'/financeiro/lancamentos/{lanc.id}/pagar',
-                    acao_texto='Pagar Agora'
-                )
-                notificacoes_criadas.append(notif)
-        
-        # Vencendo em 3 dias
-        vencendo_3dias = LancamentoFinanceiro.query.filter(
-            LancamentoFinanceiro.data_vencimento == em_3_dias,
-            LancamentoFinanceiro.status == 'pendente',
-            LancamentoFinanceiro.ativo == True
-        ).all()
+        registros = []
+        for lanc_id, descricao, valor, vencimento in pendentes:
+            if vencimento == hoje:
+                registros.append({
+                    'titulo': f'💰 Vencimento HOJE: {descricao}'[:200],
+                    'mensagem': f'O lançamento "{descricao}" vence hoje! Valor: {valor_em_moeda(valor)}',
+                    'prioridade': 'URGENTE',
+                    'acao_url': f'/financeiro/lancamentos/{lanc_id}/pagar',
+                    'acao_texto': 'Pagar Agora',
+                    'tipo': 'VENCIMENTO',
+                    'entidade_tipo': 'LancamentoFinanceiro',
+                    'entidade_id': lanc_id,
+                })
+            else:
+                registros.append({
+                    'titulo': f'⏰ Vence em 3 dias: {descricao}'[:200],
+                    'mensagem': f'O lançamento "{descricao}" vence em 3 dias. Valor: {valor_em_moeda(valor)}',
+                    'prioridade': 'ALTA',
+                    'acao_url': f'/financeiro/lancamentos/{lanc_id}/editar',
+                    'acao_texto': 'Ver Detalhes',
+                    'tipo': 'VENCIMENTO',
+                    'entidade_tipo': 'LancamentoFinanceiro',
+                    'entidade_id': lanc_id,
+                })
         
-        for lanc in vencendo_3dias:
-            existe = cls.query.filter_by(
-                entidade_tipo='LancamentoFinanceiro',
-                entidade_id=lanc.id,
-                tipo='VENCIMENTO',
-                lida=False
-            ).first()
-            
-            if not existe:
-                notif = cls.criar_notificacao(
-                    titulo=f'⏰ Vence em 3 dias: {lanc.descricao}',
-                    mensagem=f'O lançamento "{lanc.descricao}" vence em 3 dias. Valor: {lanc.valor_formatado}',
-                    tipo='VENCIMENTO',
-                    prioridade='ALTA',
-                    entidade_tipo='LancamentoFinanceiro',
-                    entidade_id=lanc.id,
-                    acao_url=f'/financeiro/lancamentos/{lanc.id}/editar',
-                    acao_texto='Ver Detalhes'
-                )
-                notificacoes_criadas.append(notif)
-        
-        return notificacoes_criadas
+        return cls._inserir_em_lote(registros)
     
     @classmethod
     def verificar_saldo_negativo(cls):
-        """Verifica contas com saldo negativo."""
-        contas_negativas = ContaBancaria.query.filter(
+        """
+        Cria notificações de contas com saldo negativo (no máximo uma a cada 24h).
+        
+        Returns:
+            int: Quantidade de notificações criadas
+        """
+        from app.financeiro.financeiro_compat import valor_em_moeda
+        
+        ontem = datetime.utcnow() - timedelta(days=1)
+        contas = db.session.query(
+            ContaBancaria.id, ContaBancaria.nome, ContaBancaria.saldo_atual
+        ).filter(
             ContaBancaria.saldo_atual < 0,
-            ContaBancaria.ativo == True,
-            ContaBancaria.ativa == True
+            ContaBancaria.ativo.is_(True),
+            ContaBancaria.ativa.is_(True),
+            cls._sem_notificacao_aberta('ContaBancaria', 'SALDO_NEGATIVO', ContaBancaria.id, desde=ontem),
         ).all()
         
-        notificacoes_criadas = []
-        
-        for conta in contas_negativas:
-            # Verifica se já existe notificação recente (últimas 24h)
-            ontem = datetime.utcnow() - timedelta(days=1)
-            existe = cls.query.filter(
-                cls.entidade_tipo == 'ContaBancaria',
-                cls.entidade_id == conta.id,
-                cls.tipo == 'SALDO_NEGATIVO',
-                cls.lida == False,
-                cls.data_criacao >= ontem
-            ).first()
-            
-            if not existe:
-                notif = cls.criar_notificacao(
-                    titulo=f'⚠️ Saldo Negativo: {conta.nome}',
-                    mensagem=f'A conta "{conta.nome}" está com saldo negativo: {conta.saldo_formatado}',
-                    tipo='SALDO_NEGATIVO',
-                    prioridade='URGENTE',
-                    entidade_tipo='ContaBancaria',
-                    entidade_id=conta.id,
-                    acao_url=f'/financeiro/contas-bancarias',
-                    acao_texto='Ver Conta'
-                )
-                notificacoes_criadas.append(notif)
-        
-        return notificacoes_criadas
+        return cls._inserir_em_lote([
+            {
+                'titulo': f'⚠️ Saldo Negativo: {nome}'[:200],
+                'mensagem': f'A conta "{nome}" está com saldo negativo: {valor_em_moeda(saldo)}',
+                'tipo': 'SALDO_NEGATIVO',
+                'prioridade': 'URGENTE',
+                'entidade_tipo': 'ContaBancaria',
+                'entidade_id': conta_id,
+                'acao_url': '/financeiro/contas-bancarias',
+                'acao_texto': 'Ver Conta',
+            }
+            for conta_id, nome, saldo in contas
+        ])
     
     @classmethod
     def verificar_estouro_orcamento(cls):
-        """Verifica orçamentos estourados."""
-        from datetime import date
+        """
+        Cria notificações de orçamentos do mês acima de 90% executados.
         
-        mes_atual = date.today().month
-        ano_atual = date.today().year
+        O realizado de todos os orçamentos vem do rollup mensal em uma
+        única consulta (OrcamentoAnual.carregar_realizados).
         
-        # Buscar orçamentos do mês atual
-        orcamentos = OrcamentoAnual.query.filter_by(
-            ano=ano_atual,
-            mes=mes_atual,
-            ativo=True
+        Returns:
+            int: Quantidade de notificações criadas
+        """
+        hoje = date.today()
+        orcamentos = OrcamentoAnual.query.filter(
+            OrcamentoAnual.ano == hoje.year,
+            OrcamentoAnual.mes == hoje.month,
+            OrcamentoAnual.ativo.is_(True),
+            cls._sem_notificacao_aberta('OrcamentoAnual', 'ESTOURO_ORCAMENTO', OrcamentoAnual.id),
         ).all()
+        OrcamentoAnual.carregar_realizados(orcamentos)
         
-        notificacoes_criadas = []
-        
+        registros = []
         for orc in orcamentos:
             perc = orc.percentual_executado
-            
-            # Alerta se passar de 100%
             if perc > 100:
-                existe = cls.query.filter_by(
-                    entidade_tipo='OrcamentoAnual',
-                    entidade_id=orc.id,
-                    tipo='ESTOURO_ORCAMENTO',
-                    lida=False
-                ).first()
-                
-                if not existe:
-                    notif = cls.criar_notificacao(
-                        titulo=f'🚨 Orçamento Estourado: {orc.categoria}',
-                        mensagem=f'O orçamento de "{orc.categoria}" está {perc:.1f}% executado (estouro de {perc-100:.1f}%)',
-                        tipo='ESTOURO_ORCAMENTO',
-                        prioridade='URGENTE',
-                        entidade_tipo='OrcamentoAnual',
-                        entidade_id=orc.id,
-                        acao_url='/financeiro/orcamento-anual/dashboard',
-                        acao_texto='Ver Orçamento'
-                    )
-                    notificacoes_criadas.append(notif)
-            
-            # Alerta se passar de 90%
+                registros.append({
+                    'titulo': f'🚨 Orçamento Estourado: {orc.categoria}'[:200],
+                    'mensagem': f'O orçamento de "{orc.categoria}" está {perc:.1f}% executado (estouro de {perc-100:.1f}%)',
+                    'prioridade': 'URGENTE',
+                })
             elif perc > 90:
-                existe = cls.query.filter_by(
-                    entidade_tipo='OrcamentoAnual',
-                    entidade_id=orc.id,
-                    tipo='ESTOURO_ORCAMENTO',
-                    lida=False
-                ).first()
-                
-                if not existe:
-                    notif = cls.criar_notificacao(
-                        titulo=f'⚠️ Atenção: {orc.categoria} em {perc:.1f}%',
-                        mensagem=f'O orçamento de "{orc.categoria}" está próximo do limite ({perc:.1f}% executado)',
-                        tipo='ESTOURO_ORCAMENTO',
-                        prioridade='ALTA',
-                        entidade_tipo='OrcamentoAnual',
-                        entidade_id=orc.id,
-                        acao_url='/financeiro/orcamento-anual/dashboard',
-                        acao_texto='Ver Orçamento'
-                    )
-                    notificacoes_criadas.append(notif)
+                registros.append({
+                    'titulo': f'⚠️ Atenção: {orc.categoria} em {perc:.1f}%'[:200],
+                    'mensagem': f'O orçamento de "{orc.categoria}" está próximo do limite ({perc:.1f}% executado)',
+                    'prioridade': 'ALTA',
+                })
+            else:
+                continue
+            registros[-1].update({
+                'tipo': 'ESTOURO_ORCAMENTO',
+                'entidade_tipo': 'OrcamentoAnual',
+                'entidade_id': orc.id,
+                'acao_url': '/financeiro/orcamento-anual/dashboard',
+                'acao_texto': 'Ver Orçamento',
+            })
         
-        return notificacoes_criadas
+        return cls._inserir_em_lote(registros)
     
     @classmethod
     def verificar_conciliacao_pendente(cls):
-        """Verifica extratos pendentes de conciliação."""
-        # Contar extratos não conciliados
-        pendentes = ExtratoBancario.query.filter_by(
-            conciliado=False,
-            ativo=True
-        ).count()
-        
-        notificacoes_criadas = []
-        
-        if pendentes > 0:
-            # Verifica se já existe notificação recente
-            ontem = datetime.utcnow() - timedelta(days=1)
-            existe = cls.query.filter(
-                cls.tipo == 'CONCILIACAO_PENDENTE',
-                cls.lida == False,
-                cls.data_criacao >= ontem
-            ).first()
-            
-            if not existe:
-                notif = cls.criar_notificacao(
-                    titulo=f'📋 {pendentes} Extrato(s) Pendente(s) de Conciliação',
-                    mensagem=f'Existem {pendentes} lançamentos de extrato bancário aguardando conciliação.',
-                    tipo='CONCILIACAO_PENDENTE',
-                    prioridade='MEDIA',
-                    acao_url='/financeiro/conciliacao-bancaria',
-                    acao_texto='Conciliar Agora'
-                )
-                notificacoes_criadas.append(notif)
-        
-        return notificacoes_criadas
+        """
+        Cria uma notificação resumo de extratos pendentes (no máximo uma a cada 24h).
+        
+        Returns:
+            int: Quantidade de notificações criadas
+        """
+        ontem = datetime.utcnow() - timedelta(days=1)
+        existe = db.session.query(cls.id).filter(
+            cls.tipo == 'CONCILIACAO_PENDENTE',
+            cls.lida.isnot(True),
+            cls.criado_em >= ontem
+        ).first()
+        if existe:
+            return 0
+        
+        pendentes = db.session.query(db.func.count(ExtratoBancario.id)).filter(
+            ExtratoBancario.conciliado.isnot(True),
+            ExtratoBancario.ativo.is_(True)
+        ).scalar() or 0
+        if not pendentes:
+            return 0
+        
+        return cls._inserir_em_lote([{
+            'titulo': f'📋 {pendentes} Extrato(s) Pendente(s) de Conciliação',
+            'mensagem': f'Existem {pendentes} lançamentos de extrato bancário aguardando conciliação.',
+            'tipo': 'CONCILIACAO_PENDENTE',
+            'prioridade': 'MEDIA',
+            'acao_url': '/financeiro/conciliacao-bancaria',
+            'acao_texto': 'Conciliar Agora',
+        }])
     
     @classmethod
     def verificar_todas(cls):
         """
         Executa todas as verificações de alertas.
-        Deve ser chamado por CRON ou scheduler.
-        """
-        notificacoes = []
         
-        notificacoes.extend(cls.verificar_vencimentos())
-        notificacoes.extend(cls.verificar_saldo_negativo())
-        notificacoes.extend(cls.verificar_estouro_orcamento())
-        notificacoes.extend(cls.verificar_conciliacao_pendente())
+        Chamado periodicamente pelo agendador (app/financeiro/alertas_agendador.py)
+        ou por scripts/verificar_alertas.py via cron.
         
-        return notificacoes
+        Returns:
+            int: Total de notificações criadas
+        """
+        return (
+            cls.verificar_vencimentos()
+            + cls.verificar_saldo_negativo()
+            + cls.verificar_estouro_orcamento()
+            + cls.verificar_conciliacao_pendente()
+        )
 
 
 # ============================================================
@@ -2160,98 +2277,36 @@ class RelatorioCustomizado(BaseModel):
         import json
         self.filtros = json.dumps(filtros_dict)
     
-    def executar(self):
-        """
-        Executa o relatório e retorna dados.
-        
-        Returns:
-            list: Lista de resultados
-        """
+    def registrar_execucao(self):
+        """Atualiza data e contador de execuções."""
         self.ultima_execucao = datetime.utcnow()
-        self.total_execucoes += 1
+        self.total_execucoes = (self.total_execucoes or 0) + 1
         db.session.commit()
-        
-        # Buscar dados baseado no tipo
-        if self.tipo == 'LANCAMENTOS':
-            return self._executar_lancamentos()
-        elif self.tipo == 'FLUXO_CAIXA':
-            return self._executar_fluxo_caixa()
-        elif self.tipo == 'DRE':
-            return self._executar_dre()
-        elif self.tipo == 'CONTAS_PAGAR':
-            return self._executar_contas_pagar()
-        elif self.tipo == 'CONTAS_RECEBER':
-            return self._executar_contas_receber()
-        elif self.tipo == 'CENTROS_CUSTO':
-            return self._executar_centros_custo()
-        
-        return []
     
-    def _executar_lancamentos(self):
-        """Executa relatório de lançamentos."""
-        filtros = self.get_filtros_dict()
-        
-        query = LancamentoFinanceiro.query.filter_by(ativo=True)
-        
-        # Aplicar filtros
-        if 'tipo' in filtros:
-            query = query.filter_by(tipo=filtros['tipo'])
-        
-        if 'status' in filtros:
-            query = query.filter_by(status=filtros['status'])
-        
-        if 'categoria' in filtros:
-            query = query.filter_by(categoria=filtros['categoria'])
-        
-        if 'data_inicio' in filtros:
-            query = query.filter(LancamentoFinanceiro.data_lancamento >= filtros['data_inicio'])
-        
-        if 'data_fim' in filtros:
-            query = query.filter(LancamentoFinanceiro.data_lancamento <= filtros['data_fim'])
-        
-        if 'conta_bancaria_id' in filtros:
-            query = query.filter_by(conta_bancaria_id=filtros['conta_bancaria_id'])
+    def executar(self, cursor=None, limite=None):
+        """
+        Executa o relatório e retorna uma página de dados.
         
-        if 'centro_custo_id' in filtros:
-            query = query.filter_by(centro_custo_id=filtros['centro_custo_id'])
+        Relatórios de lançamentos são paginados por keyset; fluxo de caixa,
+        DRE e centros de custo são agregados e cabem em uma página.
         
-        # Ordenação
-        if self.ordenacao:
-            campo_ordem = getattr(LancamentoFinanceiro, self.ordenacao, None)
-            if campo_ordem:
-                if self.ordem_direcao == 'DESC':
-                    query = query.order_by(campo_ordem.desc())
-                else:
-                    query = query.order_by(campo_ordem.asc())
+        Args:
+            cursor: `proximo_cursor` da página anterior (None = primeira)
+            limite: Linhas por página (None = padrão do serviço)
+            
+        Returns:
+            PaginaRelatorio: colunas, linhas (dicts) e proximo_cursor
+        """
+        from app.financeiro.relatorio_customizado_service import executar_pagina
         
-        return query.all()
+        if cursor is None:
+            self.registrar_execucao()
+        return executar_pagina(self, cursor=cursor, limite=limite)
     
-    def _executar_fluxo_caixa(self):
-        """Executa relatório de fluxo de caixa."""
-        # Implementação similar aos outros relatórios
-        return []
-    
-    def _executar_dre(self):
-        """Executa relatório de DRE."""
-        return []
-    
-    def _executar_contas_pagar(self):
-        """Executa relatório de contas a pagar."""
-        return LancamentoFinanceiro.query.filter(
-            LancamentoFinanceiro.tipo.in_(['despesa', 'conta_pagar']),
-            LancamentoFinanceiro.ativo == True
-        ).all()
-    
-    def _executar_contas_receber(self):
-        """Executa relatório de contas a receber."""
-        return LancamentoFinanceiro.query.filter(
-            LancamentoFinanceiro.tipo.in_(['receita', 'conta_receber']),
-            LancamentoFinanceiro.ativo == True
-        ).all()
-    
-    def _executar_centros_custo(self):
-        """Executa relatório de centros de custo."""
-        return CentroCusto.query.filter_by(ativo=True).all()
+    def iterar_linhas(self):
+        """Gerador com todas as linhas do relatório (usado na exportação)."""
+        from app.financeiro.relatorio_customizado_service import iterar_linhas
+        return iterar_linhas(self)
     
     @classmethod
     def get_campos_disponiveis(cls, tipo):
@@ -2280,6 +2335,27 @@ class RelatorioCustomizado(BaseModel):
             return campos_lancamentos
         elif tipo == 'CONTAS_PAGAR' or tipo == 'CONTAS_RECEBER':
             return campos_lancamentos
+        elif tipo == 'FLUXO_CAIXA':
+            return [
+                {'nome': 'periodo', 'label': 'Período', 'tipo': 'texto'},
+                {'nome': 'receitas', 'label': 'Receitas', 'tipo': 'numero'},
+                {'nome': 'despesas', 'label': 'Despesas', 'tipo': 'numero'},
+                {'nome': 'saldo', 'label': 'Saldo do Mês', 'tipo': 'numero'},
+                {'nome': 'saldo_acumulado', 'label': 'Saldo Acumulado', 'tipo': 'numero'},
+            ]
+        elif tipo == 'DRE':
+            return [
+                {'nome': 'linha', 'label': 'Linha', 'tipo': 'texto'},
+                {'nome': 'valor', 'label': 'Valor', 'tipo': 'numero'},
+            ]
+        elif tipo == 'CENTROS_CUSTO':
+            return [
+                {'nome': 'codigo', 'label': 'Código', 'tipo': 'texto'},
+                {'nome': 'nome', 'label': 'Nome', 'tipo': 'texto'},
+                {'nome': 'tipo', 'label': 'Tipo', 'tipo': 'opcao'},
+                {'nome': 'responsavel', 'label': 'Responsável', 'tipo': 'texto'},
+                {'nome': 'orcamento_mensal', 'label': 'Orçamento Mensal', 'tipo': 'numero'},
+            ]
         
         return []
     
@@ -2306,5 +2382,14 @@ class RelatorioCustomizado(BaseModel):
         
         if tipo in ['LANCAMENTOS', 'CONTAS_PAGAR', 'CONTAS_RECEBER']:
             return filtros_lancamentos
+        elif tipo == 'FLUXO_CAIXA':
+            return [f for f in filtros_lancamentos
+                    if f['nome'] in ('data_inicio', 'data_fim', 'conta_bancaria_id', 'centro_custo_id')]
+        elif tipo == 'DRE':
+            return [f for f in filtros_lancamentos if f['nome'] in ('data_inicio', 'data_fim')]
         
         return []
+
+
+# Rollup mensal mantido pelos eventos de LancamentoFinanceiro
+from app.financeiro import saldo_mensal_model  # noqa: E402,F401
@@ -1374,64 +1374,16 @@ def upload_extrato():
                 flash('Conta bancária não encontrada.', 'danger')
                 return redirect(url_for('financeiro.upload_extrato'))
             
-            # Processar arquivo CSV
-            import csv
-            import io
-            from app.financeiro.financeiro_model import ExtratoBancario
-            
-            # Ler arquivo
-            stream = io.StringIO(arquivo.stream.read().decode("UTF-8"), newline=None)
-            csv_reader = csv.DictReader(stream)
-            
-            # Formato esperado das colunas (pode variar por banco)
-            # data,descricao,documento,valor,tipo
-            
-            contador = 0
-            for row in csv_reader:
-                try:
-                    # Parsear data (formato DD/MM/YYYY)
-                    data_str = row.get('data', '').strip()
-                    if '/' in data_str:
-                        dia, mes, ano = data_str.split('/')
-                        data_movimento = date(int(ano), int(mes), int(dia))
-                    else:
-                        continue  # Pular linha sem data válida
-                    
-                    # Parsear descrição
-                    descricao = row.get('descricao', '').strip()
-                    if not descricao:
-                        continue
-                    
-                    # Parsear valor
-                    valor_str = row.get('valor', '0').strip()
-                    valor = converter_valor_monetario(valor_str)
-                    
-                    # Tipo de movimento
-                    tipo = row.get('tipo', 'debito').strip().lower()
-                    if tipo not in ['debito', 'credito']:
-                        tipo = 'debito' if valor < 0 else 'credito'
-                    
-                    # Documento (opcional)
-                    documento = row.get('documento', '').strip()
-                    
-                    # Criar extrato
-                    extrato = ExtratoBancario(
-                        conta_bancaria_id=conta_id,
-                        data_movimento=data_movimento,
-                        descricao=descricao,
-                        documento=documento,
-                        valor=abs(valor),
-                        tipo_movimento=tipo,
-                        arquivo_origem=arquivo.filename
-                    )
-                    db.session.add(extrato)
-                    contador += 1
-                
-                except Exception as e:
-                    continue  # Pular linhas com erro
+            # Processar arquivo (CSV ou OFX) em streaming, com gravação em lotes
+            from app.financeiro.extrato_import_service import importar_extrato
             
-            db.session.commit()
-            flash(f'Extrato importado com sucesso! {contador} lançamentos adicionados.', 'success')
+            resultado = importar_extrato(conta_id, arquivo.stream, arquivo.filename)
+            
+            flash(f'Extrato importado! {resultado.importados} movimento(s) adicionado(s), '
+                  f'{resultado.duplicados} já importado(s) ignorado(s).', 'success')
+            if resultado.total_erros:
+                detalhes = '; '.join(f'linha {linha}: {msg}' for linha, msg in resultado.erros[:10])
+                flash(f'{resultado.total_erros} linha(s) com erro não importada(s): {detalhes}', 'warning')
             return redirect(url_for('financeiro.conciliacao_bancaria', conta_id=conta_id))
         
         except Exception as e:
@@ -1470,6 +1422,61 @@ def conciliar_manual(extrato_id, lancamento_id):
         return redirect(url_for('financeiro.conciliacao_bancaria'))
 
 
+@bp_financeiro.route('/conciliacao-bancaria/conciliar-automatico/<int:conta_id>', methods=['POST'])
+def conciliar_automatico(conta_id):
+    """Concilia em lote os extratos pendentes da conta com lançamentos compatíveis."""
+    try:
+        from app.financeiro.conciliacao_service import (
+            PONTUACAO_MINIMA_PADRAO, TOLERANCIA_DIAS_PADRAO, conciliar_automaticamente
+        )
+        
+        tolerancia = request.form.get('tolerancia_dias', TOLERANCIA_DIAS_PADRAO, type=int)
+        pontuacao_minima = request.form.get('pontuacao_minima', PONTUACAO_MINIMA_PADRAO, type=float)
+        
+        total = conciliar_automaticamente(
+            conta_id,
+            tolerancia_dias=max(tolerancia, 0),
+            pontuacao_minima=pontuacao_minima,
+        )
+        
+        if total:
+            flash(f'{total} extrato(s) conciliado(s) automaticamente!', 'success')
+        else:
+            flash('Nenhuma correspondência automática encontrada.', 'info')
+    
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Erro na conciliação automática: {str(e)}', 'danger')
+    
+    return redirect(url_for('financeiro.conciliacao_bancaria', conta_id=conta_id))
+
+
+@bp_financeiro.route('/api/conciliacao-bancaria/<int:conta_id>/sugestoes')
+def api_sugestoes_conciliacao(conta_id):
+    """API com as sugestões de conciliação da conta (sem gravar)."""
+    try:
+        from app.financeiro.conciliacao_service import (
+            PONTUACAO_MINIMA_PADRAO, TOLERANCIA_DIAS_PADRAO, sugerir_conciliacoes
+        )
+        
+        sugestoes = sugerir_conciliacoes(
+            conta_id,
+            tolerancia_dias=max(request.args.get('tolerancia_dias', TOLERANCIA_DIAS_PADRAO, type=int), 0),
+            pontuacao_minima=request.args.get('pontuacao_minima', PONTUACAO_MINIMA_PADRAO, type=float),
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'data': [s.to_dict() for s in sugestoes]
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
 @bp_financeiro.route('/conciliacao-bancaria/desconciliar/<int:extrato_id>', methods=['POST'])
 def desconciliar(extrato_id):
     """Desfazer conciliação de um extrato."""
@@ -1780,76 +1787,28 @@ def gerar_lancamentos_mes():
 def fluxo_caixa():
     """Dashboard de Fluxo de Caixa Projetado."""
     try:
-        from datetime import timedelta
-        from app.financeiro.financeiro_model import CustoFixo
+        from app.financeiro.fluxo_caixa_service import ProjecaoFluxoCaixa, normalizar_horizonte
         
         # Filtros
         conta_id = request.args.get('conta_id', type=int)
-        periodo = request.args.get('periodo', '30')  # 30, 60, 90 dias
-        
-        # Data inicial e final
-        data_hoje = date.today()
-        if periodo == '30':
-            data_fim = data_hoje + timedelta(days=30)
-        elif periodo == '60':
-            data_fim = data_hoje + timedelta(days=60)
-        elif periodo == '90':
-            data_fim = data_hoje + timedelta(days=90)
-        else:
-            data_fim = data_hoje + timedelta(days=30)
-        
-        # Saldo inicial (soma de todas as contas ou conta específica)
-        query_saldo = ContaBancaria.query.filter_by(ativo=True)
-        if conta_id:
-            query_saldo = query_saldo.filter_by(id=conta_id)
+        periodo = request.args.get('periodo', '30')  # 30, 60, 90, 180, 365 dias
+        dias = normalizar_horizonte(periodo)
+        periodo = str(dias)
         
-        contas = query_saldo.all()
-        saldo_inicial = sum(conta.saldo_atual for conta in contas)
-        
-        # Buscar lançamentos futuros
-        query_lancamentos = LancamentoFinanceiro.query.filter(
-            LancamentoFinanceiro.data_vencimento >= data_hoje,
-            LancamentoFinanceiro.data_vencimento <= data_fim,
-            LancamentoFinanceiro.ativo == True
-        )
-        
-        if conta_id:
-            query_lancamentos = query_lancamentos.filter_by(conta_bancaria_id=conta_id)
-        
-        lancamentos = query_lancamentos.order_by(LancamentoFinanceiro.data_vencimento).all()
-        
-        # Calcular projeção dia a dia
-        projecao = []
-        saldo_acumulado = saldo_inicial
-        data_atual = data_hoje
-        
-        while data_atual <= data_fim:
-            # Lançamentos do dia
-            lancamentos_dia = [l for l in lancamentos if l.data_vencimento == data_atual]
-            
-            receitas_dia = sum(l.valor for l in lancamentos_dia if l.tipo == 'RECEITA')
-            despesas_dia = sum(l.valor for l in lancamentos_dia if l.tipo == 'DESPESA')
-            saldo_dia = receitas_dia - despesas_dia
-            saldo_acumulado += saldo_dia
-            
-            projecao.append({
-                'data': data_atual,
-                'receitas': receitas_dia,
-                'despesas': despesas_dia,
-                'saldo_dia': saldo_dia,
-                'saldo_acumulado': saldo_acumulado,
-                'lancamentos': lancamentos_dia
-            })
-            
-            data_atual += timedelta(days=1)
+        # Projeção agregada por dia (uma consulta agrupada no banco)
+        fluxo = ProjecaoFluxoCaixa(dias=dias, conta_id=conta_id).calcular()
+        data_hoje = fluxo.data_inicio
+        data_fim = fluxo.data_fim
+        projecao = fluxo.dias
+        saldo_inicial = float(fluxo.saldo_inicial)
         
         # Identificar períodos de saldo negativo
-        alertas = [p for p in projecao if p['saldo_acumulado'] < 0]
+        alertas = fluxo.alertas
         
         # Totais do período
-        total_receitas = sum(p['receitas'] for p in projecao)
-        total_despesas = sum(p['despesas'] for p in projecao)
-        saldo_final = projecao[-1]['saldo_acumulado'] if projecao else saldo_inicial
+        total_receitas = fluxo.total_receitas
+        total_despesas = fluxo.total_despesas
+        saldo_final = fluxo.saldo_final
         
         # Buscar todas as contas para filtro
         todas_contas = ContaBancaria.query.filter_by(ativo=True).all()
@@ -1876,44 +1835,21 @@ def fluxo_caixa():
 def exportar_fluxo_excel():
     """Exportar fluxo de caixa para Excel."""
     try:
-        from datetime import timedelta
         from io import BytesIO
         from flask import send_file
         import openpyxl
         from openpyxl.styles import Font, Alignment, PatternFill
+        from app.financeiro.fluxo_caixa_service import ProjecaoFluxoCaixa, normalizar_horizonte
         
         # Filtros
         conta_id = request.args.get('conta_id', type=int)
-        periodo = request.args.get('periodo', '30')
-        
-        # Data inicial e final
-        data_hoje = date.today()
-        if periodo == '30':
-            data_fim = data_hoje + timedelta(days=30)
-        elif periodo == '60':
-            data_fim = data_hoje + timedelta(days=60)
-        else:
-            data_fim = data_hoje + timedelta(days=90)
-        
-        # Saldo inicial
-        query_saldo = ContaBancaria.query.filter_by(ativo=True)
-        if conta_id:
-            query_saldo = query_saldo.filter_by(id=conta_id)
-        
-        contas = query_saldo.all()
-        saldo_inicial = sum(conta.saldo_atual for conta in contas)
-        
-        # Buscar lançamentos
-        query_lancamentos = LancamentoFinanceiro.query.filter(
-            LancamentoFinanceiro.data_vencimento >= data_hoje,
-            LancamentoFinanceiro.data_vencimento <= data_fim,
-            LancamentoFinanceiro.ativo == True
-        )
+        dias = normalizar_horizonte(request.args.get('periodo', '30'))
         
-        if conta_id:
-            query_lancamentos = query_lancamentos.filter_by(conta_bancaria_id=conta_id)
-        
-        lancamentos = query_lancamentos.order_by(LancamentoFinanceiro.data_vencimento).all()
+        # Mesma projeção do dashboard, sem detalhe de lançamentos
+        fluxo = ProjecaoFluxoCaixa(dias=dias, conta_id=conta_id, dias_detalhados=0).calcular()
+        data_hoje = fluxo.data_inicio
+        data_fim = fluxo.data_fim
+        saldo_inicial = float(fluxo.saldo_inicial)
         
         # Criar Excel
         wb = openpyxl.Workbook()
@@ -1937,31 +1873,19 @@ def exportar_fluxo_excel():
             cell.alignment = Alignment(horizontal='center')
         
         # Dados
-        saldo_acumulado = saldo_inicial
-        data_atual = data_hoje
-        
-        while data_atual <= data_fim:
-            lancamentos_dia = [l for l in lancamentos if l.data_vencimento == data_atual]
-            
-            receitas_dia = sum(l.valor for l in lancamentos_dia if l.tipo == 'RECEITA')
-            despesas_dia = sum(l.valor for l in lancamentos_dia if l.tipo == 'DESPESA')
-            saldo_dia = receitas_dia - despesas_dia
-            saldo_acumulado += saldo_dia
-            
+        for dia in fluxo.dias:
             ws.append([
-                data_atual.strftime('%d/%m/%Y'),
-                float(receitas_dia),
-                float(despesas_dia),
-                float(saldo_dia),
-                float(saldo_acumulado)
+                dia['data'].strftime('%d/%m/%Y'),
+                dia['receitas'],
+                dia['despesas'],
+                dia['saldo_dia'],
+                dia['saldo_acumulado']
             ])
             
             # Colorir linha se saldo negativo
-            if saldo_acumulado < 0:
+            if dia['saldo_acumulado'] < 0:
                 for cell in ws[ws.max_row]:
                     cell.fill = PatternFill(start_color='FFE6E6', end_color='FFE6E6', fill_type='solid')
-            
-            data_atual += timedelta(days=1)
         
         # Ajustar largura das colunas
         ws.column_dimensions['A'].width = 15
@@ -2000,8 +1924,9 @@ def exportar_fluxo_excel():
 def dre():
     """Demonstrativo de Resultados do Exercício."""
     try:
-        from datetime import datetime
-        from calendar import monthrange
+        from app.financeiro.dre_service import (
+            calcular_dre_periodos, calcular_variacoes, mes_anterior, periodo_ano, periodo_mes
+        )
         
         # Filtros
         ano = request.args.get('ano', type=int, default=date.today().year)
@@ -2009,102 +1934,44 @@ def dre():
         comparacao = request.args.get('comparacao', 'mensal')  # mensal ou anual
         
         # Definir período
+        periodos = {}
         if mes:
             # DRE mensal
-            data_inicio = date(ano, mes, 1)
-            ultimo_dia = monthrange(ano, mes)[1]
-            data_fim = date(ano, mes, ultimo_dia)
-            titulo_periodo = f"{data_inicio.strftime('%B/%Y').capitalize()}"
+            periodos['atual'] = periodo_mes(ano, mes)
+            titulo_periodo = f"{periodos['atual'][0].strftime('%B/%Y').capitalize()}"
         else:
             # DRE anual
-            data_inicio = date(ano, 1, 1)
-            data_fim = date(ano, 12, 31)
+            periodos['atual'] = periodo_ano(ano)
             titulo_periodo = f"Ano {ano}"
         
-        # Buscar lançamentos do período
-        lancamentos = LancamentoFinanceiro.query.filter(
-            LancamentoFinanceiro.data_lancamento >= data_inicio,
-            LancamentoFinanceiro.data_lancamento <= data_fim,
-            LancamentoFinanceiro.ativo == True
-        ).all()
-        
-        # Calcular DRE
-        dre_data = calcular_dre(lancamentos)
-        
         # Comparação com período anterior
+        titulo_comparacao = None
         if comparacao == 'mensal' and mes:
-            # Mês anterior
-            if mes == 1:
-                mes_anterior = 12
-                ano_anterior = ano - 1
-            else:
-                mes_anterior = mes - 1
-                ano_anterior = ano
-            
-            data_inicio_ant = date(ano_anterior, mes_anterior, 1)
-            ultimo_dia_ant = monthrange(ano_anterior, mes_anterior)[1]
-            data_fim_ant = date(ano_anterior, mes_anterior, ultimo_dia_ant)
-            
-            lancamentos_ant = LancamentoFinanceiro.query.filter(
-                LancamentoFinanceiro.data_lancamento >= data_inicio_ant,
-                LancamentoFinanceiro.data_lancamento <= data_fim_ant,
-                LancamentoFinanceiro.ativo == True
-            ).all()
-            
-            dre_anterior = calcular_dre(lancamentos_ant)
-            titulo_comparacao = f"{data_inicio_ant.strftime('%B/%Y').capitalize()}"
-            
+            periodos['anterior'] = periodo_mes(*mes_anterior(ano, mes))
+            titulo_comparacao = f"{periodos['anterior'][0].strftime('%B/%Y').capitalize()}"
         elif comparacao == 'anual':
-            # Ano anterior
-            data_inicio_ant = date(ano - 1, 1, 1)
-            data_fim_ant = date(ano - 1, 12, 31)
-            
-            lancamentos_ant = LancamentoFinanceiro.query.filter(
-                LancamentoFinanceiro.data_lancamento >= data_inicio_ant,
-                LancamentoFinanceiro.data_lancamento <= data_fim_ant,
-                LancamentoFinanceiro.ativo == True
-            ).all()
-            
-            dre_anterior = calcular_dre(lancamentos_ant)
+            periodos['anterior'] = periodo_ano(ano - 1)
             titulo_comparacao = f"Ano {ano - 1}"
-        else:
-            dre_anterior = None
-            titulo_comparacao = None
+        
+        # DRE mensal (todos os meses do ano)
+        if not mes:
+            for m in range(1, 13):
+                periodos[m] = periodo_mes(ano, m)
+        
+        # Todos os períodos saem de uma única consulta agregada
+        resultados = calcular_dre_periodos(periodos)
+        dre_data = resultados['atual']
+        dre_anterior = resultados.get('anterior')
         
         # Calcular variações
-        variacoes = {}
-        if dre_anterior:
-            for key in dre_data.keys():
-                valor_atual = dre_data[key]
-                valor_anterior = dre_anterior[key]
-                
-                if valor_anterior != 0:
-                    variacao_percentual = ((valor_atual - valor_anterior) / abs(valor_anterior)) * 100
-                else:
-                    variacao_percentual = 100 if valor_atual > 0 else 0
-                
-                variacoes[key] = {
-                    'valor': valor_atual - valor_anterior,
-                    'percentual': variacao_percentual
-                }
+        variacoes = calcular_variacoes(dre_data, dre_anterior) if dre_anterior else {}
         
-        # DRE mensal (todos os meses do ano)
         dre_mensal = []
         if not mes:
             for m in range(1, 13):
-                data_ini_mes = date(ano, m, 1)
-                ultimo_dia_mes = monthrange(ano, m)[1]
-                data_fim_mes = date(ano, m, ultimo_dia_mes)
-                
-                lanc_mes = LancamentoFinanceiro.query.filter(
-                    LancamentoFinanceiro.data_lancamento >= data_ini_mes,
-                    LancamentoFinanceiro.data_lancamento <= data_fim_mes,
-                    LancamentoFinanceiro.ativo == True
-                ).all()
-                
-                dre_mes = calcular_dre(lanc_mes)
+                dre_mes = resultados[m]
                 dre_mes['mes'] = m
-                dre_mes['mes_nome'] = data_ini_mes.strftime('%B').capitalize()
+                dre_mes['mes_nome'] = periodos[m][0].strftime('%B').capitalize()
                 dre_mensal.append(dre_mes)
         
         return render_template('financeiro/dre/dashboard.html',
@@ -2123,90 +1990,6 @@ def dre():
         return redirect(url_for('financeiro.dashboard'))
 
 
-def calcular_dre(lancamentos):
-    """Calcula DRE a partir de uma lista de lançamentos."""
-    
-    # Categorias de receitas
-    categorias_receita = ['Vendas', 'Serviços', 'Receitas Diversas', 'Receitas Financeiras']
-    
-    # Categorias de deduções
-    categorias_deducoes = ['Impostos sobre Vendas', 'Devoluções', 'Descontos Concedidos']
-    
-    # Categorias de custos
-    categorias_custos = ['Custo de Mercadorias', 'Custo de Serviços', 'Matéria-Prima']
-    
-    # Categorias de despesas operacionais
-    categorias_despesas = ['Aluguel', 'Salários', 'Encargos', 'Energia', 'Água', 
-                          'Internet', 'Telefone', 'Software', 'Manutenção', 
-                          'Marketing', 'Contabilidade', 'Administrativas']
-    
-    # Categorias financeiras
-    categorias_financeiras = ['Juros Pagos', 'Juros Recebidos', 'Despesas Bancárias']
-    
-    # Inicializar valores
-    receita_bruta = Decimal('0.00')
-    deducoes = Decimal('0.00')
-    custos = Decimal('0.00')
-    despesas_operacionais = Decimal('0.00')
-    receitas_financeiras = Decimal('0.00')
-    despesas_financeiras = Decimal('0.00')
-    
-    # Processar lançamentos
-    for lanc in lancamentos:
-        valor = lanc.valor
-        categoria = lanc.categoria or ''
-        
-        if lanc.tipo == 'RECEITA':
-            if categoria in categorias_deducoes:
-                deducoes += valor
-            elif categoria in categorias_financeiras or 'Juros Recebidos' in categoria:
-                receitas_financeiras += valor
-            else:
-                receita_bruta += valor
-        
-        elif lanc.tipo == 'DESPESA':
-            if categoria in categorias_custos:
-                custos += valor
-            elif categoria in categorias_financeiras or 'Juros' in categoria or 'Bancár' in categoria:
-                despesas_financeiras += valor
-            elif categoria in categorias_despesas or categoria in categorias_deducoes:
-                if categoria in categorias_deducoes:
-                    deducoes += valor
-                else:
-                    despesas_operacionais += valor
-            else:
-                despesas_operacionais += valor
-    
-    # Cálculos do DRE
-    receita_liquida = receita_bruta - deducoes
-    lucro_bruto = receita_liquida - custos
-    lucro_operacional = lucro_bruto - despesas_operacionais
-    resultado_financeiro = receitas_financeiras - despesas_financeiras
-    lucro_liquido = lucro_operacional + resultado_financeiro
-    
-    # Margens (%)
-    margem_bruta = (lucro_bruto / receita_liquida * 100) if receita_liquida > 0 else 0
-    margem_operacional = (lucro_operacional / receita_liquida * 100) if receita_liquida > 0 else 0
-    margem_liquida = (lucro_liquido / receita_liquida * 100) if receita_liquida > 0 else 0
-    
-    return {
-        'receita_bruta': receita_bruta,
-        'deducoes': deducoes,
-        'receita_liquida': receita_liquida,
-        'custos': custos,
-        'lucro_bruto': lucro_bruto,
-        'despesas_operacionais': despesas_operacionais,
-        'lucro_operacional': lucro_operacional,
-        'receitas_financeiras': receitas_financeiras,
-        'despesas_financeiras': despesas_financeiras,
-        'resultado_financeiro': resultado_financeiro,
-        'lucro_liquido': lucro_liquido,
-        'margem_bruta': margem_bruta,
-        'margem_operacional': margem_operacional,
-        'margem_liquida': margem_liquida
-    }
-
-
 @bp_financeiro.route('/dre/exportar-excel')
 def exportar_dre_excel():
     """Exportar DRE para Excel."""
@@ -2214,7 +1997,7 @@ def exportar_dre_excel():
         from io import BytesIO
         import openpyxl
         from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-        from calendar import monthrange
+        from app.financeiro.dre_service import calcular_dre_periodos, periodo_ano, periodo_mes
         
         # Filtros
         ano = request.args.get('ano', type=int, default=date.today().year)
@@ -2222,23 +2005,13 @@ def exportar_dre_excel():
         
         # Definir período
         if mes:
-            data_inicio = date(ano, mes, 1)
-            ultimo_dia = monthrange(ano, mes)[1]
-            data_fim = date(ano, mes, ultimo_dia)
-            titulo_periodo = f"{data_inicio.strftime('%B/%Y').capitalize()}"
+            periodo = periodo_mes(ano, mes)
+            titulo_periodo = f"{periodo[0].strftime('%B/%Y').capitalize()}"
         else:
-            data_inicio = date(ano, 1, 1)
-            data_fim = date(ano, 12, 31)
+            periodo = periodo_ano(ano)
             titulo_periodo = f"Ano {ano}"
         
-        # Buscar lançamentos
-        lancamentos = LancamentoFinanceiro.query.filter(
-            LancamentoFinanceiro.data_lancamento >= data_inicio,
-            LancamentoFinanceiro.data_lancamento <= data_fim,
-            LancamentoFinanceiro.ativo == True
-        ).all()
-        
-        dre_data = calcular_dre(lancamentos)
+        dre_data = calcular_dre_periodos({'atual': periodo})['atual']
         
         # Criar Excel
         wb = openpyxl.Workbook()
@@ -2594,6 +2367,7 @@ def orcamento_anual_listar():
         query = query.filter(OrcamentoAnual.categoria.like(f'%{categoria}%'))
     
     orcamentos = query.order_by(OrcamentoAnual.mes, OrcamentoAnual.tipo, OrcamentoAnual.categoria).all()
+    OrcamentoAnual.carregar_realizados(orcamentos)
     
     # Estatísticas
     total_orcado_receita = sum(o.valor_orcado for o in orcamentos if o.tipo == 'RECEITA')
@@ -2637,6 +2411,7 @@ def orcamento_anual_dashboard():
     
     # Busca todos os orçamentos do ano
     orcamentos = OrcamentoAnual.query.filter_by(ano=ano, ativo=True).all()
+    OrcamentoAnual.carregar_realizados(orcamentos)
     
     # Dados para gráficos
     dados_mensais = {}
@@ -2858,6 +2633,7 @@ def orcamento_anual_comparacao():
         OrcamentoAnual.tipo,
         OrcamentoAnual.categoria
     ).all()
+    OrcamentoAnual.carregar_realizados(orcamentos)
     
     # Agrupa por categoria
     categorias = {}
@@ -2914,8 +2690,8 @@ def notas_fiscais_listar():
     data_fim = request.args.get('data_fim', '')
     busca = request.args.get('busca', '')
     
-    # Query base
-    query = NotaFiscal.query
+    # Query base (sem carregar os arquivos XML/PDF)
+    query = NotaFiscal.query_sem_arquivos()
     
     if tipo:
         query = query.filter_by(tipo=tipo)
@@ -2969,8 +2745,8 @@ def notas_fiscais_nova():
     from app.financeiro.financeiro_model import NotaFiscal
     from app.cliente.cliente_model import Cliente
     from app.fornecedor.fornecedor_model import Fornecedor
+    from app.services.armazenamento_service import guardar_conteudo
     from datetime import datetime
-    import base64
     
     if request.method == 'POST':
         try:
@@ -2991,8 +2767,8 @@ def notas_fiscais_nova():
                     flash(f'Erro ao processar XML: {dados_xml["error"]}', 'warning')
                 else:
                     dados_nota = dados_xml
-                    # Salva XML em base64
-                    dados_nota['arquivo_xml'] = base64.b64encode(xml_content).decode('utf-8')
+                    # Salva XML no armazenamento de arquivos (ou base64, sem armazenamento externo)
+                    dados_nota['arquivo_xml'] = guardar_conteudo(xml_content)
                     dados_nota['arquivo_xml_nome'] = arquivo_xml.filename
                     
                     # Determina tipo baseado no CNPJ
@@ -3035,7 +2811,7 @@ def notas_fiscais_nova():
             # Upload de PDF
             if arquivo_pdf and arquivo_pdf.filename:
                 pdf_content = arquivo_pdf.read()
-                nota.arquivo_pdf = base64.b64encode(pdf_content).decode('utf-8')
+                nota.arquivo_pdf = guardar_conteudo(pdf_content)
                 nota.arquivo_pdf_nome = arquivo_pdf.filename
             
             db.session.add(nota)
@@ -3167,7 +2943,7 @@ def notas_fiscais_criar_lancamento(id):
 def notas_fiscais_download(id, tipo):
     """Download de arquivo XML ou PDF."""
     from app.financeiro.financeiro_model import NotaFiscal
-    import base64
+    from app.services.armazenamento_service import ler_conteudo
     
     nota = NotaFiscal.query.get_or_404(id)
     
@@ -3177,7 +2953,7 @@ def notas_fiscais_download(id, tipo):
                 flash('Nota não possui arquivo XML!', 'warning')
                 return redirect(url_for('financeiro.notas_fiscais_visualizar', id=id))
             
-            arquivo_bytes = base64.b64decode(nota.arquivo_xml)
+            arquivo_bytes = ler_conteudo(nota.arquivo_xml)
             filename = nota.arquivo_xml_nome or f'NF_{nota.numero_completo}.xml'
             
             return send_file(
@@ -3192,7 +2968,7 @@ def notas_fiscais_download(id, tipo):
                 flash('Nota não possui arquivo PDF!', 'warning')
                 return redirect(url_for('financeiro.notas_fiscais_visualizar', id=id))
             
-            arquivo_bytes = base64.b64decode(nota.arquivo_pdf)
+            arquivo_bytes = ler_conteudo(nota.arquivo_pdf)
             filename = nota.arquivo_pdf_nome or f'NF_{nota.numero_completo}.pdf'
             
             return send_file(
@@ -3218,7 +2994,8 @@ def notas_fiscais_galeria():
     ano = request.args.get('ano', datetime.now().year, type=int)
     tipo = request.args.get('tipo', '')
     
-    query = NotaFiscal.query
+    # Galeria só mostra se há XML/PDF: não carrega os arquivos em base64
+    query = NotaFiscal.query_sem_arquivos()
     
     if mes:
         data_inicio = datetime(ano, mes, 1).date()
@@ -3328,13 +3105,13 @@ def marcar_todas_lidas():
 
 @bp_financeiro.route('/notificacoes/verificar-alertas', methods=['POST'])
 def verificar_alertas():
-    """Executa verificação manual de alertas."""
+    """Executa verificação manual de alertas (a varredura também roda agendada)."""
     try:
         from app.financeiro.financeiro_model import Notificacao
         
-        notificacoes = Notificacao.verificar_todas()
+        criadas = Notificacao.verificar_todas()
         
-        flash(f'{len(notificacoes)} novas notificações criadas!', 'success')
+        flash(f'{criadas} novas notificações criadas!', 'success')
         return redirect(url_for('financeiro.notificacoes'))
     
     except Exception as e:
@@ -3390,7 +3167,6 @@ def nova_importacao_lote():
     if request.method == 'POST':
         try:
             from app.financeiro.financeiro_model import ImportacaoLote
-            import pandas as pd
             import os
             from werkzeug.utils import secure_filename
             
@@ -3410,7 +3186,8 @@ def nova_importacao_lote():
             upload_folder = os.path.join('app', 'static', 'uploads', 'importacoes')
             os.makedirs(upload_folder, exist_ok=True)
             
-            filepath = os.path.join(upload_folder, filename)
+            # Prefixo de data/hora evita sobrescrever um arquivo ainda em processamento
+            filepath = os.path.join(upload_folder, f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{filename}")
             arquivo.save(filepath)
             
             # Detectar tipo
@@ -3426,79 +3203,21 @@ def nova_importacao_lote():
             db.session.add(importacao)
             db.session.commit()
             
-            # Processar arquivo
-            try:
-                if tipo_arquivo == 'EXCEL':
-                    df = pd.read_excel(filepath)
-                else:
-                    df = pd.read_csv(filepath)
-                
-                importacao.total_linhas = len(df)
-                
-                # Obter mapeamento de colunas do form
-                mapa = {
-                    'data': request.form.get('col_data'),
-                    'descricao': request.form.get('col_descricao'),
-                    'valor': request.form.get('col_valor'),
-                    'tipo': request.form.get('col_tipo'),
-                }
-                
-                erros = []
-                sucesso = 0
-                
-                # Importar cada linha
-                for idx, row in df.iterrows():
-                    try:
-                        # Converter data
-                        data_lanc = pd.to_datetime(row[mapa['data']]).date()
-                        
-                        # Criar lançamento
-                        lancamento = LancamentoFinanceiro(
-                            descricao=str(row[mapa['descricao']]),
-                            valor=converter_valor_monetario(str(row[mapa['valor']])),
-                            tipo=str(row[mapa['tipo']]).upper(),
-                            data_lancamento=data_lanc,
-                            data_vencimento=data_lanc,
-                            status='pendente'
-                        )
-                        
-                        db.session.add(lancamento)
-                        sucesso += 1
-                    
-                    except Exception as e:
-                        erros.append({
-                            'linha': idx + 2,  # +2 porque linha 1 é cabeçalho e idx começa em 0
-                            'erro': str(e)
-                        })
-                
-                # Salvar
-                db.session.commit()
-                
-                # Atualizar importação
-                importacao.linhas_importadas = sucesso
-                importacao.linhas_erro = len(erros)
-                
-                if len(erros) > 0:
-                    import json
-                    importacao.erros_detalhes = json.dumps(erros)
-                    importacao.status = 'PARCIAL' if sucesso > 0 else 'ERRO'
-                else:
-                    importacao.status = 'CONCLUIDA'
-                
-                importacao.finalizar(importacao.status)
-                
-                flash(f'Importação concluída! {sucesso} lançamentos importados, {len(erros)} erros.', 
-                      'success' if len(erros) == 0 else 'warning')
-                
-                return redirect(url_for('financeiro.importacao_lote'))
+            # Mapeamento de colunas do form
+            mapa = {
+                'data': request.form.get('col_data'),
+                'descricao': request.form.get('col_descricao'),
+                'valor': request.form.get('col_valor'),
+                'tipo': request.form.get('col_tipo'),
+            }
             
-            except Exception as e:
-                importacao.status = 'ERRO'
-                importacao.erros_detalhes = str(e)
-                importacao.finalizar('ERRO')
-                
-                flash(f'Erro ao processar arquivo: {str(e)}', 'danger')
-                return redirect(url_for('financeiro.importacao_lote'))
+            # Processar em segundo plano (leitura em blocos + inserção em massa)
+            from app.financeiro.importacao_lote_service import iniciar_importacao_lote
+            iniciar_importacao_lote(importacao, mapa)
+            
+            flash('Arquivo recebido! A importação está em processamento; '
+                  'acompanhe o progresso na listagem.', 'info')
+            return redirect(url_for('financeiro.importacao_lote'))
         
         except Exception as e:
             flash(f'Erro: {str(e)}', 'danger')
@@ -3531,6 +3250,29 @@ def detalhes_importacao(id):
         return redirect(url_for('financeiro.importacao_lote'))
 
 
+@bp_financeiro.route('/api/importacao-lote/<int:id>/progresso')
+def api_progresso_importacao(id):
+    """API: progresso de uma importação em andamento."""
+    from app.financeiro.financeiro_model import ImportacaoLote
+    
+    importacao = ImportacaoLote.query.get_or_404(id)
+    processadas = (importacao.linhas_importadas or 0) + (importacao.linhas_erro or 0)
+    total = importacao.total_linhas or 0
+    
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'id': importacao.id,
+            'status': importacao.status,
+            'total_linhas': total,
+            'linhas_importadas': importacao.linhas_importadas or 0,
+            'linhas_erro': importacao.linhas_erro or 0,
+            'percentual': round(processadas / total * 100, 1) if total else 0,
+            'finalizada': importacao.status != 'PROCESSANDO',
+        }
+    })
+
+
 # ============================================================
 # RATEIO DE DESPESAS
 # ============================================================
@@ -3720,18 +3462,25 @@ def novo_relatorio_customizado():
 
 @bp_financeiro.route('/relatorios-customizados/<int:id>/executar')
 def executar_relatorio_customizado(id):
-    """Executa relatório customizado."""
+    """Executa relatório customizado (paginado por cursor: ?apos=...&por_pagina=...)."""
     try:
         from app.financeiro.financeiro_model import RelatorioCustomizado
+        from app.financeiro.relatorio_customizado_service import labels_colunas
         
         relatorio = RelatorioCustomizado.query.get_or_404(id)
         
-        # Executar relatório
-        dados = relatorio.executar()
+        # Executar relatório (uma página)
+        pagina = relatorio.executar(
+            cursor=request.args.get('apos') or None,
+            limite=request.args.get('por_pagina', type=int)
+        )
         
         return render_template('financeiro/relatorios_customizados/resultado.html',
                              relatorio=relatorio,
-                             dados=dados)
+                             dados=pagina.linhas,
+                             colunas=pagina.colunas,
+                             labels=labels_colunas(relatorio, pagina.colunas),
+                             proximo_cursor=pagina.proximo_cursor)
     
     except Exception as e:
         flash(f'Erro ao executar relatório: {str(e)}', 'danger')
@@ -3740,53 +3489,37 @@ def executar_relatorio_customizado(id):
 
 @bp_financeiro.route('/relatorios-customizados/<int:id>/exportar/<formato>')
 def exportar_relatorio_customizado(id, formato):
-    """Exporta relatório customizado."""
+    """Exporta relatório customizado (CSV em streaming, Excel write-only)."""
     try:
         from app.financeiro.financeiro_model import RelatorioCustomizado
-        from io import BytesIO
-        import openpyxl
+        from app.financeiro.relatorio_customizado_service import gerar_csv, gerar_xlsx
+        from flask import Response, stream_with_context
+        import tempfile
         
         relatorio = RelatorioCustomizado.query.get_or_404(id)
-        dados = relatorio.executar()
-        
-        if formato == 'excel':
-            # Criar Excel
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = relatorio.nome[:31]  # Limite de 31 caracteres
-            
-            # Cabeçalho
-            ws.append([relatorio.nome])
-            ws.append([])
-            
-            # Dados
-            if len(dados) > 0:
-                # Obter campos
-                campos = relatorio.get_campos_lista()
-                
-                # Cabeçalhos das colunas
-                ws.append(campos)
-                
-                # Linhas de dados
-                for item in dados:
-                    linha = []
-                    for campo in campos:
-                        valor = getattr(item, campo, '')
-                        linha.append(str(valor))
-                    ws.append(linha)
-            
-            # Salvar
-            output = BytesIO()
-            wb.save(output)
-            output.seek(0)
+        nome_arquivo = (relatorio.nome or 'relatorio').replace(' ', '_')
+        
+        if formato == 'csv':
+            relatorio.registrar_execucao()
+            return Response(
+                stream_with_context(gerar_csv(relatorio)),
+                mimetype='text/csv; charset=utf-8',
+                headers={'Content-Disposition': f'attachment; filename="{nome_arquivo}.csv"'}
+            )
+        
+        elif formato == 'excel':
+            relatorio.registrar_execucao()
             
-            filename = f'{relatorio.nome.replace(" ", "_")}.xlsx'
+            # Planilhas grandes vão para disco em vez de ficar em memória
+            output = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+            gerar_xlsx(relatorio, output)
+            output.seek(0)
             
             return send_file(
                 output,
                 mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
                 as_attachment=True,
-                download_name=filename
+                download_name=f'{nome_arquivo}.xlsx'
             )
         
         else:
@@ -216,17 +216,18 @@ def calcular_metricas_dashboard():
         receita_mes = float(r[6] or 0)
         qtd_ordens_mes = int(r[7] or 0)
 
-        # === LANÇAMENTOS FINANCEIROS (SQL puro) ===
+        # === LANÇAMENTOS FINANCEIROS (SQL puro sobre o rollup mensal) ===
+        # 'pagamento' = mês de data_pagamento; 'competencia' cobre todo lançamento ativo
         rf = db.session.execute(text("""
             SELECT
-                COALESCE(SUM(valor) FILTER (WHERE ativo = true AND tipo IN ('receita','conta_receber') AND status = 'recebido' AND data_pagamento >= :p1 AND data_pagamento < :p2), 0) AS receitas_mes,
-                COALESCE(SUM(valor) FILTER (WHERE ativo = true AND tipo IN ('despesa','conta_pagar') AND status = 'pago' AND data_pagamento >= :p1 AND data_pagamento < :p2), 0) AS despesas_mes,
-                COALESCE(SUM(valor) FILTER (WHERE ativo = true AND tipo = 'conta_receber' AND status = 'pendente'), 0) AS contas_receber,
-                COUNT(*) FILTER (WHERE ativo = true AND tipo = 'conta_receber' AND status = 'pendente') AS qtd_receber,
-                COALESCE(SUM(valor) FILTER (WHERE ativo = true AND tipo = 'conta_pagar' AND status = 'pendente'), 0) AS contas_pagar,
-                COUNT(*) FILTER (WHERE ativo = true AND tipo = 'conta_pagar' AND status = 'pendente') AS qtd_pagar
-            FROM lancamentos_financeiros
-        """), {"p1": primeiro_dia_mes, "p2": ultimo_dia_mes}).first()
+                COALESCE(SUM(valor_total) FILTER (WHERE referencia = 'pagamento' AND ano = :ano AND mes = :mes AND tipo IN ('receita','conta_receber') AND status = 'recebido'), 0) AS receitas_mes,
+                COALESCE(SUM(valor_total) FILTER (WHERE referencia = 'pagamento' AND ano = :ano AND mes = :mes AND tipo IN ('despesa','conta_pagar') AND status = 'pago'), 0) AS despesas_mes,
+                COALESCE(SUM(valor_total) FILTER (WHERE referencia = 'competencia' AND tipo = 'conta_receber' AND status = 'pendente'), 0) AS contas_receber,
+                COALESCE(SUM(quantidade) FILTER (WHERE referencia = 'competencia' AND tipo = 'conta_receber' AND status = 'pendente'), 0) AS qtd_receber,
+                COALESCE(SUM(valor_total) FILTER (WHERE referencia = 'competencia' AND tipo = 'conta_pagar' AND status = 'pendente'), 0) AS contas_pagar,
+                COALESCE(SUM(quantidade) FILTER (WHERE referencia = 'competencia' AND tipo = 'conta_pagar' AND status = 'pendente'), 0) AS qtd_pagar
+            FROM saldos_mensais_lancamentos
+        """), {"ano": hoje.year, "mes": hoje.month}).first()
 
         total_receitas_mes = float(rf[0] or 0)
         total_despesas_mes = float(rf[1] or 0)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Projeção de Fluxo de Caixa
+=====================================
+
+Motor único usado pelo dashboard de fluxo de caixa e pela exportação
+em Excel.
+
+Os lançamentos em aberto são agregados no banco por data de vencimento
+(e conta bancária), e a projeção dia a dia é montada em uma única
+passagem sobre o horizonte: O(dias + grupos) em vez de O(dias × lançamentos).
+Horizontes de 365 dias ou mais ficam baratos, e apenas os primeiros dias
+carregam o detalhe dos lançamentos (como dicionários simples, sem ORM).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+
+from app.extensoes import db
+from app.financeiro.financeiro_compat import STATUS_PAGO, TIPOS_DESPESA, TIPOS_RECEITA
+from app.financeiro.financeiro_model import ContaBancaria, LancamentoFinanceiro
+
+# Horizonte padrão e máximo aceitos pelas rotas (dias)
+HORIZONTE_PADRAO_DIAS = 30
+HORIZONTE_MAXIMO_DIAS = 730
+
+# Quantidade de dias com detalhe de lançamentos (tabela detalhada do dashboard)
+DIAS_DETALHADOS_PADRAO = 30
+
+# Status que não geram movimento futuro
+_STATUS_SEM_MOVIMENTO = set(STATUS_PAGO) | {'cancelado', 'cancelada'}
+
+
+def normalizar_horizonte(periodo, padrao=HORIZONTE_PADRAO_DIAS) -> int:
+    """
+    Converte o parâmetro `periodo` (dias) em horizonte válido.
+
+    Args:
+        periodo: Valor recebido na query string ('30', '365', ...)
+        padrao: Horizonte usado quando o valor é inválido
+
+    Returns:
+        int: Dias entre 1 e HORIZONTE_MAXIMO_DIAS
+    """
+    try:
+        dias = int(periodo)
+    except (TypeError, ValueError):
+        return padrao
+    if dias <= 0:
+        return padrao
+    return min(dias, HORIZONTE_MAXIMO_DIAS)
+
+
+def _normalizado(coluna):
+    return func.lower(func.trim(func.coalesce(coluna, '')))
+
+
+class ProjecaoFluxoCaixa:
+    """
+    Projeção diária de saldo a partir dos saldos das contas e dos
+    lançamentos em aberto.
+
+    Uso:
+        projecao = ProjecaoFluxoCaixa(dias=365, conta_id=None).calcular()
+        projecao.dias        # lista de dicts por dia
+        projecao.por_conta   # saldos acumulados por conta (opcional)
+    """
+
+    def __init__(self, dias: int = HORIZONTE_PADRAO_DIAS, conta_id: Optional[int] = None,
+                 data_inicio: Optional[date] = None, dias_detalhados: int = DIAS_DETALHADOS_PADRAO,
+                 por_conta: bool = False):
+        self.data_inicio = data_inicio or date.today()
+        self.data_fim = self.data_inicio + timedelta(days=dias)
+        self.conta_id = conta_id
+        self.dias_detalhados = max(int(dias_detalhados or 0), 0)
+        self.calcular_por_conta = por_conta
+
+        self.saldo_inicial = Decimal('0')
+        self.saldos_iniciais_conta: Dict[Optional[int], Decimal] = {}
+        self.dias: List[dict] = []
+        self.por_conta: Dict[Optional[int], List[Decimal]] = {}
+
+    # ===== CONSULTAS =====
+
+    def _filtro_lancamentos(self):
+        lanc = LancamentoFinanceiro
+        filtros = [
+            lanc.ativo.is_(True),
+            lanc.data_vencimento >= self.data_inicio,
+            lanc.data_vencimento <= self.data_fim,
+            ~_normalizado(lanc.status).in_(_STATUS_SEM_MOVIMENTO),
+        ]
+        if self.conta_id:
+            filtros.append(lanc.conta_bancaria_id == self.conta_id)
+        return filtros
+
+    def _carregar_saldos_iniciais(self):
+        query = db.session.query(ContaBancaria.id, ContaBancaria.saldo_atual).filter(
+            ContaBancaria.ativo.is_(True)
+        )
+        if self.conta_id:
+            query = query.filter(ContaBancaria.id == self.conta_id)
+
+        self.saldos_iniciais_conta = {
+            conta_id: Decimal(str(saldo or 0)) for conta_id, saldo in query.all()
+        }
+        self.saldo_inicial = sum(self.saldos_iniciais_conta.values(), Decimal('0'))
+
+    def _agregar_movimentos(self):
+        """Soma receitas e despesas por (data, conta) em uma única consulta."""
+        lanc = LancamentoFinanceiro
+        tipo = _normalizado(lanc.tipo)
+        receitas = func.coalesce(func.sum(case((tipo.in_(TIPOS_RECEITA), lanc.valor), else_=0)), 0)
+        despesas = func.coalesce(func.sum(case((tipo.in_(TIPOS_DESPESA), lanc.valor), else_=0)), 0)
+
+        linhas = db.session.query(
+            lanc.data_vencimento, lanc.conta_bancaria_id, receitas, despesas,
+        ).filter(*self._filtro_lancamentos()).group_by(
+            lanc.data_vencimento, lanc.conta_bancaria_id
+        ).all()
+
+        movimentos = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+        movimentos_conta = defaultdict(lambda: defaultdict(Decimal))
+        for data_venc, conta_id, receita, despesa in linhas:
+            receita = Decimal(str(receita or 0))
+            despesa = Decimal(str(despesa or 0))
+            movimentos[data_venc][0] += receita
+            movimentos[data_venc][1] += despesa
+            if self.calcular_por_conta:
+                movimentos_conta[conta_id][data_venc] += receita - despesa
+        return movimentos, movimentos_conta
+
+    def _carregar_detalhes(self):
+        """Detalhe leve (dicts) apenas dos primeiros `dias_detalhados` dias."""
+        detalhes = defaultdict(list)
+        if not self.dias_detalhados:
+            return detalhes
+
+        lanc = LancamentoFinanceiro
+        limite = min(self.data_fim, self.data_inicio + timedelta(days=self.dias_detalhados - 1))
+        linhas = db.session.query(
+            lanc.data_vencimento, lanc.descricao, lanc.tipo, lanc.valor, lanc.categoria,
+        ).filter(
+            *self._filtro_lancamentos(), lanc.data_vencimento <= limite
+        ).order_by(lanc.data_vencimento, lanc.id).all()
+
+        for data_venc, descricao, tipo, valor, categoria in linhas:
+            detalhes[data_venc].append({
+                'descricao': descricao,
+                'tipo': tipo,
+                'valor': float(valor or 0),
+                'categoria': categoria,
+            })
+        return detalhes
+
+    # ===== CÁLCULO =====
+
+    def calcular(self) -> 'ProjecaoFluxoCaixa':
+        """Executa as consultas e monta a projeção dia a dia."""
+        self._carregar_saldos_iniciais()
+        movimentos, movimentos_conta = self._agregar_movimentos()
+        detalhes = self._carregar_detalhes()
+
+        self.dias = []
+        saldo_acumulado = self.saldo_inicial
+        total_dias = (self.data_fim - self.data_inicio).days + 1
+        for deslocamento in range(total_dias):
+            data_atual = self.data_inicio + timedelta(days=deslocamento)
+            receitas_dia, despesas_dia = movimentos.get(data_atual, (Decimal('0'), Decimal('0')))
+            saldo_dia = receitas_dia - despesas_dia
+            saldo_acumulado += saldo_dia
+            self.dias.append({
+                'data': data_atual,
+                'receitas': float(receitas_dia),
+                'despesas': float(despesas_dia),
+                'saldo_dia': float(saldo_dia),
+                'saldo_acumulado': float(saldo_acumulado),
+                'lancamentos': detalhes.get(data_atual, []),
+            })
+
+        if self.calcular_por_conta:
+            self.por_conta = self._projetar_por_conta(movimentos_conta, total_dias)
+        return self
+
+    def _projetar_por_conta(self, movimentos_conta, total_dias):
+        """Saldo acumulado diário por conta (None = lançamentos sem conta)."""
+        contas = set(self.saldos_iniciais_conta) | set(movimentos_conta)
+        projecao = {}
+        for conta_id in contas:
+            saldo = self.saldos_iniciais_conta.get(conta_id, Decimal('0'))
+            deltas = movimentos_conta.get(conta_id, {})
+            serie = []
+            for deslocamento in range(total_dias):
+                saldo += deltas.get(self.data_inicio + timedelta(days=deslocamento), Decimal('0'))
+                serie.append(saldo)
+            projecao[conta_id] = serie
+        return projecao
+
+    # ===== RESUMOS =====
+
+    @property
+    def total_receitas(self) -> float:
+        return sum(d['receitas'] for d in self.dias)
+
+    @property
+    def total_despesas(self) -> float:
+        return sum(d['despesas'] for d in self.dias)
+
+    @property
+    def saldo_final(self) -> float:
+        return self.dias[-1]['saldo_acumulado'] if self.dias else float(self.saldo_inicial)
+
+    @property
+    def alertas(self) -> List[dict]:
+        """Dias com saldo acumulado negativo."""
+        return [d for d in self.dias if d['saldo_acumulado'] < 0]
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Importação em Lote de Lançamentos
+============================================
+
+Pipeline para planilhas grandes (centenas de milhares de linhas):
+
+- o arquivo é lido em blocos (CSV via `chunksize`, XLSX em modo read-only);
+- datas, valores no formato brasileiro e tipos são convertidos coluna a
+  coluna com operações vetorizadas do pandas, sem `iterrows`;
+- cada bloco é gravado com `bulk_insert_mappings` e confirmado em sua
+  própria transação, junto com o progresso em ImportacaoLote;
+- o processamento roda em um worker de segundo plano, liberando a
+  requisição imediatamente.
+
+O worker é um ThreadPoolExecutor por processo: importações em andamento
+são perdidas se o processo for reiniciado (ficam com status PROCESSANDO).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from app.extensoes import db
+from app.financeiro.financeiro_compat import TIPOS_DESPESA, TIPOS_RECEITA
+from app.financeiro.financeiro_model import ImportacaoLote, LancamentoFinanceiro
+from app.financeiro.saldo_mensal_model import registrar_lancamentos_em_massa
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_BLOCO_PADRAO = 5000
+
+# Máximo de erros detalhados gravados em erros_detalhes
+LIMITE_ERROS_DETALHADOS = 1000
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+# ===== CONVERSÕES VETORIZADAS =====
+
+def converter_datas(serie: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna para datas (DD/MM/AAAA, AAAA-MM-DD ou datas do Excel).
+
+    Valores inválidos viram NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+
+    texto = serie.astype('string').str.strip()
+    datas = pd.to_datetime(texto, format='%d/%m/%Y', errors='coerce')
+    for formato in ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%y', '%d-%m-%Y'):
+        faltantes = datas.isna() & texto.notna()
+        if not faltantes.any():
+            break
+        datas = datas.fillna(pd.to_datetime(texto.where(faltantes), format=formato, errors='coerce'))
+
+    # Células do Excel já vêm como datetime/date
+    objetos = datas.isna() & serie.map(lambda v: hasattr(v, 'year'))
+    if objetos.any():
+        datas = datas.fillna(pd.to_datetime(serie.where(objetos), errors='coerce'))
+    return datas
+
+
+def converter_valores(serie: pd.Series) -> pd.Series:
+    """
+    Converte valores monetários ('R$ 1.234,56', '1234,56', '1234.56', números).
+
+    Valores inválidos viram NaN.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype('float64')
+
+    texto = serie.astype('string').str.replace('R$', '', regex=False).str.replace(r'\s', '', regex=True)
+    negativo = texto.str.match(r'^\(.*\)$').fillna(False)
+    texto = texto.str.strip('()')
+
+    com_virgula = texto.str.contains(',', regex=False).fillna(False)
+    so_milhar = ~com_virgula & texto.str.contains(r'\.\d{3}(?:\.|$)', regex=True).fillna(False)
+
+    texto = texto.mask(com_virgula, texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    texto = texto.mask(so_milhar, texto.str.replace('.', '', regex=False))
+
+    valores = pd.to_numeric(texto, errors='coerce')
+    return valores.mask(negativo, -valores.abs())
+
+
+def normalizar_tipos(serie: pd.Series, valores: pd.Series) -> pd.Series:
+    """
+    Normaliza a coluna de tipo para 'receita'/'despesa'.
+
+    Sem tipo informado, o sinal do valor decide (negativo = despesa).
+    Tipos não reconhecidos viram NA.
+    """
+    texto = serie.astype('string').str.strip().str.lower()
+    tipos = pd.Series(pd.NA, index=serie.index, dtype='string')
+    tipos = tipos.mask(texto.isin(TIPOS_RECEITA), 'receita')
+    tipos = tipos.mask(texto.isin(TIPOS_DESPESA), 'despesa')
+
+    vazio = texto.isna() | (texto == '')
+    tipos = tipos.mask(vazio & (valores < 0), 'despesa')
+    tipos = tipos.mask(vazio & (valores >= 0), 'receita')
+    return tipos
+
+
+# ===== LEITURA EM BLOCOS =====
+
+def _separador_csv(caminho: str) -> str:
+    with open(caminho, 'r', encoding='utf-8-sig', errors='replace') as arquivo:
+        cabecalho = arquivo.readline()
+    return ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+
+
+def _contar_linhas(caminho: str, tipo_arquivo: str) -> int:
+    if tipo_arquivo == 'EXCEL' and caminho.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        planilha = load_workbook(caminho, read_only=True)
+        try:
+            return max((planilha.active.max_row or 1) - 1, 0)
+        finally:
+            planilha.close()
+    if tipo_arquivo == 'EXCEL':
+        return 0
+    with open(caminho, 'rb') as arquivo:
+        return max(sum(1 for _ in arquivo) - 1, 0)
+
+
+def ler_blocos(caminho: str, tipo_arquivo: str, tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> Iterator[pd.DataFrame]:
+    """
+    Lê o arquivo em DataFrames de até `tamanho_bloco` linhas.
+
+    O índice de cada bloco é a posição da linha de dados no arquivo
+    (0 = primeira linha após o cabeçalho).
+    """
+    if tipo_arquivo != 'EXCEL':
+        leitor = pd.read_csv(
+            caminho, sep=_separador_csv(caminho), dtype=str, chunksize=tamanho_bloco,
+            encoding='utf-8-sig', skip_blank_lines=False, keep_default_na=False,
+        )
+        for bloco in leitor:
+            yield bloco
+        return
+
+    if not caminho.lower().endswith('.xlsx'):
+        # .xls não tem leitura em streaming
+        df = pd.read_excel(caminho)
+        for inicio in range(0, len(df), tamanho_bloco):
+            yield df.iloc[inicio:inicio + tamanho_bloco]
+        return
+
+    from openpyxl import load_workbook
+    planilha = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = [str(c).strip() if c is not None else '' for c in next(linhas, ())]
+        buffer, inicio = [], 0
+        for linha in linhas:
+            buffer.append(linha[:len(cabecalho)])
+            if len(buffer) >= tamanho_bloco:
+                yield pd.DataFrame(buffer, columns=cabecalho, index=range(inicio, inicio + len(buffer)))
+                inicio += len(buffer)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=cabecalho, index=range(inicio, inicio + len(buffer)))
+    finally:
+        planilha.close()
+
+
+# ===== PROCESSAMENTO =====
+
+def preparar_bloco(bloco: pd.DataFrame, mapa: Dict[str, str]):
+    """
+    Converte um bloco em registros para bulk_insert_mappings.
+
+    Args:
+        bloco: DataFrame lido do arquivo
+        mapa: {'data', 'descricao', 'valor', 'tipo'} -> nome da coluna no arquivo
+
+    Returns:
+        tuple: (registros válidos, lista de erros {'linha', 'erro'})
+    """
+    def coluna(campo):
+        nome = mapa.get(campo)
+        if nome and nome in bloco.columns:
+            return bloco[nome]
+        return pd.Series(pd.NA, index=bloco.index, dtype='string')
+
+    datas = converter_datas(coluna('data'))
+    valores = converter_valores(coluna('valor'))
+    tipos = normalizar_tipos(coluna('tipo'), valores)
+    descricoes = coluna('descricao').astype('string').str.strip().str.slice(0, 255)
+
+    motivos = pd.Series(pd.NA, index=bloco.index, dtype='string')
+    motivos = motivos.mask(tipos.isna(), 'tipo inválido')
+    motivos = motivos.mask(valores.isna(), 'valor inválido')
+    motivos = motivos.mask(descricoes.isna() | (descricoes == ''), 'descrição vazia')
+    motivos = motivos.mask(datas.isna(), 'data inválida')
+    validas = motivos.isna()
+
+    # Linhas em branco no meio do arquivo são ignoradas, não contadas como erro
+    vazias = bloco.astype('string').apply(lambda c: c.fillna('').str.strip() == '').all(axis=1)
+    validas &= ~vazias
+    com_erro = ~validas & ~vazias
+
+    erros = [
+        {'linha': int(posicao) + 2, 'erro': str(motivo)}  # +2: cabeçalho e base 1
+        for posicao, motivo in motivos[com_erro].items()
+    ]
+
+    datas_validas = datas[validas].dt.date
+    agora = datetime.utcnow()
+    registros = [
+        {
+            'descricao': descricao,
+            'valor': round(abs(valor), 2),
+            'tipo': tipo,
+            'status': 'pendente',
+            'data_lancamento': data,
+            'data_vencimento': data,
+            'origem': 'IMPORTACAO',
+            'ativo': True,
+            'criado_em': agora,
+            'atualizado_em': agora,
+        }
+        for descricao, valor, tipo, data in zip(
+            descricoes[validas].tolist(), valores[validas].tolist(),
+            tipos[validas].tolist(), datas_validas.tolist(),
+        )
+    ]
+    return registros, erros
+
+
+def processar_importacao_lote(importacao_id: int, mapa: Dict[str, str],
+                              tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> ImportacaoLote:
+    """
+    Importa o arquivo de uma ImportacaoLote bloco a bloco.
+
+    Cada bloco é confirmado em sua própria transação junto com os
+    contadores de progresso, que podem ser acompanhados enquanto a
+    importação roda.
+    """
+    importacao = db.session.get(ImportacaoLote, importacao_id)
+    erros: List[dict] = []
+    sucesso = 0
+    total_erros = 0
+
+    try:
+        importacao.total_linhas = _contar_linhas(importacao.arquivo_path, importacao.tipo_arquivo)
+        importacao.configuracao = json.dumps(mapa)
+        db.session.commit()
+
+        for bloco in ler_blocos(importacao.arquivo_path, importacao.tipo_arquivo, tamanho_bloco):
+            registros, erros_bloco = preparar_bloco(bloco, mapa)
+            if registros:
+                db.session.bulk_insert_mappings(LancamentoFinanceiro, registros)
+                registrar_lancamentos_em_massa(registros)
+
+            sucesso += len(registros)
+            total_erros += len(erros_bloco)
+            erros.extend(erros_bloco[:max(LIMITE_ERROS_DETALHADOS - len(erros), 0)])
+
+            importacao.linhas_importadas = sucesso
+            importacao.linhas_erro = total_erros
+            importacao.total_linhas = max(importacao.total_linhas or 0, sucesso + total_erros)
+            db.session.commit()
+
+        if erros:
+            importacao.erros_detalhes = json.dumps(erros)
+        status = 'CONCLUIDA' if not total_erros else ('PARCIAL' if sucesso else 'ERRO')
+        importacao.finalizar(status)
+
+    except Exception as e:
+        db.session.rollback()
+        importacao = db.session.get(ImportacaoLote, importacao_id)
+        importacao.erros_detalhes = json.dumps(erros + [{'linha': None, 'erro': str(e)}])
+        importacao.finalizar('PARCIAL' if sucesso else 'ERRO')
+        logger.exception(f'importacao_lote evento=erro importacao_id={importacao_id}')
+
+    try:
+        from app.painel.dashboard_service import invalidar_snapshot_dashboard
+        invalidar_snapshot_dashboard()
+    except Exception:
+        pass
+
+    logger.info(f'importacao_lote evento=concluida importacao_id={importacao_id} '
+                f'importados={sucesso} erros={total_erros}')
+    return importacao
+
+
+def _executar_em_contexto(app, importacao_id, mapa, tamanho_bloco):
+    with app.app_context():
+        try:
+            processar_importacao_lote(importacao_id, mapa, tamanho_bloco)
+        finally:
+            db.session.remove()
+
+
+def iniciar_importacao_lote(importacao: ImportacaoLote, mapa: Dict[str, str],
+                            tamanho_bloco: int = TAMANHO_BLOCO_PADRAO, em_segundo_plano: bool = True):
+    """
+    Dispara o processamento de uma importação já registrada.
+
+    Args:
+        importacao: ImportacaoLote com arquivo salvo e status PROCESSANDO
+        mapa: Mapeamento de colunas do arquivo
+        em_segundo_plano: False processa na thread atual (testes/scripts)
+    """
+    from flask import current_app
+
+    if not em_segundo_plano:
+        return processar_importacao_lote(importacao.id, mapa, tamanho_bloco)
+
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='importacao-lote')
+    return _executor.submit(
+        _executar_em_contexto, current_app._get_current_object(), importacao.id, mapa, tamanho_bloco
+    )
+
@@ -26,14 +26,22 @@ from decimal import Decimal
 import re
 from typing import Optional, List, Iterable
 
+from sqlalchemy import and_, case, exists, func, or_, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.extensoes import db
 from app.financeiro.financeiro_model import LancamentoFinanceiro
 from app.financeiro.financeiro_compat import (
+    STATUS_PAGO,
+    TIPOS_DESPESA,
+    TIPOS_RECEITA,
     decimal_valor,
     normalizar_status,
     normalizar_texto,
     normalizar_tipo,
     status_eh_pago,
 )
+from app.ordem_servico.ordem_servico_model import OrdemServico, OrdemServicoParcela
 
 
 @dataclass
@@ -434,6 +442,97 @@ def resumir_registros_financeiros(
     }
 
 
+# ===== CONSULTAS SQL (Regras aplicadas no banco) =====
+
+def _normalizado(coluna):
+    """Expressão SQL equivalente a `normalizar_chave` (trim + lower)."""
+    return func.lower(func.trim(func.coalesce(coluna, '')))
+
+
+def _condicao_lancamento_valido():
+    """
+    Expressão SQL equivalente a `lancamento_ativo`.
+
+    Regra 6 e 8: exclui lançamentos inativos e os vinculados a OS
+    cancelada ou inativa. Requer OUTER JOIN com `ordem_servico`.
+    """
+    return and_(
+        LancamentoFinanceiro.ativo.is_(True),
+        or_(
+            LancamentoFinanceiro.ordem_servico_id.is_(None),
+            OrdemServico.id.is_(None),
+            and_(
+                _normalizado(OrdemServico.status).notin_(('cancelada', 'cancelado')),
+                OrdemServico.ativo.is_(True),
+            ),
+        ),
+    )
+
+
+def _consulta_lancamentos_validos():
+    """Query ORM de lançamentos válidos com OS e parcelas carregadas em lote."""
+    return (
+        LancamentoFinanceiro.query
+        .outerjoin(OrdemServico, LancamentoFinanceiro.ordem_servico_id == OrdemServico.id)
+        .filter(_condicao_lancamento_valido())
+        .options(
+            joinedload(LancamentoFinanceiro.ordem_servico)
+            .selectinload(OrdemServico.parcelas)
+        )
+    )
+
+
+def _subconsulta_deduplicada():
+    """
+    Subconsulta com um lançamento válido por linha e a marca de deduplicação.
+
+    Reproduz `montar_registro_exibicao` + `_deduplicar_ocorrencias_confiaveis`
+    no banco: a chave confiável vira (tipo_chave, id_chave) e a janela
+    ROW_NUMBER escolhe, por chave, o registro de maior prioridade de fonte
+    (empate resolvido pelo menor id, como na iteração em Python).
+    """
+    lanc = LancamentoFinanceiro
+    os_sem_parcelas = and_(
+        lanc.ordem_servico_id.isnot(None),
+        OrdemServico.id.isnot(None),
+        ~exists().where(OrdemServicoParcela.ordem_servico_id == OrdemServico.id),
+    )
+    tipo_chave = case(
+        (lanc.ordem_servico_parcela_id.isnot(None), 1),
+        (os_sem_parcelas, 2),
+        else_=3,
+    )
+    id_chave = case(
+        (lanc.ordem_servico_parcela_id.isnot(None), lanc.ordem_servico_parcela_id),
+        (os_sem_parcelas, lanc.ordem_servico_id),
+        else_=lanc.id,
+    )
+    prioridade = case(
+        (or_(lanc.origem == 'ORDEM_SERVICO', lanc.ordem_servico_id.isnot(None)), 2),
+        else_=1,
+    )
+    tipo = _normalizado(lanc.tipo)
+
+    return (
+        select(
+            lanc.id.label('id'),
+            lanc.valor.label('valor'),
+            case((tipo.in_(TIPOS_RECEITA), 'Receita'), (tipo.in_(TIPOS_DESPESA), 'Despesa'), else_='').label('tipo'),
+            _normalizado(lanc.status).in_(STATUS_PAGO).label('pago'),
+            lanc.data_pagamento.label('data_pagamento'),
+            func.coalesce(lanc.data_vencimento, lanc.data_lancamento).label('data_base'),
+            func.row_number().over(
+                partition_by=(tipo_chave, id_chave),
+                order_by=(prioridade.desc(), lanc.id.asc()),
+            ).label('ordem_chave'),
+        )
+        .select_from(lanc)
+        .outerjoin(OrdemServico, lanc.ordem_servico_id == OrdemServico.id)
+        .where(_condicao_lancamento_valido())
+        .subquery()
+    )
+
+
 def carregar_registros_financeiros(
     inicio: Optional[date] = None,
     fim: Optional[date] = None,
@@ -445,6 +544,8 @@ def carregar_registros_financeiros(
     Carrega e normaliza registros financeiros com filtros.
 
     Implementa Regra 5: Serviço central para dashboard e listagens.
+    Filtros de tipo e período são aplicados no banco; OS e parcelas
+    são carregadas em lote (sem N+1).
 
     Args:
         inicio: Data inicial do período (opcional)
@@ -458,27 +559,40 @@ def carregar_registros_financeiros(
     filtros_tipo = normalizar_tipo(tipo) if tipo else ''
     filtros_status = normalizar_status(status) if status else ''
 
-    # Carregar todos os lançamentos ativos
-    registros_brutos = list(LancamentoFinanceiro.query.filter_by(ativo=True).all())
+    query = _consulta_lancamentos_validos()
+
+    if filtros_tipo == 'Receita':
+        query = query.filter(_normalizado(LancamentoFinanceiro.tipo).in_(TIPOS_RECEITA))
+    elif filtros_tipo == 'Despesa':
+        query = query.filter(_normalizado(LancamentoFinanceiro.tipo).in_(TIPOS_DESPESA))
+
+    if inicio and fim:
+        # Mesmo critério de RegistroFinanceiroView.data_referencia
+        data_referencia = func.coalesce(
+            LancamentoFinanceiro.data_pagamento,
+            LancamentoFinanceiro.data_vencimento,
+            LancamentoFinanceiro.data_lancamento,
+        )
+        query = query.filter(
+            data_referencia.between(inicio, fim),
+            ~and_(
+                _normalizado(LancamentoFinanceiro.status).in_(STATUS_PAGO),
+                LancamentoFinanceiro.data_pagamento.is_(None),
+            ),
+        )
 
     registros: List[RegistroFinanceiroView] = []
-    for registro in registros_brutos:
+    for registro in query.order_by(LancamentoFinanceiro.id).all():
         view = montar_registro_exibicao(registro)
         if view is None:
             continue
 
-        # Aplicar filtros
+        # Filtros finos sobre a visão normalizada
         if filtros_tipo and view.tipo != filtros_tipo:
             continue
         if filtros_status and view.status != filtros_status:
             continue
 
-        # Filtro de período
-        if inicio and fim:
-            data_referencia = view.data_referencia
-            if data_referencia is None or data_referencia < inicio or data_referencia > fim:
-                continue
-
         registros.append(view)
 
     # Ordenar por data de referência (mais recentes primeiro)
@@ -490,7 +604,10 @@ def resumir_financeiro_periodo(inicio: date, fim: date) -> ResumoFinanceiro:
     """
     Gera resumo financeiro completo de um período.
 
-    Implementa todas as 12 regras de reconciliação.
+    Implementa todas as 12 regras de reconciliação. Filtros, exclusão de
+    OS canceladas e deduplicação por chave confiável rodam no banco, em
+    uma única consulta agregada; apenas as inconsistências são
+    materializadas para detalhamento.
 
     Args:
         inicio: Data inicial do período
@@ -501,59 +618,60 @@ def resumir_financeiro_periodo(inicio: date, fim: date) -> ResumoFinanceiro:
     """
     resumo = ResumoFinanceiro(inicio=inicio, fim=fim)
 
-    # Carregar todos os lançamentos ativos
-    registros = list(LancamentoFinanceiro.query.filter_by(ativo=True).all())
-
-    views: List[RegistroFinanceiroView] = []
-    for registro in registros:
+    base = _subconsulta_deduplicada()
+    unico_consistente = and_(
+        base.c.ordem_chave == 1,
+        or_(~base.c.pago, base.c.data_pagamento.isnot(None)),
+    )
+    # Regra 1: Realizado por data_pagamento dentro do período
+    realizado = and_(unico_consistente, base.c.pago, base.c.data_pagamento.between(inicio, fim))
+    # Regra 2: Pendente por data_vencimento dentro do período
+    pendente = and_(unico_consistente, ~base.c.pago, base.c.data_base.between(inicio, fim))
+    receita = base.c.tipo == 'Receita'
+    despesa = base.c.tipo == 'Despesa'
+
+    def _soma(condicao):
+        return func.sum(case((condicao, base.c.valor), else_=0))
+
+    linha = db.session.execute(
+        select(
+            _soma(and_(realizado, receita)),
+            func.count(case((and_(realizado, receita), 1))),
+            _soma(and_(realizado, despesa)),
+            func.count(case((and_(realizado, despesa), 1))),
+            _soma(and_(pendente, receita)),
+            _soma(and_(pendente, despesa)),
+        ).select_from(base)
+    ).one()
+
+    resumo.receitas_realizadas = decimal_valor(linha[0])
+    resumo.qtd_receitas = int(linha[1] or 0)
+    resumo.despesas_realizadas = decimal_valor(linha[2])
+    resumo.qtd_despesas = int(linha[3] or 0)
+    resumo.contas_a_receber_pendentes = decimal_valor(linha[4])
+    resumo.contas_a_pagar_pendentes = decimal_valor(linha[5])
+
+    # Regra 3: Coletar inconsistências (pago sem data_pagamento)
+    inconsistentes = _consulta_lancamentos_validos().filter(
+        _normalizado(LancamentoFinanceiro.status).in_(STATUS_PAGO),
+        LancamentoFinanceiro.data_pagamento.is_(None),
+    ).order_by(LancamentoFinanceiro.id).all()
+
+    for registro in inconsistentes:
         view = montar_registro_exibicao(registro)
         if view is None:
             continue
-        views.append(view)
-
-    # Regra 8-11: Deduplicar antes de processar
-    views_unicas = _deduplicar_ocorrencias_confiaveis(views)
-
-    # Regra 3: Coletar inconsistências
-    for view in views:
-        if view.inconsistente_sem_data:
-            resumo.lancamentos_pagos_sem_data_qtd += 1
-            resumo.lancamentos_pagos_sem_data_valor += view.valor
-            resumo.inconsistencias.append(
-                {
-                    'id': view.id,
-                    'tipo': view.tipo,
-                    'descricao': view.descricao,
-                    'valor': view.valor,
-                    'origem': view.origem,
-                    'os_id': view.os_id,
-                }
-            )
-
-    # Processar registros únicos
-    for view in views_unicas:
-        if view.inconsistente_sem_data:
-            continue
-
-        # Regra 1: Realizado por data_pagamento dentro do período
-        if view.status in {'Pago', 'Recebido'}:
-            data_ref = view.data_pagamento
-            if data_ref and inicio <= data_ref <= fim:
-                if view.tipo == 'Receita':
-                    resumo.receitas_realizadas += view.valor
-                    resumo.qtd_receitas += 1
-                elif view.tipo == 'Despesa':
-                    resumo.despesas_realizadas += view.valor
-                    resumo.qtd_despesas += 1
-            continue
-
-        # Regra 2: Pendente por data_vencimento dentro do período
-        if view.status == 'Pendente':
-            data_ref = view.data_vencimento or view.data
-            if data_ref and inicio <= data_ref <= fim:
-                if view.tipo == 'Receita':
-                    resumo.contas_a_receber_pendentes += view.valor
-                elif view.tipo == 'Despesa':
-                    resumo.contas_a_pagar_pendentes += view.valor
+        resumo.lancamentos_pagos_sem_data_qtd += 1
+        resumo.lancamentos_pagos_sem_data_valor += view.valor
+        resumo.inconsistencias.append(
+            {
+                'id': view.id,
+                'tipo': view.tipo,
+                'descricao': view.descricao,
+                'valor': view.valor,
+                'origem': view.origem,
+                'os_id': view.os_id,
+            }
+        )
 
     return resumo.finalizar()
@@ -25,7 +25,11 @@ class NotaFiscalServico(BaseModel):
     """
     
     __tablename__ = 'notas_fiscais_servico'
-    __table_args__ = {'extend_existing': True}
+    # Paginação por cursor da listagem (app.services.paginacao_service)
+    __table_args__ = (
+        db.Index('ix_notas_fiscais_servico_data_emissao_id', 'data_emissao', 'id'),
+        {'extend_existing': True},
+    )
     
     # Informações Básicas
     numero = db.Column(db.String(20), nullable=False, index=True)
@@ -9,7 +9,7 @@ Autor: JSP Soluções
 Data: 2026
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, make_response
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, make_response, jsonify
 from flask_login import login_required, current_user
 from datetime import datetime, date
 from decimal import Decimal
@@ -57,12 +57,47 @@ def listar():
             )
         )
     
-    notas = query.order_by(NotaFiscalServico.data_emissao.desc()).all()
-    clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
+    # Resumo de totais de todas as notas filtradas, numa consulta agregada
+    quantidade, total_bruto, total_iss, total_liquido = query.with_entities(
+        db.func.count(NotaFiscalServico.id),
+        db.func.coalesce(db.func.sum(NotaFiscalServico.valor_servicos), 0),
+        db.func.coalesce(db.func.sum(NotaFiscalServico.valor_iss), 0),
+        db.func.coalesce(db.func.sum(NotaFiscalServico.valor_liquido), 0),
+    ).one()
+    totais = {
+        'quantidade': quantidade,
+        'valor_servicos': total_bruto,
+        'valor_iss': total_iss,
+        'valor_liquido': total_liquido,
+    }
+    
+    from app.services.paginacao_service import paginar, parametros_paginacao, quer_json
+    cursor, por_pagina = parametros_paginacao(request.args)
+    pagina = paginar(query, [NotaFiscalServico.data_emissao, NotaFiscalServico.id],
+                     cursor=cursor, por_pagina=por_pagina, total=quantidade,
+                     opcoes=[db.joinedload(NotaFiscalServico.cliente)])
+    
+    if quer_json(request.args):
+        return jsonify(pagina.para_dict(lambda nota: {
+            'id': nota.id,
+            'numero': nota.numero,
+            'data_emissao': nota.data_emissao.isoformat() if nota.data_emissao else None,
+            'tomador': nota.tomador_nome,
+            'status': nota.status,
+            'valor_servicos': float(nota.valor_servicos or 0),
+            'valor_liquido': float(nota.valor_liquido or 0),
+            'url': url_for('nfse.visualizar', id=nota.id),
+        }))
+    
+    cliente_selecionado = None
+    if cliente_id and cliente_id.isdigit():
+        cliente_selecionado = db.session.get(Cliente, int(cliente_id))
     
     return render_template('financeiro/nfse/listar.html',
-                         notas=notas,
-                         clientes=clientes)
+                         notas=pagina.itens,
+                         pagina=pagina,
+                         totais=totais,
+                         cliente_selecionado=cliente_selecionado)
 
 
 @bp_nfse.route('/nova', methods=['GET', 'POST'])
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Execução de Relatórios Customizados
+==============================================
+
+Executa um RelatorioCustomizado sem materializar o resultado inteiro:
+
+- relatórios de lançamentos (LANCAMENTOS, CONTAS_PAGAR, CONTAS_RECEBER)
+  selecionam apenas as colunas do relatório e são paginados por keyset
+  (ordenação + id), com custo constante por página em qualquer posição;
+- a exportação percorre as mesmas páginas com um gerador, de modo que
+  CSV e XLSX (openpyxl write-only) são gerados com memória constante;
+- FLUXO_CAIXA e DRE são agregados no banco (GROUP BY) e retornam poucas
+  linhas.
+
+As linhas são dicionários simples, acessíveis nos templates como
+`item.campo`.
+"""
+
+from __future__ import annotations
+
+import base64
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, List, Optional
+
+from sqlalchemy import and_, case, func, or_
+
+from app.extensoes import db
+from app.financeiro.financeiro_compat import TIPOS_DESPESA, TIPOS_RECEITA
+from app.financeiro.financeiro_model import CentroCusto, LancamentoFinanceiro
+
+TAMANHO_PAGINA_PADRAO = 50
+TAMANHO_PAGINA_MAXIMO = 500
+
+# Linhas buscadas por consulta durante a exportação
+TAMANHO_LOTE_EXPORTACAO = 1000
+
+TIPOS_LANCAMENTO = ('LANCAMENTOS', 'CONTAS_PAGAR', 'CONTAS_RECEBER')
+
+_STATUS_IGNORADOS = ('cancelado', 'cancelada')
+
+LABELS_DRE = {
+    'receita_bruta': 'Receita Bruta',
+    'deducoes': '(-) Deduções',
+    'receita_liquida': '(=) Receita Líquida',
+    'custos': '(-) Custos',
+    'lucro_bruto': '(=) Lucro Bruto',
+    'despesas_operacionais': '(-) Despesas Operacionais',
+    'lucro_operacional': '(=) Lucro Operacional',
+    'resultado_financeiro': '(+/-) Resultado Financeiro',
+    'lucro_liquido': '(=) Lucro Líquido',
+}
+
+
+@dataclass
+class PaginaRelatorio:
+    """Uma página de resultado de relatório."""
+    colunas: List[str]
+    linhas: List[dict] = field(default_factory=list)
+    proximo_cursor: Optional[str] = None
+
+    @property
+    def tem_proxima(self) -> bool:
+        return self.proximo_cursor is not None
+
+
+def _normalizado(coluna):
+    return func.lower(func.trim(func.coalesce(coluna, '')))
+
+
+def _data_filtro(valor) -> Optional[date]:
+    if isinstance(valor, date):
+        return valor
+    try:
+        return datetime.strptime(str(valor), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+# ===== COLUNAS =====
+
+def colunas_relatorio(relatorio) -> List[str]:
+    """Campos selecionados válidos para o tipo (vazio = todos os disponíveis)."""
+    disponiveis = [c['nome'] for c in relatorio.get_campos_disponiveis(relatorio.tipo)]
+    selecionados = [c for c in relatorio.get_campos_lista() if c in disponiveis]
+    return selecionados or disponiveis
+
+
+def labels_colunas(relatorio, colunas: List[str]) -> List[str]:
+    labels = {c['nome']: c['label'] for c in relatorio.get_campos_disponiveis(relatorio.tipo)}
+    return [labels.get(c, c) for c in colunas]
+
+
+# ===== LANÇAMENTOS (KEYSET) =====
+
+def _coluna_ordem(relatorio):
+    colunas = LancamentoFinanceiro.__table__.c
+    nomes_validos = {c['nome'] for c in relatorio.get_campos_disponiveis(relatorio.tipo)}
+    if relatorio.ordenacao in nomes_validos and relatorio.ordenacao in colunas:
+        return colunas[relatorio.ordenacao]
+    return None
+
+
+def _query_lancamentos(relatorio, selecionadas: List[str]):
+    lanc = LancamentoFinanceiro
+    tabela = lanc.__table__
+    filtros = relatorio.get_filtros_dict()
+
+    query = db.session.query(*[tabela.c[c] for c in selecionadas]).filter(lanc.ativo.is_(True))
+
+    if relatorio.tipo == 'CONTAS_PAGAR':
+        query = query.filter(_normalizado(lanc.tipo).in_(TIPOS_DESPESA))
+    elif relatorio.tipo == 'CONTAS_RECEBER':
+        query = query.filter(_normalizado(lanc.tipo).in_(TIPOS_RECEITA))
+
+    if filtros.get('tipo'):
+        query = query.filter(_normalizado(lanc.tipo) == str(filtros['tipo']).strip().lower())
+    if filtros.get('status'):
+        query = query.filter(_normalizado(lanc.status) == str(filtros['status']).strip().lower())
+    if filtros.get('categoria'):
+        query = query.filter(lanc.categoria == filtros['categoria'])
+    if _data_filtro(filtros.get('data_inicio')):
+        query = query.filter(lanc.data_lancamento >= _data_filtro(filtros['data_inicio']))
+    if _data_filtro(filtros.get('data_fim')):
+        query = query.filter(lanc.data_lancamento <= _data_filtro(filtros['data_fim']))
+    if filtros.get('conta_bancaria_id'):
+        query = query.filter(lanc.conta_bancaria_id == filtros['conta_bancaria_id'])
+    if filtros.get('centro_custo_id'):
+        query = query.filter(lanc.centro_custo_id == filtros['centro_custo_id'])
+    return query
+
+
+def _codificar_cursor(valor, ultimo_id: int) -> str:
+    if isinstance(valor, (date, datetime)):
+        valor = valor.isoformat()
+    elif isinstance(valor, Decimal):
+        valor = str(valor)
+    bruto = json.dumps([valor, ultimo_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(bruto).decode('ascii')
+
+
+def _decodificar_cursor(cursor: str, coluna):
+    """Retorna (valor da ordenação, último id). Cursor inválido levanta ValueError."""
+    try:
+        valor, ultimo_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        ultimo_id = int(ultimo_id)
+    except Exception:
+        raise ValueError('cursor de paginação inválido')
+
+    if valor is not None and coluna is not None:
+        python_type = coluna.type.python_type
+        if python_type is date:
+            valor = date.fromisoformat(valor)
+        elif python_type is datetime:
+            valor = datetime.fromisoformat(valor)
+        elif python_type is Decimal:
+            valor = Decimal(valor)
+    return valor, ultimo_id
+
+
+def _aplicar_keyset(query, coluna, descendente: bool, cursor: Optional[str]):
+    """
+    Ordena por (coluna IS NULL, coluna, id) e continua após o cursor.
+
+    Nulos ficam sempre no fim, em qualquer direção.
+    """
+    lanc_id = LancamentoFinanceiro.__table__.c.id
+    id_ordem = lanc_id.desc() if descendente else lanc_id.asc()
+
+    if coluna is None:
+        if cursor:
+            _, ultimo_id = _decodificar_cursor(cursor, None)
+            query = query.filter(lanc_id < ultimo_id if descendente else lanc_id > ultimo_id)
+        return query.order_by(id_ordem)
+
+    nulo_por_ultimo = case((coluna.is_(None), 1), else_=0)
+    query = query.order_by(nulo_por_ultimo, coluna.desc() if descendente else coluna.asc(), id_ordem)
+    if not cursor:
+        return query
+
+    valor, ultimo_id = _decodificar_cursor(cursor, coluna)
+    depois_id = lanc_id < ultimo_id if descendente else lanc_id > ultimo_id
+    if valor is None:
+        return query.filter(coluna.is_(None), depois_id)
+
+    depois_valor = coluna < valor if descendente else coluna > valor
+    return query.filter(or_(depois_valor, and_(coluna == valor, depois_id), coluna.is_(None)))
+
+
+def _pagina_lancamentos(relatorio, colunas, cursor, limite) -> PaginaRelatorio:
+    coluna = _coluna_ordem(relatorio)
+    descendente = (relatorio.ordem_direcao or 'ASC').upper() == 'DESC'
+
+    # id e coluna de ordenação sempre vêm na consulta (formam o cursor)
+    selecionadas = ['id'] + [c for c in colunas if c != 'id']
+    if coluna is not None and coluna.name not in selecionadas:
+        selecionadas.append(coluna.name)
+
+    query = _aplicar_keyset(_query_lancamentos(relatorio, selecionadas), coluna, descendente, cursor)
+    linhas = query.limit(limite + 1).all()
+
+    pagina = PaginaRelatorio(colunas=colunas)
+    pagina.linhas = [dict(zip(selecionadas, linha)) for linha in linhas[:limite]]
+    if len(linhas) > limite:
+        ultima = pagina.linhas[-1]
+        valor = ultima[coluna.name] if coluna is not None else None
+        pagina.proximo_cursor = _codificar_cursor(valor, ultima['id'])
+    return pagina
+
+
+# ===== AGREGADOS =====
+
+def _linhas_fluxo_caixa(relatorio) -> List[dict]:
+    """Receitas, despesas e saldo por mês (data de pagamento ou vencimento)."""
+    lanc = LancamentoFinanceiro
+    filtros = relatorio.get_filtros_dict()
+    data_ref = func.coalesce(lanc.data_pagamento, lanc.data_vencimento, lanc.data_lancamento)
+    tipo = _normalizado(lanc.tipo)
+    ano = func.extract('year', data_ref)
+    mes = func.extract('month', data_ref)
+
+    query = db.session.query(
+        ano, mes,
+        func.coalesce(func.sum(case((tipo.in_(TIPOS_RECEITA), lanc.valor), else_=0)), 0),
+        func.coalesce(func.sum(case((tipo.in_(TIPOS_DESPESA), lanc.valor), else_=0)), 0),
+    ).filter(
+        lanc.ativo.is_(True),
+        ~_normalizado(lanc.status).in_(_STATUS_IGNORADOS),
+    )
+    if _data_filtro(filtros.get('data_inicio')):
+        query = query.filter(data_ref >= _data_filtro(filtros['data_inicio']))
+    if _data_filtro(filtros.get('data_fim')):
+        query = query.filter(data_ref <= _data_filtro(filtros['data_fim']))
+    if filtros.get('conta_bancaria_id'):
+        query = query.filter(lanc.conta_bancaria_id == filtros['conta_bancaria_id'])
+    if filtros.get('centro_custo_id'):
+        query = query.filter(lanc.centro_custo_id == filtros['centro_custo_id'])
+
+    linhas = []
+    acumulado = Decimal('0')
+    for ano_ref, mes_ref, receitas, despesas in query.group_by(ano, mes).order_by(ano, mes).all():
+        receitas = Decimal(str(receitas or 0))
+        despesas = Decimal(str(despesas or 0))
+        acumulado += receitas - despesas
+        linhas.append({
+            'periodo': f'{int(mes_ref):02d}/{int(ano_ref)}',
+            'receitas': receitas,
+            'despesas': despesas,
+            'saldo': receitas - despesas,
+            'saldo_acumulado': acumulado,
+        })
+    return linhas
+
+
+def _linhas_dre(relatorio) -> List[dict]:
+    """DRE consolidado do período filtrado (padrão: ano corrente)."""
+    from app.financeiro.dre_service import calcular_dre_periodos, periodo_mes
+
+    filtros = relatorio.get_filtros_dict()
+    hoje = date.today()
+    inicio = _data_filtro(filtros.get('data_inicio')) or date(hoje.year, 1, 1)
+    fim = _data_filtro(filtros.get('data_fim')) or date(hoje.year, 12, 31)
+
+    # O DRE agrega meses inteiros
+    periodo = (periodo_mes(inicio.year, inicio.month)[0], periodo_mes(fim.year, fim.month)[1])
+    dre = calcular_dre_periodos({'periodo': periodo})['periodo']
+
+    return [
+        {'linha': label, 'valor': dre[chave]}
+        for chave, label in LABELS_DRE.items()
+    ]
+
+
+def _linhas_centros_custo(relatorio, colunas) -> List[dict]:
+    tabela = CentroCusto.__table__
+    linhas = db.session.query(tabela.c.id, *[tabela.c[c] for c in colunas]).filter(
+        tabela.c.ativo.is_(True)
+    ).order_by(tabela.c.codigo).all()
+    return [dict(zip(['id'] + colunas, linha)) for linha in linhas]
+
+
+# ===== EXECUÇÃO =====
+
+def executar_pagina(relatorio, cursor: Optional[str] = None,
+                    limite: int = TAMANHO_PAGINA_PADRAO) -> PaginaRelatorio:
+    """
+    Retorna uma página do relatório.
+
+    Args:
+        relatorio: RelatorioCustomizado
+        cursor: `proximo_cursor` da página anterior (None = primeira página)
+        limite: Linhas por página (limitado a TAMANHO_PAGINA_MAXIMO)
+
+    Raises:
+        ValueError: Cursor inválido
+    """
+    limite = max(1, min(int(limite or TAMANHO_PAGINA_PADRAO), TAMANHO_PAGINA_MAXIMO))
+    colunas = colunas_relatorio(relatorio)
+
+    if relatorio.tipo in TIPOS_LANCAMENTO:
+        return _pagina_lancamentos(relatorio, colunas, cursor, limite)
+    if relatorio.tipo == 'FLUXO_CAIXA':
+        return PaginaRelatorio(colunas=colunas, linhas=_linhas_fluxo_caixa(relatorio))
+    if relatorio.tipo == 'DRE':
+        return PaginaRelatorio(colunas=colunas, linhas=_linhas_dre(relatorio))
+    if relatorio.tipo == 'CENTROS_CUSTO':
+        return PaginaRelatorio(colunas=colunas, linhas=_linhas_centros_custo(relatorio, colunas))
+    return PaginaRelatorio(colunas=colunas)
+
+
+def iterar_linhas(relatorio, tamanho_lote: int = TAMANHO_LOTE_EXPORTACAO) -> Iterator[dict]:
+    """Percorre todas as linhas do relatório, uma página por consulta."""
+    cursor = None
+    while True:
+        if relatorio.tipo in TIPOS_LANCAMENTO:
+            pagina = _pagina_lancamentos(relatorio, colunas_relatorio(relatorio), cursor, tamanho_lote)
+        else:
+            pagina = executar_pagina(relatorio)
+        for linha in pagina.linhas:
+            yield linha
+        if not pagina.tem_proxima:
+            return
+        cursor = pagina.proximo_cursor
+
+
+# ===== EXPORTAÇÃO =====
+
+def _valor_exportacao(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _formatar_csv(valor) -> str:
+    if valor is None:
+        return ''
+    if isinstance(valor, (date, datetime)):
+        return valor.strftime('%d/%m/%Y')
+    if isinstance(valor, (Decimal, float)):
+        return f'{valor:.2f}'.replace('.', ',')
+    return str(valor)
+
+
+def gerar_csv(relatorio) -> Iterator[str]:
+    """Gera o CSV (separador ';', BOM UTF-8) em pedaços, linha a linha."""
+    colunas = colunas_relatorio(relatorio)
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=';')
+
+    buffer.write('\ufeff')
+    escritor.writerow(labels_colunas(relatorio, colunas))
+    for numero, linha in enumerate(iterar_linhas(relatorio), start=1):
+        escritor.writerow([_formatar_csv(linha.get(c)) for c in colunas])
+        if numero % 500 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def gerar_xlsx(relatorio, destino):
+    """
+    Grava o relatório em XLSX com openpyxl write-only.
+
+    Args:
+        destino: Caminho ou arquivo binário (ex.: SpooledTemporaryFile)
+    """
+    import openpyxl
+
+    colunas = colunas_relatorio(relatorio)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=(relatorio.nome or 'Relatório')[:31])
+    ws.append([relatorio.nome])
+    ws.append([])
+    ws.append(labels_colunas(relatorio, colunas))
+    for linha in iterar_linhas(relatorio):
+        ws.append([_valor_exportacao(linha.get(c)) for c in colunas])
+    wb.save(destino)
@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+"""
+ERP JSP v3.0 - Saldos Mensais (Rollup de Lançamentos)
+=====================================================
+
+Tabela agregada mantida incrementalmente a partir dos eventos
+`after_insert/after_update/after_delete` de LancamentoFinanceiro.
+
+Cada lançamento ativo contribui com:
+- uma linha de referência 'competencia' (mês de vencimento, ou de lançamento
+  quando não há vencimento);
+- uma linha de referência 'pagamento' (mês de data_pagamento), se houver.
+
+As visões de mês/ano leem poucas linhas desta tabela em vez de varrer
+`lancamentos_financeiros`. Inserções com bulk_insert_mappings devem chamar
+`registrar_lancamentos_em_massa()`; demais operações que não disparam
+eventos do ORM (query.update/delete, SQL direto) exigem
+`SaldoMensalLancamento.reconstruir()` ou scripts/reconstruir_saldos_mensais.py.
+
+Autor: JSP Soluções
+Data: 2026
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import event, func, inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensoes import db
+from app.financeiro.financeiro_model import LancamentoFinanceiro
+
+REFERENCIA_COMPETENCIA = 'competencia'
+REFERENCIA_PAGAMENTO = 'pagamento'
+
+TIPOS_RECEITA_LANCAMENTO = ('receita', 'conta_receber')
+TIPOS_DESPESA_LANCAMENTO = ('despesa', 'conta_pagar')
+
+# Colunas que compõem a chave do rollup (NULL é gravado como 0/'' para
+# que a restrição UNIQUE funcione também como alvo de upsert)
+COLUNAS_CHAVE = (
+    'referencia', 'ano', 'mes', 'tipo', 'status', 'categoria',
+    'centro_custo_id', 'plano_conta_id', 'conta_bancaria_id',
+)
+
+# Atributos de LancamentoFinanceiro que afetam o rollup
+_ATRIBUTOS_LANCAMENTO = (
+    'ativo', 'valor', 'tipo', 'status', 'categoria',
+    'data_lancamento', 'data_vencimento', 'data_pagamento',
+    'centro_custo_id', 'plano_conta_id', 'conta_bancaria_id',
+)
+
+
+class SaldoMensalLancamento(db.Model):
+    """
+    Saldo agregado de lançamentos por mês e dimensões financeiras.
+
+    Não é editado manualmente: é mantido pelos eventos do ORM e pode ser
+    reconstruído a qualquer momento a partir do razão.
+    """
+
+    __tablename__ = 'saldos_mensais_lancamentos'
+    __table_args__ = (
+        db.UniqueConstraint(*COLUNAS_CHAVE, name='uq_saldos_mensais_chave'),
+        db.Index('ix_saldos_mensais_periodo', 'referencia', 'ano', 'mes'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    referencia = db.Column(db.String(20), nullable=False)
+    ano = db.Column(db.Integer, nullable=False)
+    mes = db.Column(db.Integer, nullable=False)
+    tipo = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    categoria = db.Column(db.String(100), nullable=False, default='')
+    centro_custo_id = db.Column(db.Integer, nullable=False, default=0)
+    plano_conta_id = db.Column(db.Integer, nullable=False, default=0)
+    conta_bancaria_id = db.Column(db.Integer, nullable=False, default=0)
+    valor_total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return (f'<SaldoMensalLancamento {self.referencia} {self.ano}/{self.mes:02d} '
+                f'{self.tipo}/{self.status}: R$ {self.valor_total} ({self.quantidade})>')
+
+    # ===== CONSULTAS =====
+
+    @classmethod
+    def somar(cls, referencia, ano=None, mes=None, tipos=None, status=None, **filtros):
+        """
+        Soma valor e quantidade do rollup.
+
+        Args:
+            referencia: 'competencia' ou 'pagamento'
+            ano/mes: Período (None = todos)
+            tipos/status: Iteráveis de tipos/status aceitos (None = todos)
+            **filtros: Igualdade em categoria, centro_custo_id, plano_conta_id, conta_bancaria_id
+
+        Returns:
+            tuple: (Decimal total, int quantidade)
+        """
+        query = db.session.query(
+            func.coalesce(func.sum(cls.valor_total), 0),
+            func.coalesce(func.sum(cls.quantidade), 0),
+        ).filter(cls.referencia == referencia)
+
+        if ano is not None:
+            query = query.filter(cls.ano == ano)
+        if mes is not None:
+            query = query.filter(cls.mes == mes)
+        if tipos is not None:
+            query = query.filter(cls.tipo.in_(list(tipos)))
+        if status is not None:
+            query = query.filter(cls.status.in_(list(status)))
+        for campo, valor in filtros.items():
+            query = query.filter(getattr(cls, campo) == _valor_chave(campo, valor))
+
+        total, quantidade = query.one()
+        return Decimal(str(total or 0)), int(quantidade or 0)
+
+    @classmethod
+    def linhas_do_ano(cls, ano, referencia=REFERENCIA_COMPETENCIA):
+        """Retorna todas as linhas de um ano (tipicamente poucas dezenas)."""
+        return cls.query.filter_by(referencia=referencia, ano=ano).all()
+
+    # ===== MANUTENÇÃO =====
+
+    @classmethod
+    def reconstruir(cls, ano=None):
+        """
+        Recalcula o rollup a partir de `lancamentos_financeiros`.
+
+        A agregação roda no banco (GROUP BY); apenas as linhas agregadas
+        trafegam para a aplicação.
+
+        Args:
+            ano: Limita a reconstrução a um ano (None = tudo)
+
+        Returns:
+            int: Quantidade de linhas gravadas no rollup
+        """
+        lanc = LancamentoFinanceiro
+        datas = {
+            REFERENCIA_COMPETENCIA: func.coalesce(lanc.data_vencimento, lanc.data_lancamento),
+            REFERENCIA_PAGAMENTO: lanc.data_pagamento,
+        }
+
+        apagar = cls.query
+        if ano is not None:
+            apagar = apagar.filter(cls.ano == ano)
+        apagar.delete(synchronize_session=False)
+
+        linhas = []
+        for referencia, data_ref in datas.items():
+            ano_ref = func.extract('year', data_ref)
+            mes_ref = func.extract('month', data_ref)
+            query = db.session.query(
+                ano_ref, mes_ref, lanc.tipo, lanc.status,
+                func.coalesce(lanc.categoria, ''),
+                func.coalesce(lanc.centro_custo_id, 0),
+                func.coalesce(lanc.plano_conta_id, 0),
+                func.coalesce(lanc.conta_bancaria_id, 0),
+                func.sum(lanc.valor),
+                func.count(lanc.id),
+            ).filter(lanc.ativo.is_(True), data_ref.isnot(None))
+            if ano is not None:
+                query = query.filter(ano_ref == ano)
+            query = query.group_by(
+                ano_ref, mes_ref, lanc.tipo, lanc.status,
+                func.coalesce(lanc.categoria, ''),
+                func.coalesce(lanc.centro_custo_id, 0),
+                func.coalesce(lanc.plano_conta_id, 0),
+                func.coalesce(lanc.conta_bancaria_id, 0),
+            )
+            for row in query.all():
+                linhas.append({
+                    'referencia': referencia,
+                    'ano': int(row[0]),
+                    'mes': int(row[1]),
+                    'tipo': row[2],
+                    'status': row[3],
+                    'categoria': row[4],
+                    'centro_custo_id': int(row[5]),
+                    'plano_conta_id': int(row[6]),
+                    'conta_bancaria_id': int(row[7]),
+                    'valor_total': Decimal(str(row[8] or 0)),
+                    'quantidade': int(row[9]),
+                    'atualizado_em': datetime.utcnow(),
+                })
+
+        if linhas:
+            db.session.execute(cls.__table__.insert(), linhas)
+        db.session.commit()
+        return len(linhas)
+
+    @classmethod
+    def garantir_populado(cls):
+        """Reconstrói o rollup se ele estiver vazio e houver lançamentos."""
+        if db.session.query(cls.id).first() is not None:
+            return False
+        if db.session.query(LancamentoFinanceiro.id).first() is None:
+            return False
+        cls.reconstruir()
+        return True
+
+
+def _valor_chave(campo, valor):
+    """Normaliza valores NULL das dimensões para o formato gravado na chave."""
+    if campo == 'categoria':
+        return valor or ''
+    if campo in ('centro_custo_id', 'plano_conta_id', 'conta_bancaria_id'):
+        return valor or 0
+    return valor
+
+
+def _contribuicoes(estado):
+    """
+    Converte o estado de um lançamento em deltas do rollup.
+
+    Args:
+        estado: dict com os atributos de `_ATRIBUTOS_LANCAMENTO`
+
+    Returns:
+        list[tuple[dict, Decimal, int]]: (chave, valor, quantidade)
+    """
+    if not estado or not estado.get('ativo'):
+        return []
+
+    base = {
+        'tipo': estado.get('tipo') or '',
+        'status': estado.get('status') or '',
+        'categoria': _valor_chave('categoria', estado.get('categoria')),
+        'centro_custo_id': _valor_chave('centro_custo_id', estado.get('centro_custo_id')),
+        'plano_conta_id': _valor_chave('plano_conta_id', estado.get('plano_conta_id')),
+        'conta_bancaria_id': _valor_chave('conta_bancaria_id', estado.get('conta_bancaria_id')),
+    }
+    valor = Decimal(str(estado.get('valor') or 0))
+
+    deltas = []
+    datas = (
+        (REFERENCIA_COMPETENCIA, estado.get('data_vencimento') or estado.get('data_lancamento')),
+        (REFERENCIA_PAGAMENTO, estado.get('data_pagamento')),
+    )
+    for referencia, data_ref in datas:
+        if data_ref is None:
+            continue
+        chave = dict(base, referencia=referencia, ano=data_ref.year, mes=data_ref.month)
+        deltas.append((chave, valor, 1))
+    return deltas
+
+
+def _estado_atual(target):
+    return {attr: getattr(target, attr, None) for attr in _ATRIBUTOS_LANCAMENTO}
+
+
+def _estado_anterior(target):
+    """Reconstrói o estado pré-flush a partir do histórico de atributos."""
+    estado = {}
+    attrs = sa_inspect(target).attrs
+    for attr in _ATRIBUTOS_LANCAMENTO:
+        historico = attrs[attr].history
+        if historico.deleted:
+            estado[attr] = historico.deleted[0]
+        elif historico.unchanged:
+            estado[attr] = historico.unchanged[0]
+        else:
+            estado[attr] = getattr(target, attr, None)
+    return estado
+
+
+def _aplicar_delta(connection, chave, valor, quantidade):
+    """Soma um delta na linha do rollup (upsert atômico quando suportado)."""
+    tabela = SaldoMensalLancamento.__table__
+    agora = datetime.utcnow()
+    dialeto = connection.dialect.name
+
+    if dialeto in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+        stmt = insert(tabela).values(**chave, valor_total=valor, quantidade=quantidade, atualizado_em=agora)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(COLUNAS_CHAVE),
+            set_={
+                'valor_total': tabela.c.valor_total + stmt.excluded.valor_total,
+                'quantidade': tabela.c.quantidade + stmt.excluded.quantidade,
+                'atualizado_em': agora,
+            },
+        )
+        connection.execute(stmt)
+        return
+
+    condicao = db.and_(*[tabela.c[coluna] == chave[coluna] for coluna in COLUNAS_CHAVE])
+    resultado = connection.execute(
+        tabela.update().where(condicao).values(
+            valor_total=tabela.c.valor_total + valor,
+            quantidade=tabela.c.quantidade + quantidade,
+            atualizado_em=agora,
+        )
+    )
+    if resultado.rowcount == 0:
+        connection.execute(tabela.insert().values(**chave, valor_total=valor, quantidade=quantidade, atualizado_em=agora))
+
+
+def _aplicar_contribuicoes(connection, anteriores, atuais):
+    """Aplica a diferença entre contribuições antigas e novas."""
+    acumulado = {}
+    for sinal, contribuicoes in ((-1, anteriores), (1, atuais)):
+        for chave, valor, quantidade in contribuicoes:
+            chave_tupla = tuple(chave[c] for c in COLUNAS_CHAVE)
+            total, qtd = acumulado.get(chave_tupla, (Decimal('0'), 0))
+            acumulado[chave_tupla] = (total + sinal * valor, qtd + sinal * quantidade)
+
+    for chave_tupla, (valor, quantidade) in acumulado.items():
+        if valor == 0 and quantidade == 0:
+            continue
+        _aplicar_delta(connection, dict(zip(COLUNAS_CHAVE, chave_tupla)), valor, quantidade)
+
+
+def registrar_lancamentos_em_massa(registros, connection=None):
+    """
+    Soma ao rollup lançamentos gravados sem eventos do ORM.
+
+    Usado por cargas com bulk_insert_mappings: as contribuições são
+    agregadas em memória e aplicadas com um upsert por chave.
+
+    Args:
+        registros: Iterável de dicts com os atributos do lançamento
+        connection: Conexão da transação corrente (None = sessão atual)
+    """
+    contribuicoes = []
+    for registro in registros:
+        estado = {attr: registro.get(attr) for attr in _ATRIBUTOS_LANCAMENTO}
+        if estado['ativo'] is None:
+            estado['ativo'] = True
+        contribuicoes.extend(_contribuicoes(estado))
+    _aplicar_contribuicoes(connection or db.session.connection(), [], contribuicoes)
+
+
+# ===== EVENTOS DE MANUTENÇÃO INCREMENTAL =====
+
+def _preservar_valor_anterior(_target, value, _oldvalue, _initiator):
+    return value
+
+
+# active_history carrega o valor antigo mesmo com o atributo expirado
+# (ex.: após commit), garantindo o delta correto em after_update
+for _atributo in _ATRIBUTOS_LANCAMENTO:
+    event.listen(
+        getattr(LancamentoFinanceiro, _atributo), 'set', _preservar_valor_anterior,
+        retval=True, active_history=True,
+    )
+
+
+@event.listens_for(LancamentoFinanceiro, 'after_insert')
+def _rollup_apos_inserir(_mapper, connection, target):
+    _aplicar_contribuicoes(connection, [], _contribuicoes(_estado_atual(target)))
+
+
+@event.listens_for(LancamentoFinanceiro, 'after_update')
+def _rollup_apos_atualizar(_mapper, connection, target):
+    _aplicar_contribuicoes(
+        connection,
+        _contribuicoes(_estado_anterior(target)),
+        _contribuicoes(_estado_atual(target)),
+    )
+
+
+@event.listens_for(LancamentoFinanceiro, 'after_delete')
+def _rollup_apos_excluir(_mapper, connection, target):
+    _aplicar_contribuicoes(connection, _contribuicoes(_estado_anterior(target)), [])
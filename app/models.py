@@ -11,7 +11,10 @@ Data: 2025
 """
 
 from datetime import datetime
+from sqlalchemy import event
+
 from app.extensoes import db
+from app.services.busca_service import documento_busca
 
 class BaseModel(db.Model):
     """
@@ -104,4 +107,65 @@ class BaseModel(db.Model):
     
     def __repr__(self):
         """Representação string do objeto."""
-        return f'<{self.__class__.__name__} {self.id}>'
\ No newline at end of file
+        return f'<{self.__class__.__name__} {self.id}>'
+
+class BuscavelMixin:
+    """
+    Modelos com busca textual indexada (ver app.services.busca_service).
+
+    As subclasses definem CAMPOS_BUSCA; o texto normalizado desses campos
+    é gravado em `busca_normalizada` a cada insert/update.
+    """
+    CAMPOS_BUSCA = ()
+
+    busca_normalizada = db.Column(db.Text)
+
+    def texto_busca(self):
+        """Texto indexado do registro."""
+        return documento_busca(getattr(self, campo, None) for campo in self.CAMPOS_BUSCA)
+
+    def atualizar_busca(self):
+        self.busca_normalizada = self.texto_busca()
+
+
+@event.listens_for(BuscavelMixin, 'before_insert', propagate=True)
+@event.listens_for(BuscavelMixin, 'before_update', propagate=True)
+def _atualizar_busca(mapper, connection, alvo):
+    alvo.atualizar_busca()
+
+
+class ContadorDocumento(db.Model):
+    """
+    Último número emitido por série de documento (ex.: 'OS2026', 'PED').
+
+    Mantido por app.services.numeracao_service; não herda BaseModel porque
+    a série é a própria chave e a linha é atualizada por upsert atômico.
+    """
+    __tablename__ = 'contadores_documento'
+
+    serie = db.Column(db.String(30), primary_key=True)
+    valor = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ContadorDocumento {self.serie}: {self.valor}>'
+
+
+class ConsultaExternaCache(db.Model):
+    """
+    Respostas de consultas externas de CNPJ/CEP, com validade.
+
+    Mantido por app.services.consulta_cadastro_service; `dados` nulo
+    registra uma consulta sem resultado (cache negativo, validade curta).
+    """
+    __tablename__ = 'consultas_externas_cache'
+
+    tipo = db.Column(db.String(10), primary_key=True)  # cnpj, cep
+    chave = db.Column(db.String(20), primary_key=True)  # só dígitos
+    dados = db.Column(db.Text)  # JSON normalizado
+    provedor = db.Column(db.String(30))
+    consultado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expira_em = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<ConsultaExternaCache {self.tipo}:{self.chave}>'
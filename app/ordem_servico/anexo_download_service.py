@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Download dos Anexos
+==============================
+
+Entrega o conteúdo dos anexos da OS sem carregar o arquivo inteiro na
+memória do worker:
+
+- o BLOB (coluna `conteudo`, adiada no modelo) é lido do banco em blocos
+  com SUBSTR, dentro da própria resposta em streaming;
+- requisições com Range recebem 206 apenas com o trecho pedido (vídeos,
+  PDFs grandes, downloads retomados);
+- ETag + If-None-Match devolvem 304 sem tocar no BLOB.
+
+Anexos no armazenamento externo (arquivo_sha256) usam o hash como ETag;
+os em disco (armazenamento local ou desenvolvimento sem BLOB) são
+servidos com `send_file`, que já trata Range e respostas condicionais.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Callable, Iterable, Iterator, Optional
+from urllib.parse import quote
+
+from flask import Response, request, send_file, stream_with_context
+from sqlalchemy import func, select
+
+from app.extensoes import db
+
+TAMANHO_BLOCO = 256 * 1024
+
+
+def etag_anexo(anexo) -> str:
+    """ETag estável do anexo, calculado só com metadados."""
+    versao = int(anexo.atualizado_em.timestamp()) if anexo.atualizado_em else 0
+    return f'anexo-{anexo.id}-{anexo.tamanho or 0}-{versao}'
+
+
+def tamanho_blob(anexo_id: int) -> int:
+    """Tamanho do BLOB no banco (0 se vazio), sem transferir o conteúdo."""
+    from app.ordem_servico.ordem_servico_model import OrdemServicoAnexo
+
+    tamanho = db.session.execute(
+        select(func.length(OrdemServicoAnexo.conteudo)).where(OrdemServicoAnexo.id == anexo_id)
+    ).scalar()
+    return int(tamanho or 0)
+
+
+def ler_blocos(anexo_id: int, inicio: int, fim: int, tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[bytes]:
+    """Lê o intervalo [inicio, fim) do BLOB em blocos (SUBSTR é 1-indexado)."""
+    from app.ordem_servico.ordem_servico_model import OrdemServicoAnexo
+
+    posicao = inicio
+    while posicao < fim:
+        quantidade = min(tamanho_bloco, fim - posicao)
+        bloco = db.session.execute(
+            select(func.substr(OrdemServicoAnexo.conteudo, posicao + 1, quantidade))
+            .where(OrdemServicoAnexo.id == anexo_id)
+        ).scalar()
+        if not bloco:
+            break
+        bloco = bytes(bloco)
+        yield bloco
+        posicao += len(bloco)
+
+
+def _content_disposition(nome: str, como_anexo: bool) -> str:
+    tipo = 'attachment' if como_anexo else 'inline'
+    try:
+        nome.encode('ascii')
+        return f'{tipo}; filename="{nome}"'
+    except UnicodeEncodeError:
+        ascii_nome = nome.encode('ascii', 'ignore').decode('ascii') or 'arquivo'
+        return f"{tipo}; filename=\"{ascii_nome}\"; filename*=UTF-8''{quote(nome)}"
+
+
+def _caminho_em_disco(anexo, diretorios: Iterable[str]) -> Optional[str]:
+    caminhos = [anexo.caminho] + [os.path.join(d, anexo.nome_arquivo) for d in diretorios]
+    for caminho in caminhos:
+        if caminho and os.path.exists(caminho):
+            return caminho
+    return None
+
+
+def responder_anexo(anexo, como_anexo: bool = False, mime_padrao: str = 'application/octet-stream',
+                    diretorios: Iterable[str] = ()) -> Optional[Response]:
+    """
+    Monta a resposta HTTP do anexo (armazenamento externo, BLOB em
+    streaming ou arquivo em disco, nesta ordem).
+
+    Returns:
+        Response, ou None se o conteúdo não estiver disponível
+    """
+    mimetype = anexo.mime_type or mime_padrao
+
+    if anexo.arquivo_sha256:
+        from app.services.armazenamento_service import obter_armazenamento
+
+        armazenamento = obter_armazenamento()
+        if armazenamento is None:
+            return None
+        sha256 = anexo.arquivo_sha256  # o próprio hash é um ETag forte
+        caminho = armazenamento.caminho_local(sha256)
+        if caminho:
+            if not os.path.exists(caminho):
+                return None
+            return send_file(caminho, mimetype=mimetype, as_attachment=como_anexo,
+                             download_name=anexo.nome_original, conditional=True, etag=sha256)
+        return _resposta_em_blocos(
+            anexo, sha256, armazenamento.tamanho(sha256), mimetype, como_anexo,
+            lambda inicio, fim: armazenamento.ler_blocos(sha256, inicio, fim),
+        )
+
+    etag = etag_anexo(anexo)
+    tamanho = tamanho_blob(anexo.id)
+    if not tamanho:
+        caminho = _caminho_em_disco(anexo, diretorios)
+        if caminho is None:
+            return None
+        return send_file(caminho, mimetype=mimetype, as_attachment=como_anexo,
+                         download_name=anexo.nome_original, conditional=True, etag=etag)
+
+    return _resposta_em_blocos(
+        anexo, etag, tamanho, mimetype, como_anexo,
+        lambda inicio, fim: ler_blocos(anexo.id, inicio, fim),
+    )
+
+
+def _resposta_em_blocos(anexo, etag: str, tamanho: int, mimetype: str, como_anexo: bool,
+                        ler: Callable[[int, int], Iterator[bytes]]) -> Response:
+    """Resposta em streaming com suporte a If-None-Match, Range e If-Range."""
+    resposta = Response(mimetype=mimetype)
+    resposta.set_etag(etag)
+    resposta.accept_ranges = 'bytes'
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True  # revalida com If-None-Match
+    resposta.headers['Content-Disposition'] = _content_disposition(anexo.nome_original, como_anexo)
+
+    if request.if_none_match.contains(etag):
+        resposta.status_code = 304
+        return resposta
+
+    inicio, fim = 0, tamanho
+    # If-Range que não confere com o ETag: o cliente tem outra versão, envia tudo
+    if_range = request.if_range
+    range_valido = (if_range.etag is None and if_range.date is None) or if_range.etag == etag
+    if request.range and range_valido:
+        intervalo = request.range.range_for_length(tamanho)
+        if intervalo is None:
+            resposta.status_code = 416
+            resposta.content_range = f'bytes */{tamanho}'
+            return resposta
+        inicio, fim = intervalo
+        resposta.status_code = 206
+        resposta.content_range = f'bytes {inicio}-{fim - 1}/{tamanho}'
+
+    resposta.content_length = fim - inicio
+    resposta.response = stream_with_context(ler(inicio, fim))
+    return resposta
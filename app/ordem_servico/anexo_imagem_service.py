@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Imagens dos Anexos
+=============================
+
+Gera, uma única vez no upload, variantes reduzidas das imagens anexadas
+às ordens de serviço:
+
+- 'pdf': até 1600 px, JPEG qualidade 80 — usada no relatório em PDF;
+- 'miniatura': até 320 px — usada nas galerias (visualizar/editar OS).
+
+As variantes ficam junto ao anexo (colunas conteudo_pdf e
+conteudo_miniatura), de modo que o PDF e as galerias não decodificam nem
+transferem as fotos originais (frequentemente de vários MB). Anexos
+antigos, sem variantes, são convertidos sob demanda no primeiro uso.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+from typing import Dict, Iterable, Optional
+
+MIME_VARIANTE = 'image/jpeg'
+
+# nome -> (lado máximo em px, qualidade JPEG, coluna do modelo)
+VARIANTES = {
+    'pdf': (1600, 80, 'conteudo_pdf'),
+    'miniatura': (320, 70, 'conteudo_miniatura'),
+}
+
+
+def gerar_variantes(conteudo: bytes) -> Dict[str, bytes]:
+    """
+    Reduz e recomprime uma imagem em todas as variantes.
+
+    Returns:
+        dict: {nome_variante: bytes JPEG}; vazio se o conteúdo não for
+        uma imagem que o Pillow consiga abrir
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return {}
+
+    try:
+        imagem = Image.open(io.BytesIO(conteudo))
+        # JPEG: decodifica direto em escala reduzida (bem mais rápido)
+        maior_lado = max(lado for lado, _, _ in VARIANTES.values())
+        imagem.draft('RGB', (maior_lado, maior_lado))
+        imagem = ImageOps.exif_transpose(imagem)
+
+        if imagem.mode in ('RGBA', 'LA') or (imagem.mode == 'P' and 'transparency' in imagem.info):
+            imagem = imagem.convert('RGBA')
+            fundo = Image.new('RGB', imagem.size, (255, 255, 255))
+            fundo.paste(imagem, mask=imagem.getchannel('A'))
+            imagem = fundo
+        elif imagem.mode != 'RGB':
+            imagem = imagem.convert('RGB')
+
+        variantes = {}
+        # Da maior para a menor: cada redução parte da anterior
+        for nome, (lado, qualidade, _) in sorted(VARIANTES.items(), key=lambda item: -item[1][0]):
+            imagem.thumbnail((lado, lado), Image.LANCZOS)
+            saida = io.BytesIO()
+            imagem.save(saida, 'JPEG', quality=qualidade, optimize=True, progressive=True)
+            variantes[nome] = saida.getvalue()
+        return variantes
+    except Exception as e:
+        print(f" ⚠ Não foi possível gerar variantes da imagem: {e}")
+        return {}
+
+
+def ler_original(anexo, diretorios: Iterable[str] = ()) -> Optional[bytes]:
+    """Conteúdo original do anexo: armazenamento externo, BLOB no banco ou disco."""
+    if getattr(anexo, 'arquivo_sha256', None):
+        from app.services.armazenamento_service import obter_armazenamento
+
+        armazenamento = obter_armazenamento()
+        if armazenamento is not None and armazenamento.existe(anexo.arquivo_sha256):
+            return armazenamento.ler(anexo.arquivo_sha256)
+    if getattr(anexo, 'conteudo', None):
+        return bytes(anexo.conteudo)
+
+    caminhos = [anexo.caminho] + [os.path.join(d, anexo.nome_arquivo) for d in diretorios]
+    for caminho in caminhos:
+        if caminho and os.path.exists(caminho):
+            with open(caminho, 'rb') as arquivo:
+                return arquivo.read()
+    return None
+
+
+def aplicar_variantes(anexo, conteudo: Optional[bytes] = None, diretorios: Iterable[str] = ()) -> bool:
+    """
+    Gera e grava no anexo as variantes reduzidas (não faz commit).
+
+    Returns:
+        bool: True se as variantes foram geradas
+    """
+    if not anexo.is_imagem:
+        return False
+    if conteudo is None:
+        conteudo = ler_original(anexo, diretorios)
+    if not conteudo:
+        return False
+
+    variantes = gerar_variantes(conteudo)
+    for nome, (_, _, coluna) in VARIANTES.items():
+        if nome in variantes:
+            setattr(anexo, coluna, variantes[nome])
+    return bool(variantes)
+
+
+def obter_variante(anexo, nome: str, diretorios: Iterable[str] = ()) -> Optional[bytes]:
+    """
+    Retorna a variante pedida, gerando-a se o anexo ainda não a possui.
+
+    Quando gera, deixa as colunas alteradas na sessão: o chamador decide
+    se faz commit (persistindo a conversão para os próximos acessos).
+    """
+    coluna = VARIANTES[nome][2]
+    variante = getattr(anexo, coluna, None)
+    if variante:
+        return bytes(variante)
+    if aplicar_variantes(anexo, diretorios=diretorios):
+        return getattr(anexo, coluna, None)
+    return None
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Autocomplete da Ordem de Serviço
+===========================================
+
+Sugestões para os campos livres que se repetem entre as OS (solicitante,
+técnico, título, equipamento, marca/modelo) a partir de um índice de
+prefixos em memória, sem consultar o banco a cada tecla:
+
+- por campo, os valores distintos das OS ativas com a quantidade de OS
+  que os usam; as chaves (texto normalizado, sem acentos, a partir de
+  cada palavra) ficam em uma lista ordenada e o prefixo digitado é
+  localizado por busca binária;
+- as sugestões vêm ordenadas por: começa pelo prefixo > alguma palavra
+  começa pelo prefixo, e depois pelo uso (mais frequentes primeiro);
+- o índice é montado na inicialização e atualizado a cada commit que
+  cria, altera ou exclui OS (as alterações descartadas por rollback não
+  entram). Cada worker tem o seu índice: alterações feitas em outros
+  workers aparecem na recarga periódica (AUTOCOMPLETE_RECARGA_MINUTOS).
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, List, Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.extensoes import db
+from app.services.busca_service import normalizar
+
+CAMPOS_AUTOCOMPLETE = ('solicitante', 'tecnico_responsavel', 'titulo', 'equipamento', 'marca_modelo')
+
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 50
+
+_CHAVE_EXTENSAO = 'autocomplete_os'
+_CHAVE_PENDENTE = 'autocomplete_os_pendente'
+
+
+class IndicePrefixo:
+    """Valores de um campo, com frequência, consultáveis por prefixo."""
+
+    def __init__(self):
+        self.frequencia: Counter = Counter()
+        self._chaves: List[tuple] = []  # (chave normalizada, valor), ordenada
+
+    @staticmethod
+    def _chaves_do_valor(valor: str):
+        palavras = normalizar(valor).split()
+        # Uma chave a partir de cada palavra: 'inv' encontra 'Troca de inversor'
+        return {' '.join(palavras[i:]) for i in range(len(palavras))}
+
+    @classmethod
+    def montar(cls, valores) -> 'IndicePrefixo':
+        """Índice completo a partir de (valor, quantidade), ordenando as chaves uma única vez."""
+        indice = cls()
+        for valor, quantidade in valores:
+            if valor and quantidade > 0:
+                indice.frequencia[valor] += quantidade
+        indice._chaves = sorted(
+            (chave, valor) for valor in indice.frequencia for chave in cls._chaves_do_valor(valor)
+        )
+        return indice
+
+    def adicionar(self, valor: str, quantidade: int = 1):
+        """Inclusão incremental (commits de OS); a carga completa usa montar()."""
+        if not valor or quantidade <= 0:
+            return
+        if valor not in self.frequencia:
+            for chave in self._chaves_do_valor(valor):
+                insort(self._chaves, (chave, valor))
+        self.frequencia[valor] += quantidade
+
+    def remover(self, valor: str, quantidade: int = 1):
+        if not valor or valor not in self.frequencia:
+            return
+        self.frequencia[valor] -= quantidade
+        if self.frequencia[valor] > 0:
+            return
+        del self.frequencia[valor]
+        for chave in self._chaves_do_valor(valor):
+            posicao = bisect_left(self._chaves, (chave, valor))
+            if posicao < len(self._chaves) and self._chaves[posicao] == (chave, valor):
+                del self._chaves[posicao]
+
+    def buscar(self, prefixo: str, limite: int = LIMITE_PADRAO) -> List[str]:
+        prefixo = normalizar(prefixo)
+        if not prefixo:
+            # Sem texto digitado: os mais usados
+            mais_usados = heapq.nsmallest(limite, self.frequencia.items(), key=lambda item: (-item[1], item[0]))
+            return [valor for valor, _ in mais_usados]
+
+        # Melhor posição de cada valor: 0 = o valor começa pelo prefixo
+        encontrados: Dict[str, int] = {}
+        posicao = bisect_left(self._chaves, (prefixo,))
+        while posicao < len(self._chaves) and self._chaves[posicao][0].startswith(prefixo):
+            chave, valor = self._chaves[posicao]
+            inicio = 0 if normalizar(valor) == chave else 1
+            encontrados[valor] = min(inicio, encontrados.get(valor, 1))
+            posicao += 1
+
+        ordenados = heapq.nsmallest(
+            limite, encontrados.items(),
+            key=lambda item: (item[1], -self.frequencia[item[0]], item[0]),
+        )
+        return [valor for valor, _ in ordenados]
+
+
+class IndiceAutocomplete:
+    """Índices de prefixo dos campos de autocomplete da OS."""
+
+    def __init__(self, recarga_segundos: float = 0):
+        self.recarga_segundos = recarga_segundos
+        self.campos: Dict[str, IndicePrefixo] = {campo: IndicePrefixo() for campo in CAMPOS_AUTOCOMPLETE}
+        self.carregado_em: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def carregar(self):
+        """(Re)monta os índices com os valores das OS ativas."""
+        from app.ordem_servico.ordem_servico_model import OrdemServico
+
+        campos = {}
+        for campo in CAMPOS_AUTOCOMPLETE:
+            coluna = getattr(OrdemServico, campo)
+            linhas = (db.session.query(coluna, func.count(OrdemServico.id))
+                      .filter(OrdemServico.ativo.is_(True), coluna.isnot(None), coluna != '')
+                      .group_by(coluna))
+            campos[campo] = IndicePrefixo.montar((valor.strip(), quantidade) for valor, quantidade in linhas)
+
+        with self._lock:
+            self.campos = campos
+            self.carregado_em = time.monotonic()
+
+    def precisa_recarregar(self) -> bool:
+        if self.carregado_em is None:
+            return True
+        return bool(self.recarga_segundos) and time.monotonic() - self.carregado_em > self.recarga_segundos
+
+    def buscar(self, campo: str, prefixo: str = '', limite: int = LIMITE_PADRAO) -> List[str]:
+        if self.precisa_recarregar():
+            self.carregar()
+        with self._lock:
+            return self.campos[campo].buscar(prefixo, limite)
+
+    def aplicar(self, deltas: Dict[tuple, int]):
+        """Aplica {(campo, valor): +n/-n} vindos de um commit."""
+        with self._lock:
+            for (campo, valor), quantidade in deltas.items():
+                if quantidade > 0:
+                    self.campos[campo].adicionar(valor, quantidade)
+                elif quantidade < 0:
+                    self.campos[campo].remover(valor, -quantidade)
+
+
+def obter_indice_autocomplete() -> IndiceAutocomplete:
+    """Índice do worker atual (criado e carregado no primeiro uso)."""
+    indice = current_app.extensions.get(_CHAVE_EXTENSAO)
+    if indice is None:
+        recarga = current_app.config.get('AUTOCOMPLETE_RECARGA_MINUTOS', 15) * 60
+        indice = current_app.extensions[_CHAVE_EXTENSAO] = IndiceAutocomplete(recarga)
+    return indice
+
+
+# ===== ATUALIZAÇÃO INCREMENTAL =====
+
+def _valores(ordem, anteriores: bool):
+    """Valores indexáveis da OS antes (anteriores=True) ou depois do flush."""
+    estado = sa_inspect(ordem)
+
+    def valor(atributo):
+        historico = estado.attrs[atributo].history
+        if anteriores and historico.has_changes():
+            return historico.deleted[0] if historico.deleted else None
+        return getattr(ordem, atributo)
+
+    ativo = valor('ativo')
+    if ativo is not None and not ativo:  # None: OS nova, default ativo=True
+        return {}
+    return {campo: (valor(campo) or '').strip() for campo in CAMPOS_AUTOCOMPLETE}
+
+
+def _registrar_delta(session, antes, depois):
+    pendente = session.info.setdefault(_CHAVE_PENDENTE, Counter())
+    for campo, valor in antes.items():
+        if valor:
+            pendente[(campo, valor)] -= 1
+    for campo, valor in depois.items():
+        if valor:
+            pendente[(campo, valor)] += 1
+
+
+@event.listens_for(Session, 'before_flush')
+def _antes_do_flush(session, flush_context, instances):
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+
+    with session.no_autoflush:
+        for ordem in session.new:
+            if isinstance(ordem, OrdemServico):
+                _registrar_delta(session, {}, _valores(ordem, anteriores=False))
+        for ordem in session.dirty:
+            if isinstance(ordem, OrdemServico) and session.is_modified(ordem):
+                _registrar_delta(session, _valores(ordem, anteriores=True), _valores(ordem, anteriores=False))
+        for ordem in session.deleted:
+            if isinstance(ordem, OrdemServico):
+                _registrar_delta(session, _valores(ordem, anteriores=True), {})
+
+
+@event.listens_for(Session, 'after_commit')
+def _apos_commit(session):
+    pendente = session.info.pop(_CHAVE_PENDENTE, None)
+    if not pendente or not has_app_context():
+        return
+    indice = current_app.extensions.get(_CHAVE_EXTENSAO)
+    # Índice ainda não carregado: a carga inicial já lerá o commit
+    if indice is not None and indice.carregado_em is not None:
+        indice.aplicar(pendente)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _apos_rollback(session):
+    session.info.pop(_CHAVE_PENDENTE, None)
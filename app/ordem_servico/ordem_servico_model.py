@@ -11,10 +11,10 @@ Data: 2025
 """
 
 from app.extensoes import db
-from app.models import BaseModel
+from app.models import BaseModel, BuscavelMixin
 from decimal import Decimal
 from datetime import datetime, date
-from sqlalchemy import func, event
+from sqlalchemy import func, event, inspect
 
 # Constantes para padronização
 STATUS_CHOICES = [
@@ -42,7 +42,7 @@ PRIORIDADE_MAP = dict(PRIORIDADE_CHOICES)
 TIPO_OS_MAP = dict(TIPO_OS_CHOICES)
 
 
-class OrdemServico(BaseModel):
+class OrdemServico(BuscavelMixin, BaseModel):
     """
     Model para Ordem de Serviço.
     
@@ -51,6 +51,11 @@ class OrdemServico(BaseModel):
     """
     
     __tablename__ = 'ordem_servico'
+    # Paginação por cursor da listagem (app.services.paginacao_service)
+    __table_args__ = (db.Index('ix_ordem_servico_data_abertura_id', 'data_abertura', 'id'),)
+
+    # Campos indexados na busca textual (app.services.busca_service)
+    CAMPOS_BUSCA = ('numero', 'titulo', 'equipamento', 'marca_modelo', 'numero_serie')
     
     # Constantes da classe
     STATUS_CHOICES = STATUS_CHOICES
@@ -71,7 +76,7 @@ class OrdemServico(BaseModel):
     proposta = db.relationship('Proposta', backref='ordens_servico')
     
     # Cliente
-    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False, index=True)
     cliente = db.relationship('Cliente', backref='ordens_servico')
     
     # Solicitação
@@ -388,71 +393,21 @@ class OrdemServico(BaseModel):
     @classmethod
     def gerar_proximo_numero(cls):
         """
-        Gera o próximo número de OS no formato OS2026001, OS2026002, etc.
+        Reserva o próximo número de OS no formato OS2026001, OS2026002, etc.
         
-        Sistema inteligente que:
-        - Usa o ano atual
-        - Busca o maior número existente
-        - Garante sequência sem duplicatas
+        - Usa o ano atual (a sequência reinicia a cada ano)
         - Formato: OS + ANO + SEQUENCIAL (4 dígitos)
+        - Alocação atômica pelo contador da série (numeracao_service):
+          sem duplicatas entre workers e sem lacunas se a criação falhar
         """
-        from sqlalchemy import text
-        
-        ano_atual = date.today().year
-        prefixo = f"OS{ano_atual}"
-        
-        try:
-            # FIX: Usar SQL puro para evitar erro "Unknown PG numeric type: 1043"
-            # Query raw SQL compatível com PostgreSQL e SQLite
-            sql = text("""
-                SELECT numero 
-                FROM ordem_servico 
-                WHERE numero LIKE :prefixo AND ativo = true
-                ORDER BY numero DESC 
-                LIMIT 1
-            """)
-            
-            result = db.session.execute(sql, {"prefixo": f"{prefixo}%"})
-            ultima_os = result.first()
-            
-            maior_numero = 0
-            
-            if ultima_os:
-                try:
-                    numero_str = ultima_os[0]  # Pega o primeiro campo do resultado
-                    # Extrai apenas a parte numérica (remove "OS2026")
-                    parte_numerica = numero_str.replace(prefixo, "")
-                    if parte_numerica.isdigit():
-                        maior_numero = int(parte_numerica)
-                except (ValueError, AttributeError, IndexError):
-                    maior_numero = 0
-            
-            # Próximo número é sempre maior + 1
-            proximo_numero = maior_numero + 1
-            numero_os = f"{prefixo}{proximo_numero:04d}"
-            
-            # Verificação de segurança contra duplicatas
-            tentativas = 0
-            while tentativas < 100:
-                check_sql = text("SELECT COUNT(*) FROM ordem_servico WHERE numero = :numero")
-                count_result = db.session.execute(check_sql, {"numero": numero_os})
-                count = count_result.scalar()
-                
-                if count == 0:
-                    break
-                    
-                proximo_numero += 1
-                numero_os = f"{prefixo}{proximo_numero:04d}"
-                tentativas += 1
-            
-            return numero_os
-            
-        except Exception as e:
-            # Fallback EXTREMO: gera número timestamp-based
-            print(f"⚠️ ERRO CRÍTICO ao gerar número de OS: {e}")
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%H%M%S")
-            return f"{prefixo}{timestamp[-4:]}"
+        from app.services.numeracao_service import alocar_codigo
+        return alocar_codigo(cls.numero, f"OS{date.today().year}")
+    
+    @classmethod
+    def prever_proximo_numero(cls):
+        """Número exibido no formulário de nova OS (não reserva)."""
+        from app.services.numeracao_service import prever_codigo
+        return prever_codigo(cls.numero, f"OS{date.today().year}")
     
     @classmethod
     def buscar_por_numero(cls, numero):
@@ -827,8 +782,21 @@ class OrdemServicoAnexo(BaseModel):
     mime_type = db.Column(db.String(100))
     tamanho = db.Column(db.Integer)  # em bytes
     caminho = db.Column(db.String(500), nullable=False)
-    conteudo = db.Column(db.LargeBinary)  # Conteúdo do arquivo em BLOB (para Render)
-    
+    # Conteúdo do arquivo em BLOB (para Render). Adiado: listar/visualizar a OS não
+    # traz os bytes; downloads leem em blocos (anexo_download_service)
+    conteudo = db.deferred(db.Column(db.LargeBinary))
+    # Com armazenamento externo configurado (armazenamento_service), o conteúdo fica
+    # fora do banco e aqui só a chave SHA-256; `conteudo` permanece vazio
+    arquivo_sha256 = db.Column(db.String(64), index=True)
+    # Variantes JPEG reduzidas de imagens (geradas no upload; carregadas só quando usadas)
+    conteudo_pdf = db.deferred(db.Column(db.LargeBinary))
+    conteudo_miniatura = db.deferred(db.Column(db.LargeBinary))
+
+    @property
+    def is_imagem(self):
+        """Indica se o anexo é uma imagem."""
+        return self.tipo_arquivo == 'image' or bool(self.mime_type and 'image' in self.mime_type)
+
     def __repr__(self):
         return f'<OrdemServicoAnexo {self.nome_original}>'
     
@@ -871,7 +839,18 @@ def recalcular_valor_total(mapper, connection, target):
     """
     Recalcula automaticamente o valor_total antes de salvar.
     Garante que o valor exibido esteja sempre atualizado.
+
+    Se os itens não foram carregados neste save (ex.: só mudou o status) e
+    o desconto não mudou, o valor_total gravado continua válido: não há
+    por que buscar serviços e produtos no meio do flush. Os itens alterados
+    pelo formulário passam pelas coleções (os_persistencia_service), que
+    então já estão carregadas.
     """
+    estado = inspect(target)
+    if ({'servicos', 'produtos_utilizados'} <= estado.unloaded
+            and not estado.attrs.valor_desconto.history.has_changes()):
+        return
+
     # Usar os valores já calculados pelas properties
     servicos = Decimal(str(target.valor_total_servicos or 0))
     produtos = Decimal(str(target.valor_total_produtos or 0))
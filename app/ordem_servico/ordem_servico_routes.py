@@ -25,6 +25,8 @@ import os
 import base64
 from datetime import datetime as dt, datetime, time, date, timedelta
 from werkzeug.utils import secure_filename
+from app.ordem_servico.anexo_imagem_service import MIME_VARIANTE, aplicar_variantes, obter_variante
+from app.services.armazenamento_service import obter_armazenamento
 import uuid
 
 # === FUNÇÃO UTILITÁRIA PARA BUSCAR CLIENTES ===
@@ -182,14 +184,11 @@ def aplicar_descricao_por_modo(ordem, form_data, tipo_os):
 
 def limpar_itens_e_parcelas(ordem):
     """Remove serviços, produtos e parcelas vinculados à OS."""
-    for item in list(getattr(ordem, 'servicos', []) or []):
-        db.session.delete(item)
+    from app.ordem_servico.os_persistencia_service import remover_itens
 
-    for produto in list(getattr(ordem, 'produtos_utilizados', []) or []):
-        db.session.delete(produto)
-
-    for parcela in list(getattr(ordem, 'parcelas', []) or []):
-        db.session.delete(parcela)
+    remover_itens(ordem.servicos)
+    remover_itens(ordem.produtos_utilizados)
+    remover_itens(ordem.parcelas)
 
 
 def limpar_dados_financeiros(ordem):
@@ -223,15 +222,26 @@ def extrair_colaboradores_form(form_data):
 
 
 def processar_colaboradores_os(ordem, form_data):
-    """Salva os apontamentos de colaboradores da OS."""
-    for item in list(getattr(ordem, 'colaboradores_trabalho', []) or []):
-        db.session.delete(item)
+    """
+    Salva os apontamentos de colaboradores da OS.
 
-    total_horas = Decimal('0')
-    total_horas_normais = Decimal('0')
-    total_horas_extras = Decimal('0')
-    total_km = 0
+    Compara com os apontamentos existentes (os_persistencia_service): só as
+    linhas alteradas são gravadas, e os colaboradores referenciados são
+    carregados numa única consulta.
+    """
+    from app.ordem_servico.os_persistencia_service import (
+        CHAVE_COLABORADOR, carregar_por_id, sincronizar_itens
+    )
+
+    def parse_hora(colaborador_data, campo):
+        if colaborador_data.get(campo):
+            try:
+                return datetime.strptime(colaborador_data.get(campo), '%H:%M').time()
+            except Exception:
+                return None
+        return None
 
+    linhas = []
     for colaborador_data in extrair_colaboradores_form(form_data):
         colaborador_id = safe_int_convert(colaborador_data.get('colaborador_id'))
         if not colaborador_id:
@@ -244,66 +254,60 @@ def processar_colaboradores_os(ordem, form_data):
             except Exception:
                 data_trabalho = date.today()
 
-        def parse_hora(campo):
-            if colaborador_data.get(campo):
-                try:
-                    return datetime.strptime(colaborador_data.get(campo), '%H:%M').time()
-                except Exception:
-                    return None
-            return None
-
-        hora_entrada_manha = parse_hora('hora_entrada_manha')
-        hora_saida_manha = parse_hora('hora_saida_manha')
-        hora_entrada_tarde = parse_hora('hora_entrada_tarde')
-        hora_saida_tarde = parse_hora('hora_saida_tarde')
-        hora_entrada_extra = parse_hora('hora_entrada_extra')
-        hora_saida_extra = parse_hora('hora_saida_extra')
-        hora_inicio = hora_entrada_manha or hora_entrada_tarde or hora_entrada_extra or parse_hora('hora_inicio')
-        hora_fim = hora_saida_extra or hora_saida_tarde or hora_saida_manha or parse_hora('hora_fim')
-        
-        # Extrair percentual de adicional customizado (se fornecido)
-        percentual_adicional_cobranca = colaborador_data.get('percentual_adicional_cobranca')
-        if percentual_adicional_cobranca:
-            try:
-                percentual_adicional_cobranca = Decimal(str(percentual_adicional_cobranca))
-            except:
-                percentual_adicional_cobranca = None
-
-        trabalho = OrdemServicoColaborador(
-            ordem_servico_id=ordem.id,
-            colaborador_id=colaborador_id,
-            data_trabalho=data_trabalho,
-            hora_inicio=hora_inicio,
-            hora_fim=hora_fim,
-            hora_entrada_manha=hora_entrada_manha,
-            hora_saida_manha=hora_saida_manha,
-            hora_entrada_tarde=hora_entrada_tarde,
-            hora_saida_tarde=hora_saida_tarde,
-            hora_entrada_extra=hora_entrada_extra,
-            hora_saida_extra=hora_saida_extra,
-            km_inicial=safe_int_convert(colaborador_data.get('km_inicial')),
-            km_final=safe_int_convert(colaborador_data.get('km_final')),
-            descricao_atividade=colaborador_data.get('descricao_atividade', ''),
-            observacoes=colaborador_data.get('observacoes', ''),
-            percentual_adicional_cobranca=percentual_adicional_cobranca
-        )
+        hora_entrada_manha = parse_hora(colaborador_data, 'hora_entrada_manha')
+        hora_saida_manha = parse_hora(colaborador_data, 'hora_saida_manha')
+        hora_entrada_tarde = parse_hora(colaborador_data, 'hora_entrada_tarde')
+        hora_saida_tarde = parse_hora(colaborador_data, 'hora_saida_tarde')
+        hora_entrada_extra = parse_hora(colaborador_data, 'hora_entrada_extra')
+        hora_saida_extra = parse_hora(colaborador_data, 'hora_saida_extra')
+
+        linhas.append({
+            'colaborador_id': colaborador_id,
+            'data_trabalho': data_trabalho,
+            'hora_inicio': hora_entrada_manha or hora_entrada_tarde or hora_entrada_extra or parse_hora(colaborador_data, 'hora_inicio'),
+            'hora_fim': hora_saida_extra or hora_saida_tarde or hora_saida_manha or parse_hora(colaborador_data, 'hora_fim'),
+            'hora_entrada_manha': hora_entrada_manha,
+            'hora_saida_manha': hora_saida_manha,
+            'hora_entrada_tarde': hora_entrada_tarde,
+            'hora_saida_tarde': hora_saida_tarde,
+            'hora_entrada_extra': hora_entrada_extra,
+            'hora_saida_extra': hora_saida_extra,
+            'km_inicial': safe_int_convert(colaborador_data.get('km_inicial')),
+            'km_final': safe_int_convert(colaborador_data.get('km_final')),
+            'descricao_atividade': colaborador_data.get('descricao_atividade', ''),
+            'observacoes': colaborador_data.get('observacoes', ''),
+            # Percentual de adicional customizado (vazio = regra padrão)
+            'percentual_adicional_cobranca': safe_decimal_convert(
+                colaborador_data.get('percentual_adicional_cobranca'), None
+            ),
+        })
 
+    colaboradores = carregar_por_id(Colaborador, (linha['colaborador_id'] for linha in linhas))
+
+    def ajustar(trabalho):
         # Sempre calcular automaticamente a partir dos horários detalhados
         trabalho.calcular_horas_automatico()
-        
+
         # Calcular valores com adicionais (custo e receita por hora)
-        colaborador_obj = Colaborador.query.get(colaborador_id)
+        colaborador_obj = colaboradores.get(trabalho.colaborador_id)
         if colaborador_obj:
             salario = colaborador_obj.salario_mensal or Decimal('0')
             valor_hora = colaborador_obj.valor_hora or Decimal('0')
             if salario > 0 or valor_hora > 0:
                 trabalho.atualizar_valores_com_adicional(salario, valor_hora)
 
+    sincronizar_itens(ordem.colaboradores_trabalho, linhas, CHAVE_COLABORADOR,
+                      OrdemServicoColaborador, ajustar)
+
+    total_horas = Decimal('0')
+    total_horas_normais = Decimal('0')
+    total_horas_extras = Decimal('0')
+    total_km = 0
+    for trabalho in ordem.colaboradores_trabalho:
         total_horas += Decimal(str(trabalho.total_horas or 0))
         total_horas_normais += Decimal(str(trabalho.horas_normais or 0))
         total_horas_extras += Decimal(str(trabalho.horas_extras or 0))
         total_km += trabalho.km_total
-        db.session.add(trabalho)
 
     if ordem.tipo_os == 'operacional':
         if total_horas > 0:
@@ -341,7 +345,7 @@ MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 @ordem_servico_bp.route('/autocomplete/<campo>')
 def autocomplete_campo(campo):
     """
-    Retorna valores únicos já usados para autocomplete.
+    Retorna valores já usados que começam pelo texto digitado.
     
     Campos suportados:
     - solicitante
@@ -349,101 +353,59 @@ def autocomplete_campo(campo):
     - titulo
     - equipamento
     - marca_modelo
-    """
-    from sqlalchemy import distinct
     
-    campos_permitidos = {
-        'solicitante': OrdemServico.solicitante,
-        'tecnico_responsavel': OrdemServico.tecnico_responsavel,
-        'titulo': OrdemServico.titulo,
-        'equipamento': OrdemServico.equipamento,
-        'marca_modelo': OrdemServico.marca_modelo
-    }
+    Parâmetros:
+        q: texto digitado (vazio = valores mais usados)
+        limite: quantidade máxima de sugestões (padrão 10, máx. 50)
     
-    if campo not in campos_permitidos:
+    Responde a partir do índice em memória (autocomplete_service),
+    sem consultar o banco.
+    """
+    from app.ordem_servico.autocomplete_service import (
+        CAMPOS_AUTOCOMPLETE, LIMITE_MAXIMO, LIMITE_PADRAO, obter_indice_autocomplete,
+    )
+    
+    if campo not in CAMPOS_AUTOCOMPLETE:
         return jsonify({'error': 'Campo não permitido'}), 400
     
     try:
-        coluna = campos_permitidos[campo]
-        
-        # Busca valores únicos e remove nulos/vazios
-        valores = db.session.query(distinct(coluna))\
-            .filter(coluna.isnot(None), coluna != '')\
-            .order_by(coluna)\
-            .limit(50)\
-            .all()
-        
-        # Extrai os valores da tupla
-        resultado = [v[0] for v in valores if v[0]]
-        
-        return jsonify(resultado)
+        prefixo = request.args.get('q', '').strip()
+        limite = min(max(request.args.get('limite', LIMITE_PADRAO, type=int), 1), LIMITE_MAXIMO)
+        return jsonify(obter_indice_autocomplete().buscar(campo, prefixo, limite))
         
     except Exception as e:
         print(f"Erro ao buscar autocomplete para {campo}: {e}")
         return jsonify([])
 
 def get_logo_base64():
-    """Retorna o logo configurado no sistema em base64 para o PDF"""
+    """
+    Retorna o logo configurado no sistema em base64 para o PDF.
+    
+    O resultado fica em cache por versão da configuração (pdf_render_service),
+    sem reler arquivo ou reprocessar o base64 a cada relatório.
+    """
     try:
-        from app.configuracao.configuracao_model import Configuracao
-        import base64
-        
-        print("🔍 DEBUG LOGO: Iniciando busca da logo...")
-        
-        # Busca a configuração do sistema
-        config = Configuracao.get_solo()
-        
-        # Se há logo em base64 armazenado no banco (para cloud/Render), usa ele primeiro
-        if config and config.logo_base64:
-            print(f"✅ DEBUG LOGO: Logo encontrada no banco (base64) - {len(config.logo_base64)} chars")
-            # Remove prefixo data:image se houver
-            logo_b64 = config.logo_base64
-            if logo_b64.startswith('data:'):
-                # Extrai apenas o base64 depois da vírgula
-                logo_b64 = logo_b64.split(',', 1)[1] if ',' in logo_b64 else logo_b64
-                print(f"   🔧 Removido prefixo data:image, tamanho agora: {len(logo_b64)} chars")
-            return logo_b64
-        
-        # Se há logo configurado como arquivo, usa ele
-        if config and config.logo:
-            print(f"🔍 DEBUG LOGO: Tentando carregar logo do arquivo: {config.logo}")
-            # Verifica se é caminho absoluto ou relativo
-            if os.path.isabs(config.logo):
-                logo_path = config.logo
-            else:
-                # Caminho relativo ao diretório static
-                logo_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'static', 'uploads', config.logo)
-            
-            print(f"   📁 Caminho completo: {logo_path}")
-            # Lê o arquivo da imagem e converte para base64
-            if os.path.exists(logo_path):
-                with open(logo_path, 'rb') as img_file:
-                    img_data = img_file.read()
-                    img_base64 = base64.b64encode(img_data).decode('utf-8')
-                    print(f"   ✅ Logo carregada do arquivo - {len(img_base64)} chars base64")
-                    return img_base64
-            else:
-                print(f"   ❌ Arquivo não encontrado: {logo_path}")
-        
-        # Fallback: tenta usar a logo padrão JSP.jpg
-        logo_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'static', 'img', 'JSP.jpg')
-        print(f"🔍 DEBUG LOGO: Tentando logo padrão: {logo_path}")
-        if os.path.exists(logo_path):
-            with open(logo_path, 'rb') as img_file:
-                img_data = img_file.read()
-                img_base64 = base64.b64encode(img_data).decode('utf-8')
-                print(f"   ✅ Logo padrão carregada - {len(img_base64)} chars base64")
-                return img_base64
-        else:
-            print(f"   ❌ Logo padrão não encontrada: {logo_path}")
-                
+        from app.configuracao.configuracao_utils import get_config
+        from app.services.pdf_render_service import logo_empresa
+        
+        config = get_config()
+        raiz = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        
+        # Logo em base64 no banco (cloud/Render) tem prioridade; depois o
+        # arquivo configurado e, por fim, a logo padrão JSP.jpg
+        caminho = os.path.join(raiz, 'static', 'img', 'JSP.jpg')
+        if config and config.logo and not config.logo_base64:
+            arquivo = config.logo if os.path.isabs(config.logo) else os.path.join(raiz, 'static', 'uploads', config.logo)
+            if os.path.exists(arquivo):
+                caminho = arquivo
+        
+        logo = logo_empresa(config, caminho_padrao=caminho)
+        if logo['base64']:
+            return logo['base64']
     except Exception as e:
         print(f"❌ DEBUG LOGO: Erro ao carregar logo: {e}")
-        import traceback
-        traceback.print_exc()
     
     # Fallback final: retorna None para usar o SVG no template
-    print("⚠️ DEBUG LOGO: Nenhuma logo encontrada, retornando None (usará placeholder)")
     return None
 
 @ordem_servico_bp.route('/teste_os')
@@ -567,12 +529,11 @@ def listar():
         
         # Aplica filtros
         if busca:
-            query = query.join(Cliente, isouter=True).filter(
+            from app.services.busca_service import condicao_busca, ids_busca
+            query = query.filter(
                 db.or_(
-                    OrdemServico.numero.ilike(f'%{busca}%'),
-                    OrdemServico.titulo.ilike(f'%{busca}%'),
-                    OrdemServico.equipamento.ilike(f'%{busca}%'),
-                    Cliente.nome.ilike(f'%{busca}%')
+                    condicao_busca(OrdemServico, busca),
+                    OrdemServico.cliente_id.in_(ids_busca(Cliente, busca))
                 )
             )
         
@@ -603,17 +564,27 @@ def listar():
             except ValueError:
                 flash('Data de fim inválida', 'warning')
         
-        ordens = query.order_by(OrdemServico.data_abertura.desc()).all()
+        from app.services.paginacao_service import paginar, parametros_paginacao, quer_json
+        cursor, por_pagina = parametros_paginacao(request.args)
+        pagina = paginar(query, [OrdemServico.data_abertura, OrdemServico.id],
+                         cursor=cursor, por_pagina=por_pagina,
+                         opcoes=[db.joinedload(OrdemServico.cliente)])
         
-        # Lista de clientes para filtro dropdown
-        clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
+        if quer_json(request.args):
+            return jsonify(pagina.para_dict(_ordem_para_lista))
+        
+        # Filtro de cliente: só o selecionado; os demais vêm da busca AJAX
+        cliente_selecionado = None
+        if cliente_id.isdigit():
+            cliente_selecionado = db.session.get(Cliente, int(cliente_id))
         
         # Estatísticas
         stats = OrdemServico.estatisticas_dashboard()
         
         return render_template('os/listar.html', 
-                             ordens=ordens, 
-                             clientes=clientes,
+                             ordens=pagina.itens, 
+                             pagina=pagina,
+                             cliente_selecionado=cliente_selecionado,
                              stats=stats,
                              busca=busca,
                              status_filtro=status,
@@ -636,6 +607,19 @@ def listar():
         flash(f'Erro ao carregar ordens: {error_msg}', 'error')
         return redirect(url_for('painel.index'))
 
+def _ordem_para_lista(ordem):
+    """Linha da listagem de OS na variante JSON (rolagem infinita)."""
+    return {
+        'id': ordem.id,
+        'numero': ordem.numero,
+        'cliente': ordem.cliente.nome if ordem.cliente else None,
+        'titulo': ordem.titulo,
+        'status': ordem.status,
+        'prioridade': ordem.prioridade,
+        'data_abertura': ordem.data_abertura.isoformat() if ordem.data_abertura else None,
+        'url': url_for('ordem_servico.visualizar', id=ordem.id),
+    }
+
 @ordem_servico_bp.route('/novo', methods=['GET', 'POST'])
 def novo():
     """
@@ -794,7 +778,7 @@ def novo():
                 flash('Cliente é obrigatório!', 'error')
                 print(" DEBUG: Cliente é obrigatório")
                 clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
-                numero_os = OrdemServico.gerar_proximo_numero()
+                numero_os = OrdemServico.prever_proximo_numero()
                 return render_template('os/form.html', ordem=None, clientes=clientes, numero_os=numero_os, today=date.today())
             
             # Adiciona ordem à sessão (transação será confirmada no final)
@@ -810,7 +794,7 @@ def novo():
                 db.session.rollback()
                 flash(f'Erro ao criar ordem: {str(e)}', 'error')
                 clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
-                numero_os = OrdemServico.gerar_proximo_numero()
+                numero_os = OrdemServico.prever_proximo_numero()
                 return render_template('os/form.html', ordem=None, clientes=clientes, numero_os=numero_os, today=date.today())
             
             # Processa itens de serviço
@@ -903,6 +887,10 @@ def novo():
             max_produtos = max(len(produtos_id) if produtos_id else 0,
                               len(produtos_desc) if produtos_desc else 0)
             
+            # Produtos cadastrados referenciados: uma única consulta
+            from app.ordem_servico.os_persistencia_service import carregar_por_id
+            produtos_cadastrados = carregar_por_id(Produto, (safe_int_convert(valor) for valor in produtos_id))
+            
             for i in range(max_produtos):
                 descricao = None
                 produto_cadastrado_id = None
@@ -915,13 +903,10 @@ def novo():
                             descricao = produtos_desc_custom[i].strip()
                     else:
                         # Produto cadastrado
-                        try:
-                            produto_cadastrado_id = int(produtos_id[i])
-                            produto_obj = Produto.query.get(produto_cadastrado_id)
-                            if produto_obj:
-                                descricao = produto_obj.nome
-                        except (ValueError, TypeError):
-                            pass
+                        produto_cadastrado_id = safe_int_convert(produtos_id[i])
+                        produto_obj = produtos_cadastrados.get(produto_cadastrado_id)
+                        if produto_obj:
+                            descricao = produto_obj.nome
                 
                 # Fallback: produto_descricao (antigo sistema - para OS antigas)
                 if not descricao and i < len(produtos_desc) and produtos_desc[i].strip():
@@ -992,8 +977,12 @@ def novo():
                             file_content = file.read()
                             file.seek(0)  # Volta novamente para salvar em disco
                             
-                            # Salva arquivo em disco também (para desenvolvimento local)
-                            file.save(filepath)
+                            # Com armazenamento externo (SHA-256, deduplicado) o conteúdo não vai ao banco
+                            armazenamento = obter_armazenamento()
+                            arquivo_salvo = armazenamento.salvar(file_content) if armazenamento else None
+                            if not arquivo_salvo:
+                                # Salva arquivo em disco também (para desenvolvimento local)
+                                file.save(filepath)
                             
                             # Detecta tipo do arquivo
                             content_type = file.content_type or 'application/octet-stream'
@@ -1008,8 +997,10 @@ def novo():
                                     tipo_arquivo=tipo_arquivo,
                                     mime_type=content_type,
                                     tamanho=len(file_content),
-                                    caminho=filepath,
-                                    conteudo=file_content  # Salva no banco para persistir no Render
+                                    caminho=arquivo_salvo.referencia if arquivo_salvo else filepath,
+                                    # Salva no banco para persistir no Render (sem armazenamento externo)
+                                    conteudo=None if arquivo_salvo else file_content,
+                                    arquivo_sha256=arquivo_salvo.sha256 if arquivo_salvo else None
                                 )
                             except TypeError:
                                 # Se a coluna conteudo não existir ainda, cria sem ela
@@ -1024,6 +1015,8 @@ def novo():
                                     caminho=filepath
                                 )
                             db.session.add(anexo)
+                            # Variantes reduzidas (PDF/miniatura) geradas uma única vez
+                            aplicar_variantes(anexo, file_content)
                             
                         except Exception as e:
                             flash(f'Erro ao salvar arquivo {file.filename}: {str(e)}', 'warning')
@@ -1084,7 +1077,7 @@ def novo():
                         # Não criar parcelas se soma não bater com o total
                         flash('Soma das parcelas + entrada não corresponde ao valor total. Verifique os valores inseridos.', 'error')
                         clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
-                        numero_os = OrdemServico.gerar_proximo_numero()
+                        numero_os = OrdemServico.prever_proximo_numero()
                         # Não persistir alterações de parcelas neste fluxo; deixa o usuário corrigir
                         return render_template('os/form.html', ordem=ordem, clientes=clientes, numero_os=numero_os, today=date.today())
 
@@ -1180,7 +1173,7 @@ def novo():
                 db.session.rollback()
                 flash(f'Erro ao salvar ordem de serviço no banco de dados: {str(commit_error)}', 'error')
                 clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
-                numero_os = OrdemServico.gerar_proximo_numero()
+                numero_os = OrdemServico.prever_proximo_numero()
                 return render_template('os/form.html', ordem=None, clientes=clientes, numero_os=numero_os, today=date.today())
 
             flash(f'✅ Ordem de Serviço #{ordem.numero} criada com sucesso!', 'success')
@@ -1199,12 +1192,12 @@ def novo():
                 pass
             flash(f'❌ Erro ao criar ordem de serviço: {str(e)}', 'error')
             clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
-            numero_os = OrdemServico.gerar_proximo_numero()
+            numero_os = OrdemServico.prever_proximo_numero()
             return render_template('os/form.html', ordem=None, clientes=clientes, numero_os=numero_os, today=date.today())
     
     # GET - exibe formulário vazio
     clientes = buscar_clientes_ativos()
-    numero_os = OrdemServico.gerar_proximo_numero()
+    numero_os = OrdemServico.prever_proximo_numero()
     return render_template('os/form.html', ordem=None, clientes=clientes, numero_os=numero_os, today=date.today())
 
 @ordem_servico_bp.route('/<int:id>')
@@ -1516,13 +1509,9 @@ def editar(id):
                 limpar_itens_e_parcelas(ordem)
                 limpar_dados_financeiros(ordem)
             elif pode_gerir_financeiro:
-                print(f"DEBUG: Removendo {len(ordem.servicos)} serviços antigos via loop delete")
-                servicos_removidos = 0
-                for item_existente in list(ordem.servicos):
-                    print(f"  🗑️ Removendo serviço: {item_existente.descricao}")
-                    db.session.delete(item_existente)
-                    servicos_removidos += 1
-                print(f" {servicos_removidos} serviços removidos")
+                from app.ordem_servico.os_persistencia_service import (
+                    CHAVE_PRODUTO, CHAVE_SERVICO, carregar_por_id, sincronizar_itens
+                )
 
                 print("DEBUG: Processando itens de serviço com nova estrutura de tipos (edição)")
                 servicos_desc_array = request.form.getlist('servico_descricao[]')
@@ -1576,28 +1565,16 @@ def editar(id):
 
                 print(f"DEBUG: Coletados {len(servicos_data)} serviços para edição: {servicos_data}")
 
-                servicos_adicionados = 0
-                for servico_data in servicos_data:
-                    item = OrdemServicoItem(
-                        ordem_servico_id=ordem.id,
-                        descricao=servico_data['descricao'],
-                        tipo_servico=servico_data['tipo'],
-                        quantidade=Decimal(str(servico_data['quantidade'])),
-                        valor_unitario=Decimal(str(servico_data['valor_unitario']))
-                    )
-                    item.calcular_total()
-                    db.session.add(item)
-                    servicos_adicionados += 1
-                    print(f"  ➕ Adicionado serviço: {item.descricao} - {item.quantidade} {item.tipo_servico} = R$ {item.valor_total}")
-                print(f" {servicos_adicionados} serviços adicionados")
-
-                print(f"DEBUG: Removendo {len(ordem.produtos_utilizados)} produtos antigos via loop delete")
-                produtos_removidos = 0
-                for produto_existente in list(ordem.produtos_utilizados):
-                    print(f"  🗑️ Removendo produto: {produto_existente.descricao}")
-                    db.session.delete(produto_existente)
-                    produtos_removidos += 1
-                print(f" {produtos_removidos} produtos removidos")
+                # Grava só a diferença em relação aos serviços existentes
+                linhas_servicos = [{
+                    'descricao': servico_data['descricao'],
+                    'tipo_servico': servico_data['tipo'],
+                    'quantidade': Decimal(str(servico_data['quantidade'])),
+                    'valor_unitario': Decimal(str(servico_data['valor_unitario'])),
+                } for servico_data in servicos_data]
+                resultado = sincronizar_itens(ordem.servicos, linhas_servicos, CHAVE_SERVICO,
+                                              OrdemServicoItem, OrdemServicoItem.calcular_total)
+                print(f" Serviços: {resultado}")
 
                 produtos_id = request.form.getlist('produto_id[]')
                 produtos_desc = request.form.getlist('produto_descricao[]')
@@ -1613,7 +1590,12 @@ def editar(id):
                 print(f"  📝 Descrições: {produtos_desc if produtos_desc else []}")
                 print(f"  📝 Custom: {produtos_desc_custom if produtos_desc_custom else []}")
 
-                produtos_adicionados = 0
+                # Produtos cadastrados referenciados: uma única consulta
+                produtos_cadastrados = carregar_por_id(
+                    Produto, (safe_int_convert(valor) for valor in produtos_id)
+                )
+
+                linhas_produtos = []
                 for i in range(max_produtos):
                     descricao = None
                     produto_cadastrado_id = None
@@ -1623,13 +1605,10 @@ def editar(id):
                             if i < len(produtos_desc_custom) and produtos_desc_custom[i].strip():
                                 descricao = produtos_desc_custom[i].strip()
                         else:
-                            try:
-                                produto_cadastrado_id = int(produtos_id[i])
-                                produto_obj = Produto.query.get(produto_cadastrado_id)
-                                if produto_obj:
-                                    descricao = produto_obj.nome
-                            except (ValueError, TypeError):
-                                pass
+                            produto_cadastrado_id = safe_int_convert(produtos_id[i])
+                            produto_obj = produtos_cadastrados.get(produto_cadastrado_id)
+                            if produto_obj:
+                                descricao = produto_obj.nome
 
                     if not descricao and i < len(produtos_desc) and produtos_desc[i].strip():
                         descricao = produtos_desc[i].strip()
@@ -1638,27 +1617,25 @@ def editar(id):
                         qtd_value = produtos_qtd[i] if i < len(produtos_qtd) else ''
                         valor_value = produtos_valor[i] if i < len(produtos_valor) else ''
 
-                        produto = OrdemServicoProduto(
-                            ordem_servico_id=ordem.id,
-                            descricao=descricao,
-                            produto_id=produto_cadastrado_id,
-                            quantidade=safe_decimal_convert(qtd_value, 1),
-                            valor_unitario=safe_decimal_convert(valor_value, 0)
-                        )
-                        produto.calcular_total()
-                        db.session.add(produto)
-                        produtos_adicionados += 1
-                        print(f"  ➕ Adicionado produto: {descricao} (ID: {produto_cadastrado_id})")
-                print(f" {produtos_adicionados} produtos adicionados")
+                        linhas_produtos.append({
+                            'descricao': descricao,
+                            'produto_id': produto_cadastrado_id,
+                            'quantidade': safe_decimal_convert(qtd_value, 1),
+                            'valor_unitario': safe_decimal_convert(valor_value, 0),
+                        })
+                resultado = sincronizar_itens(ordem.produtos_utilizados, linhas_produtos, CHAVE_PRODUTO,
+                                              OrdemServicoProduto, OrdemServicoProduto.calcular_total)
+                print(f" Produtos: {resultado}")
 
                 ordem.valor_servico = ordem.valor_total_servicos
                 ordem.valor_pecas = ordem.valor_total_produtos
                 ordem.valor_total = ordem.valor_total_calculado_novo
                 print(f"🧮 DEBUG: Valor serviço: R$ {ordem.valor_servico} | Valor peças: R$ {ordem.valor_pecas} | Valor total: R$ {ordem.valor_total}")
 
-            # Processa parcelas da ordem: validação e recriação conforme formulário
-            # IMPORTANTE: Só recria parcelas se o usuário forneceu dados manuais de parcelas
+            # Processa parcelas da ordem: validação e atualização conforme formulário
+            # IMPORTANTE: Só altera parcelas se o usuário forneceu dados manuais de parcelas
             try:
+                from app.ordem_servico.os_persistencia_service import sincronizar_parcelas
                 # Verificar se existem parcelas cadastradas
                 tem_parcelas_existentes = hasattr(ordem, 'parcelas') and ordem.parcelas and len(ordem.parcelas) > 0
                 
@@ -1713,19 +1690,13 @@ def editar(id):
                                 clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
                                 return render_template('os/form.html', ordem=ordem, clientes=clientes, today=date.today())
 
-                            # Limpa existentes e salva as parcelas manuais
-                            for p in list(ordem.parcelas):
-                                p.delete()
-
-                            for numero, data_venc, valor_parcela in parsed_parcelas:
-                                parcela = OrdemServicoParcela(
-                                    ordem_servico_id=ordem.id,
-                                    numero_parcela=numero,
-                                    data_vencimento=data_venc,
-                                    valor=Decimal(str(valor_parcela)).quantize(Decimal('0.01'), rounding=decimal.ROUND_HALF_UP),
-                                    ativo=True
-                                )
-                                db.session.add(parcela)
+                            # Aplica as parcelas manuais sobre as existentes (mesmo número = mesmo registro)
+                            sincronizar_parcelas(ordem.parcelas, [{
+                                'numero_parcela': numero,
+                                'data_vencimento': data_venc,
+                                'valor': Decimal(str(valor_parcela)).quantize(Decimal('0.01'), rounding=decimal.ROUND_HALF_UP),
+                                'ativo': True,
+                            } for numero, data_venc, valor_parcela in parsed_parcelas], OrdemServicoParcela)
                         else:
                             # Distribuição automática: calcula parcelas garantindo soma exata
                             restante = Decimal(str(ordem.valor_total)) - entrada
@@ -1755,20 +1726,15 @@ def editar(id):
                                         valor_final = valor_por_parcela_q
                                     valores.append(valor_final)
 
-                            # Limpa parcelas existentes e salva nova distribuição
-                            for p in list(ordem.parcelas):
-                                p.delete()
-
+                            linhas_parcelas = []
                             idx_offset = 0
                             if entrada and entrada > 0:
-                                parcela = OrdemServicoParcela(
-                                    ordem_servico_id=ordem.id,
-                                    numero_parcela=1,
-                                    data_vencimento=base_date,
-                                    valor=Decimal(str(entrada)).quantize(Decimal('0.01'), rounding=decimal.ROUND_HALF_UP),
-                                    ativo=True
-                                )
-                                db.session.add(parcela)
+                                linhas_parcelas.append({
+                                    'numero_parcela': 1,
+                                    'data_vencimento': base_date,
+                                    'valor': Decimal(str(entrada)).quantize(Decimal('0.01'), rounding=decimal.ROUND_HALF_UP),
+                                    'ativo': True,
+                                })
                                 idx_offset = 1
 
                             for i, val in enumerate(valores):
@@ -1782,14 +1748,15 @@ def editar(id):
                                 except Exception:
                                     data_venc = base_date
 
-                                parcela = OrdemServicoParcela(
-                                    ordem_servico_id=ordem.id,
-                                    numero_parcela=numero,
-                                    data_vencimento=data_venc,
-                                    valor=val,
-                                    ativo=True
-                                )
-                                db.session.add(parcela)
+                                linhas_parcelas.append({
+                                    'numero_parcela': numero,
+                                    'data_vencimento': data_venc,
+                                    'valor': val,
+                                    'ativo': True,
+                                })
+
+                            # Aplica a nova distribuição sobre as parcelas existentes
+                            sincronizar_parcelas(ordem.parcelas, linhas_parcelas, OrdemServicoParcela)
             except Exception as e:
                 print('Erro ao processar parcelas:', e)
             
@@ -1846,9 +1813,13 @@ def editar(id):
                             file_content = file.read()
                             file.seek(0)  # Volta novamente para salvar em disco
                             
-                            # Salva arquivo em disco (para desenvolvimento local)
-                            file.save(filepath)
-                            print(f"✅ DEBUG ANEXOS EDITAR: Arquivo salvo fisicamente: {filepath}")
+                            # Com armazenamento externo (SHA-256, deduplicado) o conteúdo não vai ao banco
+                            armazenamento = obter_armazenamento()
+                            arquivo_salvo = armazenamento.salvar(file_content) if armazenamento else None
+                            if not arquivo_salvo:
+                                # Salva arquivo em disco (para desenvolvimento local)
+                                file.save(filepath)
+                                print(f"✅ DEBUG ANEXOS EDITAR: Arquivo salvo fisicamente: {filepath}")
                             
                             # Detecta tipo do arquivo
                             content_type = file.content_type or 'application/octet-stream'
@@ -1864,8 +1835,10 @@ def editar(id):
                                     tipo_arquivo=tipo_arquivo,
                                     mime_type=content_type,
                                     tamanho=len(file_content),
-                                    caminho=filepath,
-                                    conteudo=file_content  # Salva no banco para persistir no Render
+                                    caminho=arquivo_salvo.referencia if arquivo_salvo else filepath,
+                                    # Salva no banco para persistir no Render (sem armazenamento externo)
+                                    conteudo=None if arquivo_salvo else file_content,
+                                    arquivo_sha256=arquivo_salvo.sha256 if arquivo_salvo else None
                                 )
                             except TypeError:
                                 # Se a coluna conteudo não existir ainda, cria sem ela
@@ -1880,6 +1853,8 @@ def editar(id):
                                     caminho=filepath
                                 )
                             db.session.add(anexo)
+                            # Variantes reduzidas (PDF/miniatura) geradas uma única vez
+                            aplicar_variantes(anexo, file_content)
                             print(f"✅ DEBUG ANEXOS EDITAR: Registro criado no banco: {anexo}")
                             
                         except Exception as e:
@@ -2061,16 +2036,18 @@ def api_buscar():
         status = request.args.get('status', '').strip()
         cliente_id = request.args.get('cliente_id', '').strip()
         
+        from app.services.busca_service import condicao_busca, ids_busca, relevancia
+        
         query = OrdemServico.query.filter_by(ativo=True)
         
         if termo:
-            query = query.join(Cliente).filter(
+            # Pela própria OS (número, título, equipamento) ou pelo cliente
+            query = query.filter(
                 db.or_(
-                    OrdemServico.numero.ilike(f'%{termo}%'),
-                    OrdemServico.titulo.ilike(f'%{termo}%'),
-                    Cliente.nome.ilike(f'%{termo}%')
+                    condicao_busca(OrdemServico, termo),
+                    OrdemServico.cliente_id.in_(ids_busca(Cliente, termo))
                 )
-            )
+            ).order_by(relevancia(OrdemServico, termo).desc())
         
         if status:
             query = query.filter(OrdemServico.status == status)
@@ -2078,7 +2055,7 @@ def api_buscar():
         if cliente_id:
             query = query.filter(OrdemServico.cliente_id == int(cliente_id))
         
-        ordens = query.limit(20).all()
+        ordens = query.order_by(OrdemServico.id.desc()).limit(20).all()
         
         resultado = []
         for ordem in ordens:
@@ -2102,74 +2079,74 @@ def api_buscar():
 def baixar_anexo(anexo_id):
     """
     Serve um arquivo anexado à ordem de serviço.
-    Serve do BLOB primeiro, depois tenta disco físico.
+    Serve do BLOB em streaming (com Range/ETag), depois tenta disco físico.
     
     Args:
         anexo_id: ID do anexo
     """
-    from flask import Response
-    import io
-    
+    from app.ordem_servico.anexo_download_service import responder_anexo
+
     anexo = OrdemServicoAnexo.query.get_or_404(anexo_id)
-    
-    # 1. Tenta servir do BLOB (se disponível)
-    if hasattr(anexo, 'conteudo') and anexo.conteudo:
-        return Response(
-            io.BytesIO(anexo.conteudo),
-            mimetype=anexo.mime_type,
-            headers={'Content-Disposition': f'attachment; filename="{anexo.nome_original}"'}
-        )
-    
-    # 2. Fallback: tenta servir do disco
-    try:
-        return send_from_directory(
-            UPLOAD_FOLDER,
-            anexo.nome_arquivo,
-            as_attachment=True,
-            download_name=anexo.nome_original
-        )
-    except FileNotFoundError:
+
+    resposta = responder_anexo(anexo, como_anexo=True, diretorios=_diretorios_anexos())
+    if resposta is None:
         flash('Arquivo não encontrado!', 'error')
         return redirect(url_for('ordem_servico.visualizar', id=anexo.ordem_servico_id))
+    return resposta
 
 @ordem_servico_bp.route('/anexo/<int:anexo_id>/visualizar')
 def visualizar_anexo(anexo_id):
     """
     Visualiza um arquivo anexado (para imagens principalmente).
-    Serve do BLOB primeiro, depois tenta disco físico.
+    Serve do BLOB em streaming (com Range/ETag), depois tenta disco físico.
+    """
+    from app.ordem_servico.anexo_download_service import responder_anexo
+
+    anexo = OrdemServicoAnexo.query.get_or_404(anexo_id)
+
+    resposta = responder_anexo(anexo, como_anexo=False, mime_padrao='image/jpeg',
+                               diretorios=_diretorios_anexos())
+    if resposta is None:
+        return ('Imagem não encontrada', 404)
+    return resposta
+
+@ordem_servico_bp.route('/anexo/<int:anexo_id>/miniatura')
+def miniatura_anexo(anexo_id):
+    """
+    Serve a miniatura (JPEG reduzido) de um anexo de imagem.
+    Anexos antigos têm a miniatura gerada e gravada no primeiro acesso.
     """
     from flask import send_file
     import io
+    from app.ordem_servico.anexo_download_service import etag_anexo
 
     anexo = OrdemServicoAnexo.query.get_or_404(anexo_id)
 
-    # 1. Tenta servir do BLOB (funciona no Render)
-    if hasattr(anexo, 'conteudo') and anexo.conteudo:
-        conteudo = bytes(anexo.conteudo) if not isinstance(anexo.conteudo, bytes) else anexo.conteudo
-        return send_file(
-            io.BytesIO(conteudo),
-            mimetype=anexo.mime_type or 'image/jpeg',
-            as_attachment=False,
-            download_name=anexo.nome_original
-        )
+    miniatura = obter_variante(anexo, 'miniatura', diretorios=_diretorios_anexos())
+    if not miniatura:
+        return redirect(url_for('ordem_servico.visualizar_anexo', anexo_id=anexo_id))
 
-    # 2. Fallback: tenta disco
-    possible_paths = [
-        os.path.join(UPLOAD_FOLDER, anexo.nome_arquivo),
-        os.path.join('app', 'static', 'uploads', anexo.nome_arquivo),
-        os.path.join(current_app.root_path, 'static', 'uploads', anexo.nome_arquivo),
+    if db.session.is_modified(anexo):
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Não foi possível gravar variantes do anexo {anexo_id}: {e}")
+
+    resposta = send_file(io.BytesIO(miniatura), mimetype=MIME_VARIANTE, as_attachment=False,
+                         conditional=True, etag=f'{etag_anexo(anexo)}-miniatura')
+    resposta.cache_control.max_age = 86400
+    resposta.cache_control.private = True
+    return resposta
+
+def _diretorios_anexos():
+    """Diretórios onde anexos antigos podem estar gravados em disco."""
+    raiz = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    return [
+        UPLOAD_FOLDER,
+        os.path.join(raiz, 'uploads', 'ordem_servico', 'anexos'),
+        os.path.join(raiz, 'app', 'static', 'uploads'),
     ]
-    for path in possible_paths:
-        if os.path.exists(path):
-            with open(path, 'rb') as f:
-                return send_file(
-                    io.BytesIO(f.read()),
-                    mimetype=anexo.mime_type or 'image/jpeg',
-                    as_attachment=False,
-                    download_name=anexo.nome_original
-                )
-
-    return ('Imagem não encontrada', 404)
 
 @ordem_servico_bp.route('/anexo/<int:anexo_id>/excluir', methods=['POST'])
 def excluir_anexo(anexo_id):
@@ -2189,7 +2166,9 @@ def excluir_anexo(anexo_id):
         if os.path.exists(filepath):
             os.remove(filepath)
         
-        # Remove registro do banco (BLOB também será removido automaticamente)
+        # Remove registro do banco (BLOB também será removido automaticamente).
+        # No armazenamento externo o arquivo pode ser compartilhado (deduplicação):
+        # fica para scripts/migrar_arquivos_armazenamento.py --coletar-orfaos
         anexo.delete()
         
         return jsonify({
@@ -2212,8 +2191,11 @@ def listar_anexos(id):
         id: ID da ordem de serviço
     """
     ordem = OrdemServico.query.get_or_404(id)
-    anexos = OrdemServicoAnexo.query.filter_by(ordem_servico_id=id).order_by(OrdemServicoAnexo.data_upload, OrdemServicoAnexo.id).all()
-    
+    anexos = (OrdemServicoAnexo.query
+              .filter_by(ordem_servico_id=id)
+              .order_by(OrdemServicoAnexo.criado_em, OrdemServicoAnexo.id)
+              .all())
+
     resultado = []
     for anexo in anexos:
         resultado.append({
@@ -2221,7 +2203,9 @@ def listar_anexos(id):
             'nome_original': anexo.nome_original,
             'tipo_arquivo': anexo.tipo_arquivo,
             'tamanho': anexo.tamanho,
-            'data_upload': anexo.data_upload.strftime('%d/%m/%Y %H:%M') if anexo.data_upload else ''
+            'data_upload': anexo.criado_em.strftime('%d/%m/%Y %H:%M') if anexo.criado_em else '',
+            'url': url_for('ordem_servico.visualizar_anexo', anexo_id=anexo.id),
+            'miniatura_url': url_for('ordem_servico.miniatura_anexo', anexo_id=anexo.id) if anexo.is_imagem else None,
         })
     
     return jsonify(resultado)
@@ -2230,34 +2214,17 @@ def listar_anexos(id):
 def download_anexo(anexo_id):
     """
     Faz download de um arquivo anexado.
-    Tenta BLOB primeiro (funciona no Render), depois disco.
+    Tenta BLOB em streaming primeiro (funciona no Render), depois disco.
     """
-    from flask import send_file
-    import io
+    from app.ordem_servico.anexo_download_service import responder_anexo
 
     anexo = OrdemServicoAnexo.query.get_or_404(anexo_id)
 
-    # 1. Tenta BLOB (Render)
-    if hasattr(anexo, 'conteudo') and anexo.conteudo:
-        conteudo = bytes(anexo.conteudo) if not isinstance(anexo.conteudo, bytes) else anexo.conteudo
-        return send_file(
-            io.BytesIO(conteudo),
-            mimetype=anexo.mime_type or 'application/octet-stream',
-            as_attachment=True,
-            download_name=anexo.nome_original
-        )
-
-    # 2. Fallback: disco
-    try:
-        return send_from_directory(
-            UPLOAD_FOLDER,
-            anexo.nome_arquivo,
-            as_attachment=True,
-            download_name=anexo.nome_original
-        )
-    except FileNotFoundError:
+    resposta = responder_anexo(anexo, como_anexo=True, diretorios=_diretorios_anexos())
+    if resposta is None:
         flash('Arquivo não encontrado!', 'error')
         return redirect(url_for('ordem_servico.visualizar', id=anexo.ordem_servico_id))
+    return resposta
 
 @ordem_servico_bp.route('/api/test')
 def api_test():
@@ -2572,57 +2539,30 @@ def gerar_relatorio_pdf(id):
         print(f"🔍 CAMINHO ABSOLUTO: {os.path.abspath(os.path.join('app', 'ordem_servico', 'templates', 'os', 'pdf_ordem_servico.html'))}")
         
         # Converter imagens anexadas para base64 (sempre para PDF normal e do cliente; nunca para fechamento)
+        # Usa a variante reduzida 'pdf' (gerada no upload). Anexos antigos são convertidos em memória
+        # (esta rota não faz commit: altera a ordem só para renderizar); a rota da miniatura persiste
         anexos_base64 = {}
+        anexos_mime = {}
         if not fechamento and hasattr(ordem, 'anexos') and ordem.anexos:
             import base64
             print(f"🖼️ DEBUG PDF: Convertendo {len(ordem.anexos)} anexos para base64...")
             for anexo in ordem.anexos:
-                print(f"  📁 Processando: {anexo.nome_original}")
-                print(f"     - Tipo: {anexo.tipo_arquivo}")
-                print(f"     - MIME: {anexo.mime_type}")
-                print(f"     - Caminho salvo: {anexo.caminho}")
-                
-                if anexo.tipo_arquivo == 'image' or (anexo.mime_type and 'image' in anexo.mime_type):
-                    try:
-                        # PRIORIDADE 1: Usar conteúdo BLOB salvo no banco (funciona no Render)
-                        if hasattr(anexo, 'conteudo') and anexo.conteudo:
-                            print(f"     ✅ Usando conteúdo do BLOB no banco ({len(anexo.conteudo)} bytes)")
-                            img_base64 = base64.b64encode(anexo.conteudo).decode('utf-8')
-                            anexos_base64[str(anexo.id)] = img_base64
-                            print(f"     ✅ Convertido do BLOB: {len(img_base64)} chars base64")
-                        else:
-                            # PRIORIDADE 2: Tentar ler do disco (desenvolvimento local)
-                            print(f"     ⚠️ BLOB vazio, tentando ler do disco...")
-                            possible_paths = [
-                                anexo.caminho,  # Caminho completo salvo no banco
-                                os.path.join(UPLOAD_FOLDER, anexo.nome_arquivo),  # Usando UPLOAD_FOLDER
-                                os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads', 'ordem_servico', 'anexos', anexo.nome_arquivo),
-                                os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'app', 'static', 'uploads', anexo.nome_arquivo),  # Caminho usado atualmente
-                            ]
-                            
-                            arquivo_encontrado = None
-                            for caminho_teste in possible_paths:
-                                if os.path.exists(caminho_teste):
-                                    arquivo_encontrado = caminho_teste
-                                    print(f"     ✅ Arquivo encontrado em: {arquivo_encontrado}")
-                                    break
-                                else:
-                                    print(f"     ❌ Não encontrado em: {caminho_teste}")
-                            
-                            if arquivo_encontrado:
-                                # Lê o arquivo e converte para base64
-                                with open(arquivo_encontrado, 'rb') as img_file:
-                                    img_data = img_file.read()
-                                    img_base64 = base64.b64encode(img_data).decode('utf-8')
-                                    anexos_base64[str(anexo.id)] = img_base64
-                                    print(f"     ✅ Convertido do disco: {len(img_base64)} chars base64 | {len(img_data)} bytes")
-                            else:
-                                print(f"     ⚠️ ARQUIVO NÃO ENCONTRADO em nenhum caminho testado!")
-                            
-                    except Exception as e:
-                        print(f"     ⚠️ ERRO ao converter {anexo.nome_original}: {str(e)}")
-                        import traceback
-                        print(f"     Stack: {traceback.format_exc()}")
+                if not anexo.is_imagem:
+                    continue
+                try:
+                    img_data = obter_variante(anexo, 'pdf', diretorios=_diretorios_anexos())
+                    if img_data:
+                        anexos_mime[str(anexo.id)] = MIME_VARIANTE
+                    else:
+                        # Pillow não conseguiu abrir: embute o original (BLOB ou disco)
+                        from app.ordem_servico.anexo_imagem_service import ler_original
+                        img_data = ler_original(anexo, _diretorios_anexos())
+                    if img_data:
+                        anexos_base64[str(anexo.id)] = base64.b64encode(img_data).decode('utf-8')
+                    else:
+                        print(f"     ⚠️ ARQUIVO NÃO ENCONTRADO: {anexo.nome_original}")
+                except Exception as e:
+                    print(f"     ⚠️ ERRO ao converter {anexo.nome_original}: {str(e)}")
             print(f"🖼️ DEBUG PDF: Total de imagens convertidas com sucesso: {len(anexos_base64)}/{len(ordem.anexos)}")
         
         # Renderiza o template HTML com timestamp para evitar cache
@@ -2633,8 +2573,8 @@ def gerar_relatorio_pdf(id):
             logo_base64=get_logo_base64(),  # Função para obter logo em base64
             config=config,  # Adicionar configurações
             timedelta=timedelta,  # Para cálculo de garantia
-            timestamp=dt.now().isoformat(),  # Timestamp único para evitar cache
             anexos_base64=anexos_base64,  # Imagens em base64
+            anexos_mime=anexos_mime,
             com_custos=com_custos,  # Seção de custo de M.O. (admin)
             fechamento=fechamento   # PDF de fechamento - o que pagar ao colaborador
         )
@@ -2655,6 +2595,26 @@ def gerar_relatorio_pdf(id):
             }
         '''
         
+        # Nome sugerido do arquivo: "Ordem de Servico OS16012026007" (data + número da OS)
+        data_str = dt.now().strftime("%d%m%Y")  # Formato: 16012026
+        numero_str = str(ordem.numero).zfill(4)  # Formato: 0007
+        nome_arquivo = f'Ordem de Servico OS{data_str}{numero_str}.pdf'
+        
+        from app.services.pdf_render_service import PDFIndisponivel, obter_ou_gerar_pdf
+        try:
+            # Pool de renderização + cache por conteúdo (mesmo HTML = mesmo PDF)
+            pdf, etag = obter_ou_gerar_pdf(f'os:{ordem.id}', html_content, base_url, css_string)
+        except PDFIndisponivel:
+            print(f"⚠️ DEBUG PDF: WeasyPrint indisponível - retornando HTML para impressão")
+        else:
+            # ETag = chave do cache: o navegador revalida e recebe 304 se nada mudou
+            response = make_response(pdf)
+            response.headers['Content-Type'] = 'application/pdf'
+            response.headers['Content-Disposition'] = f'inline; filename="{nome_arquivo}"'
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.set_etag(etag)
+            return response.make_conditional(request)
+        
         # Retorna HTML otimizado para impressão com script de auto-download
         print(f"DEBUG PDF: Retornando HTML para impressão com auto-download...")
         
@@ -2679,11 +2639,8 @@ def gerar_relatorio_pdf(id):
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0, private'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '-1'
-        # Sugere nome do arquivo para quando o usuário escolher "Salvar como PDF"
-        # Formato: "Ordem de Serviço OS16012026007" (data + número da OS)
-        data_str = dt.now().strftime("%d%m%Y")  # Formato: 16012026
-        numero_str = str(ordem.numero).zfill(4)  # Formato: 0007
-        response.headers['Content-Disposition'] = f'inline; filename="Ordem de Servico OS{data_str}{numero_str}.pdf"'
+        # Sugere o nome do arquivo para quando o usuário escolher "Salvar como PDF"
+        response.headers['Content-Disposition'] = f'inline; filename="{nome_arquivo}"'
         
         print(f" DEBUG PDF: HTML retornado com sucesso (com auto-print)")
         return response
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+ERP JSP v3.0 - Persistência dos Itens da OS
+===========================================
+
+Ao salvar a OS, as linhas enviadas pelo formulário (serviços, produtos,
+parcelas e apontamentos de colaboradores) são comparadas com os registros
+já existentes, e só a diferença vai para o banco:
+
+- a linha com a mesma chave de um registro existente (ex.: número da
+  parcela) reaproveita esse registro; o UPDATE sai só se algum valor mudou;
+- as linhas sem par reaproveitam, na ordem, os registros que sobraram;
+- o que ainda sobrar é inserido (linhas) ou removido (registros).
+
+Parcelas (sincronizar_parcelas) não reaproveitam sobras: a parcela carrega
+o pagamento (pago, data_pagamento), que não passa para outra parcela. Uma
+parcela cujo valor ou vencimento muda volta a ficar em aberto.
+
+Um save sem alterações não emite comandos nos itens, e os IDs referenciados
+por lançamentos financeiros (parcelas) não mudam a cada edição. As coleções
+do relacionamento ficam coerentes com o banco, de modo que os totais da OS
+são calculados sem recarregar os itens.
+
+Autor: JSP Soluções
+Data: 2026
+"""
+
+from sqlalchemy import inspect as sa_inspect
+
+from app.extensoes import db
+
+# Campos que identificam a mesma linha entre um save e outro
+CHAVE_SERVICO = ('descricao',)
+CHAVE_PRODUTO = ('produto_id', 'descricao')
+CHAVE_PARCELA = ('numero_parcela',)
+CHAVE_COLABORADOR = ('colaborador_id', 'data_trabalho')
+
+# Alterar estes campos da parcela desfaz o pagamento registrado
+CAMPOS_PAGAMENTO_PARCELA = ('valor', 'data_vencimento')
+
+
+def carregar_por_id(modelo, ids):
+    """Carrega numa única consulta os registros referenciados pelas linhas ({id: objeto})."""
+    ids = {i for i in ids if i}
+    if not ids:
+        return {}
+    return {obj.id: obj for obj in modelo.query.filter(modelo.id.in_(ids))}
+
+
+def _chave(origem, campos, obter):
+    return tuple(obter(origem, campo) for campo in campos)
+
+
+def sincronizar_itens(colecao, linhas, chave, modelo, ajustar=None, reaproveitar_sobras=True):
+    """
+    Aplica as linhas do formulário sobre os itens existentes da coleção.
+
+    Args:
+        colecao: coleção do relacionamento (ex.: ordem.servicos)
+        linhas: lista de dicts {atributo: valor}, na ordem do formulário
+        chave: campos que identificam a linha (ex.: CHAVE_PARCELA)
+        modelo: classe dos itens, usada para as linhas novas
+        ajustar: função(item) chamada depois de aplicar cada linha
+                 (ex.: recalcular o total do item)
+        reaproveitar_sobras: se False, linhas sem par são sempre inseridas
+                 e os registros sem par, removidos
+
+    Returns:
+        dict: {'inseridos', 'atualizados', 'removidos', 'inalterados'}
+    """
+    existentes = sorted(colecao, key=lambda item: (item.id is None, item.id or 0))
+    por_chave = {}
+    for item in existentes:
+        por_chave.setdefault(_chave(item, chave, getattr), []).append(item)
+
+    pares = []
+    usados = set()
+    for linha in linhas:
+        candidatos = por_chave.get(_chave(linha, chave, dict.get))
+        item = candidatos.pop(0) if candidatos else None
+        if item is not None:
+            usados.add(id(item))
+        pares.append(item)
+
+    sobras = [item for item in existentes if id(item) not in usados]
+    if reaproveitar_sobras:
+        for posicao, item in enumerate(pares):
+            if item is None and sobras:
+                pares[posicao] = sobras.pop(0)
+
+    resultado = {'inseridos': 0, 'atualizados': 0, 'removidos': 0, 'inalterados': 0}
+    for item in sobras:
+        colecao.remove(item)
+        db.session.delete(item)
+        resultado['removidos'] += 1
+
+    for linha, item in zip(linhas, pares):
+        if item is None:
+            item = modelo(**linha)
+            colecao.append(item)
+            if ajustar:
+                ajustar(item)
+            resultado['inseridos'] += 1
+            continue
+
+        for campo, valor in linha.items():
+            setattr(item, campo, valor)
+        if ajustar:
+            ajustar(item)
+        # is_modified compara com o valor carregado: reatribuir o mesmo valor não gera UPDATE
+        if db.session.is_modified(item):
+            resultado['atualizados'] += 1
+        else:
+            resultado['inalterados'] += 1
+
+    return resultado
+
+
+def _reiniciar_pagamento(parcela):
+    estado = sa_inspect(parcela)
+    if estado.persistent and any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_PAGAMENTO_PARCELA):
+        parcela.pago = False
+        parcela.data_pagamento = None
+
+
+def sincronizar_parcelas(colecao, linhas, modelo):
+    """
+    Aplica as parcelas do formulário (mesmo número = mesmo registro).
+
+    Sem reaproveitar sobras, e com o pagamento desfeito quando o valor ou o
+    vencimento da parcela muda.
+    """
+    return sincronizar_itens(colecao, linhas, CHAVE_PARCELA, modelo,
+                             ajustar=_reiniciar_pagamento, reaproveitar_sobras=False)
+
+
+def remover_itens(colecao):
+    """Remove todos os itens da coleção (e do banco no próximo flush)."""
+    removidos = 0
+    for item in list(colecao):
+        colecao.remove(item)
+        db.session.delete(item)
+        removidos += 1
+    return removidos
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Snapshot do Dashboard
+================================
+
+Consolida os indicadores do painel principal em poucas consultas
+agregadas (uma por tabela) e mantém o resultado em cache por processo.
+
+O cache é invalidado quando o commit de uma transação do processo atual
+grava clientes, fornecedores, produtos, ordens de serviço ou lançamentos
+financeiros (o flush só marca a sessão; um rollback descarta a marca).
+Cada invalidação avança uma versão, e um snapshot calculado enquanto
+outra transação fazia commit não é guardado. Um TTL curto limita a
+defasagem entre workers do Gunicorn, já que cada worker possui seu
+próprio cache.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import case, event, func
+from sqlalchemy.orm import Session, object_session
+
+from app.extensoes import db
+from app.cliente.cliente_model import Cliente
+from app.financeiro.financeiro_model import LancamentoFinanceiro
+from app.financeiro.financeiro_utils import calcular_metricas_dashboard, formatar_valor_real
+from app.fornecedor.fornecedor_model import Fornecedor
+from app.ordem_servico.ordem_servico_model import OrdemServico
+from app.produto.produto_model import Produto
+
+# Tempo máximo (segundos) que um snapshot permanece válido sem invalidação
+TTL_SNAPSHOT_SEGUNDOS = 60
+
+# Campos monetários que recebem versão formatada (<campo>_fmt)
+_CAMPOS_MONETARIOS = (
+    'valor_total_ordens', 'valor_ordens_concluidas', 'valor_ordens_abertas',
+    'receita_mes', 'total_receitas_mes', 'total_despesas_mes', 'saldo_mes',
+    'total_contas_receber', 'total_contas_pagar', 'fluxo_caixa', 'valor_estoque',
+)
+
+_LIMITE_RECENTES = 5
+
+# Marca, em session.info, que a transação gravou dados do dashboard
+_CHAVE_PENDENTE = 'dashboard_snapshot_invalidar'
+
+_lock = threading.Lock()
+_cached: Optional['DashboardSnapshot'] = None
+_cache_time: Optional[float] = None
+_versao = 0
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """
+    Fotografia imutável dos indicadores do dashboard.
+
+    Guarda apenas valores escalares e dicionários simples (nunca objetos ORM),
+    para que possa ser reaproveitada entre requisições e sessões.
+    """
+    indicadores: dict
+    clientes_recentes: List[dict] = field(default_factory=list)
+    produtos_estoque_baixo: List[dict] = field(default_factory=list)
+    ordens_recentes: List[dict] = field(default_factory=list)
+    gerado_em: float = 0.0
+
+    @property
+    def stats(self) -> dict:
+        """Retorna cópia dos indicadores com valores formatados e cores."""
+        stats = dict(self.indicadores)
+        for campo in _CAMPOS_MONETARIOS:
+            stats[f'{campo}_fmt'] = formatar_valor_real(stats.get(campo, 0))
+        stats['saldo_mes_cor'] = 'success' if stats.get('saldo_mes', 0) >= 0 else 'danger'
+        stats['fluxo_caixa_cor'] = 'success' if stats.get('fluxo_caixa', 0) >= 0 else 'danger'
+        return stats
+
+
+def _contar_ativos(model) -> int:
+    """Conta registros ativos de uma tabela em uma única consulta."""
+    return int(db.session.query(func.count(model.id)).filter(model.ativo.is_(True)).scalar() or 0)
+
+
+def _agregar_produtos() -> dict:
+    """
+    Agrega totais de produtos em uma única consulta.
+
+    Substitui a contagem separada, a listagem de estoque baixo e a
+    soma em Python de `valor_estoque` produto a produto.
+    """
+    estoque_baixo = (Produto.controla_estoque.is_(True)) & (Produto.estoque_atual <= Produto.estoque_minimo)
+    valorizado = (Produto.controla_estoque.is_(True)) & (Produto.preco_custo.isnot(None))
+
+    linha = db.session.query(
+        func.count(Produto.id),
+        func.count(case((estoque_baixo, Produto.id))),
+        func.coalesce(func.sum(case(
+            (valorizado, Produto.preco_custo * func.coalesce(Produto.estoque_atual, 0)),
+            else_=0,
+        )), 0),
+    ).filter(Produto.ativo.is_(True)).one()
+
+    return {
+        'total_produtos': int(linha[0] or 0),
+        'produtos_estoque_baixo': int(linha[1] or 0),
+        'valor_estoque': float(linha[2] or 0),
+    }
+
+
+def _listar_clientes_recentes() -> List[dict]:
+    clientes = Cliente.query.filter(Cliente.ativo.is_(True)).order_by(
+        Cliente.criado_em.desc()
+    ).limit(_LIMITE_RECENTES).all()
+    return [
+        {
+            'id': c.id,
+            'nome_display': c.nome_display,
+            'email': c.email,
+            'documento_formatado': c.documento_formatado,
+        }
+        for c in clientes
+    ]
+
+
+def _listar_produtos_estoque_baixo() -> List[dict]:
+    produtos = Produto.query.filter(
+        Produto.controla_estoque.is_(True),
+        Produto.estoque_atual <= Produto.estoque_minimo,
+        Produto.ativo.is_(True),
+    ).order_by(Produto.estoque_atual.asc(), Produto.id.asc()).limit(_LIMITE_RECENTES).all()
+    return [
+        {
+            'id': p.id,
+            'nome_display': p.nome_display,
+            'estoque_atual': p.estoque_atual,
+            'estoque_minimo': p.estoque_minimo,
+            'unidade_medida': p.unidade_medida,
+        }
+        for p in produtos
+    ]
+
+
+def _listar_ordens_recentes() -> List[dict]:
+    ordens = OrdemServico.query.filter(OrdemServico.ativo.is_(True)).order_by(
+        OrdemServico.criado_em.desc()
+    ).limit(_LIMITE_RECENTES).all()
+    return [
+        {
+            'id': o.id,
+            'numero': o.numero,
+            'titulo': o.titulo,
+            'status': o.status,
+            'valor_total': float(o.valor_total or 0),
+        }
+        for o in ordens
+    ]
+
+
+def calcular_snapshot_dashboard() -> DashboardSnapshot:
+    """Calcula um snapshot novo, sem consultar o cache."""
+    indicadores = {
+        'total_clientes': _contar_ativos(Cliente),
+        'total_fornecedores': _contar_ativos(Fornecedor),
+    }
+    indicadores.update(_agregar_produtos())
+    # OS e lançamentos: uma consulta agregada por tabela (FILTER)
+    indicadores.update(calcular_metricas_dashboard())
+
+    return DashboardSnapshot(
+        indicadores=indicadores,
+        clientes_recentes=_listar_clientes_recentes(),
+        produtos_estoque_baixo=_listar_produtos_estoque_baixo(),
+        ordens_recentes=_listar_ordens_recentes(),
+        gerado_em=time.time(),
+    )
+
+
+def obter_snapshot_dashboard(force_reload: bool = False) -> DashboardSnapshot:
+    """
+    Retorna o snapshot do dashboard, usando o cache do processo quando válido.
+
+    Args:
+        force_reload: Ignora o cache e recalcula imediatamente
+
+    Returns:
+        DashboardSnapshot com os indicadores atuais
+    """
+    global _cached, _cache_time
+
+    with _lock:
+        valido = (
+            not force_reload
+            and _cached is not None
+            and _cache_time is not None
+            and (time.monotonic() - _cache_time) <= TTL_SNAPSHOT_SEGUNDOS
+        )
+        if valido:
+            return _cached
+        versao = _versao
+
+    snapshot = calcular_snapshot_dashboard()
+
+    with _lock:
+        # Commit durante o cálculo: o snapshot pode não refletir a escrita
+        if _versao == versao:
+            _cached = snapshot
+            _cache_time = time.monotonic()
+    return snapshot
+
+
+def invalidar_snapshot_dashboard():
+    """Descarta o snapshot em cache (usado após o commit de escritas)."""
+    global _cached, _cache_time, _versao
+    with _lock:
+        _versao += 1
+        _cached = None
+        _cache_time = None
+
+
+# ===== EVENTOS DE INVALIDAÇÃO =====
+
+def _marcar_pendente(_mapper, _connection, target):
+    sessao = object_session(target)
+    if sessao is not None:
+        sessao.info[_CHAVE_PENDENTE] = True
+
+
+for _model in (Cliente, Fornecedor, Produto, OrdemServico, LancamentoFinanceiro):
+    for _evento in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _evento, _marcar_pendente)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apos_commit(session):
+    if session.info.pop(_CHAVE_PENDENTE, False):
+        invalidar_snapshot_dashboard()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _apos_rollback(session):
+    session.info.pop(_CHAVE_PENDENTE, None)
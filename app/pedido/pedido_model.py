@@ -96,16 +96,9 @@ class Pedido(BaseModel):
 
     @classmethod
     def gerar_proximo_numero(cls):
-        ultimo = cls.query.filter(cls.numero.like("PED%")).order_by(cls.numero.desc()).first()
-        if not ultimo:
-            return "PED0001"
-
-        sufixo = str(ultimo.numero or "").replace("PED", "", 1)
-        try:
-            proximo = int(sufixo) + 1
-        except (ValueError, TypeError):
-            proximo = 1
-        return f"PED{proximo:04d}"
+        from app.services.numeracao_service import alocar_codigo
+
+        return alocar_codigo(cls.numero, "PED")
 
     def recalcular_totais(self):
         subtotal = Decimal("0.00")
@@ -79,6 +79,8 @@ class PedidoCompra(BaseModel):
         CheckConstraint("subtotal >= 0", name="ck_pedidos_compra_subtotal_nao_negativo"),
         CheckConstraint("desconto >= 0", name="ck_pedidos_compra_desconto_nao_negativo"),
         CheckConstraint("total >= 0", name="ck_pedidos_compra_total_nao_negativo"),
+        # Paginação por cursor da listagem (app.services.paginacao_service)
+        db.Index("ix_pedidos_compra_data_emissao_id", "data_emissao", "id"),
     )
 
     def __init__(self, **kwargs):
@@ -96,16 +98,9 @@ class PedidoCompra(BaseModel):
 
     @classmethod
     def gerar_proximo_numero(cls):
-        ultimo = cls.query.filter(cls.numero.like("PC%")).order_by(cls.numero.desc()).first()
-        if not ultimo:
-            return "PC0001"
-
-        sufixo = str(ultimo.numero or "").replace("PC", "", 1)
-        try:
-            proximo = int(sufixo) + 1
-        except (TypeError, ValueError):
-            proximo = 1
-        return f"PC{proximo:04d}"
+        from app.services.numeracao_service import alocar_codigo
+
+        return alocar_codigo(cls.numero, "PC")
 
     def recalcular_totais(self):
         subtotal = Decimal("0.00")
@@ -6,7 +6,7 @@ from datetime import date, datetime
 from decimal import Decimal
 from functools import wraps
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 from sqlalchemy.orm import joinedload
 
@@ -25,6 +25,7 @@ from app.pedido_compra.forms import (
 from app.pedido_compra.pedido_compra_model import PedidoCompra, PedidoCompraItem
 from app.produto.produto_model import Produto
 from app.servico.servico_model import Servico
+from app.services.paginacao_service import paginar, parametros_paginacao, quer_json
 
 pedido_compra_bp = Blueprint("pedido_compra", __name__, template_folder="templates")
 
@@ -189,6 +190,19 @@ def _aplicar_itens_no_pedido_compra(pedido_compra, itens_form, modo_edicao=False
             db.session.delete(item_existente)
 
 
+def _pedido_compra_para_lista(pedido_compra):
+    return {
+        "id": pedido_compra.id,
+        "numero": pedido_compra.numero,
+        "fornecedor": pedido_compra.fornecedor.nome if pedido_compra.fornecedor else None,
+        "finalidade": pedido_compra.finalidade_label,
+        "status": pedido_compra.status_label,
+        "data_emissao": pedido_compra.data_emissao.isoformat() if pedido_compra.data_emissao else None,
+        "total": float(pedido_compra.total or 0),
+        "url": url_for("pedido_compra.visualizar", id=pedido_compra.id),
+    }
+
+
 @pedido_compra_bp.route("/")
 @pedido_compra_permission_required("visualizar_pedidos_compra")
 def listar():
@@ -197,7 +211,7 @@ def listar():
     finalidade_filtro = (request.args.get("finalidade") or "").strip().upper()
     busca = (request.args.get("busca") or "").strip()
 
-    query = _query_base_pedidos_compra()
+    query = PedidoCompra.query.filter(PedidoCompra.ativo.is_(True))
     if status_filtro:
         query = query.filter(PedidoCompra.status == status_filtro)
     if fornecedor_filtro:
@@ -213,11 +227,22 @@ def listar():
             )
         )
 
-    pedidos_compra = query.order_by(PedidoCompra.data_emissao.desc(), PedidoCompra.id.desc()).all()
+    cursor, por_pagina = parametros_paginacao(request.args)
+    pagina = paginar(
+        query,
+        [PedidoCompra.data_emissao, PedidoCompra.id],
+        cursor=cursor,
+        por_pagina=por_pagina,
+        opcoes=[joinedload(PedidoCompra.fornecedor)],
+    )
+    if quer_json(request.args):
+        return jsonify(pagina.para_dict(_pedido_compra_para_lista))
+
     return render_template(
         "pedido_compra/listar.html",
-        pedidos_compra=pedidos_compra,
-        fornecedores=Fornecedor.query.filter(Fornecedor.ativo.is_(True)).order_by(Fornecedor.nome.asc()).all(),
+        pedidos_compra=pagina.itens,
+        pagina=pagina,
+        fornecedor_selecionado=db.session.get(Fornecedor, fornecedor_filtro) if fornecedor_filtro else None,
         status_choices=PedidoCompra.STATUS_CHOICES,
         finalidade_choices=PedidoCompra.FINALIDADE_CHOICES,
         filtros={
@@ -11,10 +11,10 @@ Data: 2025
 """
 
 from app.extensoes import db
-from app.models import BaseModel
+from app.models import BaseModel, BuscavelMixin
 from decimal import Decimal
 
-class Produto(BaseModel):
+class Produto(BuscavelMixin, BaseModel):
     """
     Model para representar produtos do sistema.
     
@@ -22,6 +22,9 @@ class Produto(BaseModel):
     incluindo controle de estoque e preços.
     """
     __tablename__ = 'produtos'
+
+    # Campos indexados na busca textual (app.services.busca_service)
+    CAMPOS_BUSCA = ('nome', 'codigo', 'codigo_barras', 'marca', 'modelo')
     
     # Dados principais
     nome = db.Column(db.String(100), nullable=False, index=True)
@@ -176,7 +179,8 @@ class Produto(BaseModel):
     @classmethod
     def buscar_por_nome(cls, nome):
         """
-        Busca produtos por nome (busca parcial).
+        Busca produtos por nome (busca parcial, sem acentos; também
+        encontra pelo código, código de barras, marca e modelo).
         
         Args:
             nome (str): Nome ou parte do nome
@@ -184,10 +188,11 @@ class Produto(BaseModel):
         Returns:
             list: Lista de produtos encontrados
         """
+        from app.services.busca_service import condicao_busca, relevancia
         return cls.query.filter(
-            cls.nome.ilike(f'%{nome}%'),
+            condicao_busca(cls, nome),
             cls.ativo == True
-        ).all()
+        ).order_by(relevancia(cls, nome).desc(), cls.nome).all()
     
     @classmethod
     def buscar_por_categoria(cls, categoria):
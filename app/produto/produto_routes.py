@@ -36,14 +36,8 @@ def listar():
     
     # Aplica filtros se houver busca
     if busca:
-        query = query.filter(
-            db.or_(
-                Produto.nome.ilike(f'%{busca}%'),
-                Produto.codigo.ilike(f'%{busca}%'),
-                Produto.codigo_barras.ilike(f'%{busca}%'),
-                Produto.marca.ilike(f'%{busca}%')
-            )
-        )
+        from app.services.busca_service import condicao_busca
+        query = query.filter(condicao_busca(Produto, busca))
     
     # Filtro por categoria
     if categoria:
@@ -294,14 +288,8 @@ def api_buscar():
     if not termo or len(termo) < 2:
         return jsonify([])
     
-    produtos = Produto.query.filter(
-        db.or_(
-            Produto.nome.ilike(f'%{termo}%'),
-            Produto.codigo.ilike(f'%{termo}%'),
-            Produto.codigo_barras.ilike(f'%{termo}%')
-        ),
-        Produto.ativo == True
-    ).limit(10).all()
+    from app.services.busca_service import buscar
+    produtos = buscar(Produto, termo, limite=10, filtros=[Produto.ativo == True])
     
     resultado = []
     for produto in produtos:
@@ -11,13 +11,13 @@ Data: 2025
 """
 
 from app.extensoes import db
-from app.models import BaseModel
+from app.models import BaseModel, BuscavelMixin
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 from sqlalchemy import func
 
 
-class Proposta(BaseModel):
+class Proposta(BuscavelMixin, BaseModel):
     """
     Model para Proposta Comercial.
     
@@ -25,12 +25,17 @@ class Proposta(BaseModel):
     """
     
     __tablename__ = 'propostas'
+    # Paginação por cursor da listagem (app.services.paginacao_service)
+    __table_args__ = (db.Index('ix_propostas_data_emissao_id', 'data_emissao', 'id'),)
+
+    # Campos indexados na busca textual (app.services.busca_service)
+    CAMPOS_BUSCA = ('codigo', 'titulo')
     
     # Campos básicos
     codigo = db.Column(db.String(20), unique=True, nullable=False, index=True)
     
     # Cliente
-    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False, index=True)
     cliente = db.relationship('Cliente', backref='propostas')
     
     # Dados da proposta
@@ -211,25 +216,9 @@ class Proposta(BaseModel):
     
     @classmethod
     def gerar_proximo_codigo(cls):
-        """Gera o próximo código de proposta."""
-        ano_atual = date.today().year
-        prefixo = f"PROP{ano_atual}"
-        
-        # Busca o último código do ano
-        ultima_proposta = cls.query.filter(
-            cls.codigo.like(f"{prefixo}%")
-        ).order_by(cls.codigo.desc()).first()
-        
-        if ultima_proposta:
-            try:
-                ultimo_num = int(ultima_proposta.codigo.replace(prefixo, ""))
-                proximo_num = ultimo_num + 1
-            except ValueError:
-                proximo_num = 1
-        else:
-            proximo_num = 1
-        
-        return f"{prefixo}{proximo_num:04d}"
+        """Reserva o próximo código de proposta (PROP + ANO + 4 dígitos)."""
+        from app.services.numeracao_service import alocar_codigo
+        return alocar_codigo(cls.codigo, f"PROP{date.today().year}")
     
     @classmethod
     def buscar_por_codigo(cls, codigo):
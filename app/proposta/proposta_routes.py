@@ -71,35 +71,54 @@ def listar_propostas():
         logger.debug(f"Filtros: status={status_filtro}, cliente={cliente_filtro}, codigo={codigo_filtro}")
         
         # Construir query base - apenas propostas ativas
-        query = db.session.query(Proposta).join(Cliente, Proposta.cliente_id == Cliente.id, isouter=True).filter(Proposta.ativo == True)
+        query = Proposta.query.filter(Proposta.ativo == True)
         
         # Aplicar filtros
         if status_filtro:
             query = query.filter(Proposta.status == status_filtro)
         
         if cliente_filtro:
-            query = query.filter(Cliente.nome.ilike(f'%{cliente_filtro}%'))
+            from app.services.busca_service import ids_busca
+            query = query.filter(Proposta.cliente_id.in_(ids_busca(Cliente, cliente_filtro)))
         
         if codigo_filtro:
-            query = query.filter(Proposta.codigo.ilike(f'%{codigo_filtro}%'))
-        
-        # Executar query
-        propostas = query.order_by(Proposta.data_emissao.desc()).all()
-        
-        logger.debug(f"Encontradas {len(propostas)} propostas")
-        
-        # Calcular estatísticas
-        total_propostas = len(propostas)
-        propostas_pendentes = len([p for p in propostas if p.status.lower() in ['pendente', 'enviada']])
-        propostas_aprovadas = len([p for p in propostas if p.status.lower() == 'aprovada'])
-        valor_total = sum([p.valor_total or 0 for p in propostas])
+            from app.services.busca_service import condicao_busca
+            query = query.filter(condicao_busca(Proposta, codigo_filtro))
+        
+        # Estatísticas numa única consulta agregada (antes: laço sobre todas as propostas)
+        status_minusculo = db.func.lower(Proposta.status)
+        total_propostas, propostas_pendentes, propostas_aprovadas, valor_total = query.with_entities(
+            db.func.count(Proposta.id),
+            db.func.count(db.case((status_minusculo.in_(['pendente', 'enviada']), 1))),
+            db.func.count(db.case((status_minusculo == 'aprovada', 1))),
+            db.func.coalesce(db.func.sum(Proposta.valor_total), 0),
+        ).one()
         
         logger.debug(f"Estatísticas: total={total_propostas}, pendentes={propostas_pendentes}, aprovadas={propostas_aprovadas}, valor={valor_total}")
         
+        from app.services.paginacao_service import paginar, parametros_paginacao, quer_json
+        cursor, por_pagina = parametros_paginacao(request.args)
+        pagina = paginar(query, [Proposta.data_emissao, Proposta.id], cursor=cursor,
+                         por_pagina=por_pagina, total=total_propostas,
+                         opcoes=[joinedload(Proposta.cliente)])
+        
+        if quer_json(request.args):
+            return jsonify(pagina.para_dict(lambda proposta: {
+                'id': proposta.id,
+                'codigo': proposta.codigo,
+                'titulo': proposta.titulo,
+                'cliente': proposta.cliente.nome if proposta.cliente else None,
+                'status': proposta.status,
+                'data_emissao': proposta.data_emissao.isoformat() if proposta.data_emissao else None,
+                'valor_total': float(proposta.valor_total or 0),
+                'url': url_for('proposta.visualizar_proposta', id=proposta.id),
+            }))
+        
         # Render template
         logger.debug("Renderizando template proposta/listar.html")
         return render_template('proposta/listar.html',
-                             propostas=propostas,
+                             propostas=pagina.itens,
+                             pagina=pagina,
                              total_propostas=total_propostas,
                              propostas_pendentes=propostas_pendentes,
                              propostas_aprovadas=propostas_aprovadas,
@@ -809,97 +828,70 @@ def gerar_pdf(id):
                 logger.error(f"Erro ao carregar parcelas: {str(e)}")
                 parcelas = []
         
-        # Tentar importar WeasyPrint
-        try:
-            import weasyprint
-            from flask import current_app
-            import os
-            
-            # Definir project_root no início para garantir que esteja disponível
-            project_root = os.path.dirname(current_app.root_path)
-            
-            # Importar configurações da empresa
-            from app.configuracao.configuracao_utils import get_config
-            config = get_config(force_reload=True)  # Forçar reload para garantir dados atualizados
-            
-            # Usar logo base64 das configurações se disponível
-            logo_url = None
+        from flask import current_app
+        import os
+        from app.configuracao.configuracao_utils import get_config
+        from app.services.pdf_render_service import PDFIndisponivel, logo_empresa, obter_ou_gerar_pdf
+        
+        project_root = os.path.dirname(current_app.root_path)
+        
+        # Configurações da empresa (cache invalidado ao salvar configurações)
+        config = get_config()
+        
+        # Logo normalizado uma vez por versão da configuração
+        logo_padrao = os.path.join(project_root, "static", "img", "JSP.jpg")
+        logo = logo_empresa(config)
+        if logo['data_uri']:
+            logo_url = logo['data_uri']
+        else:
             if config and config.logo_base64:
-                # Verificar se a logo tem o prefixo correto
-                if not config.logo_base64.startswith('data:image'):
-                    logger.warning("⚠️ Logo base64 sem prefixo data URI - será exibida logo padrão")
-                    logger.warning(f"   Primeiros 50 chars: {config.logo_base64[:50]}")
-                    # Usar fallback
-                    logo_path = os.path.join(project_root, "static", "img", "JSP.jpg")
-                    logo_url = f"file:///{logo_path.replace(os.sep, '/')}"
-                else:
-                    logo_url = config.logo_base64
-                    logger.info("✅ Usando logo_base64 das configurações")
-                    logger.info(f"   Prefixo: {config.logo_base64[:50]}...")
-            else:
-                # Fallback para logo padrão se não houver base64
-                logo_path = os.path.join(project_root, "static", "img", "JSP.jpg")
-                logo_url = f"file:///{logo_path.replace(os.sep, '/')}"
-                logger.warning("⚠️ Logo base64 não encontrada, usando logo padrão")
-            
-            # Renderizar template HTML com o caminho da logo e configurações
-            html_content = render_template('proposta/pdf_proposta.html', 
-                                         proposta=proposta,
-                                         itens_produto=itens_produto,
-                                         itens_servico=itens_servico,
-                                         logo_url=logo_url,
-                                         config=config,
-                                         parcelas=parcelas)
-            
-            # Base URL para resolver outros caminhos relativos
-            base_url = f"file:///{project_root.replace(os.sep, '/')}/"
-            
-            # Gerar PDF com base_url para resolver imagens
-            pdf = weasyprint.HTML(string=html_content, base_url=base_url).write_pdf()
-            
-            # Criar resposta com headers para evitar cache
-            response = make_response(pdf)
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = f'inline; filename=proposta_{proposta.codigo}.pdf'
-            response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
-            response.headers['Pragma'] = 'no-cache'
-            response.headers['Expires'] = '0'
-            response.headers['Last-Modified'] = 'Wed, 11 Jan 1984 05:00:00 GMT'
-            
-            return response
-            
-        except ImportError:
+                logger.warning("⚠️ Logo base64 sem prefixo data URI - será exibida logo padrão")
+            logo_url = f"file:///{logo_padrao.replace(os.sep, '/')}"
+        
+        # Renderizar template HTML com o caminho da logo e configurações
+        html_content = render_template('proposta/pdf_proposta.html', 
+                                     proposta=proposta,
+                                     itens_produto=itens_produto,
+                                     itens_servico=itens_servico,
+                                     logo_url=logo_url,
+                                     config=config,
+                                     parcelas=parcelas)
+        
+        # Base URL para resolver outros caminhos relativos
+        base_url = f"file:///{project_root.replace(os.sep, '/')}/"
+        
+        try:
+            # Pool de renderização + cache por conteúdo (mesmo HTML = mesmo PDF)
+            pdf, etag = obter_ou_gerar_pdf(f'proposta:{proposta.id}', html_content, base_url)
+        except PDFIndisponivel:
             # WeasyPrint não disponível - retornar HTML
             logger.warning("WeasyPrint não encontrado - retornando HTML")
             flash('Biblioteca PDF não disponível - exibindo versão HTML', 'warning')
             
-            # Importar configurações da empresa para HTML também
-            from app.configuracao.configuracao_utils import get_config
-            config = get_config(force_reload=True)  # Forçar reload para garantir dados atualizados
-            
-            # Preparar logo_url também para HTML
-            logo_url = None
-            if config and config.logo_base64:
-                if config.logo_base64.startswith('data:image'):
-                    logo_url = config.logo_base64
-                    logger.info("✅ Usando logo_base64 das configurações (HTML)")
-                else:
-                    logger.warning("⚠️ Logo base64 sem prefixo data URI (HTML)")
-            
-            # Criar resposta HTML com headers de não-cache
-            html_response = make_response(render_template('proposta/pdf_proposta.html', 
-                                                        proposta=proposta,
-                                                        itens_produto=itens_produto,
-                                                        itens_servico=itens_servico,
-                                                        config=config,
-                                                        logo_url=logo_url,
-                                                        parcelas=parcelas))
+            # O navegador não carrega file:/// vindo de uma página http: a logo
+            # padrão vai embutida como data URI
+            if not logo['data_uri']:
+                html_content = render_template('proposta/pdf_proposta.html',
+                                             proposta=proposta,
+                                             itens_produto=itens_produto,
+                                             itens_servico=itens_servico,
+                                             logo_url=logo_empresa(config, logo_padrao)['data_uri'],
+                                             config=config,
+                                             parcelas=parcelas)
+            
+            html_response = make_response(html_content)
             html_response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
             html_response.headers['Pragma'] = 'no-cache'
             html_response.headers['Expires'] = '0'
-            html_response.headers['Last-Modified'] = 'Wed, 11 Jan 1984 05:00:00 GMT'
-            
             return html_response
+        
+        # ETag = chave do cache: o navegador revalida e recebe 304 se nada mudou
+        response = make_response(pdf)
+        response.headers['Content-Type'] = 'application/pdf'
+        response.headers['Content-Disposition'] = f'inline; filename=proposta_{proposta.codigo}.pdf'
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.set_etag(etag)
+        return response.make_conditional(request)
             
     except Exception as e:
         logger.error(f"Erro ao gerar PDF da proposta {id}: {str(e)}")
@@ -1066,10 +1058,8 @@ def api_clientes():
             })
         else:
             # Busca com termo para autocomplete
-            clientes = Cliente.query.filter(
-                Cliente.ativo == True,
-                Cliente.nome.ilike(f'%{termo}%')
-            ).limit(10).all()
+            from app.services.busca_service import buscar
+            clientes = buscar(Cliente, termo, limite=10, filtros=[Cliente.ativo == True])
             
             # Formato para autocomplete
             return jsonify([{
@@ -7,17 +7,102 @@ Este módulo fornece funções para consumir a API do distribuidor,
 incluindo autenticação via Bearer Token, tratamento de erros e
 paginação.
 
+- As requisições usam uma `requests.Session` compartilhada por URL base
+  (pool de conexões com keep-alive), em vez de abrir uma conexão por
+  chamada.
+- GETs do catálogo ficam em cache em memória por
+  DISTRIBUIDOR_API_CACHE_SEGUNDOS; vencido o prazo, a resposta é
+  revalidada com If-None-Match (304 reaproveita o conteúdo).
+- Timeouts, falhas de conexão, 429 e 5xx em GET são repetidos até
+  DISTRIBUIDOR_API_TENTATIVAS vezes, com espera exponencial e jitter
+  (ou o Retry-After informado pelo distribuidor).
+- `sincronizar_catalogo()` baixa todas as páginas em paralelo e grava o
+  espelho local (`kits_fotovoltaicos`), que é o que as telas de
+  precificação consultam.
+
 Autor: JSP Soluções
 Data: 2026
 """
 
+import copy
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from typing import Dict, List, Optional, Any
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Any, Tuple
 from flask import current_app
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Pool de conexões por URL base
+POOL_CONEXOES = 16
+
+# Espera entre tentativas: base * 2^tentativa, sorteada em [0, teto]
+BACKOFF_BASE_SEGUNDOS = 0.5
+BACKOFF_MAXIMO_SEGUNDOS = 30
+
+MAX_ENTRADAS_CACHE = 512
+
+_STATUS_REPETIVEIS = (429, 500, 502, 503, 504)
+_METODOS_REPETIVEIS = ('GET', 'HEAD')
+
+_sessoes: Dict[str, requests.Session] = {}
+_sessoes_lock = threading.Lock()
+
+
+def _obter_sessao(base_url: str) -> requests.Session:
+    """Sessão HTTP compartilhada (thread-safe) para a URL base."""
+    with _sessoes_lock:
+        sessao = _sessoes.get(base_url)
+        if sessao is None:
+            sessao = requests.Session()
+            # Repetições ficam por conta de _make_request (com backoff próprio)
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_CONEXOES, max_retries=0)
+            sessao.mount('http://', adaptador)
+            sessao.mount('https://', adaptador)
+            _sessoes[base_url] = sessao
+        return sessao
+
+
+class _CacheRespostas:
+    """Respostas GET em memória: {chave: (expira_em, etag, dados)}, LRU limitado."""
+
+    def __init__(self, max_entradas: int = MAX_ENTRADAS_CACHE):
+        self.max_entradas = max_entradas
+        self._entradas: 'OrderedDict[tuple, Tuple[float, Optional[str], Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+            return entrada
+
+    def guardar(self, chave, dados, etag: Optional[str], validade: float):
+        with self._lock:
+            self._entradas[chave] = (time.monotonic() + validade, etag, dados)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+_cache = _CacheRespostas()
+
+
+def limpar_cache():
+    """Descarta as respostas em cache (ex.: após alteração de preços)."""
+    _cache.limpar()
+
 
 class DistribuidorAPIError(Exception):
     """Exceção personalizada para erros da API do distribuidor."""
@@ -35,18 +120,27 @@ class DistribuidorAPIService:
                 self.base_url = current_app.config.get('DISTRIBUIDOR_API_URL', '')
                 self.token = current_app.config.get('DISTRIBUIDOR_API_TOKEN', '')
                 self.timeout = current_app.config.get('DISTRIBUIDOR_API_TIMEOUT', 30)
+                self.tentativas = current_app.config.get('DISTRIBUIDOR_API_TENTATIVAS', 3)
+                self.cache_segundos = current_app.config.get('DISTRIBUIDOR_API_CACHE_SEGUNDOS', 300)
             else:
                 # Fallback para quando não há contexto de app
                 import os
                 self.base_url = os.environ.get('DISTRIBUIDOR_API_URL', '')
                 self.token = os.environ.get('DISTRIBUIDOR_API_TOKEN', '')
                 self.timeout = int(os.environ.get('DISTRIBUIDOR_API_TIMEOUT', '30'))
+                self.tentativas = int(os.environ.get('DISTRIBUIDOR_API_TENTATIVAS', '3'))
+                self.cache_segundos = int(os.environ.get('DISTRIBUIDOR_API_CACHE_SEGUNDOS', '300'))
         except Exception:
             # Fallback seguro se houver qualquer erro
             import os
             self.base_url = os.environ.get('DISTRIBUIDOR_API_URL', '')
             self.token = os.environ.get('DISTRIBUIDOR_API_TOKEN', '')
             self.timeout = int(os.environ.get('DISTRIBUIDOR_API_TIMEOUT', '30'))
+            self.tentativas = int(os.environ.get('DISTRIBUIDOR_API_TENTATIVAS', '3'))
+            self.cache_segundos = int(os.environ.get('DISTRIBUIDOR_API_CACHE_SEGUNDOS', '300'))
+        
+        self.tentativas = max(1, self.tentativas)
+        self.backoff_base = BACKOFF_BASE_SEGUNDOS
         
         if not self.token:
             logger.warning("⚠️  DISTRIBUIDOR_API_TOKEN não configurado!")
@@ -65,12 +159,61 @@ class DistribuidorAPIService:
             'User-Agent': 'ERP-JSP/3.0'
         }
     
+    def _espera(self, tentativa: int, retry_after: Optional[str] = None) -> float:
+        """
+        Segundos até a próxima tentativa.
+        
+        Usa o Retry-After (em segundos) quando o distribuidor informa;
+        senão, backoff exponencial com jitter completo, para que vários
+        workers não repitam todos no mesmo instante.
+        """
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), BACKOFF_MAXIMO_SEGUNDOS)
+            except ValueError:
+                pass  # Retry-After em formato de data: usa o backoff
+        teto = min(BACKOFF_MAXIMO_SEGUNDOS, self.backoff_base * (2 ** tentativa))
+        return random.uniform(0, teto)
+    
+    def _enviar(self, method: str, url: str, headers: Dict, params, data) -> requests.Response:
+        """Envia a requisição, repetindo falhas transitórias em métodos idempotentes."""
+        sessao = _obter_sessao(self.base_url)
+        tentativas = self.tentativas if method.upper() in _METODOS_REPETIVEIS else 1
+        
+        for tentativa in range(tentativas):
+            ultima = tentativa == tentativas - 1
+            try:
+                response = sessao.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    json=data,
+                    timeout=self.timeout
+                )
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if ultima:
+                    raise
+                espera = self._espera(tentativa)
+                logger.warning(f"API {method} {url}: {e.__class__.__name__}, nova tentativa em {espera:.1f}s")
+                time.sleep(espera)
+                continue
+            
+            if response.status_code in _STATUS_REPETIVEIS and not ultima:
+                espera = self._espera(tentativa, response.headers.get('Retry-After'))
+                logger.warning(f"API {method} {url}: {response.status_code}, nova tentativa em {espera:.1f}s")
+                response.close()
+                time.sleep(espera)
+                continue
+            return response
+    
     def _make_request(
         self, 
         endpoint: str, 
         method: str = 'GET',
         params: Optional[Dict] = None,
-        data: Optional[Dict] = None
+        data: Optional[Dict] = None,
+        usar_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Faz requisição HTTP para a API do distribuidor.
@@ -80,6 +223,7 @@ class DistribuidorAPIService:
             method: Método HTTP (GET, POST, PUT, DELETE)
             params: Parâmetros de query string
             data: Dados para enviar no body (JSON)
+            usar_cache: Em GET, reaproveita/guarda a resposta no cache
         
         Returns:
             Resposta da API em formato dict
@@ -96,21 +240,29 @@ class DistribuidorAPIService:
         url = f"{self.base_url}{endpoint}"
         headers = self._get_headers()
         
+        usar_cache = usar_cache and method.upper() == 'GET' and self.cache_segundos > 0
+        chave = (url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+        entrada = _cache.obter(chave) if usar_cache else None
+        if entrada is not None:
+            expira_em, etag, dados = entrada
+            if time.monotonic() < expira_em:
+                return copy.deepcopy(dados)
+            if etag:
+                headers['If-None-Match'] = etag
+        
         try:
             logger.info(f"API Request: {method} {url}")
             
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                params=params,
-                json=data,
-                timeout=self.timeout
-            )
+            response = self._enviar(method, url, headers, params, data)
             
             # Log de resposta
             logger.info(f"API Response: {response.status_code}")
             
+            # Conteúdo não mudou desde a resposta em cache
+            if response.status_code == 304 and entrada is not None:
+                _cache.guardar(chave, entrada[2], response.headers.get('ETag') or entrada[1], self.cache_segundos)
+                return copy.deepcopy(entrada[2])
+            
             # Tratamento de erros HTTP
             if response.status_code == 401:
                 raise DistribuidorAPIError("Token de autenticação inválido ou expirado")
@@ -128,7 +280,11 @@ class DistribuidorAPIService:
                 )
             
             # Retorna JSON
-            return response.json()
+            dados = response.json()
+            if usar_cache:
+                _cache.guardar(chave, dados, response.headers.get('ETag'), self.cache_segundos)
+                return copy.deepcopy(dados)
+            return dados
             
         except requests.exceptions.Timeout:
             raise DistribuidorAPIError(
@@ -230,6 +386,40 @@ class DistribuidorAPIService:
         response = self.listar_kits(per_page=100, filtros=filtros)
         return response.get('kits', [])
     
+    def listar_catalogo(self, per_page: int = 100, max_workers: int = 4) -> List[Dict]:
+        """
+        Baixa o catálogo completo, com as páginas em paralelo.
+        
+        A primeira página informa o total de páginas; as demais são
+        buscadas em até `max_workers` requisições simultâneas (pela mesma
+        sessão com pool). Sem cache: a sincronização sempre lê o catálogo
+        atual.
+        
+        Args:
+            per_page: Quantidade de kits por página
+            max_workers: Páginas buscadas ao mesmo tempo
+        
+        Returns:
+            Lista com todos os kits, na ordem das páginas
+            
+        Raises:
+            DistribuidorAPIError: Se alguma página falhar (o catálogo
+                parcial não é devolvido)
+        """
+        def pagina(numero):
+            return self._make_request(
+                '/kits', params={'page': numero, 'per_page': per_page}, usar_cache=False
+            )
+        
+        primeira = pagina(1)
+        kits = list(primeira.get('kits', []))
+        total_paginas = int(primeira.get('pages') or 1)
+        if total_paginas > 1:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                for resposta in executor.map(pagina, range(2, total_paginas + 1)):
+                    kits.extend(resposta.get('kits', []))
+        return kits
+    
     def testar_conexao(self) -> bool:
         """
         Testa a conexão com a API do distribuidor.
@@ -254,3 +444,61 @@ def get_api_service() -> DistribuidorAPIService:
         Instância de DistribuidorAPIService
     """
     return DistribuidorAPIService()
+
+
+def sincronizar_catalogo(api: Optional[DistribuidorAPIService] = None,
+                         per_page: int = 100, max_workers: int = 4) -> Dict[str, int]:
+    """
+    Atualiza o espelho local (`kits_fotovoltaicos`) com o catálogo do distribuidor.
+    
+    Todos os kits são gravados em uma única transação, casados pelo
+    `kit_id_api`; kits que saíram do catálogo ficam inativos (não são
+    excluídos, para não perder referências). Se o download falhar, nada
+    é alterado.
+    
+    Args:
+        api: Serviço a usar (padrão: get_api_service())
+        per_page: Quantidade de kits por página
+        max_workers: Páginas buscadas ao mesmo tempo
+    
+    Returns:
+        Dict com: {'total', 'novos', 'atualizados', 'desativados'}
+    """
+    from app.extensoes import db
+    from app.kits_distribuidor.kits_model import KitFotovoltaico
+    
+    api = api or get_api_service()
+    kits_api = api.listar_catalogo(per_page=per_page, max_workers=max_workers)
+    
+    existentes = {kit.kit_id_api: kit for kit in KitFotovoltaico.query.all()}
+    vistos = set()
+    novos = atualizados = 0
+    try:
+        for dados in kits_api:
+            kit_id = str(dados.get('id') or dados.get('kit_id') or '')
+            if not kit_id or kit_id in vistos:
+                continue
+            vistos.add(kit_id)
+            kit = existentes.get(kit_id)
+            if kit is None:
+                kit = KitFotovoltaico(kit_id_api=kit_id)
+                db.session.add(kit)
+                novos += 1
+            else:
+                atualizados += 1
+            kit.atualizar_da_api(dados)
+        
+        desativados = 0
+        for kit_id, kit in existentes.items():
+            if kit_id not in vistos and kit.ativo:
+                kit.ativo = False
+                desativados += 1
+        
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    logger.info(f"Catálogo sincronizado: {len(vistos)} kits ({novos} novos, "
+                f"{atualizados} atualizados, {desativados} desativados)")
+    return {'total': len(vistos), 'novos': novos, 'atualizados': atualizados, 'desativados': desativados}
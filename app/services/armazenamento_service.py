@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Armazenamento de Arquivos
+====================================
+
+Armazenamento único dos arquivos enviados ao sistema (anexos de OS,
+XML/PDF de notas fiscais), endereçado pelo SHA-256 do conteúdo:
+
+- uploads idênticos são gravados uma única vez (deduplicação);
+- o banco guarda apenas a referência ("sha256:<hex>"), não os bytes;
+- backends: disco local (ARMAZENAMENTO_DIR) ou S3 compatível (AWS,
+  MinIO), escolhidos por ARMAZENAMENTO_BACKEND;
+- `migrar_do_banco` move BLOBs/base64 já existentes para o armazenamento
+  e `coletar_orfaos` remove arquivos que nenhum registro referencia.
+
+Com ARMAZENAMENTO_BACKEND='banco' (padrão) nada muda: os arquivos seguem
+no banco, como antes.
+
+Credenciais do S3 seguem as variáveis padrão da AWS
+(AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_DEFAULT_REGION).
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional, Set, Tuple, Union
+
+PREFIXO_REFERENCIA = 'sha256:'
+TAMANHO_BLOCO = 256 * 1024
+# Uploads até este tamanho ficam em memória enquanto o hash é calculado
+LIMITE_MEMORIA = 8 * 1024 * 1024
+
+
+class ArmazenamentoIndisponivel(RuntimeError):
+    """Backend configurado não pode ser usado (ex.: boto3 ausente)."""
+
+
+@dataclass
+class ArquivoSalvo:
+    sha256: str
+    tamanho: int
+    novo: bool  # False: conteúdo idêntico já armazenado (deduplicado)
+
+    @property
+    def referencia(self) -> str:
+        return referencia(self.sha256)
+
+
+def referencia(sha256: str) -> str:
+    """Valor gravado no banco no lugar do conteúdo."""
+    return f'{PREFIXO_REFERENCIA}{sha256}'
+
+
+def sha256_da_referencia(valor: Optional[str]) -> Optional[str]:
+    """Extrai o hash de uma referência; None se o valor for conteúdo/caminho."""
+    if valor and valor.startswith(PREFIXO_REFERENCIA):
+        return valor[len(PREFIXO_REFERENCIA):]
+    return None
+
+
+# ===== BACKENDS =====
+
+class BackendLocal:
+    """Arquivos em disco, distribuídos em subpastas pelo início do hash."""
+
+    nome = 'local'
+
+    def __init__(self, raiz: str):
+        self.raiz = raiz
+
+    def _caminho(self, sha256: str) -> str:
+        return os.path.join(self.raiz, sha256[:2], sha256[2:4], sha256)
+
+    def existe(self, sha256: str) -> bool:
+        return os.path.exists(self._caminho(sha256))
+
+    def tamanho(self, sha256: str) -> int:
+        return os.path.getsize(self._caminho(sha256))
+
+    def gravar(self, sha256: str, origem):
+        destino = self._caminho(sha256)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = f'{destino}.{os.getpid()}.tmp'
+        with open(temporario, 'wb') as arquivo:
+            while True:
+                bloco = origem.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                arquivo.write(bloco)
+        os.replace(temporario, destino)  # atômico: leitores nunca veem arquivo parcial
+
+    def ler_blocos(self, sha256: str, inicio: int = 0, fim: Optional[int] = None) -> Iterator[bytes]:
+        with open(self._caminho(sha256), 'rb') as arquivo:
+            arquivo.seek(inicio)
+            restante = None if fim is None else fim - inicio
+            while restante is None or restante > 0:
+                bloco = arquivo.read(TAMANHO_BLOCO if restante is None else min(TAMANHO_BLOCO, restante))
+                if not bloco:
+                    break
+                if restante is not None:
+                    restante -= len(bloco)
+                yield bloco
+
+    def caminho_local(self, sha256: str) -> Optional[str]:
+        return self._caminho(sha256)
+
+    def remover(self, sha256: str):
+        try:
+            os.remove(self._caminho(sha256))
+        except FileNotFoundError:
+            pass
+
+    def listar(self) -> Iterator[Tuple[str, datetime]]:
+        for pasta, _, arquivos in os.walk(self.raiz):
+            for nome in arquivos:
+                if len(nome) == 64:
+                    modificado = os.path.getmtime(os.path.join(pasta, nome))
+                    yield nome, datetime.fromtimestamp(modificado, timezone.utc)
+
+
+class BackendS3:
+    """Bucket S3 ou compatível (MinIO via endpoint_url)."""
+
+    nome = 's3'
+
+    def __init__(self, bucket: str, prefixo: str = '', endpoint_url: Optional[str] = None, cliente=None):
+        if not bucket:
+            raise ArmazenamentoIndisponivel('ARMAZENAMENTO_S3_BUCKET não configurado')
+        if cliente is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise ArmazenamentoIndisponivel(f'boto3 não instalado: {e}')
+            cliente = boto3.client('s3', endpoint_url=endpoint_url or None)
+        self.cliente = cliente
+        self.bucket = bucket
+        self.prefixo = prefixo
+
+    def _chave(self, sha256: str) -> str:
+        return f'{self.prefixo}{sha256[:2]}/{sha256}'
+
+    def _cabecalho(self, sha256: str):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.cliente.head_object(Bucket=self.bucket, Key=self._chave(sha256))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def existe(self, sha256: str) -> bool:
+        return self._cabecalho(sha256) is not None
+
+    def tamanho(self, sha256: str) -> int:
+        cabecalho = self._cabecalho(sha256)
+        if cabecalho is None:
+            raise FileNotFoundError(sha256)
+        return int(cabecalho['ContentLength'])
+
+    def gravar(self, sha256: str, origem):
+        self.cliente.upload_fileobj(origem, self.bucket, self._chave(sha256))
+
+    def ler_blocos(self, sha256: str, inicio: int = 0, fim: Optional[int] = None) -> Iterator[bytes]:
+        parametros = {'Bucket': self.bucket, 'Key': self._chave(sha256)}
+        if inicio or fim is not None:
+            parametros['Range'] = f"bytes={inicio}-{'' if fim is None else fim - 1}"
+        corpo = self.cliente.get_object(**parametros)['Body']
+        try:
+            yield from corpo.iter_chunks(TAMANHO_BLOCO)
+        finally:
+            corpo.close()
+
+    def caminho_local(self, sha256: str) -> Optional[str]:
+        return None
+
+    def remover(self, sha256: str):
+        self.cliente.delete_object(Bucket=self.bucket, Key=self._chave(sha256))
+
+    def listar(self) -> Iterator[Tuple[str, datetime]]:
+        paginador = self.cliente.get_paginator('list_objects_v2')
+        for pagina in paginador.paginate(Bucket=self.bucket, Prefix=self.prefixo):
+            for objeto in pagina.get('Contents', []):
+                yield objeto['Key'].rsplit('/', 1)[-1], objeto['LastModified']
+
+
+# ===== ARMAZENAMENTO =====
+
+class Armazenamento:
+    """Fachada sobre o backend: hash, deduplicação e leitura."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def salvar(self, conteudo: Union[bytes, object]) -> ArquivoSalvo:
+        """
+        Armazena bytes ou um arquivo aberto (ex.: FileStorage do upload).
+
+        Returns:
+            ArquivoSalvo: hash, tamanho e se o conteúdo era inédito
+        """
+        if isinstance(conteudo, (bytes, bytearray, memoryview)):
+            conteudo = bytes(conteudo)
+            sha256 = hashlib.sha256(conteudo).hexdigest()
+            if self.backend.existe(sha256):
+                return ArquivoSalvo(sha256, len(conteudo), novo=False)
+            self.backend.gravar(sha256, io.BytesIO(conteudo))
+            return ArquivoSalvo(sha256, len(conteudo), novo=True)
+
+        digest, tamanho = hashlib.sha256(), 0
+        with tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA) as copia:
+            while True:
+                bloco = conteudo.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                digest.update(bloco)
+                tamanho += len(bloco)
+                copia.write(bloco)
+            sha256 = digest.hexdigest()
+            if self.backend.existe(sha256):
+                return ArquivoSalvo(sha256, tamanho, novo=False)
+            copia.seek(0)
+            self.backend.gravar(sha256, copia)
+            return ArquivoSalvo(sha256, tamanho, novo=True)
+
+    def ler(self, sha256: str) -> bytes:
+        return b''.join(self.backend.ler_blocos(sha256))
+
+    def ler_blocos(self, sha256: str, inicio: int = 0, fim: Optional[int] = None) -> Iterator[bytes]:
+        return self.backend.ler_blocos(sha256, inicio, fim)
+
+    def existe(self, sha256: str) -> bool:
+        return self.backend.existe(sha256)
+
+    def tamanho(self, sha256: str) -> int:
+        return self.backend.tamanho(sha256)
+
+    def caminho_local(self, sha256: str) -> Optional[str]:
+        return self.backend.caminho_local(sha256)
+
+    def coletar_orfaos(self, em_uso: Set[str], idade_minima: timedelta = timedelta(days=1)) -> int:
+        """
+        Remove arquivos não referenciados. A idade mínima protege uploads
+        gravados cujo registro ainda não foi commitado.
+        """
+        limite = datetime.now(timezone.utc) - idade_minima
+        removidos = 0
+        for sha256, modificado in list(self.backend.listar()):
+            if sha256 not in em_uso and modificado < limite:
+                self.backend.remover(sha256)
+                removidos += 1
+        return removidos
+
+
+def criar_armazenamento(config) -> Optional[Armazenamento]:
+    """Instancia o armazenamento a partir da configuração (None = 'banco')."""
+    backend = (config.get('ARMAZENAMENTO_BACKEND') or 'banco').lower()
+    if backend == 'banco':
+        return None
+    if backend == 'local':
+        return Armazenamento(BackendLocal(config['ARMAZENAMENTO_DIR']))
+    if backend == 's3':
+        return Armazenamento(BackendS3(
+            config.get('ARMAZENAMENTO_S3_BUCKET'),
+            prefixo=config.get('ARMAZENAMENTO_S3_PREFIXO') or '',
+            endpoint_url=config.get('ARMAZENAMENTO_S3_ENDPOINT'),
+        ))
+    raise ArmazenamentoIndisponivel(f'ARMAZENAMENTO_BACKEND desconhecido: {backend}')
+
+
+def obter_armazenamento() -> Optional[Armazenamento]:
+    """Armazenamento da aplicação atual (criado uma vez por configuração)."""
+    from flask import current_app
+
+    chave = tuple(current_app.config.get(nome) for nome in (
+        'ARMAZENAMENTO_BACKEND', 'ARMAZENAMENTO_DIR', 'ARMAZENAMENTO_S3_BUCKET',
+        'ARMAZENAMENTO_S3_PREFIXO', 'ARMAZENAMENTO_S3_ENDPOINT',
+    ))
+    atual = current_app.extensions.get('armazenamento')
+    if atual is None or atual[0] != chave:
+        atual = current_app.extensions['armazenamento'] = (chave, criar_armazenamento(current_app.config))
+    return atual[1]
+
+
+# ===== REFERÊNCIAS NO BANCO =====
+
+def hashes_em_uso() -> Set[str]:
+    """Hashes referenciados por anexos de OS e notas fiscais."""
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import NotaFiscal
+    from app.ordem_servico.ordem_servico_model import OrdemServicoAnexo
+
+    em_uso = {
+        sha256 for (sha256,) in
+        db.session.query(OrdemServicoAnexo.arquivo_sha256).filter(OrdemServicoAnexo.arquivo_sha256.isnot(None))
+    }
+    for coluna in (NotaFiscal.arquivo_xml, NotaFiscal.arquivo_pdf):
+        em_uso.update(
+            sha256_da_referencia(valor) for (valor,) in
+            db.session.query(coluna).filter(coluna.like(f'{PREFIXO_REFERENCIA}%'))
+        )
+    return em_uso
+
+
+def _decodificar_texto(valor: str) -> Optional[bytes]:
+    """Conteúdo das colunas "caminho ou base64" das notas fiscais."""
+    if os.path.isfile(valor):
+        with open(valor, 'rb') as arquivo:
+            return arquivo.read()
+    try:
+        return base64.b64decode(valor, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def guardar_conteudo(conteudo: bytes) -> str:
+    """
+    Valor para colunas de texto "caminho ou base64" (XML/PDF de NF): a
+    referência ao armazenamento ou, sem armazenamento externo, o base64.
+    """
+    armazenamento = obter_armazenamento()
+    if armazenamento is None:
+        return base64.b64encode(conteudo).decode('utf-8')
+    return armazenamento.salvar(conteudo).referencia
+
+
+def ler_conteudo(valor: str) -> bytes:
+    """Inverso de `guardar_conteudo` (aceita também caminhos legados)."""
+    sha256 = sha256_da_referencia(valor)
+    if sha256 is None:
+        conteudo = _decodificar_texto(valor)
+        if conteudo is None:
+            raise ValueError('Conteúdo não é base64 nem caminho existente')
+        return conteudo
+
+    armazenamento = obter_armazenamento()
+    if armazenamento is None:
+        raise ArmazenamentoIndisponivel('Arquivo no armazenamento externo, mas ARMAZENAMENTO_BACKEND=banco')
+    return armazenamento.ler(sha256)
+
+
+def migrar_do_banco(armazenamento: Armazenamento, tamanho_lote: int = 50,
+                    ids_anexos: Optional[Iterable[int]] = None) -> dict:
+    """
+    Move BLOBs de anexos e base64 de notas fiscais para o armazenamento.
+
+    Cada registro é lido individualmente (o BLOB é adiado) e o commit é
+    feito por lote, então a migração pode ser interrompida e retomada.
+
+    Returns:
+        dict: {'anexos': n, 'notas_fiscais': n, 'ignorados': n, 'bytes': n}
+    """
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import NotaFiscal
+    from app.ordem_servico.ordem_servico_model import OrdemServicoAnexo
+
+    resultado = {'anexos': 0, 'notas_fiscais': 0, 'ignorados': 0, 'bytes': 0}
+
+    consulta = db.session.query(OrdemServicoAnexo.id).filter(
+        OrdemServicoAnexo.arquivo_sha256.is_(None), OrdemServicoAnexo.conteudo.isnot(None)
+    )
+    if ids_anexos is not None:
+        consulta = consulta.filter(OrdemServicoAnexo.id.in_(list(ids_anexos)))
+    pendentes = [anexo_id for (anexo_id,) in consulta.order_by(OrdemServicoAnexo.id)]
+
+    for posicao, anexo_id in enumerate(pendentes, 1):
+        anexo = db.session.get(OrdemServicoAnexo, anexo_id)
+        salvo = armazenamento.salvar(anexo.conteudo)
+        anexo.arquivo_sha256 = salvo.sha256
+        anexo.conteudo = None
+        resultado['anexos'] += 1
+        resultado['bytes'] += salvo.tamanho
+        if posicao % tamanho_lote == 0:
+            db.session.commit()
+            db.session.expunge_all()
+    db.session.commit()
+
+    pendentes = [
+        nota_id for (nota_id,) in db.session.query(NotaFiscal.id).filter(db.or_(
+            db.and_(NotaFiscal.arquivo_xml.isnot(None), ~NotaFiscal.arquivo_xml.like(f'{PREFIXO_REFERENCIA}%')),
+            db.and_(NotaFiscal.arquivo_pdf.isnot(None), ~NotaFiscal.arquivo_pdf.like(f'{PREFIXO_REFERENCIA}%')),
+        )).order_by(NotaFiscal.id)
+    ]
+    for posicao, nota_id in enumerate(pendentes, 1):
+        nota = db.session.get(NotaFiscal, nota_id)
+        for coluna in ('arquivo_xml', 'arquivo_pdf'):
+            valor = getattr(nota, coluna)
+            if not valor or sha256_da_referencia(valor):
+                continue
+            conteudo = _decodificar_texto(valor)
+            if conteudo is None:
+                print(f" ⚠ NF {nota.id}: {coluna} não é base64 nem caminho existente, mantido no banco")
+                resultado['ignorados'] += 1
+                continue
+            salvo = armazenamento.salvar(conteudo)
+            setattr(nota, coluna, salvo.referencia)
+            resultado['bytes'] += salvo.tamanho
+        resultado['notas_fiscais'] += 1
+        if posicao % tamanho_lote == 0:
+            db.session.commit()
+            db.session.expunge_all()
+    db.session.commit()
+
+    return resultado
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Busca Textual
+========================
+
+Busca indexada por trechos de texto em clientes, ordens de serviço,
+propostas e produtos, sem o `ilike('%termo%')` em várias colunas (que
+não usa índice e força varredura completa das tabelas).
+
+Cada modelo buscável (BuscavelMixin) mantém a coluna `busca_normalizada`:
+os campos de CAMPOS_BUSCA sem acentos, em minúsculas, sem pontuação e,
+para documentos como CPF/CNPJ, também só com os dígitos. A coluna é
+atualizada pelo ORM a cada insert/update e indexada conforme o banco:
+
+- PostgreSQL: índice GIN com pg_trgm (`gin_trgm_ops`), que atende
+  `LIKE '%trecho%'`; a relevância vem de `word_similarity`;
+- SQLite (desenvolvimento): tabela FTS5 com tokenizer trigram
+  (`<tabela>_busca`), mantida por triggers.
+
+Termos com menos de 3 caracteres não formam trigramas: nesses casos a
+condição cai para LIKE na coluna normalizada.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Iterable, List
+
+from sqlalchemy import bindparam, event, func, literal_column, select, table, text, true
+
+from app.extensoes import db
+
+COLUNA = 'busca_normalizada'
+
+# Trigramas: trechos menores não são indexados
+TAMANHO_MINIMO_TRIGRAMA = 3
+MAX_TERMOS = 8
+
+_NAO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+_NAO_DIGITO = re.compile(r'\D')
+
+# {tabela: tem índice FTS5} (SQLite), verificado uma vez por processo
+_fts_instalados = {}
+
+
+# ===== NORMALIZAÇÃO =====
+
+def normalizar(texto) -> str:
+    """'São João - 123.456/0001' -> 'sao joao 123 456 0001'."""
+    if texto is None:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(' ', sem_acentos.lower()).strip()
+
+
+def documento_busca(valores: Iterable) -> str:
+    """
+    Texto indexado de um registro.
+
+    Valores com dígitos e pontuação (CPF/CNPJ, códigos) entram também só
+    com os dígitos, para que '12345678000190' encontre '12.345.678/0001-90'.
+    """
+    partes = []
+    for valor in valores:
+        normalizado = normalizar(valor)
+        if not normalizado:
+            continue
+        partes.append(normalizado)
+        digitos = _NAO_DIGITO.sub('', normalizado)
+        if len(digitos) >= TAMANHO_MINIMO_TRIGRAMA and digitos != normalizado:
+            partes.append(digitos)
+    return ' '.join(partes)
+
+
+def termos_busca(termo) -> List[str]:
+    """Palavras do termo normalizadas, sem repetição."""
+    termos = []
+    for palavra in normalizar(termo).split():
+        if palavra not in termos:
+            termos.append(palavra)
+    return termos[:MAX_TERMOS]
+
+
+# ===== CONSULTA =====
+
+def _dialeto() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def _fts_disponivel(tabela: str) -> bool:
+    # Workers não instalam índices (o runner de migrações instala): apenas
+    # consultam se a tabela FTS existe, na primeira busca
+    if tabela not in _fts_instalados:
+        _fts_instalados[tabela] = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"), {'nome': f'{tabela}_busca'}
+        ).first() is not None
+    return _fts_instalados[tabela]
+
+
+def condicao_busca(modelo, termo):
+    """
+    Condição WHERE: todas as palavras do termo aparecem no registro.
+
+    Pode ser combinada com os demais filtros e joins da consulta.
+    """
+    termos = termos_busca(termo)
+    if not termos:
+        return true()
+
+    coluna = getattr(modelo, COLUNA)
+    tabela = modelo.__table__.name
+    condicoes = []
+    if _dialeto() == 'sqlite' and _fts_disponivel(tabela):
+        longos = [t for t in termos if len(t) >= TAMANHO_MINIMO_TRIGRAMA]
+        if longos:
+            fts = f'{tabela}_busca'
+            consulta = ' '.join(f'"{t}"' for t in longos)
+            condicoes.append(modelo.id.in_(
+                select(literal_column('rowid')).select_from(table(fts))
+                .where(literal_column(fts).op('MATCH')(consulta))
+            ))
+        termos = [t for t in termos if len(t) < TAMANHO_MINIMO_TRIGRAMA]
+
+    condicoes.extend(coluna.like(f'%{t}%') for t in termos)
+    return db.and_(*condicoes)
+
+
+def relevancia(modelo, termo):
+    """Expressão para ORDER BY (maior = mais relevante)."""
+    termos = termos_busca(termo)
+    coluna = getattr(modelo, COLUNA)
+    if not termos:
+        return literal_column('0')
+    if _dialeto() == 'postgresql':
+        return func.word_similarity(' '.join(termos), coluna)
+
+    # Início do registro (o campo principal) > início de palavra > trecho
+    pontos = [
+        db.case((coluna.like(f'{t}%'), 3), (coluna.like(f'% {t}%'), 2), else_=1)
+        for t in termos
+    ]
+    return sum(pontos[1:], pontos[0])
+
+
+def ids_busca(modelo, termo):
+    """SELECT dos ids encontrados, para filtros entre tabelas (ex.: OS pelo nome do cliente)."""
+    return select(modelo.id).where(condicao_busca(modelo, termo))
+
+
+def buscar(modelo, termo, limite=10, filtros=()):
+    """Registros que atendem ao termo, do mais relevante para o menos."""
+    return (modelo.query
+            .filter(condicao_busca(modelo, termo), *filtros)
+            .order_by(relevancia(modelo, termo).desc(), modelo.id.desc())
+            .limit(limite)
+            .all())
+
+
+# ===== ÍNDICES =====
+
+def _tabelas_buscaveis(tabelas=None):
+    tabelas = tabelas if tabelas is not None else db.metadata.sorted_tables
+    return [t for t in tabelas if COLUNA in t.c]
+
+
+def _instalar_sqlite(connection, tabela: str) -> bool:
+    fts = f'{tabela}_busca'
+    existia = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"), {'nome': fts}
+    ).first() is not None
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{COLUNA}, content='{tabela}', content_rowid='id', tokenize='trigram')"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabela} BEGIN "
+        f"INSERT INTO {fts}(rowid, {COLUNA}) VALUES (new.id, new.{COLUNA}); END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabela} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {COLUNA}) VALUES ('delete', old.id, old.{COLUNA}); END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {COLUNA} ON {tabela} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {COLUNA}) VALUES ('delete', old.id, old.{COLUNA}); "
+        f"INSERT INTO {fts}(rowid, {COLUNA}) VALUES (new.id, new.{COLUNA}); END"
+    ))
+    if not existia:
+        # Tabela já populada: indexa o conteúdo atual
+        connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    return True
+
+
+def _instalar_postgresql(connection, tabela: str) -> bool:
+    # Em savepoint: sem permissão para a extensão, a transação segue válida
+    with connection.begin_nested():
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{tabela}_busca_trgm "
+            f"ON {tabela} USING gin ({COLUNA} gin_trgm_ops)"
+        ))
+    return True
+
+
+def instalar_indices_busca(connection, tabelas=None) -> int:
+    """
+    Cria (se preciso) os índices de busca das tabelas buscáveis.
+
+    Returns:
+        int: Quantidade de tabelas com índice instalado
+    """
+    dialeto = connection.dialect.name
+    instalados = 0
+    for tabela in _tabelas_buscaveis(tabelas):
+        try:
+            if dialeto == 'sqlite':
+                _instalar_sqlite(connection, tabela.name)
+                _fts_instalados[tabela.name] = True
+            elif dialeto == 'postgresql':
+                _instalar_postgresql(connection, tabela.name)
+            else:
+                continue
+            instalados += 1
+        except Exception as e:
+            # Sem FTS5/pg_trgm a busca funciona, apenas sem índice
+            _fts_instalados[tabela.name] = False
+            print(f" ⚠ Índice de busca indisponível para {tabela.name}: {e}")
+    return instalados
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _apos_criar_tabelas(target, connection, tables=None, **kw):
+    instalar_indices_busca(connection, tables)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _antes_remover_tabelas(target, connection, tables=None, **kw):
+    if connection.dialect.name != 'sqlite':
+        return
+    for tabela in _tabelas_buscaveis(tables):
+        connection.execute(text(f"DROP TABLE IF EXISTS {tabela.name}_busca"))
+        _fts_instalados[tabela.name] = False
+
+
+def reindexar_busca(tamanho_lote: int = 500) -> int:
+    """
+    Preenche `busca_normalizada` dos registros ainda sem texto de busca
+    (criados antes da coluna). Faz commit a cada lote.
+
+    Returns:
+        int: Quantidade de registros indexados
+    """
+    modelos = [
+        mapper.class_ for mapper in db.Model.registry.mappers
+        if COLUNA in mapper.columns and getattr(mapper.class_, 'CAMPOS_BUSCA', None)
+    ]
+    total = 0
+    for modelo in modelos:
+        coluna = getattr(modelo, COLUNA)
+        tabela = modelo.__table__
+        # UPDATE direto: a indexação não deve alterar atualizado_em
+        atualizar = tabela.update().where(tabela.c.id == bindparam('_id')).values(
+            {COLUNA: bindparam('_texto'), 'atualizado_em': tabela.c.atualizado_em}
+        )
+        campos = [getattr(modelo, campo) for campo in modelo.CAMPOS_BUSCA]
+        while True:
+            # Só os campos indexados, sem carregar os objetos
+            registros = (db.session.query(modelo.id, *campos)
+                         .filter(coluna.is_(None)).order_by(modelo.id).limit(tamanho_lote).all())
+            if not registros:
+                break
+            db.session.execute(atualizar, [
+                {'_id': registro[0], '_texto': documento_busca(registro[1:])} for registro in registros
+            ])
+            db.session.commit()
+            total += len(registros)
+    return total
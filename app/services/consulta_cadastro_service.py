@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Consulta Cadastral (CNPJ / CEP)
+==========================================
+
+Consulta dados de empresas (CNPJ) e endereços (CEP) em APIs públicas,
+usado no cadastro de clientes e fornecedores:
+
+- cache em banco (`consultas_externas_cache`) com validade: a mesma
+  consulta não sai para a internet de novo, em nenhum worker;
+- os provedores de cada tipo são consultados em paralelo e vence a
+  primeira resposta válida, com um prazo total (CONSULTA_TIMEOUT_SEGUNDOS)
+  em vez de timeouts somados provedor após provedor;
+- sessão HTTP compartilhada (conexões reaproveitadas) e circuit breaker
+  por provedor: após falhas seguidas o provedor fica fora por um tempo e
+  depois volta com uma única tentativa.
+
+Todos os provedores retornam os dados no mesmo formato (ver _dados_cnpj
+e _dados_cep).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensoes import db
+from app.models import ConsultaExternaCache
+
+# Circuit breaker
+FALHAS_PARA_ABRIR = 3
+SEGUNDOS_ABERTO = 60
+
+# Consulta sem resultado fica em cache por pouco tempo (CNPJ recém-aberto)
+CACHE_NEGATIVO = timedelta(days=1)
+
+_CHAVE_EXTENSAO = 'consulta_cadastro'
+
+
+class ConsultaIndisponivel(Exception):
+    """Nenhum provedor respondeu a tempo (ou todos estão com o circuito aberto)."""
+
+
+class _NaoEncontrado(Exception):
+    """O provedor respondeu, mas não conhece o documento."""
+
+
+@dataclass
+class ResultadoConsulta:
+    encontrado: bool
+    dados: Optional[dict]
+    provedor: Optional[str]
+    do_cache: bool = False
+
+
+# ===== PROVEDORES =====
+
+def _dados_cnpj(nome='', fantasia='', cnpj='', situacao='', email='', telefone='', atividade_principal='',
+                logradouro='', numero='', complemento='', bairro='', cidade='', uf='', cep=''):
+    return {
+        'nome': nome or '', 'fantasia': fantasia or '', 'cnpj': cnpj or '', 'situacao': situacao or '',
+        'email': email or '', 'telefone': telefone or '', 'atividade_principal': atividade_principal or '',
+        'endereco': {
+            'logradouro': logradouro or '', 'numero': numero or '', 'complemento': complemento or '',
+            'bairro': bairro or '', 'cidade': cidade or '', 'uf': uf or '', 'cep': cep or '',
+        },
+    }
+
+
+def _dados_cep(cep='', logradouro='', complemento='', bairro='', cidade='', uf=''):
+    return {
+        'cep': cep or '', 'logradouro': logradouro or '', 'complemento': complemento or '',
+        'bairro': bairro or '', 'cidade': cidade or '', 'uf': uf or '',
+    }
+
+
+def _receitaws(resposta) -> dict:
+    data = resposta.json()
+    if data.get('status') == 'ERROR':
+        raise _NaoEncontrado(data.get('message'))
+    atividades = data.get('atividade_principal') or [{}]
+    return _dados_cnpj(
+        nome=data.get('nome'), fantasia=data.get('fantasia'), cnpj=data.get('cnpj'),
+        situacao=data.get('situacao'), email=data.get('email'), telefone=data.get('telefone'),
+        atividade_principal=atividades[0].get('text'),
+        logradouro=data.get('logradouro'), numero=data.get('numero'), complemento=data.get('complemento'),
+        bairro=data.get('bairro'), cidade=data.get('municipio'), uf=data.get('uf'), cep=data.get('cep'),
+    )
+
+
+def _brasilapi_cnpj(resposta) -> dict:
+    data = resposta.json()
+    telefone = data.get('ddd_telefone_1') or ''
+    return _dados_cnpj(
+        nome=data.get('razao_social') or data.get('legal_name'),
+        fantasia=data.get('nome_fantasia') or data.get('trade_name'),
+        cnpj=data.get('cnpj'),
+        situacao=data.get('descricao_situacao_cadastral') or data.get('registration_status'),
+        email=data.get('email'), telefone=telefone,
+        atividade_principal=data.get('cnae_fiscal_descricao'),
+        logradouro=data.get('logradouro'), numero=data.get('numero'), complemento=data.get('complemento'),
+        bairro=data.get('bairro'), cidade=data.get('municipio'), uf=data.get('uf'), cep=data.get('cep'),
+    )
+
+
+def _viacep(resposta) -> dict:
+    data = resposta.json()
+    if data.get('erro'):
+        raise _NaoEncontrado('CEP não encontrado')
+    return _dados_cep(
+        cep=data.get('cep'), logradouro=data.get('logradouro'), complemento=data.get('complemento'),
+        bairro=data.get('bairro'), cidade=data.get('localidade'), uf=data.get('uf'),
+    )
+
+
+def _brasilapi_cep(resposta) -> dict:
+    data = resposta.json()
+    cep = data.get('cep') or ''
+    if len(cep) == 8:
+        cep = f'{cep[:5]}-{cep[5:]}'
+    return _dados_cep(
+        cep=cep, logradouro=data.get('street'), bairro=data.get('neighborhood'),
+        cidade=data.get('city'), uf=data.get('state'),
+    )
+
+
+class Provedor:
+    """Uma API externa, com circuit breaker próprio."""
+
+    def __init__(self, nome: str, url: str, interpretar: Callable, status_nao_encontrado=(404,)):
+        self.nome = nome
+        self.url = url  # com {chave}
+        self.interpretar = interpretar
+        self.status_nao_encontrado = status_nao_encontrado
+        self._falhas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+        self._lock = threading.Lock()
+
+    def disponivel(self) -> bool:
+        """Circuito fechado, ou aberto há tempo suficiente para uma nova tentativa."""
+        with self._lock:
+            if self._falhas < FALHAS_PARA_ABRIR:
+                return True
+            if time.monotonic() < self._aberto_ate or self._testando:
+                return False
+            self._testando = True  # meio-aberto: só esta requisição passa
+            return True
+
+    def registrar(self, sucesso: bool):
+        with self._lock:
+            self._testando = False
+            if sucesso:
+                self._falhas = 0
+                return
+            self._falhas += 1
+            if self._falhas >= FALHAS_PARA_ABRIR:
+                self._aberto_ate = time.monotonic() + SEGUNDOS_ABERTO
+                print(f"⚠️ Consulta {self.nome}: circuito aberto por {SEGUNDOS_ABERTO}s")
+
+    def consultar(self, sessao: requests.Session, chave: str, timeout: float) -> dict:
+        """Dados normalizados; _NaoEncontrado se o provedor não conhece a chave."""
+        try:
+            resposta = sessao.get(self.url.format(chave=chave), timeout=timeout,
+                                  headers={'Accept': 'application/json'})
+            if resposta.status_code in self.status_nao_encontrado:
+                raise _NaoEncontrado(f'{self.nome}: HTTP {resposta.status_code}')
+            resposta.raise_for_status()
+            dados = self.interpretar(resposta)
+        except _NaoEncontrado:
+            self.registrar(True)
+            raise
+        except Exception:
+            self.registrar(False)
+            raise
+        self.registrar(True)
+        return dados
+
+
+def provedores_padrao() -> Dict[str, List[Provedor]]:
+    return {
+        'cnpj': [
+            Provedor('ReceitaWS', 'https://www.receitaws.com.br/v1/cnpj/{chave}', _receitaws),
+            Provedor('BrasilAPI', 'https://brasilapi.com.br/api/cnpj/v1/{chave}', _brasilapi_cnpj, (400, 404)),
+        ],
+        'cep': [
+            Provedor('ViaCEP', 'https://viacep.com.br/ws/{chave}/json/', _viacep, (400,)),
+            Provedor('BrasilAPI', 'https://brasilapi.com.br/api/cep/v1/{chave}', _brasilapi_cep, (400, 404)),
+        ],
+    }
+
+
+# ===== SERVIÇO =====
+
+class ServicoConsulta:
+    """Consultas com cache em banco e provedores em paralelo."""
+
+    TAMANHO_CHAVE = {'cnpj': 14, 'cep': 8}
+
+    def __init__(self, provedores: Dict[str, List[Provedor]], timeout: float = 6.0,
+                 validade: Optional[Dict[str, timedelta]] = None, max_workers: int = 8):
+        self.provedores = provedores
+        self.timeout = timeout
+        self.validade = validade or {'cnpj': timedelta(days=30), 'cep': timedelta(days=180)}
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=8, pool_maxsize=max_workers, max_retries=0)
+        self.sessao.mount('https://', adaptador)
+        self.sessao.mount('http://', adaptador)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='consulta')
+
+    def consultar(self, tipo: str, documento: str) -> ResultadoConsulta:
+        """
+        Consulta um CNPJ ou CEP (com ou sem formatação).
+
+        Raises:
+            ValueError: Documento com quantidade de dígitos inválida
+            ConsultaIndisponivel: Nenhum provedor respondeu
+        """
+        chave = re.sub(r'[^0-9]', '', documento or '')
+        if len(chave) != self.TAMANHO_CHAVE[tipo]:
+            raise ValueError(f'{tipo.upper()} deve ter {self.TAMANHO_CHAVE[tipo]} dígitos')
+
+        em_cache = self._ler_cache(tipo, chave)
+        if em_cache is not None:
+            return em_cache
+
+        resultado = self._disputar(tipo, chave)
+        self._gravar_cache(tipo, chave, resultado)
+        return resultado
+
+    def _disputar(self, tipo: str, chave: str) -> ResultadoConsulta:
+        """Consulta os provedores em paralelo; vence a primeira resposta com dados."""
+        provedores = [p for p in self.provedores[tipo] if p.disponivel()]
+        if not provedores:
+            raise ConsultaIndisponivel('Serviços de consulta temporariamente indisponíveis')
+
+        prazo = time.monotonic() + self.timeout
+        pendentes = {
+            self._executor.submit(p.consultar, self.sessao, chave, self.timeout): p for p in provedores
+        }
+        nao_encontrado = None
+        falhas = 0
+        while pendentes:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            prontos, _ = wait(pendentes, timeout=restante, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                provedor = pendentes.pop(futuro)
+                try:
+                    dados = futuro.result()
+                except _NaoEncontrado:
+                    nao_encontrado = provedor.nome
+                    continue
+                except Exception as e:
+                    falhas += 1
+                    print(f"⚠️ Consulta {tipo.upper()} {provedor.nome} falhou: {e}")
+                    continue
+                # Os demais seguem em segundo plano e são descartados
+                return ResultadoConsulta(True, dados, provedor.nome)
+
+        if nao_encontrado and not falhas and not pendentes:
+            return ResultadoConsulta(False, None, nao_encontrado)
+        if nao_encontrado:
+            # Alguém respondeu "não existe", mas nem todos: não vai para o cache
+            return ResultadoConsulta(False, None, None)
+        raise ConsultaIndisponivel('CNPJ/CEP não consultado: serviços sem resposta no momento')
+
+    def _ler_cache(self, tipo: str, chave: str) -> Optional[ResultadoConsulta]:
+        registro = db.session.get(ConsultaExternaCache, (tipo, chave))
+        if registro is None or registro.expira_em <= datetime.utcnow():
+            return None
+        dados = json.loads(registro.dados) if registro.dados else None
+        return ResultadoConsulta(dados is not None, dados, registro.provedor, do_cache=True)
+
+    def _gravar_cache(self, tipo: str, chave: str, resultado: ResultadoConsulta):
+        if resultado.provedor is None:
+            return
+        agora = datetime.utcnow()
+        valores = {
+            'tipo': tipo, 'chave': chave, 'provedor': resultado.provedor, 'consultado_em': agora,
+            'dados': json.dumps(resultado.dados, ensure_ascii=False) if resultado.encontrado else None,
+            'expira_em': agora + (self.validade[tipo] if resultado.encontrado else CACHE_NEGATIVO),
+        }
+        tabela = ConsultaExternaCache.__table__
+        try:
+            connection = db.session.connection()
+            dialeto = connection.dialect.name
+            if dialeto in ('postgresql', 'sqlite'):
+                insert = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+                stmt = insert(tabela).values(**valores)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['tipo', 'chave'],
+                    set_={coluna: stmt.excluded[coluna] for coluna in ('dados', 'provedor', 'consultado_em', 'expira_em')},
+                )
+                connection.execute(stmt)
+            else:
+                connection.execute(tabela.delete().where(tabela.c.tipo == tipo, tabela.c.chave == chave))
+                connection.execute(tabela.insert().values(**valores))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Falha ao gravar cache da consulta {tipo.upper()} {chave}: {e}")
+
+    def limpar_expirados(self) -> int:
+        """Remove do cache as consultas vencidas."""
+        removidos = ConsultaExternaCache.query.filter(
+            ConsultaExternaCache.expira_em <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return removidos
+
+
+def obter_servico_consulta() -> ServicoConsulta:
+    """Serviço do worker atual (sessão HTTP e circuit breakers compartilhados)."""
+    from flask import current_app
+
+    servico = current_app.extensions.get(_CHAVE_EXTENSAO)
+    if servico is None:
+        config = current_app.config
+        servico = current_app.extensions[_CHAVE_EXTENSAO] = ServicoConsulta(
+            provedores_padrao(),
+            timeout=config.get('CONSULTA_TIMEOUT_SEGUNDOS', 6),
+            validade={
+                'cnpj': timedelta(days=config.get('CONSULTA_CACHE_CNPJ_DIAS', 30)),
+                'cep': timedelta(days=config.get('CONSULTA_CACHE_CEP_DIAS', 180)),
+            },
+        )
+    return servico
+
+
+def responder_consulta(tipo: str, documento: str):
+    """Resposta JSON das rotas /api/consultar-cnpj e /api/consultar-cep."""
+    from flask import jsonify
+
+    try:
+        resultado = obter_servico_consulta().consultar(tipo, documento)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except ConsultaIndisponivel:
+        return jsonify({
+            'success': False,
+            'error': f'{tipo.upper()} não consultado: serviços temporariamente indisponíveis. '
+                     'Tente novamente em alguns instantes.',
+        }), 503
+    except Exception as e:
+        print(f"❌ Erro geral na consulta {tipo.upper()}: {e}")
+        return jsonify({'success': False, 'error': 'Erro interno do servidor'}), 500
+
+    if not resultado.encontrado:
+        return jsonify({'success': False, 'error': f'{tipo.upper()} não encontrado'}), 404
+    return jsonify({'success': True, 'data': resultado.dados})
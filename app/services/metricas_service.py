@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Métricas de Desempenho
+=================================
+
+Instrumentação opcional (METRICAS_HABILITADAS=1) para saber quais
+blueprints pesam em produção:
+
+- latência por endpoint (histograma) e contagem de respostas por status;
+- comandos SQL por requisição: quantidade e tempo, medidos pelos eventos
+  `before_cursor_execute`/`after_cursor_execute` do engine;
+- detecção de N+1: o mesmo comando (normalizado, sem valores) repetido
+  METRICAS_LIMITE_N_MAIS_1 vezes ou mais na mesma requisição;
+- tempo de renderização por template (sinais do Flask);
+- dump das requisições lentas (acima de METRICAS_LENTA_SEGUNDOS), por
+  amostragem (METRICAS_AMOSTRAGEM_LENTAS). Cada dump traz os comandos
+  mais pesados e vai para o log e para /status/metrics/lentas.
+
+As métricas saem em /status/metrics no formato texto do Prometheus. São
+por processo: cada worker do Gunicorn expõe as suas, e o Prometheus
+agrega por instância. O endpoint expõe rotas e SQL normalizado, por isso
+exige `Authorization: Bearer <METRICAS_TOKEN>`: sem token configurado a
+instrumentação não é instalada.
+
+Autor: JSP Soluções
+Data: 2026
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from flask import g, has_request_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+
+from app.extensoes import db
+
+logger = logging.getLogger(__name__)
+
+CHAVE_EXTENSAO = 'metricas'
+
+# Limites dos histogramas (segundos / quantidade de comandos)
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_TEMPLATE = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BUCKETS_COMANDOS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Endpoints fora da medição (a própria coleta e arquivos estáticos)
+ENDPOINTS_IGNORADOS = {'status.metricas', 'status.metricas_lentas', 'static'}
+
+MAX_COMANDOS_DUMP = 5
+
+_ESPACOS = re.compile(r'\s+')
+_LISTA_IN = re.compile(r'\bIN\s*\((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_COLUNAS_SELECT = re.compile(r'^SELECT (?:DISTINCT )?.+? FROM ', re.IGNORECASE)
+
+
+def normalizar_comando(sql: str) -> str:
+    """
+    Forma do comando sem valores: 'WHERE id IN (?, ?, ?)' e 'WHERE id = 5'
+    viram a mesma chave. A lista de colunas do SELECT vira '...' para o
+    FROM/WHERE caber no log e no dump.
+    """
+    texto = _ESPACOS.sub(' ', sql).strip()
+    texto = _COLUNAS_SELECT.sub('SELECT ... FROM ', texto)
+    texto = _LISTA_IN.sub('IN (...)', texto)
+    return _LITERAIS.sub('?', texto)
+
+
+# ===== HISTOGRAMA =====
+
+class Histograma:
+    """Histograma cumulativo no formato do Prometheus (buckets, soma e contagem)."""
+
+    def __init__(self, limites):
+        self.limites = tuple(limites)
+        self.contagens = [0] * len(self.limites)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.soma += valor
+        self.total += 1
+        for posicao, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.contagens[posicao] += 1
+                break
+
+    def linhas(self, nome, rotulos):
+        acumulado = 0
+        for limite, quantidade in zip(self.limites, self.contagens):
+            acumulado += quantidade
+            yield f'{nome}_bucket{_rotulos(rotulos, le=_numero(limite))} {acumulado}'
+        yield f'{nome}_bucket{_rotulos(rotulos, le="+Inf")} {self.total}'
+        yield f'{nome}_sum{_rotulos(rotulos)} {_numero(self.soma)}'
+        yield f'{nome}_count{_rotulos(rotulos)} {self.total}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(rotulos, **extras):
+    pares = list(rotulos) + list(extras.items())
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{chave}="{_escapar(valor)}"' for chave, valor in pares) + '}'
+
+
+# ===== COLETOR =====
+
+class ColetorMetricas:
+    """Acumula as métricas do processo; protegido por lock (threads do worker)."""
+
+    def __init__(self, config):
+        self.limite_n_mais_1 = config.get('METRICAS_LIMITE_N_MAIS_1', 10)
+        self.lenta_segundos = config.get('METRICAS_LENTA_SEGUNDOS', 1.0)
+        self.amostragem_lentas = config.get('METRICAS_AMOSTRAGEM_LENTAS', 0.1)
+        self.lock = threading.Lock()
+        self.latencia = defaultdict(lambda: Histograma(BUCKETS_LATENCIA))
+        self.respostas = Counter()
+        self.comandos_por_requisicao = defaultdict(lambda: Histograma(BUCKETS_COMANDOS))
+        self.comandos_total = Counter()
+        self.sql_segundos = Counter()
+        self.n_mais_1 = Counter()
+        self.templates = defaultdict(lambda: Histograma(BUCKETS_TEMPLATE))
+        self.lentas = deque(maxlen=50)
+
+    # ----- por requisição -----
+
+    def iniciar(self):
+        g._metricas = {
+            'inicio': time.perf_counter(),
+            'comandos': 0,
+            'sql_segundos': 0.0,
+            'por_comando': defaultdict(lambda: [0, 0.0]),
+            'templates': [],
+            'status': 500,
+        }
+
+    def finalizar(self):
+        estado = g.pop('_metricas', None)
+        endpoint = request.endpoint or 'sem_rota'
+        if estado is None or endpoint in ENDPOINTS_IGNORADOS:
+            return
+        duracao = time.perf_counter() - estado['inicio']
+        metodo = request.method
+        repetidos = {sql: dados for sql, dados in estado['por_comando'].items()
+                     if dados[0] >= self.limite_n_mais_1}
+
+        with self.lock:
+            self.latencia[(endpoint, metodo)].observar(duracao)
+            self.respostas[(endpoint, metodo, estado['status'])] += 1
+            self.comandos_por_requisicao[endpoint].observar(estado['comandos'])
+            self.comandos_total[endpoint] += estado['comandos']
+            self.sql_segundos[endpoint] += estado['sql_segundos']
+            if repetidos:
+                self.n_mais_1[endpoint] += 1
+            for nome, segundos in estado['templates']:
+                self.templates[nome].observar(segundos)
+
+        for sql, (vezes, _segundos) in repetidos.items():
+            logger.warning(f'metricas evento=n_mais_1 endpoint={endpoint} repeticoes={vezes} sql="{sql[:200]}"')
+
+        if duracao >= self.lenta_segundos and random.random() < self.amostragem_lentas:
+            self._registrar_lenta(endpoint, metodo, duracao, estado)
+
+    def _registrar_lenta(self, endpoint, metodo, duracao, estado):
+        mais_pesados = sorted(estado['por_comando'].items(), key=lambda item: item[1][1], reverse=True)
+        dump = {
+            'quando': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'endpoint': endpoint,
+            'metodo': metodo,
+            'caminho': request.path,
+            'status': estado['status'],
+            'segundos': round(duracao, 4),
+            'comandos_sql': estado['comandos'],
+            'sql_segundos': round(estado['sql_segundos'], 4),
+            'templates': [{'nome': nome, 'segundos': round(segundos, 4)} for nome, segundos in estado['templates']],
+            'comandos_mais_pesados': [
+                {'sql': sql[:500], 'vezes': vezes, 'segundos': round(segundos, 4)}
+                for sql, (vezes, segundos) in mais_pesados[:MAX_COMANDOS_DUMP]
+            ],
+        }
+        with self.lock:
+            self.lentas.append(dump)
+        logger.warning(f'metricas evento=requisicao_lenta {json.dumps(dump, ensure_ascii=False)}')
+
+    # ----- exportação -----
+
+    def exportar(self) -> str:
+        """Métricas no formato texto do Prometheus (0.0.4)."""
+        linhas = []
+
+        def cabecalho(nome, tipo, ajuda):
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} {tipo}')
+
+        with self.lock:
+            cabecalho('erp_http_request_duration_seconds', 'histogram', 'Latência das requisições por endpoint')
+            for (endpoint, metodo), histograma in sorted(self.latencia.items()):
+                linhas.extend(histograma.linhas('erp_http_request_duration_seconds',
+                                                [('endpoint', endpoint), ('metodo', metodo)]))
+
+            cabecalho('erp_http_requests_total', 'counter', 'Respostas por endpoint e status')
+            for (endpoint, metodo, status), total in sorted(self.respostas.items()):
+                linhas.append(f'erp_http_requests_total'
+                              f'{_rotulos([("endpoint", endpoint), ("metodo", metodo), ("status", status)])} {total}')
+
+            cabecalho('erp_sql_statements_per_request', 'histogram', 'Comandos SQL por requisição')
+            for endpoint, histograma in sorted(self.comandos_por_requisicao.items()):
+                linhas.extend(histograma.linhas('erp_sql_statements_per_request', [('endpoint', endpoint)]))
+
+            cabecalho('erp_sql_statements_total', 'counter', 'Comandos SQL executados')
+            for endpoint, total in sorted(self.comandos_total.items()):
+                linhas.append(f'erp_sql_statements_total{_rotulos([("endpoint", endpoint)])} {total}')
+
+            cabecalho('erp_sql_duration_seconds_total', 'counter', 'Tempo gasto em comandos SQL')
+            for endpoint, segundos in sorted(self.sql_segundos.items()):
+                linhas.append(f'erp_sql_duration_seconds_total{_rotulos([("endpoint", endpoint)])} {_numero(segundos)}')
+
+            cabecalho('erp_sql_n_plus_one_total', 'counter', 'Requisições com o mesmo comando SQL repetido (N+1)')
+            for endpoint, total in sorted(self.n_mais_1.items()):
+                linhas.append(f'erp_sql_n_plus_one_total{_rotulos([("endpoint", endpoint)])} {total}')
+
+            cabecalho('erp_template_render_seconds', 'histogram', 'Tempo de renderização por template')
+            for nome, histograma in sorted(self.templates.items()):
+                linhas.extend(histograma.linhas('erp_template_render_seconds', [('template', nome)]))
+
+        return '\n'.join(linhas) + '\n'
+
+
+def obter_coletor(app):
+    """Coletor da aplicação, ou None quando as métricas não foram instaladas."""
+    return app.extensions.get(CHAVE_EXTENSAO)
+
+
+# ===== INSTALAÇÃO =====
+
+def _estado_atual():
+    if not has_request_context():
+        return None
+    return g.get('_metricas')
+
+
+def instalar_metricas(app):
+    """
+    Liga a instrumentação na aplicação (hooks de requisição, engine e templates).
+
+    Returns:
+        ColetorMetricas, ou None se METRICAS_TOKEN não está configurado
+    """
+    if obter_coletor(app) is not None:
+        return obter_coletor(app)
+    if not app.config.get('METRICAS_TOKEN'):
+        logger.warning('metricas evento=nao_instaladas motivo=METRICAS_TOKEN_ausente')
+        print("   ⚠️ Métricas não instaladas: defina METRICAS_TOKEN para expor /status/metrics")
+        return None
+    coletor = ColetorMetricas(app.config)
+    app.extensions[CHAVE_EXTENSAO] = coletor
+
+    # Primeiro before_request: mede também os demais hooks (login, etc.)
+    app.before_request_funcs.setdefault(None, []).insert(0, coletor.iniciar)
+
+    @app.after_request
+    def _status_metricas(resposta):
+        estado = _estado_atual()
+        if estado is not None:
+            estado['status'] = resposta.status_code
+        return resposta
+
+    @app.teardown_request
+    def _finalizar_metricas(_erro=None):
+        if _estado_atual() is not None:
+            coletor.finalizar()
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _antes_comando(conn, cursor, statement, parameters, context, executemany):
+        if _estado_atual() is not None:
+            conn.info.setdefault('metricas_inicio', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _depois_comando(conn, cursor, statement, parameters, context, executemany):
+        estado = _estado_atual()
+        inicios = conn.info.get('metricas_inicio')
+        if estado is None or not inicios:
+            return
+        segundos = time.perf_counter() - inicios.pop()
+        estado['comandos'] += 1
+        estado['sql_segundos'] += segundos
+        dados = estado['por_comando'][normalizar_comando(statement)]
+        dados[0] += 1
+        dados[1] += segundos
+
+    def _antes_template(sender, template, context, **extra):
+        estado = _estado_atual()
+        if estado is not None:
+            estado.setdefault('_template_inicio', []).append(time.perf_counter())
+
+    def _template_renderizado(sender, template, context, **extra):
+        estado = _estado_atual()
+        if estado is None or not estado.get('_template_inicio'):
+            return
+        inicio = estado['_template_inicio'].pop()
+        estado['templates'].append((template.name or 'sem_nome', time.perf_counter() - inicio))
+
+    before_render_template.connect(_antes_template, app, weak=False)
+    template_rendered.connect(_template_renderizado, app, weak=False)
+
+    print(f"[OK] Métricas de desempenho ativas em /status/metrics")
+    return coletor
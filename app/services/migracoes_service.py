@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Migrações do Banco
+=============================
+
+Runner versionado sobre o Alembic (`migrations/`), executado uma vez por
+deploy (`python scripts/migrar_banco.py`) em vez de a cada boot de cada
+worker:
+
+- a revisão aplicada fica registrada em `alembic_version`; um banco já
+  na revisão mais recente não recebe nenhuma alteração;
+- a execução acontece sob trava (advisory lock no PostgreSQL, arquivo de
+  trava no SQLite): várias instâncias subindo juntas não disputam os
+  mesmos ALTER TABLE — as demais esperam e encontram o banco atualizado;
+- banco vazio: as tabelas são criadas pelos modelos e marcadas na
+  revisão mais recente (`stamp`);
+- banco anterior ao runner (sem `alembic_version`, montado pelo
+  create_all + ajustes da inicialização): recebe as tabelas que faltam,
+  é marcado em REVISAO_LEGADA e atualizado a partir dela.
+
+Depois das migrações rodam as tarefas idempotentes que também ficavam na
+inicialização: índices de busca (só quando o esquema mudou), saldos
+mensais, sequências de ID, calendário de feriados do ano corrente e do
+seguinte e usuário administrador inicial.
+
+Em desenvolvimento e testes o runner é chamado pelo create_app
+(MIGRAR_BANCO_NA_INICIALIZACAO); em produção os workers não consultam o
+esquema do banco.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+
+from app.extensoes import db
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DIRETORIO_MIGRACOES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'migrations'
+)
+
+# Última revisão anterior ao runner. As revisões seguintes são idempotentes
+# (conferem tabelas e colunas antes de criar): num banco legado aplicam só
+# o que os ajustes antigos da inicialização não chegaram a fazer
+REVISAO_LEGADA = '20260803_01'
+
+# Chave do pg_advisory_lock das migrações
+CHAVE_TRAVA = 7402051
+
+# Tabelas com sequência de ID que já ficou dessincronizada em importações
+TABELAS_SEQUENCIA = ('propostas', 'clientes', 'fornecedores', 'produtos', 'ordem_servico',
+                     'usuarios', 'proposta_produto', 'proposta_servico', 'proposta_parcela')
+
+_trava_processo = threading.Lock()
+
+
+def configuracao_alembic(conexao=None) -> AlembicConfig:
+    """Config do Alembic apontando para `migrations/` (sem alembic.ini: não reconfigura o logging)."""
+    cfg = AlembicConfig()
+    cfg.set_main_option('script_location', DIRETORIO_MIGRACOES)
+    if conexao is not None:
+        cfg.attributes['connection'] = conexao
+    return cfg
+
+
+def revisao_head() -> str:
+    """Revisão mais recente em `migrations/versions`."""
+    return ScriptDirectory.from_config(configuracao_alembic()).get_current_head()
+
+
+def revisao_atual(conexao) -> Optional[str]:
+    """Revisão registrada no banco (None se o banco nunca foi versionado)."""
+    return MigrationContext.configure(conexao).get_current_revision()
+
+
+@contextmanager
+def _trava(conexao):
+    """Garante um único runner por vez entre processos e instâncias."""
+    if conexao.dialect.name == 'postgresql':
+        conexao.execute(text('SELECT pg_advisory_lock(:chave)'), {'chave': CHAVE_TRAVA})
+        conexao.commit()
+        try:
+            yield
+        finally:
+            conexao.rollback()
+            conexao.execute(text('SELECT pg_advisory_unlock(:chave)'), {'chave': CHAVE_TRAVA})
+            conexao.commit()
+        return
+
+    arquivo_banco = conexao.engine.url.database
+    if fcntl is None or not arquivo_banco or arquivo_banco == ':memory:':
+        with _trava_processo:
+            yield
+        return
+
+    with open(f'{arquivo_banco}.migracao.lock', 'w') as arquivo_trava:
+        fcntl.flock(arquivo_trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo_trava, fcntl.LOCK_UN)
+
+
+def _aplicar_esquema(conexao) -> Dict[str, Optional[str]]:
+    cfg = configuracao_alembic(conexao)
+    head = revisao_head()
+    atual = revisao_atual(conexao)
+    resultado = {'de': atual, 'para': head}
+
+    if atual is None:
+        tabelas = set(inspect(conexao).get_table_names())
+        legado = bool(tabelas & set(db.metadata.tables))
+        db.metadata.create_all(bind=conexao)
+        conexao.commit()
+        if legado:
+            # Banco montado pela inicialização antiga: aplica o que veio depois dela
+            command.stamp(cfg, REVISAO_LEGADA)
+            conexao.commit()
+            command.upgrade(cfg, 'head')
+            resultado['acao'] = 'legado'
+        else:
+            command.stamp(cfg, 'head')
+            resultado['acao'] = 'criado'
+        conexao.commit()
+        return resultado
+
+    if atual == head:
+        resultado['acao'] = 'em_dia'
+        return resultado
+
+    command.upgrade(cfg, 'head')
+    conexao.commit()
+    # Modelos ainda sem revisão própria: cria só as tabelas novas
+    db.metadata.create_all(bind=conexao)
+    conexao.commit()
+    resultado['acao'] = 'atualizado'
+    return resultado
+
+
+def _indices_de_busca(conexao):
+    try:
+        from app.services.busca_service import instalar_indices_busca, reindexar_busca
+        instalar_indices_busca(conexao)
+        conexao.commit()
+        indexados = reindexar_busca()
+        if indexados:
+            print(f"[OK] {indexados} registro(s) indexados para busca")
+    except Exception as e:
+        conexao.rollback()
+        db.session.rollback()
+        print(f"   ⚠️ Erro ao preparar índices de busca: {e}")
+
+
+def _tarefas_de_dados(conexao):
+    """Ajustes de dados idempotentes que acompanham as migrações."""
+
+    try:
+        from app.financeiro.saldo_mensal_model import SaldoMensalLancamento
+        if SaldoMensalLancamento.garantir_populado():
+            print("[OK] Saldos mensais de lançamentos reconstruídos!")
+    except Exception as e:
+        db.session.rollback()
+        print(f"   ⚠️ Erro ao popular saldos mensais: {e}")
+
+    if conexao.dialect.name == 'postgresql':
+        for tabela in TABELAS_SEQUENCIA:
+            try:
+                with conexao.begin_nested():
+                    conexao.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+                        f"COALESCE((SELECT MAX(id) FROM {tabela}), 1), true)"
+                    ))
+            except Exception:
+                pass  # Tabela sem sequência
+        conexao.commit()
+
+    try:
+        from datetime import date
+        from app.colaborador.feriado_model import Feriado
+        ano = date.today().year
+        novos = Feriado.gerar_ano(ano) + Feriado.gerar_ano(ano + 1)
+        if novos:
+            print(f"[OK] {novos} feriado(s) incluídos no calendário")
+    except Exception as e:
+        db.session.rollback()
+        print(f"   ⚠️ Erro ao gerar calendário de feriados: {e}")
+
+    try:
+        from app.auth.usuario_model import Usuario
+        if Usuario.query.count() == 0:
+            admin = Usuario(
+                nome='Administrador',
+                email='admin@jsp.com',
+                usuario='admin',
+                tipo_usuario='admin',
+                ativo=True,
+                email_confirmado=True
+            )
+            admin.set_senha('admin123')
+            db.session.add(admin)
+            db.session.commit()
+            print("[OK] Usuario admin padrao criado! (admin / admin123)")
+    except Exception as e:
+        db.session.rollback()
+        print(f"   ⚠️ Erro ao criar usuário admin padrão: {e}")
+
+
+def migrar_banco() -> Dict[str, Optional[str]]:
+    """
+    Leva o banco do app atual para a revisão mais recente.
+
+    Deve ser chamado dentro do app context, com os modelos importados
+    (create_app já importa todos).
+
+    Returns:
+        dict: {'acao': 'criado' | 'legado' | 'atualizado' | 'em_dia',
+               'de': revisão anterior, 'para': revisão atual}
+    """
+    with db.engine.connect() as conexao:
+        with _trava(conexao):
+            # Revisão lida já sob a trava: quem esperou encontra o banco em dia
+            resultado = _aplicar_esquema(conexao)
+            if resultado['acao'] != 'em_dia':
+                _indices_de_busca(conexao)
+            _tarefas_de_dados(conexao)
+    return resultado
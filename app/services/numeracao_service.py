@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Numeração de Documentos
+==================================
+
+Aloca números sequenciais (OS, propostas, pedidos, pedidos de compra) a
+partir da tabela `contadores_documento`, uma linha por série:
+
+- o incremento é um único UPDATE ... RETURNING (ou upsert, na primeira
+  vez da série), atômico entre workers: dois processos nunca recebem o
+  mesmo número, sem varrer a tabela do documento;
+- o contador é alterado na transação de quem cria o documento: a linha
+  fica bloqueada até o commit e, se a criação falhar (rollback), o número
+  volta a ficar disponível — a numeração não abre lacunas;
+- na primeira alocação de uma série o contador é semeado com o maior
+  número já existente (dados anteriores ao contador).
+
+Sequências nativas do PostgreSQL não são usadas porque não participam da
+transação (todo rollback deixaria um buraco) e exigiriam uma sequência
+por ano.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensoes import db
+from app.models import ContadorDocumento
+
+# Proteção contra números inseridos manualmente à frente do contador
+_MAX_TENTATIVAS = 1000
+
+
+def maior_sufixo(coluna, prefixo: str) -> int:
+    """
+    Maior parte numérica após `prefixo` entre os valores da coluna.
+
+    Usado apenas para semear um contador novo; compara inteiros, não
+    strings (PED10000 > PED9999).
+    """
+    maior = 0
+    for (valor,) in db.session.query(coluna).filter(coluna.like(f'{prefixo}%')):
+        sufixo = (valor or '')[len(prefixo):]
+        if sufixo.isdigit():
+            maior = max(maior, int(sufixo))
+    return maior
+
+
+def _incrementar(connection, serie: str, semente: Optional[Callable[[], int]]) -> int:
+    tabela = ContadorDocumento.__table__
+    agora = datetime.utcnow()
+    dialeto = connection.dialect.name
+    suporta_returning = dialeto in ('postgresql', 'sqlite')
+
+    atualizar = tabela.update().where(tabela.c.serie == serie).values(
+        valor=tabela.c.valor + 1, atualizado_em=agora
+    )
+    if suporta_returning:
+        valor = connection.execute(atualizar.returning(tabela.c.valor)).scalar()
+    else:
+        resultado = connection.execute(atualizar)
+        valor = None
+        if resultado.rowcount:
+            valor = connection.execute(tabela.select().with_only_columns(tabela.c.valor)
+                                       .where(tabela.c.serie == serie)).scalar()
+    if valor is not None:
+        return valor
+
+    # Primeira alocação da série: semeia com o maior número já emitido
+    inicial = (semente() if semente else 0) + 1
+    if suporta_returning:
+        insert = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+        stmt = insert(tabela).values(serie=serie, valor=inicial, atualizado_em=agora)
+        # Outro worker semeou a série ao mesmo tempo: apenas incrementa
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['serie'], set_={'valor': tabela.c.valor + 1, 'atualizado_em': agora}
+        )
+        return connection.execute(stmt.returning(tabela.c.valor)).scalar()
+
+    connection.execute(tabela.insert().values(serie=serie, valor=inicial, atualizado_em=agora))
+    return inicial
+
+
+def alocar_numero(serie: str, semente: Optional[Callable[[], int]] = None,
+                  existe: Optional[Callable[[int], bool]] = None) -> int:
+    """
+    Reserva o próximo número da série na transação atual.
+
+    Args:
+        serie: Identificador da série (ex.: 'OS2026')
+        semente: Maior número já existente; chamada só na criação da série
+        existe: Verifica se o número já está em uso (registros inseridos
+            sem passar pelo contador são pulados)
+
+    Returns:
+        int: Número reservado (liberado novamente em caso de rollback)
+    """
+    connection = db.session.connection()
+    for _ in range(_MAX_TENTATIVAS):
+        numero = _incrementar(connection, serie, semente)
+        if existe is None or not existe(numero):
+            return numero
+    raise RuntimeError(f'Não foi possível alocar número livre para a série {serie}')
+
+
+def prever_numero(serie: str, semente: Optional[Callable[[], int]] = None) -> int:
+    """
+    Próximo número da série sem reservá-lo (exibição em formulários).
+
+    Não é garantido: outro usuário pode salvar antes.
+    """
+    tabela = ContadorDocumento.__table__
+    valor = db.session.execute(
+        tabela.select().with_only_columns(tabela.c.valor).where(tabela.c.serie == serie)
+    ).scalar()
+    if valor is not None:
+        return valor + 1
+    return (semente() if semente else 0) + 1
+
+
+# ===== CÓDIGOS NO FORMATO PREFIXO + SEQUENCIAL =====
+
+def _formatar(prefixo: str, numero: int, digitos: int) -> str:
+    return f'{prefixo}{numero:0{digitos}d}'
+
+
+def alocar_codigo(coluna, prefixo: str, digitos: int = 4) -> str:
+    """
+    Reserva o próximo código da coluna (ex.: OS20260001), usando o
+    prefixo como série do contador.
+    """
+    def em_uso(numero):
+        codigo = _formatar(prefixo, numero, digitos)
+        return db.session.query(coluna).filter(coluna == codigo).first() is not None
+
+    numero = alocar_numero(prefixo, semente=lambda: maior_sufixo(coluna, prefixo), existe=em_uso)
+    return _formatar(prefixo, numero, digitos)
+
+
+def prever_codigo(coluna, prefixo: str, digitos: int = 4) -> str:
+    """Código que `alocar_codigo` tende a devolver, sem reservá-lo."""
+    return _formatar(prefixo, prever_numero(prefixo, semente=lambda: maior_sufixo(coluna, prefixo)), digitos)
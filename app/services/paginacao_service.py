@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Paginação por Cursor
+===============================
+
+Paginação das listagens (OS, clientes, propostas, pedidos de compra,
+NFS-e, equipamentos e serviços) sem carregar a tabela inteira com `.all()`.
+
+A página seguinte é pedida por um cursor (keyset) com os valores de
+ordenação do último registro exibido, em vez de OFFSET:
+
+    WHERE (data_abertura, id) < (:data, :id)
+    ORDER BY data_abertura DESC, id DESC
+    LIMIT :por_pagina + 1
+
+- a consulta usa o índice composto (coluna de ordenação, id) e custa o
+  mesmo na primeira ou na milésima página;
+- registros inseridos enquanto o usuário rola a lista não deslocam as
+  páginas seguintes (sem itens repetidos ou pulados, como no OFFSET);
+- o id no fim da ordenação desempata registros com o mesmo valor.
+
+O total é contado só na primeira página e limitado a LIMITE_CONTAGEM
+(acima disso vira "10.000+"); quem já tem o número pronto (ex.: total de
+clientes do snapshot do dashboard) pode informá-lo e evitar a contagem.
+
+O cursor é opaco para o cliente (JSON em base64 url-safe); um cursor
+inválido ou adulterado volta para a primeira página.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import func, literal, select, tuple_
+
+from app.extensoes import db
+
+POR_PAGINA_PADRAO = 50
+POR_PAGINA_MAXIMO = 200
+LIMITE_CONTAGEM = 10000
+
+
+@dataclass
+class Pagina:
+    """Uma página da listagem e o cursor da próxima."""
+
+    itens: List[Any]
+    por_pagina: int
+    cursor: Optional[str] = None
+    proximo_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_aproximado: bool = False
+
+    @property
+    def tem_proxima(self) -> bool:
+        return self.proximo_cursor is not None
+
+    @property
+    def primeira(self) -> bool:
+        return self.cursor is None
+
+    @property
+    def total_formatado(self) -> str:
+        """'1.234' ou '10.000+' quando a contagem foi limitada."""
+        if self.total is None:
+            return ''
+        texto = f'{self.total:,}'.replace(',', '.')
+        return f'{texto}+' if self.total_aproximado else texto
+
+    def para_dict(self, serializar) -> dict:
+        """Resposta JSON da rolagem infinita: itens serializados e o cursor da próxima página."""
+        return {
+            'itens': [serializar(item) for item in self.itens],
+            'proximo_cursor': self.proximo_cursor,
+            'tem_proxima': self.tem_proxima,
+            'total': self.total,
+            'total_aproximado': self.total_aproximado,
+        }
+
+
+# ===== CURSOR =====
+
+def _valor_json(valor):
+    if isinstance(valor, datetime):
+        return {'dt': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'d': valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return {'n': str(valor)}
+    return valor
+
+
+def _valor_python(valor):
+    if isinstance(valor, dict):
+        if 'dt' in valor:
+            return datetime.fromisoformat(valor['dt'])
+        if 'd' in valor:
+            return date.fromisoformat(valor['d'])
+        if 'n' in valor:
+            return Decimal(valor['n'])
+        raise ValueError('valor de cursor desconhecido')
+    return valor
+
+
+def codificar_cursor(valores: Sequence) -> str:
+    """Valores de ordenação do último item -> cursor opaco."""
+    texto = json.dumps([_valor_json(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: Optional[str], quantidade: int) -> Optional[list]:
+    """Cursor -> lista de valores; None quando ausente ou inválido."""
+    if not cursor:
+        return None
+    try:
+        preenchido = cursor + '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(preenchido.encode('ascii')))
+        if not isinstance(valores, list) or len(valores) != quantidade:
+            return None
+        return [_valor_python(v) for v in valores]
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        return None
+
+
+# ===== PARÂMETROS =====
+
+def parametros_paginacao(args, padrao: int = POR_PAGINA_PADRAO):
+    """Lê `cursor` e `por_pagina` da query string (por_pagina limitado a POR_PAGINA_MAXIMO)."""
+    try:
+        por_pagina = int(args.get('por_pagina', padrao))
+    except (TypeError, ValueError):
+        por_pagina = padrao
+    por_pagina = max(1, min(por_pagina, POR_PAGINA_MAXIMO))
+    return args.get('cursor') or None, por_pagina
+
+
+def quer_json(args) -> bool:
+    """Variante JSON da listagem (rolagem infinita): `?formato=json`."""
+    return args.get('formato') == 'json'
+
+
+# ===== CONTAGEM =====
+
+def contar_limitado(query, coluna, limite: int = LIMITE_CONTAGEM):
+    """
+    Conta os registros da consulta até `limite`, sem percorrer o resto.
+
+    Returns:
+        tuple: (total, aproximado) — aproximado=True quando há mais de `limite`
+    """
+    subconsulta = query.order_by(None).with_entities(coluna)
+    subconsulta = subconsulta.limit(limite + 1).subquery()
+    total = db.session.execute(select(func.count()).select_from(subconsulta)).scalar() or 0
+    if total > limite:
+        return limite, True
+    return total, False
+
+
+# ===== PAGINAÇÃO =====
+
+def paginar(query, colunas, decrescente: bool = True, cursor: Optional[str] = None,
+            por_pagina: int = POR_PAGINA_PADRAO, total: Optional[int] = None,
+            opcoes: Sequence = ()) -> Pagina:
+    """
+    Pagina a consulta por cursor.
+
+    Args:
+        query: consulta já filtrada (sem order_by)
+        colunas: colunas de ordenação terminando na chave primária,
+                 ex.: [OrdemServico.data_abertura, OrdemServico.id];
+                 devem ser NOT NULL e ter índice composto na mesma ordem
+        decrescente: direção da ordenação (a mesma para todas as colunas)
+        cursor: cursor recebido da página anterior (None = primeira página)
+        por_pagina: tamanho da página
+        total: total já conhecido; se None, é contado (limitado) na primeira página
+        opcoes: opções de carga dos itens (ex.: joinedload do cliente exibido
+                em cada linha), aplicadas só na busca da página
+
+    Returns:
+        Pagina
+    """
+    valores = decodificar_cursor(cursor, len(colunas))
+    if valores is None:
+        cursor = None
+
+    aproximado = False
+    if cursor is None and total is None:
+        total, aproximado = contar_limitado(query, colunas[-1])
+
+    linha = tuple_(*colunas)
+    if valores is not None:
+        limite = tuple_(*[literal(v, c.type) for c, v in zip(colunas, valores)])
+        query = query.filter(linha < limite if decrescente else linha > limite)
+    ordem = [c.desc() if decrescente else c.asc() for c in colunas]
+
+    itens = query.options(*opcoes).order_by(*ordem).limit(por_pagina + 1).all()
+    proximo = None
+    if len(itens) > por_pagina:
+        itens = itens[:por_pagina]
+        ultimo = itens[-1]
+        proximo = codificar_cursor([getattr(ultimo, c.key) for c in colunas])
+
+    return Pagina(itens=itens, por_pagina=por_pagina, cursor=cursor, proximo_cursor=proximo,
+                  total=total if cursor is None else None, total_aproximado=aproximado)
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Renderização de PDF
+==============================
+
+Centraliza a geração de PDFs com WeasyPrint (propostas e demais
+documentos):
+
+- a renderização roda em um pool de processos pré-aquecidos, fora das
+  threads que atendem requisições; os processos nascem do forkserver
+  (spawn no Windows), sem herdar threads, locks e conexões do worker web
+  como no fork, e cada um mantém FontConfiguration,
+  folhas de estilo já analisadas e imagens (logo, arquivos estáticos) em
+  cache;
+- PDFs gerados ficam em cache endereçado por conteúdo: a chave é o hash
+  do HTML renderizado, de modo que um download repetido do mesmo documento
+  não passa pelo WeasyPrint e qualquer alteração (itens, configuração,
+  logo) gera automaticamente uma nova entrada;
+- o logo da empresa é normalizado uma única vez por versão da
+  configuração.
+
+Configuração (app.config / variáveis de ambiente):
+    PDF_WORKERS: processos do pool (0 = renderiza no próprio processo)
+    PDF_CACHE_DIR: diretório do cache de PDFs
+    PDF_CACHE_MAX_ARQUIVOS: limite de arquivos no cache (remove os mais antigos)
+    PDF_TIMEOUT: segundos máximos de espera por uma renderização
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+PDF_WORKERS_PADRAO = 2
+PDF_CACHE_MAX_ARQUIVOS_PADRAO = 500
+PDF_TIMEOUT_PADRAO = 120
+
+# Recursos (imagens, CSS) mantidos em memória por processo de renderização
+_LIMITE_RECURSOS = 64
+
+
+class PDFIndisponivel(RuntimeError):
+    """WeasyPrint (ou suas bibliotecas nativas) não está disponível."""
+
+
+# ============================================================
+# LADO DO WORKER (executa dentro dos processos do pool)
+# ============================================================
+
+_fontes = None
+_recursos: Dict[str, dict] = {}
+_folhas_estilo: Dict[str, object] = {}
+
+
+def _importar_weasyprint():
+    try:
+        import weasyprint
+        return weasyprint
+    except (ImportError, OSError) as e:
+        # OSError: pacote instalado, mas sem pango/cairo no sistema
+        raise PDFIndisponivel(str(e))
+
+
+def _buscar_recurso(url, *args, **kwargs):
+    """url_fetcher com cache: logo em data URI e arquivos locais são lidos uma vez."""
+    weasyprint = _importar_weasyprint()
+    if not url.startswith(('data:', 'file:')):
+        return weasyprint.default_url_fetcher(url, *args, **kwargs)
+
+    chave = hashlib.sha1(url.encode('utf-8')).hexdigest() if url.startswith('data:') else url
+    recurso = _recursos.get(chave)
+    if recurso is None:
+        resultado = weasyprint.default_url_fetcher(url, *args, **kwargs)
+        if 'file_obj' in resultado:
+            resultado['string'] = resultado.pop('file_obj').read()
+        if len(_recursos) >= _LIMITE_RECURSOS:
+            _recursos.pop(next(iter(_recursos)))
+        recurso = _recursos[chave] = resultado
+    return dict(recurso)
+
+
+def _folha_estilo(css: str):
+    """CSS analisado uma vez por processo."""
+    weasyprint = _importar_weasyprint()
+    chave = hashlib.sha1(css.encode('utf-8')).hexdigest()
+    folha = _folhas_estilo.get(chave)
+    if folha is None:
+        folha = weasyprint.CSS(string=css, font_config=_fontes, url_fetcher=_buscar_recurso)
+        _folhas_estilo[chave] = folha
+    return folha
+
+
+def _inicializar_worker():
+    """Prepara o processo: aquece o WeasyPrint (fontes e primeiro layout)."""
+    global _fontes
+
+    weasyprint = _importar_weasyprint()
+    from weasyprint.text.fonts import FontConfiguration
+
+    _fontes = FontConfiguration()
+    weasyprint.HTML(string='<p>.</p>').write_pdf(font_config=_fontes)
+
+
+def renderizar_pdf(html: str, base_url: Optional[str] = None, css: Optional[str] = None) -> bytes:
+    """Renderiza HTML em PDF no processo atual (usado pelos workers do pool)."""
+    global _fontes
+    weasyprint = _importar_weasyprint()
+    if _fontes is None:
+        from weasyprint.text.fonts import FontConfiguration
+        _fontes = FontConfiguration()
+
+    documento = weasyprint.HTML(string=html, base_url=base_url, url_fetcher=_buscar_recurso)
+    folhas = [_folha_estilo(css)] if css else None
+    return documento.write_pdf(stylesheets=folhas, font_config=_fontes)
+
+
+# ============================================================
+# LADO DA APLICAÇÃO
+# ============================================================
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _config(nome, padrao):
+    try:
+        from flask import current_app
+        valor = current_app.config.get(nome)
+    except RuntimeError:
+        valor = None
+    if valor is None:
+        valor = os.getenv(nome, padrao)
+    return valor
+
+
+def _contexto_pool():
+    """
+    forkserver onde existir (Linux/macOS) e spawn no Windows.
+
+    Importar este módulo nos filhos não cria a aplicação (app.app só executa
+    a factory no primeiro acesso a ``app``).
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('forkserver')
+        # Carregado uma vez no servidor; cada processo do pool nasce dele
+        contexto.set_forkserver_preload([__name__])
+        return contexto
+    return multiprocessing.get_context('spawn')
+
+
+def _obter_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    workers = int(_config('PDF_WORKERS', PDF_WORKERS_PADRAO))
+    if workers <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=_contexto_pool(),
+                initializer=_inicializar_worker,
+            )
+        return _pool
+
+
+def encerrar_pool():
+    """Finaliza os processos de renderização (testes/desligamento)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def gerar_pdf(html: str, base_url: Optional[str] = None, css: Optional[str] = None) -> bytes:
+    """
+    Renderiza HTML em PDF no pool de processos.
+
+    Raises:
+        PDFIndisponivel: WeasyPrint não pode ser carregado
+    """
+    # Falha de importação aparece aqui (e não como pool quebrado)
+    _importar_weasyprint()
+
+    pool = _obter_pool()
+    if pool is None:
+        return renderizar_pdf(html, base_url, css)
+
+    timeout = float(_config('PDF_TIMEOUT', PDF_TIMEOUT_PADRAO))
+    try:
+        return pool.submit(renderizar_pdf, html, base_url, css).result(timeout=timeout)
+    except BrokenProcessPool:
+        # Worker morto (ex.: falta de memória): recria o pool na próxima chamada
+        encerrar_pool()
+        raise
+
+
+# ===== CACHE DE PDFs =====
+
+class CachePDF:
+    """Cache em disco de PDFs, endereçado pelo hash do conteúdo de origem."""
+
+    def __init__(self, diretorio: Optional[str] = None, max_arquivos: Optional[int] = None):
+        self.diretorio = diretorio or _config(
+            'PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'erp_jsp_pdf_cache')
+        )
+        self.max_arquivos = int(max_arquivos or _config('PDF_CACHE_MAX_ARQUIVOS', PDF_CACHE_MAX_ARQUIVOS_PADRAO))
+
+    @staticmethod
+    def chave(*partes) -> str:
+        digest = hashlib.sha256()
+        for parte in partes:
+            digest.update(str(parte if parte is not None else '').encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f'{chave}.pdf')
+
+    def obter(self, chave: str) -> Optional[bytes]:
+        try:
+            with open(self._caminho(chave), 'rb') as arquivo:
+                conteudo = arquivo.read()
+            os.utime(self._caminho(chave))  # LRU por data de acesso
+            return conteudo
+        except FileNotFoundError:
+            return None
+
+    def gravar(self, chave: str, conteudo: bytes):
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = f'{self._caminho(chave)}.{os.getpid()}.tmp'
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(conteudo)
+        os.replace(temporario, self._caminho(chave))  # atômico entre workers
+        self._podar()
+
+    def _podar(self):
+        arquivos = [
+            os.path.join(self.diretorio, nome)
+            for nome in os.listdir(self.diretorio) if nome.endswith('.pdf')
+        ]
+        excedentes = len(arquivos) - self.max_arquivos
+        if excedentes <= 0:
+            return
+        arquivos.sort(key=lambda caminho: os.path.getmtime(caminho))
+        for caminho in arquivos[:excedentes]:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+
+
+def obter_ou_gerar_pdf(documento: str, html: str, base_url: Optional[str] = None,
+                       css: Optional[str] = None, cache: Optional[CachePDF] = None,
+                       renderizador: Callable[..., bytes] = gerar_pdf):
+    """
+    Retorna o PDF do documento, gerando-o apenas se o conteúdo mudou.
+
+    Args:
+        documento: Identificação do documento (ex.: 'proposta:15')
+        html: HTML já renderizado
+        base_url/css: Repassados ao WeasyPrint (fazem parte da chave)
+
+    Returns:
+        tuple: (bytes do PDF, chave do cache — usada como ETag)
+    """
+    cache = cache or CachePDF()
+    chave = CachePDF.chave(documento, html, base_url, css)
+    pdf = cache.obter(chave)
+    if pdf is None:
+        pdf = renderizador(html, base_url, css)
+        cache.gravar(chave, pdf)
+    return pdf, chave
+
+
+# ===== LOGO DA EMPRESA =====
+
+_logo_cache: Dict[tuple, dict] = {}
+
+
+def logo_empresa(config, caminho_padrao: Optional[str] = None) -> dict:
+    """
+    Logo da configuração normalizado, calculado uma vez por versão.
+
+    Returns:
+        dict: {'data_uri': 'data:image/...;base64,...' ou None,
+               'base64': conteúdo sem prefixo ou None}
+    """
+    logo = getattr(config, 'logo_base64', None) if config else None
+    versao = (
+        getattr(config, 'id', None),
+        getattr(config, 'atualizado_em', None),
+        len(logo) if logo else 0,
+        getattr(config, 'logo', None) if config else None,
+        caminho_padrao,
+    )
+    resultado = _logo_cache.get(versao)
+    if resultado is not None:
+        return resultado
+
+    resultado = {'data_uri': None, 'base64': None}
+    if logo:
+        if logo.startswith('data:'):
+            resultado['data_uri'] = logo
+            resultado['base64'] = logo.split(',', 1)[1] if ',' in logo else logo
+        else:
+            resultado['base64'] = logo
+    elif caminho_padrao and os.path.exists(caminho_padrao):
+        with open(caminho_padrao, 'rb') as arquivo:
+            resultado['base64'] = base64.b64encode(arquivo.read()).decode('ascii')
+        mime = 'image/png' if caminho_padrao.lower().endswith('.png') else 'image/jpeg'
+        resultado['data_uri'] = f"data:{mime};base64,{resultado['base64']}"
+
+    _logo_cache.clear()  # apenas a versão atual interessa
+    _logo_cache[versao] = resultado
+    return resultado
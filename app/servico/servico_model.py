@@ -44,6 +44,8 @@ class Servico(BaseModel):
     """
     
     __tablename__ = 'servicos'
+    # Paginação por cursor da listagem (app.services.paginacao_service)
+    __table_args__ = (db.Index('ix_servicos_nome_id', 'nome', 'id'),)
     
     # Constantes da classe
     TIPO_COBRANCA_CHOICES = TIPO_COBRANCA_CHOICES
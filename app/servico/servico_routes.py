@@ -39,13 +39,20 @@ def listar():
             )
         )
     
-    servicos = query.order_by(Servico.nome).all()
+    from app.services.paginacao_service import paginar, parametros_paginacao, quer_json
+
+    cursor, por_pagina = parametros_paginacao(request.args)
+    pagina = paginar(query, [Servico.nome, Servico.id], decrescente=False,
+                     cursor=cursor, por_pagina=por_pagina)
+    if quer_json(request.args):
+        return jsonify(pagina.para_dict(Servico.to_dict))
     
     # Estatísticas
     stats = Servico.estatisticas_dashboard()
     
     return render_template('servico/listar.html', 
-                         servicos=servicos, 
+                         servicos=pagina.itens, 
+                         pagina=pagina,
                          stats=stats,
                          categoria_filtro=categoria,
                          busca=busca)
@@ -5,7 +5,9 @@
 Verifica se todas as correções foram aplicadas.
 """
 
-from flask import Blueprint, jsonify
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
 from app.extensoes import db
 from sqlalchemy import text
 
@@ -106,3 +108,35 @@ def status_ordem_servico():
         })
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
+
+
+def _coletor_autorizado():
+    """Coletor de métricas, ou 404/401 se desligado ou sem o token."""
+    from app.services.metricas_service import obter_coletor
+
+    coletor = obter_coletor(current_app)
+    token = current_app.config.get('METRICAS_TOKEN')
+    if coletor is None or not token:
+        abort(404)
+    # Só pelo cabeçalho: token na URL vazaria nos logs de acesso e do proxy
+    cabecalho = request.headers.get('Authorization', '')
+    enviado = cabecalho[7:] if cabecalho.startswith('Bearer ') else ''
+    if not hmac.compare_digest(enviado.encode(), token.encode()):
+        abort(401)
+    return coletor
+
+
+@status_bp.route('/metrics')
+def metricas():
+    """Métricas de desempenho no formato texto do Prometheus"""
+    coletor = _coletor_autorizado()
+    return Response(coletor.exportar(), mimetype='text/plain; version=0.0.4')
+
+
+@status_bp.route('/metrics/lentas')
+def metricas_lentas():
+    """Últimas requisições lentas amostradas (mais recentes primeiro)"""
+    coletor = _coletor_autorizado()
+    with coletor.lock:
+        lentas = list(coletor.lentas)
+    return jsonify(list(reversed(lentas)))
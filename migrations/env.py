@@ -78,6 +78,15 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Runner do app (app/services/migracoes_service.py): usa a conexão que
+    # já detém a trava de migração
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = create_engine(_get_database_url(), poolclass=pool.NullPool)
 
     with connectable.connect() as connection:
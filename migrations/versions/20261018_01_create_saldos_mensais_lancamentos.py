@@ -0,0 +1,60 @@
+"""Create saldos_mensais_lancamentos rollup
+
+Revision ID: 20261018_01
+Revises: 20260803_01
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_01"
+down_revision = "20260803_01"
+branch_labels = None
+depends_on = None
+
+
+_CHAVE = (
+    "referencia", "ano", "mes", "tipo", "status", "categoria",
+    "centro_custo_id", "plano_conta_id", "conta_bancaria_id",
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Bancos legados: a tabela pode já ter vindo do create_all
+    if "saldos_mensais_lancamentos" in sa.inspect(bind).get_table_names():
+        return
+    op.create_table(
+        "saldos_mensais_lancamentos",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("referencia", sa.String(length=20), nullable=False),
+        sa.Column("ano", sa.Integer(), nullable=False),
+        sa.Column("mes", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(length=20), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("categoria", sa.String(length=100), nullable=False, server_default=""),
+        sa.Column("centro_custo_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("plano_conta_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("conta_bancaria_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("valor_total", sa.Numeric(14, 2), nullable=False, server_default="0.00"),
+        sa.Column("quantidade", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(*_CHAVE, name="uq_saldos_mensais_chave"),
+    )
+    op.create_index(
+        "ix_saldos_mensais_periodo",
+        "saldos_mensais_lancamentos",
+        ["referencia", "ano", "mes"],
+        unique=False,
+    )
+    # O preenchimento inicial é feito pela aplicação (create_app) ou por
+    # scripts/reconstruir_saldos_mensais.py
+
+
+def downgrade() -> None:
+    op.drop_index("ix_saldos_mensais_periodo", table_name="saldos_mensais_lancamentos")
+    op.drop_table("saldos_mensais_lancamentos")
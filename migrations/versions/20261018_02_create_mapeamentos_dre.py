@@ -0,0 +1,41 @@
+"""Create mapeamentos_dre
+
+Revision ID: 20261018_02
+Revises: 20261018_01
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_02"
+down_revision = "20261018_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Bancos legados: a tabela pode já ter vindo do create_all
+    if "mapeamentos_dre" in sa.inspect(bind).get_table_names():
+        return
+    op.create_table(
+        "mapeamentos_dre",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("tipo", sa.String(length=20), nullable=False),
+        sa.Column("categoria", sa.String(length=100), nullable=True),
+        sa.Column("correspondencia", sa.String(length=10), nullable=False, server_default="igual"),
+        sa.Column("plano_conta_id", sa.Integer(), sa.ForeignKey("plano_contas.id"), nullable=True),
+        sa.Column("linha_dre", sa.String(length=30), nullable=False),
+        sa.Column("ordem", sa.Integer(), nullable=False, server_default="100"),
+        sa.Column("criado_em", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("ativo", sa.Boolean(), nullable=False, server_default=sa.text("true")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("mapeamentos_dre")
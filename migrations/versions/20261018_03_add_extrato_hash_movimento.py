@@ -0,0 +1,43 @@
+"""Add hash_movimento to extratos_bancarios
+
+Revision ID: 20261018_03
+Revises: 20261018_02
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_03"
+down_revision = "20261018_02"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "extratos_bancarios" not in inspector.get_table_names():
+        return
+    # Coluna já criada pelos ajustes antigos da inicialização do app
+    colunas = {c["name"] for c in inspector.get_columns("extratos_bancarios")}
+    if "hash_movimento" in colunas:
+        return
+    op.add_column("extratos_bancarios", sa.Column("hash_movimento", sa.String(length=64), nullable=True))
+    op.create_index(
+        "ix_extratos_bancarios_hash_movimento",
+        "extratos_bancarios",
+        ["hash_movimento"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if "extratos_bancarios" not in sa.inspect(bind).get_table_names():
+        return
+    op.drop_index("ix_extratos_bancarios_hash_movimento", table_name="extratos_bancarios")
+    op.drop_column("extratos_bancarios", "hash_movimento")
@@ -0,0 +1,37 @@
+"""Add reduced image variants to ordem_servico_anexos
+
+Revision ID: 20261018_04
+Revises: 20261018_03
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_04"
+down_revision = "20261018_03"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ordem_servico_anexos" not in inspector.get_table_names():
+        return
+    # Colunas já criadas pelos ajustes antigos da inicialização do app
+    colunas = {c["name"] for c in inspector.get_columns("ordem_servico_anexos")}
+    for coluna in ("conteudo_pdf", "conteudo_miniatura"):
+        if coluna not in colunas:
+            op.add_column("ordem_servico_anexos", sa.Column(coluna, sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if "ordem_servico_anexos" not in sa.inspect(bind).get_table_names():
+        return
+    op.drop_column("ordem_servico_anexos", "conteudo_miniatura")
+    op.drop_column("ordem_servico_anexos", "conteudo_pdf")
@@ -0,0 +1,42 @@
+"""Add arquivo_sha256 reference to ordem_servico_anexos
+
+Revision ID: 20261018_05
+Revises: 20261018_04
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_05"
+down_revision = "20261018_04"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ordem_servico_anexos" not in inspector.get_table_names():
+        return
+    # Coluna já criada pelos ajustes antigos da inicialização do app
+    colunas = {c["name"] for c in inspector.get_columns("ordem_servico_anexos")}
+    if "arquivo_sha256" in colunas:
+        return
+    op.add_column("ordem_servico_anexos", sa.Column("arquivo_sha256", sa.String(length=64), nullable=True))
+    op.create_index(
+        "ix_ordem_servico_anexos_arquivo_sha256",
+        "ordem_servico_anexos",
+        ["arquivo_sha256"],
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if "ordem_servico_anexos" not in sa.inspect(bind).get_table_names():
+        return
+    op.drop_index("ix_ordem_servico_anexos_arquivo_sha256", table_name="ordem_servico_anexos")
+    op.drop_column("ordem_servico_anexos", "arquivo_sha256")
@@ -0,0 +1,38 @@
+"""Add contadores_documento (numeração sequencial por série)
+
+Revision ID: 20261018_06
+Revises: 20261018_05
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_06"
+down_revision = "20261018_05"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "contadores_documento" in sa.inspect(bind).get_table_names():
+        return
+    # Sem semente aqui: cada série é semeada com o maior número existente
+    # na primeira alocação (numeracao_service)
+    op.create_table(
+        "contadores_documento",
+        sa.Column("serie", sa.String(length=30), primary_key=True),
+        sa.Column("valor", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if "contadores_documento" not in sa.inspect(bind).get_table_names():
+        return
+    op.drop_table("contadores_documento")
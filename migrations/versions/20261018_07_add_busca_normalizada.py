@@ -0,0 +1,64 @@
+"""Add busca_normalizada with trigram indexes (clientes, OS, propostas, produtos)
+
+Revision ID: 20261018_07
+Revises: 20261018_06
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_07"
+down_revision = "20261018_06"
+branch_labels = None
+depends_on = None
+
+TABELAS = ("clientes", "ordem_servico", "propostas", "produtos")
+TABELAS_CLIENTE = ("ordem_servico", "propostas")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existentes = inspector.get_table_names()
+    postgresql = bind.dialect.name == "postgresql"
+    if postgresql:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # O texto é preenchido pela aplicação na inicialização (reindexar_busca);
+    # no SQLite as tabelas FTS5 também são criadas por ela
+    for tabela in TABELAS:
+        if tabela not in existentes:
+            continue
+        colunas = [c["name"] for c in inspector.get_columns(tabela)]
+        if "busca_normalizada" not in colunas:
+            op.add_column(tabela, sa.Column("busca_normalizada", sa.Text(), nullable=True))
+        if postgresql:
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{tabela}_busca_trgm "
+                f"ON {tabela} USING gin (busca_normalizada gin_trgm_ops)"
+            )
+
+    for tabela in TABELAS_CLIENTE:
+        if tabela in existentes and "cliente_id" in [c["name"] for c in inspector.get_columns(tabela)]:
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{tabela}_cliente_id ON {tabela} (cliente_id)")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    existentes = sa.inspect(bind).get_table_names()
+    for tabela in TABELAS_CLIENTE:
+        if tabela in existentes:
+            op.execute(f"DROP INDEX IF EXISTS ix_{tabela}_cliente_id")
+    for tabela in TABELAS:
+        if tabela not in existentes:
+            continue
+        op.execute(f"DROP INDEX IF EXISTS ix_{tabela}_busca_trgm")
+        if bind.dialect.name == "sqlite":
+            for sufixo in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {tabela}_busca_{sufixo}")
+            op.execute(f"DROP TABLE IF EXISTS {tabela}_busca")
+        op.drop_column(tabela, "busca_normalizada")
@@ -0,0 +1,41 @@
+"""Add consultas_externas_cache (cache de consultas CNPJ/CEP)
+
+Revision ID: 20261018_08
+Revises: 20261018_07
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_08"
+down_revision = "20261018_07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "consultas_externas_cache" in sa.inspect(bind).get_table_names():
+        return
+    op.create_table(
+        "consultas_externas_cache",
+        sa.Column("tipo", sa.String(length=10), primary_key=True),
+        sa.Column("chave", sa.String(length=20), primary_key=True),
+        sa.Column("dados", sa.Text(), nullable=True),
+        sa.Column("provedor", sa.String(length=30), nullable=True),
+        sa.Column("consultado_em", sa.DateTime(), nullable=False),
+        sa.Column("expira_em", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_consultas_externas_cache_expira_em", "consultas_externas_cache", ["expira_em"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if "consultas_externas_cache" not in sa.inspect(bind).get_table_names():
+        return
+    op.drop_index("ix_consultas_externas_cache_expira_em", table_name="consultas_externas_cache")
+    op.drop_table("consultas_externas_cache")
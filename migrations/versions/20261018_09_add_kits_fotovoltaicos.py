@@ -0,0 +1,66 @@
+"""Add kits_fotovoltaicos (espelho local do catálogo do distribuidor)
+
+Revision ID: 20261018_09
+Revises: 20261018_08
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_09"
+down_revision = "20261018_08"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "kits_fotovoltaicos" in sa.inspect(bind).get_table_names():
+        return
+    op.create_table(
+        "kits_fotovoltaicos",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kit_id_api", sa.String(length=100), nullable=False),
+        sa.Column("nome", sa.String(length=200), nullable=False),
+        sa.Column("descricao", sa.Text(), nullable=True),
+        sa.Column("codigo", sa.String(length=50), nullable=True),
+        sa.Column("potencia", sa.Float(), nullable=True),
+        sa.Column("potencia_modulo", sa.Float(), nullable=True),
+        sa.Column("quantidade_modulos", sa.Integer(), nullable=True),
+        sa.Column("fabricante_modulo", sa.String(length=100), nullable=True),
+        sa.Column("modelo_modulo", sa.String(length=100), nullable=True),
+        sa.Column("potencia_inversor", sa.Float(), nullable=True),
+        sa.Column("fabricante_inversor", sa.String(length=100), nullable=True),
+        sa.Column("modelo_inversor", sa.String(length=100), nullable=True),
+        sa.Column("tipo_inversor", sa.String(length=50), nullable=True),
+        sa.Column("preco", sa.Numeric(12, 2), nullable=True),
+        sa.Column("moeda", sa.String(length=3), nullable=True),
+        sa.Column("disponivel", sa.Boolean(), nullable=True),
+        sa.Column("estoque", sa.Integer(), nullable=True),
+        sa.Column("categoria", sa.String(length=50), nullable=True),
+        sa.Column("tipo", sa.String(length=50), nullable=True),
+        sa.Column("garantia_modulo", sa.Integer(), nullable=True),
+        sa.Column("garantia_inversor", sa.Integer(), nullable=True),
+        sa.Column("eficiencia", sa.Float(), nullable=True),
+        sa.Column("area_necessaria", sa.Float(), nullable=True),
+        sa.Column("dados_completos_api", sa.JSON(), nullable=True),
+        sa.Column("criado_em", sa.DateTime(), nullable=True),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=True),
+        sa.Column("ultima_sincronizacao", sa.DateTime(), nullable=True),
+        sa.Column("ativo", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_kits_fotovoltaicos_kit_id_api", "kits_fotovoltaicos", ["kit_id_api"], unique=True)
+    op.create_index("ix_kits_fotovoltaicos_potencia", "kits_fotovoltaicos", ["potencia"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if "kits_fotovoltaicos" not in sa.inspect(bind).get_table_names():
+        return
+    op.drop_index("ix_kits_fotovoltaicos_potencia", table_name="kits_fotovoltaicos")
+    op.drop_index("ix_kits_fotovoltaicos_kit_id_api", table_name="kits_fotovoltaicos")
+    op.drop_table("kits_fotovoltaicos")
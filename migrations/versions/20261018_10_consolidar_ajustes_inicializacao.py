@@ -0,0 +1,249 @@
+"""Consolida os ajustes de colunas que eram feitos na inicialização do app
+
+Até esta revisão, create_app() verificava a cada boot (em todos os workers)
+as colunas de várias tabelas e aplicava ALTER TABLE nas que faltavam. Esses
+ajustes passam a ser uma revisão versionada, aplicada uma única vez pelo
+runner de migrações (app/services/migracoes_service.py).
+
+Cada coluna só é criada se ainda não existir: bancos que já receberam os
+ajustes na inicialização passam por esta revisão sem alterações.
+
+Revision ID: 20261018_10
+Revises: 20261018_09
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_10"
+down_revision = "20261018_09"
+branch_labels = None
+depends_on = None
+
+
+# {tabela: {coluna: DDL}}; '{binario}' vira BYTEA (PostgreSQL) ou BLOB
+COLUNAS = {
+    "orcamento_itens": {
+        "categoria": "VARCHAR(50)",
+        "ordem": "INTEGER DEFAULT 0",
+        "criado_em": "TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+    },
+    "lancamentos_financeiros": {
+        "usuario_criador": "VARCHAR(100)",
+        "usuario_editor": "VARCHAR(100)",
+        "data_criacao_auditoria": "TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+        "data_edicao_auditoria": "TIMESTAMP",
+        "conta_bancaria_id": "INTEGER REFERENCES contas_bancarias(id)",
+        "centro_custo_id": "INTEGER REFERENCES centros_custo(id)",
+        "comprovante_anexo": "VARCHAR(255)",
+        "numero_parcela": "VARCHAR(20)",
+        "valor_original": "NUMERIC(12, 2)",
+        "juros": "NUMERIC(12, 2) DEFAULT 0",
+        "desconto": "NUMERIC(12, 2) DEFAULT 0",
+        "multa": "NUMERIC(12, 2) DEFAULT 0",
+        "plano_conta_id": "INTEGER REFERENCES plano_contas(id)",
+        "origem": "VARCHAR(50) DEFAULT 'MANUAL'",
+        "custo_fixo_id": "INTEGER REFERENCES custos_fixos(id)",
+        "ordem_servico_parcela_id": "INTEGER REFERENCES ordem_servico_parcelas(id)",
+    },
+    "plano_contas": {
+        "descricao": "TEXT",
+        "nivel": "INTEGER DEFAULT 1",
+        "conta_pai_id": "INTEGER REFERENCES plano_contas(id)",
+        "aceita_lancamento": "BOOLEAN DEFAULT true",
+        "ativa": "BOOLEAN DEFAULT true",
+        "natureza": "VARCHAR(20)",
+        "ordem": "INTEGER DEFAULT 0",
+    },
+    "colaborador": {
+        "salario_mensal": "NUMERIC(10,2) DEFAULT 0",
+    },
+    "ordem_servico_anexos": {
+        "conteudo": "{binario}",
+        "conteudo_pdf": "{binario}",
+        "conteudo_miniatura": "{binario}",
+        "arquivo_sha256": "VARCHAR(64)",
+    },
+    "ordem_servico": {
+        # Assinaturas digitais
+        "assinatura_cliente": "TEXT",
+        "assinatura_cliente_nome": "VARCHAR(200)",
+        "assinatura_cliente_data": "TIMESTAMP",
+        "assinatura_tecnico": "TEXT",
+        "assinatura_tecnico_nome": "VARCHAR(200)",
+        "assinatura_tecnico_data": "TIMESTAMP",
+        "tipo_os": "VARCHAR(20) DEFAULT 'comercial'",
+        # Horários detalhados
+        "intervalo_almoco": "INTEGER DEFAULT 60",
+        "hora_entrada_manha": "TIME",
+        "hora_saida_almoco": "TIME",
+        "hora_retorno_almoco": "TIME",
+        "hora_saida": "TIME",
+        "hora_entrada_extra": "TIME",
+        "hora_saida_extra": "TIME",
+        # Atendimento
+        "solicitante": "VARCHAR(200)",
+        "descricao_problema": "TEXT",
+        "diagnostico_tecnico": "TEXT",
+        "solucao": "TEXT",
+        # Pagamento
+        "valor_entrada": "NUMERIC(10,2) DEFAULT 0",
+        "data_primeira_parcela": "DATE",
+        "data_vencimento_pagamento": "DATE",
+        "descricao_pagamento": "TEXT",
+        "status_pagamento": "VARCHAR(20) DEFAULT 'pendente'",
+        "observacoes_anexos": "TEXT",
+        # Quilometragem
+        "km_inicial": "INTEGER",
+        "km_final": "INTEGER",
+        "total_km": "VARCHAR(20)",
+        "proposta_id": "INTEGER",
+        "incluir_imagens_relatorio": "BOOLEAN DEFAULT FALSE",
+        "data_abertura": "DATE",
+    },
+    "config_precificacao": {
+        "percentual_encargos": "FLOAT DEFAULT 80.0",
+        "percentual_impostos": "FLOAT DEFAULT 13.33",
+        "horas_improdutivas_percentual": "FLOAT DEFAULT 20.0",
+    },
+    "projeto_solar": {
+        "numero": "VARCHAR(20)",
+        "tipo_instalacao": "VARCHAR(20) DEFAULT 'monofasica'",
+        "circuito": "VARCHAR(20)",
+        "status_orcamento": "VARCHAR(20) DEFAULT 'pendente'",
+        "taxa_disponibilidade": "DOUBLE PRECISION",
+        "economia_mensal": "DOUBLE PRECISION",
+        "tempo_retorno": "DOUBLE PRECISION",
+        "iluminacao_publica": "DOUBLE PRECISION DEFAULT 0",
+        "demais_custos": "DOUBLE PRECISION DEFAULT 0",
+        "reajuste_anual_energia": "DOUBLE PRECISION DEFAULT 10.0",
+        "aplicar_pis_te": "BOOLEAN DEFAULT TRUE",
+        "aplicar_cofins_te": "BOOLEAN DEFAULT TRUE",
+        "aplicar_icms_te": "BOOLEAN DEFAULT TRUE",
+        "aplicar_pis_tusd": "BOOLEAN DEFAULT TRUE",
+        "aplicar_cofins_tusd": "BOOLEAN DEFAULT TRUE",
+        "aplicar_icms_tusd": "BOOLEAN DEFAULT TRUE",
+        "economia_25_anos": "DOUBLE PRECISION",
+        "economia_anual": "DOUBLE PRECISION",
+        "payback_anos": "DOUBLE PRECISION",
+        "modalidade_gd": "VARCHAR(50)",
+        "aliquota_fio_b": "DOUBLE PRECISION",
+        "usuario_criador": "VARCHAR(100)",
+        "data_criacao": "TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+        "data_atualizacao": "TIMESTAMP",
+        "perda_eficiencia_anual": "DOUBLE PRECISION DEFAULT 0.8",
+        "usar_micro_inversor": "BOOLEAN DEFAULT FALSE",
+        "largura_area": "DOUBLE PRECISION",
+        "comprimento_area": "DOUBLE PRECISION",
+        "protecao_cc_tipo": "VARCHAR(50)",
+        "protecao_cc_corrente": "VARCHAR(20)",
+        "protecao_ca_tipo": "VARCHAR(50)",
+        "protecao_ca_corrente": "VARCHAR(20)",
+        "qtd_fases": "INTEGER",
+        "cabo_fase_bitola": "VARCHAR(20)",
+        "cabo_neutro_bitola": "VARCHAR(20)",
+        "qtd_terra": "INTEGER",
+        "cabo_terra_bitola": "VARCHAR(20)",
+        "padrao_observacoes": "VARCHAR(200)",
+    },
+    "placa_solar": {
+        "largura": "DOUBLE PRECISION",
+        "comprimento": "DOUBLE PRECISION",
+    },
+}
+
+_REFERENCIA = re.compile(r"REFERENCES (\w+)\(")
+
+INDICES = {
+    "ix_ordem_servico_anexos_arquivo_sha256": ("ordem_servico_anexos", "arquivo_sha256", False),
+    "ix_extratos_bancarios_hash_movimento": ("extratos_bancarios", "hash_movimento", True),
+}
+
+
+def _adicionar_colunas(bind) -> dict:
+    inspector = sa.inspect(bind)
+    tabelas = set(inspector.get_table_names())
+    binario = "BYTEA" if bind.dialect.name == "postgresql" else "BLOB"
+    adicionadas = {}
+    for tabela, colunas in COLUNAS.items():
+        if tabela not in tabelas:
+            continue
+        existentes = {c["name"] for c in inspector.get_columns(tabela)}
+        for coluna, ddl in colunas.items():
+            if coluna in existentes:
+                continue
+            ddl = ddl.format(binario=binario)
+            referencia = _REFERENCIA.search(ddl)
+            if referencia and referencia.group(1) not in tabelas:
+                # Tabela referenciada ausente (esquema parcial): só a coluna
+                ddl = ddl[:referencia.start()].rstrip()
+            if bind.dialect.name == "sqlite":
+                # SQLite não aceita default não constante em ADD COLUMN
+                ddl = ddl.replace(" DEFAULT CURRENT_TIMESTAMP", "")
+            op.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {ddl}")
+            adicionadas.setdefault(tabela, []).append(coluna)
+    return adicionadas
+
+
+def _ajustes_postgresql(bind) -> None:
+    inspector = sa.inspect(bind)
+    tabelas = set(inspector.get_table_names())
+
+    if "propostas" in tabelas:
+        tamanhos = {c["name"]: getattr(c["type"], "length", None) for c in inspector.get_columns("propostas")}
+        for coluna in ("forma_pagamento", "prazo_execucao", "garantia"):
+            if coluna in tamanhos and tamanhos[coluna] is not None and tamanhos[coluna] < 500:
+                op.execute(f"ALTER TABLE propostas ALTER COLUMN {coluna} TYPE VARCHAR(500)")
+
+    if "ordem_servico" in tabelas:
+        tipos = {c["name"]: str(c["type"]).lower() for c in inspector.get_columns("ordem_servico")}
+        for coluna in ("horas_normais", "horas_extras"):
+            if "varchar" not in tipos.get(coluna, ""):
+                continue
+            # Valores não numéricos (texto livre antigo) são descartados
+            op.execute(
+                f"UPDATE ordem_servico SET {coluna} = NULL "
+                f"WHERE {coluna} IS NOT NULL AND {coluna} !~ '^[0-9]+(\\.[0-9]+)?$'"
+            )
+            op.execute(
+                f"ALTER TABLE ordem_servico ALTER COLUMN {coluna} TYPE numeric(10,2) "
+                f"USING NULLIF(TRIM({coluna}), '')::numeric"
+            )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    adicionadas = _adicionar_colunas(bind)
+
+    if "origem" in adicionadas.get("lancamentos_financeiros", []):
+        op.execute("UPDATE lancamentos_financeiros SET origem = 'MANUAL' WHERE origem IS NULL")
+
+    if {"circuito", "tipo_instalacao"} & set(adicionadas.get("projeto_solar", [])):
+        op.execute(
+            "UPDATE projeto_solar SET circuito = CASE "
+            "WHEN tipo_instalacao = 'monofasica' THEN 'Monofásico' "
+            "WHEN tipo_instalacao = 'bifasica' THEN 'Bifásico' "
+            "WHEN tipo_instalacao = 'trifasica' THEN 'Trifásico' "
+            "ELSE circuito END "
+            "WHERE circuito IS NULL AND tipo_instalacao IS NOT NULL"
+        )
+
+    tabelas = set(sa.inspect(bind).get_table_names())
+    for nome, (tabela, coluna, unico) in INDICES.items():
+        if tabela in tabelas:
+            unique = "UNIQUE " if unico else ""
+            op.execute(f"CREATE {unique}INDEX IF NOT EXISTS {nome} ON {tabela} ({coluna})")
+
+    if bind.dialect.name == "postgresql":
+        _ajustes_postgresql(bind)
+
+
+def downgrade() -> None:
+    # Colunas de dados legados: não são removidas
+    pass
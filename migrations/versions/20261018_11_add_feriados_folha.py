@@ -0,0 +1,55 @@
+"""Add feriados (calendário da folha) e índice de data_trabalho
+
+O calendário de feriados pré-calculado substitui a lista fixa de
+OrdemServicoColaborador.eh_feriado; o índice em
+ordem_servico_colaborador.data_trabalho atende as consultas por intervalo
+de datas da folha mensal.
+
+Revision ID: 20261018_11
+Revises: 20261018_10
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_11"
+down_revision = "20261018_10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    tabelas = set(sa.inspect(bind).get_table_names())
+
+    if "feriados" not in tabelas:
+        op.create_table(
+            "feriados",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("data", sa.Date(), nullable=False),
+            sa.Column("nome", sa.String(length=100), nullable=False),
+            sa.Column("abrangencia", sa.String(length=20), nullable=False, server_default="nacional"),
+            sa.Column("movel", sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column("criado_em", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("atualizado_em", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("ativo", sa.Boolean(), nullable=False, server_default=sa.true()),
+        )
+        op.create_index("ix_feriados_data", "feriados", ["data"], unique=True)
+
+    if "ordem_servico_colaborador" in tabelas:
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_ordem_servico_colaborador_data_trabalho "
+            "ON ordem_servico_colaborador (data_trabalho)"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_ordem_servico_colaborador_data_trabalho")
+    bind = op.get_bind()
+    if "feriados" in sa.inspect(bind).get_table_names():
+        op.drop_index("ix_feriados_data", table_name="feriados")
+        op.drop_table("feriados")
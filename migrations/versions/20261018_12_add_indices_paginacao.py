@@ -0,0 +1,45 @@
+"""Add índices compostos para a paginação por cursor das listagens
+
+As listagens de OS, clientes, propostas, pedidos de compra e NFS-e passam
+a ser paginadas por cursor (coluna de ordenação, id); os índices compostos
+atendem o WHERE (coluna, id) < (:valor, :id) ORDER BY ... LIMIT sem
+ordenar a tabela inteira.
+
+Revision ID: 20261018_12
+Revises: 20261018_11
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_12"
+down_revision = "20261018_11"
+branch_labels = None
+depends_on = None
+
+
+INDICES = (
+    ("ix_ordem_servico_data_abertura_id", "ordem_servico", "data_abertura, id"),
+    ("ix_clientes_nome_id", "clientes", "nome, id"),
+    ("ix_propostas_data_emissao_id", "propostas", "data_emissao, id"),
+    ("ix_pedidos_compra_data_emissao_id", "pedidos_compra", "data_emissao, id"),
+    ("ix_notas_fiscais_servico_data_emissao_id", "notas_fiscais_servico", "data_emissao, id"),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    tabelas = set(sa.inspect(bind).get_table_names())
+
+    for nome, tabela, colunas in INDICES:
+        if tabela in tabelas:
+            op.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({colunas})")
+
+
+def downgrade() -> None:
+    for nome, _tabela, _colunas in INDICES:
+        op.execute(f"DROP INDEX IF EXISTS {nome}")
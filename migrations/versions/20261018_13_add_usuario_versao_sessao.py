@@ -0,0 +1,44 @@
+"""Add usuarios.versao_sessao (identidade da sessão)
+
+Contador incrementado a cada troca de senha, perfil ou ativação do
+usuário; vai junto do id na sessão do Flask-Login e invalida sessões e
+cookies "lembrar" emitidos antes da troca.
+
+Revision ID: 20261018_13
+Revises: 20261018_12
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_13"
+down_revision = "20261018_12"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "usuarios" not in inspector.get_table_names():
+        return
+    colunas = {c["name"] for c in inspector.get_columns("usuarios")}
+    if "versao_sessao" not in colunas:
+        op.add_column(
+            "usuarios",
+            sa.Column("versao_sessao", sa.Integer(), nullable=False, server_default="1"),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "usuarios" not in inspector.get_table_names():
+        return
+    if "versao_sessao" in {c["name"] for c in inspector.get_columns("usuarios")}:
+        with op.batch_alter_table("usuarios") as batch:
+            batch.drop_column("versao_sessao")
@@ -0,0 +1,40 @@
+"""Add índices compostos para a paginação de equipamentos e serviços
+
+As listagens de equipamentos e serviços passam a ser paginadas por cursor
+(nome, id), como as demais listagens da revisão 20261018_12.
+
+Revision ID: 20261018_14
+Revises: 20261018_13
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_14"
+down_revision = "20261018_13"
+branch_labels = None
+depends_on = None
+
+
+INDICES = (
+    ("ix_equipamentos_nome_id", "equipamentos", "nome, id"),
+    ("ix_servicos_nome_id", "servicos", "nome, id"),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    tabelas = set(sa.inspect(bind).get_table_names())
+
+    for nome, tabela, colunas in INDICES:
+        if tabela in tabelas:
+            op.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({colunas})")
+
+
+def downgrade() -> None:
+    for nome, _tabela, _colunas in INDICES:
+        op.execute(f"DROP INDEX IF EXISTS {nome}")
@@ -28,9 +28,6 @@ else:
     print(f"✅ DATABASE_URL carregada: {os.getenv('DATABASE_URL')[:50]}...")
 
 try:
-    # Importa a aplicação já criada (também usada pelo Gunicorn)
-    from app.app import app
-    
     if __name__ == '__main__':
         """
         Executa a aplicação em modo de desenvolvimento.
@@ -41,6 +38,11 @@ try:
         - Debug: Habilitado para debug
         """
         
+        # Importa a aplicação (também usada pelo Gunicorn) só ao executar o
+        # script: processos de renderização de PDF (spawn) reimportam este
+        # módulo e não devem criar outra instância
+        from app.app import app
+        
         print(" INICIANDO ERP JSP...")
         
         # Porta do servidor
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Fixtures Compartilhadas dos Testes
+==================================
+
+``app_ctx``: aplicação de testes (SQLite em memória) com o contexto ativo e
+as tabelas recriadas. Módulos que precisam de configuração ou dados extras
+redefinem ``app_ctx`` recebendo esta fixture.
+
+``app``: a mesma aplicação sem contexto ativo, para testes de requisições
+em que cada requisição precisa do próprio ``g``.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture()
+def app_ctx():
+    from app import create_app
+    from app.extensoes import db
+
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture()
+def app():
+    from app import create_app
+    from app.extensoes import db
+
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
@@ -0,0 +1,45 @@
+"""
+Move os arquivos guardados no banco (BLOB dos anexos de OS, base64 do
+XML/PDF das notas fiscais) para o armazenamento endereçado por SHA-256
+configurado em ARMAZENAMENTO_BACKEND ('local' ou 's3').
+
+Pode ser interrompido e executado de novo: registros já migrados são
+ignorados. Após a migração, no PostgreSQL rode VACUUM FULL nas tabelas
+ordem_servico_anexos e notas_fiscais para devolver o espaço ao disco.
+
+Uso:
+    ARMAZENAMENTO_BACKEND=local ARMAZENAMENTO_DIR=/dados/arquivos \\
+        python scripts/migrar_arquivos_armazenamento.py [--lote 50] [--coletar-orfaos]
+
+    --coletar-orfaos  remove do armazenamento arquivos que nenhum registro
+                      referencia (gravados há mais de 24 h)
+"""
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.app import app
+from app.services.armazenamento_service import hashes_em_uso, migrar_do_banco, obter_armazenamento
+
+parser = argparse.ArgumentParser(description='Migra arquivos do banco para o armazenamento SHA-256')
+parser.add_argument('--lote', type=int, default=50, help='registros por commit')
+parser.add_argument('--coletar-orfaos', action='store_true', help='remove arquivos não referenciados')
+args = parser.parse_args()
+
+with app.app_context():
+    armazenamento = obter_armazenamento()
+    if armazenamento is None:
+        print("❌ ARMAZENAMENTO_BACKEND=banco: configure 'local' ou 's3' antes de migrar")
+        sys.exit(1)
+
+    print(f"📦 Migrando arquivos do banco para o armazenamento '{armazenamento.backend.nome}'...")
+    resultado = migrar_do_banco(armazenamento, tamanho_lote=args.lote)
+    print(f"✅ {resultado['anexos']} anexo(s) de OS e {resultado['notas_fiscais']} nota(s) fiscal(is) migrados "
+          f"({resultado['bytes'] / (1024 * 1024):.1f} MB)")
+    if resultado['ignorados']:
+        print(f"⚠️ {resultado['ignorados']} arquivo(s) de NF mantidos no banco (conteúdo não reconhecido)")
+
+    if args.coletar_orfaos:
+        removidos = armazenamento.coletar_orfaos(hashes_em_uso())
+        print(f"🧹 {removidos} arquivo(s) órfão(s) removido(s)")
@@ -0,0 +1,43 @@
+"""
+Aplica as migrações versionadas do banco (migrations/) uma vez por deploy,
+antes de subir os workers do gunicorn.
+
+Seguro com várias instâncias subindo ao mesmo tempo: a execução é feita
+sob trava (advisory lock no PostgreSQL) e quem chegar depois encontra o
+banco já na revisão mais recente.
+
+Uso:
+    python scripts/migrar_banco.py [--status]
+
+    --status  apenas mostra a revisão do banco e a mais recente
+"""
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Só migra: sem pré-carga do autocomplete nem agendador de alertas
+os.environ.setdefault('SERVICOS_WORKER_NA_INICIALIZACAO', '0')
+
+from app.app import app
+from app.extensoes import db
+from app.services.migracoes_service import migrar_banco, revisao_atual, revisao_head
+
+parser = argparse.ArgumentParser(description='Aplica as migrações versionadas do banco')
+parser.add_argument('--status', action='store_true', help='mostra a revisão atual sem migrar')
+args = parser.parse_args()
+
+with app.app_context():
+    if args.status:
+        with db.engine.connect() as conexao:
+            atual = revisao_atual(conexao)
+        print(f"📋 Banco: {atual or 'não versionado'} | mais recente: {revisao_head()}")
+        sys.exit(0)
+
+    print("🔧 Aplicando migrações do banco...")
+    try:
+        resultado = migrar_banco()
+    except Exception as e:
+        print(f"❌ Erro nas migrações: {e}")
+        sys.exit(1)
+    print(f"✅ Banco na revisão {resultado['para']} ({resultado['acao']}; antes: {resultado['de'] or 'não versionado'})")
@@ -0,0 +1,22 @@
+"""
+Reconstrói a tabela saldos_mensais_lancamentos a partir dos lançamentos.
+
+Necessário após cargas em massa que não passam pelos eventos do ORM
+(bulk_insert_mappings, query.update/delete ou SQL direto).
+
+Uso:
+    python scripts/reconstruir_saldos_mensais.py          # todos os anos
+    python scripts/reconstruir_saldos_mensais.py 2026     # apenas um ano
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.app import app
+from app.financeiro.saldo_mensal_model import SaldoMensalLancamento
+
+with app.app_context():
+    ano = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    print(f"🔄 Reconstruindo saldos mensais ({ano or 'todos os anos'})...")
+    linhas = SaldoMensalLancamento.reconstruir(ano=ano)
+    print(f"✅ {linhas} linha(s) gravada(s) em saldos_mensais_lancamentos")
@@ -0,0 +1,32 @@
+"""
+Atualiza o espelho local do catálogo de kits do distribuidor
+(tabela kits_fotovoltaicos), usado pelas telas de precificação.
+
+Pode ser agendado (cron) fora do horário comercial. Kits que saíram do
+catálogo ficam inativos.
+
+Uso:
+    python scripts/sincronizar_kits_distribuidor.py [--por-pagina 100] [--paralelo 4]
+"""
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.app import app
+from app.services.api_distribuidor import DistribuidorAPIError, sincronizar_catalogo
+
+parser = argparse.ArgumentParser(description='Sincroniza o catálogo de kits do distribuidor')
+parser.add_argument('--por-pagina', type=int, default=100, help='kits por página da API')
+parser.add_argument('--paralelo', type=int, default=4, help='páginas buscadas ao mesmo tempo')
+args = parser.parse_args()
+
+with app.app_context():
+    print("🔄 Sincronizando catálogo do distribuidor...")
+    try:
+        resultado = sincronizar_catalogo(per_page=args.por_pagina, max_workers=args.paralelo)
+    except DistribuidorAPIError as e:
+        print(f"❌ Erro na API do distribuidor: {e}")
+        sys.exit(1)
+    print(f"✅ {resultado['total']} kit(s) sincronizados ({resultado['novos']} novos, "
+          f"{resultado['atualizados']} atualizados, {resultado['desativados']} desativados)")
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Download de Anexos
+============================
+
+Valida que o BLOB dos anexos não é carregado junto com a OS e que o
+download em streaming responde corretamente a Range e If-None-Match.
+
+Execução:
+    python -m pytest scripts/test_anexo_download.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture()
+def anexo_id(app_ctx):
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServico, OrdemServicoAnexo
+
+    conteudo = bytes(range(256)) * 2400  # 600 KB: mais de um bloco de leitura
+    cliente = Cliente(nome='Cliente Anexo', cpf_cnpj='98765432100', ativo=True)
+    db.session.add(cliente)
+    db.session.flush()
+    ordem = OrdemServico(numero='OS-ANEXO-1', titulo='Anexos', cliente_id=cliente.id)
+    db.session.add(ordem)
+    db.session.flush()
+    anexo = OrdemServicoAnexo(
+        ordem_servico_id=ordem.id, nome_original='relatório.pdf', nome_arquivo='relatorio.pdf',
+        tipo_arquivo='document', mime_type='application/pdf', tamanho=len(conteudo),
+        caminho='/inexistente/relatorio.pdf', conteudo=conteudo,
+    )
+    db.session.add(anexo)
+    db.session.commit()
+    anexo_id = anexo.id
+    db.session.expunge_all()
+    return anexo_id
+
+
+def test_blob_adiado_ao_listar_anexos(app_ctx, anexo_id):
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+
+    ordem = OrdemServico.query.filter_by(numero='OS-ANEXO-1').one()
+    anexo = ordem.anexos[0]
+    assert anexo.id == anexo_id
+    assert 'conteudo' in db.inspect(anexo).unloaded
+
+
+def test_download_em_streaming_com_range_e_etag(app_ctx, anexo_id):
+    esperado = bytes(range(256)) * 2400
+
+    with app_ctx.test_client() as client:
+        resposta = client.get(f'/ordem_servico/anexo/{anexo_id}/download')
+        assert resposta.status_code == 200
+        assert resposta.is_streamed
+        assert resposta.data == esperado
+        assert resposta.headers['Accept-Ranges'] == 'bytes'
+        assert "filename*=UTF-8''relat%C3%B3rio.pdf" in resposta.headers['Content-Disposition']
+        etag = resposta.headers['ETag']
+
+        resposta = client.get(f'/ordem_servico/anexo/{anexo_id}', headers={'If-None-Match': etag})
+        assert resposta.status_code == 304
+        assert resposta.data == b''
+
+        resposta = client.get(f'/ordem_servico/anexo/{anexo_id}/visualizar',
+                              headers={'Range': 'bytes=262000-262999'})
+        assert resposta.status_code == 206
+        assert resposta.headers['Content-Range'] == f'bytes 262000-262999/{len(esperado)}'
+        assert resposta.data == esperado[262000:263000]
+
+        resposta = client.get(f'/ordem_servico/anexo/{anexo_id}/download',
+                              headers={'Range': f'bytes={len(esperado) + 10}-'})
+        assert resposta.status_code == 416
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Testes das Variantes de Imagem dos Anexos
+=========================================
+
+Valida a geração das variantes reduzidas (PDF e miniatura) dos anexos
+de imagem da OS e a conversão sob demanda de anexos antigos.
+
+Execução:
+    python -m pytest scripts/test_anexo_imagem.py
+"""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _imagem(tamanho, modo='RGBA', formato='PNG'):
+    from PIL import Image
+
+    saida = io.BytesIO()
+    Image.new(modo, tamanho, (200, 30, 30, 128) if modo == 'RGBA' else (200, 30, 30)).save(saida, formato)
+    return saida.getvalue()
+
+
+def _anexo(conteudo, mime='image/png', ordem_id=None):
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServico, OrdemServicoAnexo
+
+    if ordem_id is None:
+        cliente = Cliente(nome='Cliente Foto', cpf_cnpj='12345678901', ativo=True)
+        db.session.add(cliente)
+        db.session.flush()
+        ordem = OrdemServico(numero='OS-FOTO-1', titulo='Fotos', cliente_id=cliente.id)
+        db.session.add(ordem)
+        db.session.flush()
+        ordem_id = ordem.id
+    anexo = OrdemServicoAnexo(
+        ordem_servico_id=ordem_id, nome_original='foto.png', nome_arquivo='foto.png',
+        tipo_arquivo='image' if mime.startswith('image/') else 'document', mime_type=mime,
+        tamanho=len(conteudo), caminho='/inexistente/foto.png', conteudo=conteudo,
+    )
+    db.session.add(anexo)
+    return anexo
+
+
+def test_variantes_reduzidas_no_upload(app_ctx):
+    from PIL import Image
+    from app.extensoes import db
+    from app.ordem_servico.anexo_imagem_service import aplicar_variantes
+
+    original = _imagem((3000, 2000))
+    anexo = _anexo(original)
+    assert aplicar_variantes(anexo, original)
+    db.session.commit()
+
+    pdf = Image.open(io.BytesIO(anexo.conteudo_pdf))
+    miniatura = Image.open(io.BytesIO(anexo.conteudo_miniatura))
+    assert (pdf.format, pdf.mode, pdf.size) == ('JPEG', 'RGB', (1600, 1067))
+    assert max(miniatura.size) == 320
+    # Transparência composta sobre fundo branco (não preto)
+    assert miniatura.getpixel((10, 10))[1] > 100
+
+    documento = _anexo(b'%PDF-1.4', mime='application/pdf', ordem_id=anexo.ordem_servico_id)
+    assert not aplicar_variantes(documento, b'%PDF-1.4')
+
+
+def test_miniatura_gerada_sob_demanda_para_anexo_antigo(app_ctx):
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServicoAnexo
+
+    anexo = _anexo(_imagem((1000, 800), modo='RGB', formato='JPEG'), mime='image/jpeg')
+    db.session.commit()
+    assert anexo.conteudo_miniatura is None
+
+    with app_ctx.test_client() as client:
+        resposta = client.get(f'/ordem_servico/anexo/{anexo.id}/miniatura')
+        assert resposta.status_code == 200
+        assert resposta.mimetype == 'image/jpeg'
+
+        lista = client.get(f'/ordem_servico/{anexo.ordem_servico_id}/anexos').get_json()
+        assert lista[0]['miniatura_url'].endswith(f'/anexo/{anexo.id}/miniatura')
+
+    db.session.expire_all()
+    assert db.session.get(OrdemServicoAnexo, anexo.id).conteudo_pdf
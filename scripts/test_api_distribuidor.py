@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Cliente da API do Distribuidor
+========================================
+
+A API aponta para um servidor HTTP local (stub): valida o cache com
+revalidação por ETag, a repetição de falhas transitórias e a
+sincronização paralela do catálogo para o espelho local.
+
+Execução:
+    python -m pytest scripts/test_api_distribuidor.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+TOTAL_KITS = 23
+CHAMADAS = Counter()
+FALHAS = {'restantes': 0}
+CATALOGO = {'total': TOTAL_KITS}
+
+
+def _kit(numero):
+    return {
+        'id': f'K{numero:03d}',
+        'nome': f'Kit {numero}',
+        'potencia': 2.0 + numero,
+        'preco': 1000 + numero,
+        'modulos': {'fabricante': 'Canadian' if numero % 2 else 'Jinko', 'quantidade': 10},
+        'inversor': {'fabricante': 'Growatt', 'modelo': 'MIN'},
+    }
+
+
+class _Stub(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, corpo=None, etag=None):
+        dados = json.dumps(corpo).encode('utf-8') if corpo is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: int(v[0]) for k, v in parse_qs(url.query).items()}
+        pagina, por_pagina = params.get('page', 1), params.get('per_page', 50)
+        CHAMADAS['total'] += 1
+
+        if FALHAS['restantes'] > 0:
+            FALHAS['restantes'] -= 1
+            return self._json(503, {})
+
+        etag = f'"p{pagina}-{CATALOGO["total"]}"'
+        if self.headers.get('If-None-Match') == etag:
+            CHAMADAS['304'] += 1
+            return self._json(304, etag=etag)
+
+        total = CATALOGO['total']
+        inicio = (pagina - 1) * por_pagina
+        kits = [_kit(n) for n in range(inicio + 1, min(inicio + por_pagina, total) + 1)]
+        paginas = max(1, -(-total // por_pagina))
+        self._json(200, {'kits': kits, 'total': total, 'page': pagina, 'pages': paginas}, etag=etag)
+
+
+@pytest.fixture(scope='module')
+def stub():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Stub)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{servidor.server_address[1]}'
+    servidor.shutdown()
+
+
+@pytest.fixture()
+def app_ctx(app_ctx, stub):
+    from app.services.api_distribuidor import limpar_cache
+
+    app_ctx.config.update(DISTRIBUIDOR_API_URL=stub, DISTRIBUIDOR_API_TOKEN='teste')
+    CHAMADAS.clear()
+    FALHAS['restantes'] = 0
+    CATALOGO['total'] = TOTAL_KITS
+    limpar_cache()
+    return app_ctx
+
+
+def _api():
+    from app.services.api_distribuidor import get_api_service
+
+    api = get_api_service()
+    api.backoff_base = 0.01
+    return api
+
+
+def test_cache_etag_e_repeticao(app_ctx):
+    api = _api()
+
+    primeira = api.listar_kits(page=1, per_page=10)
+    assert len(primeira['kits']) == 10
+    # Dentro da validade: sem nova requisição; alterar o retorno não afeta o cache
+    primeira['kits'].clear()
+    assert len(api.listar_kits(page=1, per_page=10)['kits']) == 10
+    assert CHAMADAS['total'] == 1
+
+    # Vencido: revalida com If-None-Match e reaproveita o conteúdo (304)
+    api.cache_segundos = 0.001
+    api.listar_kits(page=2, per_page=10)
+    time.sleep(0.01)
+    assert len(api.listar_kits(page=2, per_page=10)['kits']) == 10
+    assert CHAMADAS['304'] == 1
+
+    # 503 transitório: repete com backoff até obter a resposta
+    FALHAS['restantes'] = 2
+    assert api.listar_kits(page=3, per_page=10)['page'] == 3
+    assert FALHAS['restantes'] == 0
+
+
+def test_falha_persistente_gera_erro(app_ctx):
+    from app.services.api_distribuidor import DistribuidorAPIError
+
+    api = _api()
+    FALHAS['restantes'] = api.tentativas
+    with pytest.raises(DistribuidorAPIError):
+        api.listar_kits(page=3)
+    assert CHAMADAS['total'] == api.tentativas
+
+
+def test_sincronizar_catalogo_espelho_local(app_ctx):
+    from app.kits_distribuidor.kits_model import KitFotovoltaico
+    from app.services.api_distribuidor import sincronizar_catalogo
+
+    resultado = sincronizar_catalogo(_api(), per_page=5, max_workers=3)
+    assert resultado == {'total': TOTAL_KITS, 'novos': TOTAL_KITS, 'atualizados': 0, 'desativados': 0}
+    assert KitFotovoltaico.query.count() == TOTAL_KITS
+    assert CHAMADAS['total'] == 5  # uma requisição por página
+
+    # Kits que saíram do catálogo ficam inativos e somem das consultas locais
+    CATALOGO['total'] = 20
+    resultado = sincronizar_catalogo(_api(), per_page=5, max_workers=3)
+    assert resultado['atualizados'] == 20 and resultado['desativados'] == 3
+    assert KitFotovoltaico.disponiveis().count() == 20
+
+    canadian = KitFotovoltaico.disponiveis(potencia_min=5, potencia_max=10, fabricante='canadian').all()
+    assert [kit.kit_id_api for kit in canadian] == ['K003', 'K005', 'K007']
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Armazenamento de Arquivos
+===================================
+
+Valida a deduplicação por SHA-256, a migração dos BLOBs/base64 do banco
+para o armazenamento local e o download a partir do armazenamento.
+
+O teste do backend S3 roda apenas com um MinIO (ou S3) disponível:
+    TEST_S3_ENDPOINT=http://localhost:9000 TEST_S3_BUCKET=erp-teste \\
+    AWS_ACCESS_KEY_ID=minioadmin AWS_SECRET_ACCESS_KEY=minioadmin \\
+    python -m pytest scripts/test_armazenamento.py
+
+Execução:
+    python -m pytest scripts/test_armazenamento.py
+"""
+
+import base64
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture()
+def app_ctx(app_ctx, tmp_path):
+    app_ctx.config['ARMAZENAMENTO_BACKEND'] = 'local'
+    app_ctx.config['ARMAZENAMENTO_DIR'] = str(tmp_path / 'arquivos')
+    return app_ctx
+
+
+def test_migracao_deduplicada_e_download(app_ctx):
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import NotaFiscal
+    from app.ordem_servico.ordem_servico_model import OrdemServico, OrdemServicoAnexo
+    from app.services.armazenamento_service import (
+        hashes_em_uso, migrar_do_banco, obter_armazenamento, referencia,
+    )
+
+    conteudo = b'%PDF-1.4 laudo tecnico' * 1000
+    cliente = Cliente(nome='Cliente Arquivo', cpf_cnpj='11122233344', ativo=True)
+    db.session.add(cliente)
+    db.session.flush()
+    ordem = OrdemServico(numero='OS-ARQ-1', titulo='Arquivos', cliente_id=cliente.id)
+    db.session.add(ordem)
+    db.session.flush()
+    # O mesmo laudo anexado duas vezes e também como PDF da nota fiscal
+    for nome in ('laudo.pdf', 'laudo-copia.pdf'):
+        db.session.add(OrdemServicoAnexo(
+            ordem_servico_id=ordem.id, nome_original=nome, nome_arquivo=nome, tipo_arquivo='document',
+            mime_type='application/pdf', tamanho=len(conteudo), caminho=f'/inexistente/{nome}',
+            conteudo=conteudo,
+        ))
+    nota = NotaFiscal(numero='10', tipo='ENTRADA', data_emissao=date.today(), valor_total=1,
+                      arquivo_pdf=base64.b64encode(conteudo).decode('utf-8'),
+                      arquivo_xml=base64.b64encode(b'<nfe/>').decode('utf-8'))
+    db.session.add(nota)
+    db.session.commit()
+    nota_id = nota.id
+
+    armazenamento = obter_armazenamento()
+    resultado = migrar_do_banco(armazenamento, tamanho_lote=1)
+    assert (resultado['anexos'], resultado['notas_fiscais'], resultado['ignorados']) == (2, 1, 0)
+
+    anexos = OrdemServicoAnexo.query.order_by(OrdemServicoAnexo.id).all()
+    sha256 = anexos[0].arquivo_sha256
+    assert anexos[1].arquivo_sha256 == sha256
+    assert all(anexo.conteudo is None for anexo in anexos)
+    nota = db.session.get(NotaFiscal, nota_id)
+    assert nota.arquivo_pdf == referencia(sha256)
+    assert nota.possui_pdf and nota.possui_xml
+    # Três referências ao laudo, um único arquivo gravado (mais o XML)
+    arquivos = [nome for _, _, nomes in os.walk(app_ctx.config['ARMAZENAMENTO_DIR']) for nome in nomes]
+    assert len(arquivos) == 2
+    assert hashes_em_uso() == set(arquivos)
+
+    # Migração idempotente
+    assert migrar_do_banco(armazenamento)['anexos'] == 0
+
+    with app_ctx.test_client() as client:
+        resposta = client.get(f'/ordem_servico/anexo/{anexos[1].id}/download')
+        assert resposta.status_code == 200
+        assert resposta.data == conteudo
+        assert resposta.headers['ETag'] == f'"{sha256}"'
+        resposta.close()
+
+        resposta = client.get(f'/financeiro/notas-fiscais/{nota.id}/download/xml')
+        assert resposta.data == b'<nfe/>'
+        resposta.close()
+
+    # Órfãos: só o que não é referenciado (e já passou da idade mínima)
+    orfao = armazenamento.salvar(b'upload abandonado')
+    assert orfao.novo and not armazenamento.salvar(b'upload abandonado').novo
+    assert armazenamento.coletar_orfaos(hashes_em_uso()) == 0
+    assert armazenamento.coletar_orfaos(hashes_em_uso(), idade_minima=timedelta(0)) == 1
+    assert not armazenamento.existe(orfao.sha256) and armazenamento.existe(sha256)
+
+
+@pytest.mark.skipif(not os.getenv('TEST_S3_ENDPOINT'), reason='MinIO/S3 de teste não configurado')
+def test_backend_s3_com_minio():
+    pytest.importorskip('boto3')
+    from app.services.armazenamento_service import Armazenamento, BackendS3
+
+    armazenamento = Armazenamento(BackendS3(
+        os.environ['TEST_S3_BUCKET'], prefixo='teste-erp/', endpoint_url=os.environ['TEST_S3_ENDPOINT'],
+    ))
+    salvo = armazenamento.salvar(b'conteudo s3')
+    assert armazenamento.ler(salvo.sha256) == b'conteudo s3'
+    assert b''.join(armazenamento.ler_blocos(salvo.sha256, 3, 6)) == b'teu'
+    assert not armazenamento.salvar(b'conteudo s3').novo
+    armazenamento.backend.remover(salvo.sha256)
+    assert not armazenamento.existe(salvo.sha256)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Autocomplete da OS
+============================
+
+Valida o índice de prefixos em memória: ordenação por início/uso,
+atualização a cada commit (e não em rollback), a rota de autocomplete e
+a pré-carga restrita aos workers web.
+
+Execução:
+    python -m pytest scripts/test_autocomplete_os.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def test_indice_prefixo_ordena_por_inicio_e_uso():
+    from app.ordem_servico.autocomplete_service import IndicePrefixo
+
+    indice = IndicePrefixo()
+    indice.adicionar('Troca de inversor', 2)
+    indice.adicionar('Inversor Fronius')
+    indice.adicionar('Instalação elétrica', 5)
+
+    # Começa pelo prefixo antes de "alguma palavra começa", depois uso
+    assert indice.buscar('in') == ['Instalação elétrica', 'Inversor Fronius', 'Troca de inversor']
+    assert indice.buscar('INSTALACAO') == ['Instalação elétrica']
+    assert indice.buscar('') == ['Instalação elétrica', 'Troca de inversor', 'Inversor Fronius']
+
+    indice.remover('Troca de inversor')
+    assert 'Troca de inversor' in indice.buscar('troca')
+    indice.remover('Troca de inversor')
+    assert indice.buscar('troca') == []
+
+
+def test_indice_acompanha_commits(app_ctx):
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.ordem_servico.autocomplete_service import obter_indice_autocomplete
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+
+    cliente = Cliente(nome='Cliente Autocomplete', cpf_cnpj='22233344455', ativo=True)
+    db.session.add(cliente)
+    db.session.flush()
+    db.session.add(OrdemServico(numero='OS-AC-1', titulo='Manutenção', equipamento='Bomba Schneider',
+                                cliente_id=cliente.id))
+    db.session.commit()
+
+    indice = obter_indice_autocomplete()
+    indice.carregar()
+    assert indice.buscar('equipamento', 'bom') == ['Bomba Schneider']
+
+    # Novo valor entra no commit; rollback não altera o índice
+    db.session.add(OrdemServico(numero='OS-AC-2', titulo='Manutenção', equipamento='Bomba Dancor',
+                                cliente_id=cliente.id))
+    db.session.commit()
+    ordem = OrdemServico.query.filter_by(numero='OS-AC-1').first()
+    ordem.equipamento = 'Compressor'
+    db.session.flush()
+    db.session.rollback()
+    assert indice.buscar('equipamento', 'bomba') == ['Bomba Dancor', 'Bomba Schneider']
+
+    # Alteração e inativação
+    ordem = OrdemServico.query.filter_by(numero='OS-AC-1').first()
+    ordem.equipamento = 'Compressor Schulz'
+    db.session.commit()
+    assert indice.buscar('equipamento', 'bomba') == ['Bomba Dancor']
+    assert indice.buscar('titulo', 'man') == ['Manutenção']
+    ordem = OrdemServico.query.filter_by(numero='OS-AC-2').first()
+    ordem.ativo = False
+    db.session.commit()
+    assert indice.buscar('equipamento', 'bomba') == []
+
+    with app_ctx.test_client() as client:
+        resposta = client.get('/ordem_servico/autocomplete/equipamento?q=comp')
+        assert resposta.get_json() == ['Compressor Schulz']
+        assert client.get('/ordem_servico/autocomplete/senha').status_code == 400
+
+
+def test_pre_carga_apenas_com_servicos_de_worker(monkeypatch):
+    from app import create_app
+    from app.config import TestingConfig
+
+    # Testes e scripts de linha de comando: o índice só é criado no primeiro uso
+    assert 'autocomplete_os' not in create_app('testing').extensions
+
+    monkeypatch.setattr(TestingConfig, 'SERVICOS_WORKER_NA_INICIALIZACAO', True)
+    assert create_app('testing').extensions['autocomplete_os'].carregado_em is not None
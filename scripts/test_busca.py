@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Busca Textual
+=======================
+
+Valida a normalização (acentos, pontuação, CPF/CNPJ só com dígitos), o
+índice FTS5 do SQLite mantido por triggers e as rotas de busca.
+
+Execução:
+    python -m pytest scripts/test_busca.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def test_busca_normalizada_e_ranqueada(app_ctx):
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.services.busca_service import _fts_instalados, buscar, normalizar
+
+    assert normalizar('  São João - Nº 12/B ') == 'sao joao no 12 b'
+    assert 'clientes' in _fts_instalados
+
+    db.session.add_all([
+        Cliente(nome='Centro Automotivo', cpf_cnpj='44455566677', ativo=True),
+        Cliente(nome='Conceição Elétrica', cpf_cnpj='12.345.678/0001-90', ativo=True),
+        Cliente(nome='Mercado Central', nome_fantasia='Elétrica do Centro', cpf_cnpj='98765432100', ativo=True),
+        Cliente(nome='Padaria Pão Quente', cpf_cnpj='11122233344', ativo=True),
+    ])
+    db.session.commit()
+
+    nomes = lambda termo: [c.nome for c in buscar(Cliente, termo)]
+    # O registro que começa pelo termo vem antes dos que só o contêm
+    assert nomes('centr') == ['Centro Automotivo', 'Mercado Central']
+    assert sorted(nomes('eletrica')) == ['Conceição Elétrica', 'Mercado Central']
+    assert nomes('conceicao ELET') == ['Conceição Elétrica']
+    assert nomes('12345678000190') == ['Conceição Elétrica']
+    assert nomes('0001-90') == ['Conceição Elétrica']
+    assert nomes('pa') == ['Padaria Pão Quente']
+
+    # O índice acompanha alterações e exclusões
+    cliente = Cliente.query.filter_by(cpf_cnpj='11122233344').first()
+    cliente.nome = 'Padaria Bom Pão'
+    db.session.commit()
+    assert nomes('quente') == [] and nomes('bom pao') == ['Padaria Bom Pão']
+    db.session.delete(cliente)
+    db.session.commit()
+    assert nomes('padaria') == []
+
+
+def test_rotas_de_busca(app_ctx):
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+
+    cliente = Cliente(nome='José Antônio', cpf_cnpj='55566677788', ativo=True)
+    db.session.add(cliente)
+    db.session.flush()
+    db.session.add_all([
+        OrdemServico(numero='OS20260101', titulo='Troca de inversor', equipamento='Inversor Fronius',
+                     cliente_id=cliente.id),
+        OrdemServico(numero='OS20260102', titulo='Limpeza de placas', cliente_id=cliente.id),
+    ])
+    db.session.commit()
+
+    with app_ctx.test_client() as client:
+        resposta = client.get('/cliente/api/buscar?q=jose anto')
+        assert [c['nome'] for c in resposta.get_json()] == ['José Antônio']
+
+        resposta = client.get('/ordem_servico/api/buscar?q=fronius')
+        assert [o['numero'] for o in resposta.get_json()] == ['OS20260101']
+        # Pelo nome do cliente, todas as OS dele
+        resposta = client.get('/ordem_servico/api/buscar?q=antonio')
+        assert sorted(o['numero'] for o in resposta.get_json()) == ['OS20260101', 'OS20260102']
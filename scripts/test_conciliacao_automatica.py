@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Conciliação Bancária Automática
+=========================================
+
+Valida o casamento extrato/lançamento por valor, janela de datas e
+descrição, e a aplicação em lote.
+
+Execução:
+    python -m pytest scripts/test_conciliacao_automatica.py
+"""
+
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture()
+def conta_id(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import ContaBancaria
+
+    conta = ContaBancaria(nome='Conta Conciliação', tipo='corrente', ativo=True)
+    db.session.add(conta)
+    db.session.commit()
+    return conta.id
+
+
+def _extrato(conta_id, descricao, valor, data, tipo, documento=None):
+    from app.financeiro.financeiro_model import ExtratoBancario
+    return ExtratoBancario(
+        conta_bancaria_id=conta_id, descricao=descricao, valor=Decimal(str(valor)),
+        data_movimento=data, tipo_movimento=tipo, documento=documento,
+    )
+
+
+def _lancamento(conta_id, descricao, valor, vencimento, tipo, status='pendente', **kwargs):
+    from app.financeiro.financeiro_model import LancamentoFinanceiro
+    return LancamentoFinanceiro(
+        descricao=descricao, valor=Decimal(str(valor)), tipo=tipo, status=status,
+        data_lancamento=vencimento, data_vencimento=vencimento, conta_bancaria_id=conta_id, **kwargs
+    )
+
+
+def test_sugere_pares_unicos_e_aplica_em_lote(conta_id):
+    from app.extensoes import db
+    from app.financeiro.conciliacao_service import aplicar_conciliacoes, sugerir_conciliacoes
+    from app.financeiro.financeiro_model import ExtratoBancario
+
+    extratos = [
+        _extrato(conta_id, 'PIX RECEBIDO CLIENTE ACME LTDA', 1500, date(2026, 3, 10), 'credito'),
+        _extrato(conta_id, 'PAGTO BOLETO ENERGIA', 320.45, date(2026, 3, 12), 'debito', documento='BOL991'),
+        _extrato(conta_id, 'TARIFA PACOTE', 39.90, date(2026, 3, 15), 'debito'),
+    ]
+    lancamentos = [
+        _lancamento(conta_id, 'Recebimento Acme Ltda - NF 10', 1500, date(2026, 3, 9), 'conta_receber'),
+        _lancamento(conta_id, 'Recebimento outro cliente', 1500, date(2026, 3, 30), 'conta_receber'),
+        _lancamento(conta_id, 'Conta de energia', 320.45, date(2026, 3, 14), 'conta_pagar', numero_documento='BOL991'),
+        _lancamento(conta_id, 'Conta de energia (receita)', 320.45, date(2026, 3, 12), 'receita'),
+        _lancamento(conta_id, 'Tarifa pacote', 39.90, date(2026, 3, 15), 'despesa', status='cancelado'),
+    ]
+    db.session.add_all(extratos + lancamentos)
+    db.session.commit()
+
+    sugestoes = sugerir_conciliacoes(conta_id)
+    pares = {(s.extrato_id, s.lancamento_id) for s in sugestoes}
+
+    assert pares == {(extratos[0].id, lancamentos[0].id), (extratos[1].id, lancamentos[2].id)}
+
+    assert aplicar_conciliacoes(sugestoes) == 2
+    assert ExtratoBancario.query.filter_by(conciliado=True).count() == 2
+    assert db.session.get(ExtratoBancario, extratos[0].id).lancamento_id == lancamentos[0].id
+
+    # Lançamentos já conciliados não voltam como candidatos
+    assert sugerir_conciliacoes(conta_id) == []
+
+
+def test_pontuacao_minima_filtra_descricoes_diferentes(conta_id):
+    from app.extensoes import db
+    from app.financeiro.conciliacao_service import sugerir_conciliacoes
+
+    db.session.add_all([
+        _extrato(conta_id, 'COMPRA MERCADO XPTO', 87.30, date(2026, 4, 1), 'debito'),
+        _lancamento(conta_id, 'Aluguel sala comercial', 87.30, date(2026, 4, 4), 'despesa'),
+    ])
+    db.session.commit()
+
+    assert sugerir_conciliacoes(conta_id, pontuacao_minima=0.6) == []
+    assert len(sugerir_conciliacoes(conta_id, pontuacao_minima=0.05)) == 1
+
+
+def test_documento_em_um_so_lado_nao_pesa_contra_o_par(conta_id):
+    from app.extensoes import db
+    from app.financeiro.conciliacao_service import sugerir_conciliacoes
+
+    # Mesmo par (descrição e datas) com documento: nos dois lados ausente,
+    # só no extrato, só no lançamento e divergente
+    casos = [(None, None), ('DOC1', None), (None, 'DOC3'), ('DOC4', 'OUTRO')]
+    extratos = []
+    for mes, (doc_extrato, doc_lancamento) in enumerate(casos, start=5):
+        extrato = _extrato(conta_id, 'PAGTO FORNECEDOR ALFA', 210, date(2026, mes, 10), 'debito', documento=doc_extrato)
+        extratos.append(extrato)
+        db.session.add_all([extrato, _lancamento(conta_id, 'Fornecedor Alfa', 210, date(2026, mes, 11), 'despesa',
+                                                 numero_documento=doc_lancamento)])
+    db.session.commit()
+
+    pontuacoes = {s.extrato_id: s.pontuacao for s in sugerir_conciliacoes(conta_id, pontuacao_minima=0.0)}
+    sem_documento, so_extrato, so_lancamento, divergente = (pontuacoes[e.id] for e in extratos)
+    assert so_extrato == pytest.approx(sem_documento)
+    assert so_lancamento == pytest.approx(sem_documento)
+    # Documentos presentes e diferentes, sim, pesam contra
+    assert divergente < sem_documento
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Consulta Cadastral (CNPJ / CEP)
+=========================================
+
+Os provedores apontam para um servidor HTTP local (stub): valida a
+disputa em paralelo (o provedor rápido vence o lento), o cache em banco,
+o cache negativo e o circuit breaker.
+
+Execução:
+    python -m pytest scripts/test_consulta_cadastro.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+CNPJ = '12345678000190'
+CHAMADAS = Counter()
+
+
+class _Stub(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, corpo):
+        dados = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        provedor, chave = self.path.strip('/').split('/')
+        CHAMADAS[provedor] += 1
+        if provedor == 'lento':
+            time.sleep(1.5)
+            return self._json(200, {'nome': 'LENTO LTDA', 'cnpj': chave})
+        if provedor == 'rapido':
+            if chave == CNPJ:
+                return self._json(200, {'razao_social': 'EMPRESA RÁPIDA LTDA', 'cnpj': chave, 'uf': 'SP'})
+            return self._json(404, {'message': 'CNPJ não encontrado'})
+        if provedor == 'quebrado':
+            return self._json(500, {})
+        if provedor == 'viacep':
+            return self._json(200, {'erro': True})
+
+
+@pytest.fixture(scope='module')
+def stub():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Stub)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{servidor.server_address[1]}'
+    servidor.shutdown()
+
+
+def _servico(stub):
+    from app.services.consulta_cadastro_service import (
+        Provedor, ServicoConsulta, _brasilapi_cnpj, _receitaws, _viacep,
+    )
+
+    return ServicoConsulta({
+        'cnpj': [
+            Provedor('Lento', f'{stub}/lento/{{chave}}', _receitaws),
+            Provedor('Rapido', f'{stub}/rapido/{{chave}}', _brasilapi_cnpj),
+            Provedor('Quebrado', f'{stub}/quebrado/{{chave}}', _receitaws),
+        ],
+        'cep': [Provedor('ViaCEP', f'{stub}/viacep/{{chave}}', _viacep)],
+    }, timeout=3)
+
+
+def test_provedor_mais_rapido_vence_e_resultado_fica_em_cache(app_ctx, stub):
+    from app.models import ConsultaExternaCache
+
+    CHAMADAS.clear()
+    servico = _servico(stub)
+
+    inicio = time.monotonic()
+    resultado = servico.consultar('cnpj', '12.345.678/0001-90')
+    assert time.monotonic() - inicio < 1.0  # não esperou o provedor lento
+    assert resultado.encontrado and resultado.provedor == 'Rapido' and not resultado.do_cache
+    assert resultado.dados['nome'] == 'EMPRESA RÁPIDA LTDA'
+    assert resultado.dados['endereco']['uf'] == 'SP'
+
+    repetido = servico.consultar('cnpj', CNPJ)
+    assert repetido.do_cache and repetido.dados == resultado.dados
+    assert CHAMADAS['rapido'] == 1
+    assert ConsultaExternaCache.query.count() == 1
+
+    # CEP inexistente: cache negativo, sem nova chamada
+    assert not servico.consultar('cep', '01001-999').encontrado
+    assert not servico.consultar('cep', '01001999').encontrado
+    assert CHAMADAS['viacep'] == 1
+
+    with pytest.raises(ValueError):
+        servico.consultar('cnpj', '123')
+
+
+def test_circuit_breaker_isola_provedor_com_falhas(app_ctx, stub):
+    from app.services import consulta_cadastro_service as modulo
+
+    CHAMADAS.clear()
+    servico = _servico(stub)
+    servico.provedores['cnpj'] = [p for p in servico.provedores['cnpj'] if p.nome == 'Quebrado']
+
+    for _ in range(modulo.FALHAS_PARA_ABRIR):
+        with pytest.raises(modulo.ConsultaIndisponivel):
+            servico.consultar('cnpj', '11222333000181')
+    assert CHAMADAS['quebrado'] == modulo.FALHAS_PARA_ABRIR
+
+    # Circuito aberto: nem chega a chamar o provedor
+    with pytest.raises(modulo.ConsultaIndisponivel):
+        servico.consultar('cnpj', '11222333000181')
+    assert CHAMADAS['quebrado'] == modulo.FALHAS_PARA_ABRIR
+
+    # Depois do tempo aberto, uma nova tentativa passa (meio-aberto)
+    provedor = servico.provedores['cnpj'][0]
+    provedor._aberto_ate = 0
+    with pytest.raises(modulo.ConsultaIndisponivel):
+        servico.consultar('cnpj', '11222333000181')
+    assert CHAMADAS['quebrado'] == modulo.FALHAS_PARA_ABRIR + 1
+
+    with app_ctx.test_client() as client:
+        resposta = client.get('/cliente/api/consultar-cep/123')
+        assert resposta.status_code == 400
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Snapshot do Dashboard
+===============================
+
+Valida agregações e invalidação do cache do painel principal.
+
+Execução:
+    python -m pytest scripts/test_dashboard_snapshot.py
+"""
+
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture()
+def app_ctx(app_ctx):
+    from app.painel.dashboard_service import invalidar_snapshot_dashboard
+
+    invalidar_snapshot_dashboard()
+    return app_ctx
+
+
+def _produto(nome, estoque, minimo, custo, controla=True):
+    from app.produto.produto_model import Produto
+    return Produto(
+        nome=nome,
+        estoque_atual=estoque,
+        estoque_minimo=minimo,
+        preco_custo=Decimal(str(custo)) if custo is not None else None,
+        controla_estoque=controla,
+        ativo=True,
+    )
+
+
+def test_snapshot_agrega_produtos_em_uma_consulta(app_ctx):
+    from app.extensoes import db
+    from app.painel.dashboard_service import obter_snapshot_dashboard
+
+    db.session.add_all([
+        _produto('cabo', 2, 5, 10),
+        _produto('disjuntor', 10, 3, 25),
+        _produto('servico avulso', 0, 0, None, controla=False),
+    ])
+    db.session.commit()
+
+    stats = obter_snapshot_dashboard(force_reload=True).stats
+
+    assert stats['total_produtos'] == 3
+    assert stats['produtos_estoque_baixo'] == 1
+    assert stats['valor_estoque'] == pytest.approx(2 * 10 + 10 * 25)
+    assert stats['valor_estoque_fmt'] == 'R$ 270,00'
+
+
+def test_snapshot_usa_cache_e_invalida_em_escrita(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import LancamentoFinanceiro
+    from app.painel.dashboard_service import obter_snapshot_dashboard
+
+    primeiro = obter_snapshot_dashboard()
+    assert obter_snapshot_dashboard() is primeiro
+
+    hoje = date.today()
+    db.session.add(LancamentoFinanceiro(
+        descricao='Receita teste',
+        valor=Decimal('80.00'),
+        tipo='receita',
+        status='recebido',
+        data_lancamento=hoje,
+        data_vencimento=hoje,
+        data_pagamento=hoje,
+    ))
+    db.session.commit()
+
+    segundo = obter_snapshot_dashboard()
+    assert segundo is not primeiro
+    assert segundo.stats['total_receitas_mes'] == pytest.approx(80.0)
+
+
+def test_invalida_apenas_no_commit(app_ctx):
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.painel.dashboard_service import obter_snapshot_dashboard
+
+    primeiro = obter_snapshot_dashboard()
+
+    # Flush sem commit (e depois rollback) não descarta o cache
+    db.session.add(Cliente(nome='Cliente Rascunho', cpf_cnpj='11122233344', ativo=True))
+    db.session.flush()
+    assert obter_snapshot_dashboard() is primeiro
+    db.session.rollback()
+    db.session.commit()
+    assert obter_snapshot_dashboard() is primeiro
+
+    db.session.add(Cliente(nome='Cliente Gravado', cpf_cnpj='55566677788', ativo=True))
+    db.session.commit()
+    segundo = obter_snapshot_dashboard()
+    assert segundo is not primeiro
+    assert segundo.stats['total_clientes'] == 1
+
+
+def test_snapshot_calculado_durante_commit_nao_e_guardado(app_ctx, monkeypatch):
+    from app.painel import dashboard_service
+
+    calcular = dashboard_service.calcular_snapshot_dashboard
+
+    def calcular_com_commit_concorrente():
+        snapshot = calcular()
+        dashboard_service.invalidar_snapshot_dashboard()  # outro worker/thread fez commit
+        return snapshot
+
+    monkeypatch.setattr(dashboard_service, 'calcular_snapshot_dashboard', calcular_com_commit_concorrente)
+    antigo = dashboard_service.obter_snapshot_dashboard()
+
+    monkeypatch.setattr(dashboard_service, 'calcular_snapshot_dashboard', calcular)
+    assert dashboard_service.obter_snapshot_dashboard() is not antigo
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Serviço de DRE
+========================
+
+Valida a classificação por MapeamentoDRE e a agregação multi-período.
+
+Execução:
+    python -m pytest scripts/test_dre_service.py
+"""
+
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _lancamento(tipo, valor, data, categoria=None, status='pendente', **kwargs):
+    from app.financeiro.financeiro_model import LancamentoFinanceiro
+    return LancamentoFinanceiro(
+        descricao=f'{tipo} {categoria}',
+        tipo=tipo,
+        status=status,
+        categoria=categoria,
+        valor=Decimal(str(valor)),
+        data_lancamento=data,
+        **kwargs
+    )
+
+
+def test_dre_classifica_com_regras_padrao_e_compara_periodos(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.dre_service import calcular_dre_periodos, periodo_ano, periodo_mes
+
+    db.session.add_all([
+        _lancamento('receita', 1000, date(2026, 2, 5), 'Vendas'),
+        _lancamento('conta_receber', 500, date(2026, 3, 5), 'Serviços'),
+        _lancamento('despesa', 100, date(2026, 3, 6), 'Devoluções'),
+        _lancamento('conta_pagar', 200, date(2026, 3, 7), 'Custo de Serviços'),
+        _lancamento('despesa', 30, date(2026, 3, 8), 'Tarifas Bancárias'),
+        _lancamento('despesa', 70, date(2026, 3, 9), 'Aluguel'),
+        _lancamento('receita', 15, date(2026, 3, 10), 'Juros Recebidos s/ aplicação'),
+        _lancamento('receita', 999, date(2026, 3, 11), 'Vendas', status='cancelado'),
+        _lancamento('receita', 40, date(2025, 3, 11), 'Vendas'),
+    ])
+    db.session.commit()
+
+    periodos = {
+        'atual': periodo_mes(2026, 3),
+        'anterior': periodo_mes(2026, 2),
+        'ano': periodo_ano(2026),
+        'ano_anterior': periodo_ano(2025),
+    }
+    resultado = calcular_dre_periodos(periodos)
+
+    marco = resultado['atual']
+    assert marco['receita_bruta'] == Decimal('500')
+    assert marco['deducoes'] == Decimal('100')
+    assert marco['custos'] == Decimal('200')
+    assert marco['despesas_financeiras'] == Decimal('30')
+    assert marco['despesas_operacionais'] == Decimal('70')
+    assert marco['receitas_financeiras'] == Decimal('15')
+    assert marco['lucro_liquido'] == Decimal('500') - 100 - 200 - 70 + 15 - 30
+
+    assert resultado['anterior']['receita_bruta'] == Decimal('1000')
+    assert resultado['ano']['receita_bruta'] == Decimal('1500')
+    assert resultado['ano_anterior']['receita_bruta'] == Decimal('40')
+
+
+def test_dre_usa_mapeamento_da_tabela(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.dre_service import calcular_dre_periodos, periodo_mes
+    from app.financeiro.financeiro_model import MapeamentoDRE
+
+    db.session.add(MapeamentoDRE(tipo='despesa', categoria='Fretes', linha_dre='custos', ordem=1))
+    db.session.add(_lancamento('despesa', 80, date(2026, 5, 2), 'Fretes'))
+    db.session.add(_lancamento('despesa', 20, date(2026, 5, 3), 'Aluguel'))
+    db.session.commit()
+
+    dre = calcular_dre_periodos({'maio': periodo_mes(2026, 5)})['maio']
+    assert dre['custos'] == Decimal('80')
+    assert dre['despesas_operacionais'] == Decimal('20')
+
+    assert MapeamentoDRE.criar_mapeamento_padrao() == 0
+    assert len(MapeamentoDRE.regras_ativas()) == 1
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Importação de Extratos
+================================
+
+Valida a leitura incremental de CSV/OFX, os erros por linha e a
+idempotência da reimportação.
+
+Execução:
+    python -m pytest scripts/test_extrato_import.py
+"""
+
+import io
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+CSV_EXTRATO = (
+    "data;descricao;documento;valor;tipo\n"
+    "01/01/2026;Pagamento Fornecedor ABC;DOC123;1.500,00;debito\n"
+    "02/01/2026;Recebimento Cliente XYZ;;3250.50;credito\n"
+    "02/01/2026;Tarifa;;12,90;debito\n"
+    "02/01/2026;Tarifa;;12,90;debito\n"
+    "31/02/2026;Data inválida;;10,00;debito\n"
+    "03/01/2026;;;10,00;credito\n"
+).encode('utf-8')
+
+OFX_EXTRATO = b"""OFXHEADER:100
+DATA:OFXSGML
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20260105120000[-3:BRT]
+<TRNAMT>-45.10
+<FITID>20260105001
+<MEMO>Compra cartao
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260106<TRNAMT>100.00<FITID>20260106001<NAME>PIX recebido</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+@pytest.fixture()
+def conta_id(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import ContaBancaria
+
+    conta = ContaBancaria(nome='Conta Extrato', tipo='corrente', ativo=True)
+    db.session.add(conta)
+    db.session.commit()
+    return conta.id
+
+
+def test_csv_importa_em_lotes_reporta_erros_e_e_idempotente(conta_id):
+    from app.financeiro.extrato_import_service import importar_extrato
+    from app.financeiro.financeiro_model import ExtratoBancario
+
+    resultado = importar_extrato(conta_id, io.BytesIO(CSV_EXTRATO), 'extrato.csv', tamanho_lote=2)
+
+    assert resultado.importados == 4
+    assert resultado.duplicados == 0
+    assert [linha for linha, _ in resultado.erros] == [6, 7]
+
+    fornecedor = ExtratoBancario.query.filter_by(documento='DOC123').one()
+    assert fornecedor.valor == Decimal('1500.00')
+    assert fornecedor.tipo_movimento == 'debito'
+    assert ExtratoBancario.query.filter_by(descricao='Tarifa').count() == 2
+
+    reimportacao = importar_extrato(conta_id, io.BytesIO(CSV_EXTRATO), 'extrato.csv')
+    assert reimportacao.importados == 0
+    assert reimportacao.duplicados == 4
+    assert ExtratoBancario.query.count() == 4
+
+
+def test_ofx_sgml_le_transacoes(conta_id):
+    from app.financeiro.extrato_import_service import importar_extrato
+    from app.financeiro.financeiro_model import ExtratoBancario
+
+    resultado = importar_extrato(conta_id, OFX_EXTRATO, 'extrato.ofx')
+
+    assert resultado.importados == 2
+    assert resultado.total_erros == 0
+    compra = ExtratoBancario.query.filter_by(documento='20260105001').one()
+    assert compra.data_movimento == date(2026, 1, 5)
+    assert compra.valor == Decimal('45.10')
+    assert compra.tipo_movimento == 'debito'
+    pix = ExtratoBancario.query.filter_by(documento='20260106001').one()
+    assert pix.descricao == 'PIX recebido'
+    assert pix.tipo_movimento == 'credito'
@@ -21,6 +21,8 @@ from app import create_app
 from app.extensoes import db
 from app.financeiro.financeiro_model import LancamentoFinanceiro
 from app.financeiro.indicadores_service import resumir_financeiro_periodo
+from app.cliente.cliente_model import Cliente
+from app.ordem_servico.ordem_servico_model import OrdemServico, OrdemServicoParcela
 
 
 def _novo_lancamento(tipo, status, valor, data_lanc, data_venc=None, data_pag=None, origem='MANUAL'):
@@ -215,6 +217,49 @@ def test_10_decimal_preserva_precisao():
         assert isinstance(r.receita_realizada, Decimal), "Deveria ser Decimal"
 
 
+def test_11_deduplicacao_e_os_cancelada_no_banco():
+    """Regras 8-11: Chave confiável e OS cancelada aplicadas na consulta SQL."""
+    app = _setup_app()
+    with app.app_context():
+        cliente = Cliente(nome='Cliente Indicadores', cpf_cnpj='44444444444', ativo=True)
+        db.session.add(cliente)
+        db.session.flush()
+
+        os_ok = OrdemServico(numero='OS-IND-001', titulo='Ativa', cliente_id=cliente.id,
+                             status='concluida', ativo=True)
+        os_cancelada = OrdemServico(numero='OS-IND-002', titulo='Cancelada', cliente_id=cliente.id,
+                                    status='cancelada', ativo=True)
+        db.session.add_all([os_ok, os_cancelada])
+        db.session.flush()
+
+        parcela = OrdemServicoParcela(
+            ordem_servico_id=os_ok.id, numero_parcela=1,
+            data_vencimento=date(2025, 1, 10), valor=Decimal('70'),
+        )
+        db.session.add(parcela)
+        db.session.flush()
+
+        # Mesma parcela em duas fontes: apenas a de origem OS deve contar
+        legado = _novo_lancamento('receita', 'recebido', 999, date(2025, 1, 10), data_pag=date(2025, 1, 10))
+        legado.ordem_servico_parcela_id = parcela.id
+        da_os = _novo_lancamento('receita', 'recebido', 70, date(2025, 1, 10),
+                                 data_pag=date(2025, 1, 10), origem='ORDEM_SERVICO')
+        da_os.ordem_servico_id = os_ok.id
+        da_os.ordem_servico_parcela_id = parcela.id
+
+        # OS cancelada não entra em nenhum indicador
+        cancelado = _novo_lancamento('receita', 'pendente', 500, date(2025, 1, 12), origem='ORDEM_SERVICO')
+        cancelado.ordem_servico_id = os_cancelada.id
+
+        db.session.add_all([legado, da_os, cancelado])
+        db.session.commit()
+
+        r = resumir_financeiro_periodo(date(2025, 1, 1), date(2025, 1, 31))
+        assert r.receita_realizada == Decimal('70'), f"Esperado 70, obtido {r.receita_realizada}"
+        assert r.qtd_receitas == 1, f"Esperado 1, obtido {r.qtd_receitas}"
+        assert r.a_receber_pendente == Decimal('0'), f"Esperado 0, obtido {r.a_receber_pendente}"
+
+
 def main():
     """Executa todos os testes."""
     print("\n" + "="*80)
@@ -233,6 +278,7 @@ def main():
         ("Regra 1: data_pagamento define período realizado", test_08_data_pagamento_define_periodo_realizado),
         ("Regra 2: data_vencimento define período pendente", test_09_vencimento_define_periodo_pendente),
         ("Regra 4: Decimal preserva precisão monetária", test_10_decimal_preserva_precisao),
+        ("Regras 8-11: Deduplicação e OS cancelada no banco", test_11_deduplicacao_e_os_cancelada_no_banco),
     ]
 
     results = []
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Projeção de Fluxo de Caixa
+====================================
+
+Valida o motor ProjecaoFluxoCaixa usado pelo dashboard e pela exportação.
+
+Execução:
+    python -m pytest scripts/test_fluxo_caixa_projecao.py
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _lancamento(tipo, valor, vencimento, status='pendente', conta_id=None, ativo=True):
+    from app.financeiro.financeiro_model import LancamentoFinanceiro
+    return LancamentoFinanceiro(
+        descricao=f'{tipo} {valor}',
+        tipo=tipo,
+        status=status,
+        valor=Decimal(str(valor)),
+        data_lancamento=vencimento,
+        data_vencimento=vencimento,
+        conta_bancaria_id=conta_id,
+        ativo=ativo,
+    )
+
+
+def test_projecao_agrega_por_dia_e_conta(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import ContaBancaria
+    from app.financeiro.fluxo_caixa_service import ProjecaoFluxoCaixa
+
+    inicio = date(2026, 1, 1)
+    conta = ContaBancaria(nome='Conta Principal', tipo='corrente', banco='001', saldo_atual=Decimal('100.00'), ativo=True)
+    db.session.add(conta)
+    db.session.flush()
+
+    db.session.add_all([
+        _lancamento('conta_receber', 50, inicio, conta_id=conta.id),
+        _lancamento('receita', 25, inicio),
+        _lancamento('conta_pagar', 300, inicio + timedelta(days=2), conta_id=conta.id),
+        _lancamento('conta_pagar', 999, inicio + timedelta(days=2), status='pago'),
+        _lancamento('conta_pagar', 999, inicio + timedelta(days=2), ativo=False),
+        _lancamento('conta_receber', 10, inicio + timedelta(days=400)),
+    ])
+    db.session.commit()
+
+    fluxo = ProjecaoFluxoCaixa(dias=365, data_inicio=inicio, dias_detalhados=2, por_conta=True).calcular()
+
+    assert len(fluxo.dias) == 366
+    assert fluxo.dias[0]['receitas'] == pytest.approx(75.0)
+    assert len(fluxo.dias[0]['lancamentos']) == 2
+    assert fluxo.dias[2]['despesas'] == pytest.approx(300.0)
+    assert fluxo.dias[2]['lancamentos'] == []  # fora dos dias detalhados
+    assert fluxo.saldo_final == pytest.approx(100 + 75 - 300)
+    assert fluxo.alertas[0]['data'] == inicio + timedelta(days=2)
+
+    assert fluxo.por_conta[conta.id][-1] == Decimal('-150.00')
+    assert fluxo.por_conta[None][0] == Decimal('25.00')
+
+
+def test_horizonte_normalizado():
+    from app.financeiro.fluxo_caixa_service import HORIZONTE_MAXIMO_DIAS, normalizar_horizonte
+
+    assert normalizar_horizonte('365') == 365
+    assert normalizar_horizonte('abc') == 30
+    assert normalizar_horizonte('-1') == 30
+    assert normalizar_horizonte('100000') == HORIZONTE_MAXIMO_DIAS
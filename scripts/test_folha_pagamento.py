@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Folha Mensal de Colaboradores
+=======================================
+
+Valida o calendário de feriados (móveis, municipais e registros
+desativados), o cálculo da folha do mês em uma única consulta agrupada
+e a exportação em lote.
+
+Execução:
+    python -m pytest scripts/test_folha_pagamento.py
+"""
+
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture()
+def app_ctx(app_ctx):
+    from app.colaborador.feriado_model import limpar_cache_feriados
+
+    limpar_cache_feriados()
+    yield app_ctx
+    limpar_cache_feriados()
+
+
+def _apontar(colaborador, ordem, dia, normais, extras=0):
+    from app.colaborador.colaborador_model import OrdemServicoColaborador
+
+    return OrdemServicoColaborador(
+        colaborador_id=colaborador.id, ordem_servico_id=ordem.id, data_trabalho=dia,
+        horas_normais=Decimal(normais), horas_extras=Decimal(extras),
+        total_horas=Decimal(normais) + Decimal(extras),
+    )
+
+
+def _dados_junho(db):
+    from app.cliente.cliente_model import Cliente
+    from app.colaborador.colaborador_model import Colaborador
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+
+    cliente = Cliente(nome='Cliente Folha', cpf_cnpj='33344455566', ativo=True)
+    db.session.add(cliente)
+    db.session.flush()
+    ordem = OrdemServico(numero='OS-FOLHA-1', titulo='Manutenção', cliente_id=cliente.id)
+    ana = Colaborador(nome='Ana', salario_mensal=Decimal('2200'))
+    bruno = Colaborador(nome='Bruno', salario_mensal=Decimal('4400'))
+    carlos = Colaborador(nome='Carlos', salario_mensal=Decimal('3000'), data_demissao=date(2026, 5, 1))
+    db.session.add_all([ordem, ana, bruno, carlos])
+    db.session.flush()
+    db.session.add_all([
+        _apontar(ana, ordem, date(2026, 6, 1), 8, 2),   # segunda-feira, 2h extras
+        _apontar(ana, ordem, date(2026, 6, 4), 8),      # Corpus Christi
+        _apontar(ana, ordem, date(2026, 6, 6), 4),      # sábado
+        _apontar(ana, ordem, date(2026, 5, 31), 8),     # fora do mês
+        _apontar(ana, ordem, date(2026, 7, 1), 8),      # fora do mês
+    ])
+    db.session.commit()
+
+
+def test_calendario_com_moveis_municipais_e_desativados(app_ctx):
+    from app.colaborador.colaborador_model import OrdemServicoColaborador
+    from app.colaborador.feriado_model import Feriado, calcular_pascoa, limpar_cache_feriados
+    from app.extensoes import db
+
+    app_ctx.config['FERIADOS_MUNICIPAIS'] = '20/01 São Sebastião; 99/99 inválido'
+    assert calcular_pascoa(2025) == date(2025, 4, 20)
+    assert calcular_pascoa(2026) == date(2026, 4, 5)
+
+    assert Feriado.gerar_ano(2026) == 14
+    assert Feriado.gerar_ano(2026) == 0
+
+    feriados = Feriado.do_ano(2026)
+    assert feriados[date(2026, 2, 17)] == 'Carnaval'
+    assert feriados[date(2026, 6, 4)] == 'Corpus Christi'
+    assert feriados[date(2026, 1, 20)] == 'São Sebastião'
+    assert OrdemServicoColaborador(data_trabalho=date(2026, 2, 17)).eh_feriado()
+    assert not OrdemServicoColaborador(data_trabalho=date(2026, 2, 18)).eh_feriado()
+
+    # Registro desativado anula o feriado calculado
+    Feriado.query.filter_by(data=date(2026, 2, 16)).first().ativo = False
+    db.session.commit()
+    limpar_cache_feriados()
+    assert date(2026, 2, 16) not in Feriado.do_periodo(date(2026, 2, 1), date(2026, 3, 1))
+
+
+def test_folha_do_mes_em_uma_consulta_agrupada(app_ctx):
+    from app.colaborador.folha_service import calcular_folha
+    from app.extensoes import db
+
+    _dados_junho(db)
+    consultas = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM ordem_servico_colaborador' in statement:
+            consultas.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', contar)
+    try:
+        folha = calcular_folha(2026, 6)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', contar)
+
+    assert len(consultas) == 1
+    assert 'GROUP BY' in consultas[0]
+    assert 'data_trabalho >=' in consultas[0]
+
+    resumos = {r['colaborador'].nome: r for r in folha['colaboradores']}
+    assert list(resumos) == ['Ana', 'Bruno']  # Carlos demitido antes do mês
+
+    ana = resumos['Ana']
+    assert ana['dias_trabalhados'] == 3
+    assert ana['total_horas'] == Decimal('22')
+    assert ana['horas_domingo_feriado'] == Decimal('8')
+    assert ana['horas_sabado'] == Decimal('4')
+    assert ana['feriados_trabalhados'] == [date(2026, 6, 4)]
+    assert ana['valor_horas'] == Decimal('220.00')
+    # 8h feriado × 100% + 4h sábado × 50% + 2h extras × 50%, a R$ 10/h
+    assert ana['valor_adicionais'] == Decimal('110.00')
+    assert resumos['Bruno']['valor_total'] == Decimal('0')
+    assert folha['totais']['valor_total'] == Decimal('330.00')
+
+
+def test_exportacao_da_folha_para_admin(app_ctx):
+    from app.auth.usuario_model import Usuario
+    from app.extensoes import db
+
+    _dados_junho(db)
+    admin = Usuario(nome='Admin Folha', email='folha@example.com', usuario='admin_folha',
+                    tipo_usuario='admin', email_confirmado=True, primeiro_login=False)
+    admin.set_senha('SenhaSegura123')
+    db.session.add(admin)
+    db.session.commit()
+
+    with app_ctx.test_client() as client:
+        client.post('/auth/login', data={'identificador': 'admin_folha', 'senha': 'SenhaSegura123'})
+
+        resposta = client.get('/colaborador/folha/csv?mes=6&ano=2026')
+        assert resposta.status_code == 200
+        assert resposta.mimetype == 'text/csv'
+        linhas = resposta.get_data(as_text=True).lstrip('\ufeff').splitlines()
+        assert linhas[0].startswith('Colaborador;CPF;Cargo')
+        assert linhas[1].startswith('Ana;')
+        assert linhas[-1].startswith('TOTAL;') and linhas[-1].endswith(';330,00')
+
+        pagina = client.get('/colaborador/folha?mes=6&ano=2026')
+        assert pagina.status_code == 200
+        assert 'Corpus Christi' in pagina.get_data(as_text=True)
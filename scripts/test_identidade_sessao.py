@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Identidade da Sessão
+==============================
+
+Valida que o usuário logado vem do snapshot em cache (sem consulta a
+`usuarios` a cada requisição), que as permissões do snapshot seguem a
+regra do modelo e que a troca de senha ou perfil revoga as sessões
+abertas, exceto a de quem trocou a própria senha.
+
+Execução:
+    python -m pytest scripts/test_identidade_sessao.py
+"""
+
+import os
+import sys
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _criar_usuario(db, usuario, tipo, senha='SenhaSegura123'):
+    from app.auth.usuario_model import Usuario
+
+    registro = Usuario(nome=usuario.title(), email=f'{usuario}@example.com', usuario=usuario,
+                       tipo_usuario=tipo, email_confirmado=True, primeiro_login=False)
+    registro.set_senha(senha)
+    db.session.add(registro)
+    db.session.commit()
+    return registro
+
+
+def _versao_e_tipo(app, usuario):
+    from app.auth.usuario_model import Usuario
+
+    with app.app_context():
+        registro = Usuario.query.filter_by(usuario=usuario).one()
+        return registro.id, registro.versao_sessao, registro.tipo_usuario
+
+
+def _login(app, usuario, senha='SenhaSegura123'):
+    client = app.test_client()
+    client.post('/auth/login', data={'identificador': usuario, 'senha': senha})
+    return client
+
+
+def test_requisicoes_usam_snapshot_sem_consultar_usuarios(app):
+    from app.extensoes import db
+
+    with app.app_context():
+        _criar_usuario(db, 'operador_id', 'operador')
+        engine = db.engine
+    client = _login(app, 'operador_id')
+    assert client.get('/pedido-compra/').status_code == 200
+
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM usuarios' in statement:
+            consultas.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        assert client.get('/pedido-compra/').status_code == 200
+        assert client.get('/pedido-compra/').status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+    assert consultas == []
+
+
+def test_snapshot_segue_permissoes_do_modelo(app):
+    from app.auth.identidade_service import IdentidadeUsuario
+    from app.auth.usuario_model import PERMISSOES_POR_TIPO
+    from app.extensoes import db
+
+    with app.app_context():
+        for tipo in list(PERMISSOES_POR_TIPO) + ['admin']:
+            usuario = _criar_usuario(db, f'perm_{tipo}', tipo)
+            identidade = IdentidadeUsuario.do_usuario(usuario)
+            for permissao in ('visualizar_clientes', 'cancelar_pedidos_compra', 'upload_anexos_os', 'inexistente'):
+                assert identidade.tem_permissao(permissao) == usuario.tem_permissao(permissao), (tipo, permissao)
+            # Campos fora do snapshot vêm do modelo
+            assert identidade.tentativas_login == usuario.tentativas_login
+
+
+def test_troca_de_senha_ou_perfil_revoga_outras_sessoes(app):
+    from app.extensoes import db
+
+    with app.app_context():
+        _criar_usuario(db, 'admin_id', 'admin')
+        _criar_usuario(db, 'ana_id', 'usuario')
+    admin = _login(app, 'admin_id')
+    ana = _login(app, 'ana_id')
+    ana_outro_navegador = _login(app, 'ana_id')
+    assert ana.get('/pedido-compra/').status_code == 200
+    assert ana_outro_navegador.get('/pedido-compra/').status_code == 200
+
+    # Ana troca a própria senha: a sessão dela continua, a do outro navegador cai
+    resposta = ana.post('/auth/alterar-senha', data={'senha_atual': 'SenhaSegura123',
+                                                     'nova_senha': 'NovaSenha456', 'confirmar_senha': 'NovaSenha456'})
+    assert resposta.status_code == 302
+    ana_id, versao, _ = _versao_e_tipo(app, 'ana_id')
+    assert versao == 2
+    assert ana.get('/pedido-compra/').status_code == 200
+    assert ana_outro_navegador.get('/pedido-compra/').status_code == 302
+
+    # Admin rebaixa Ana para readonly: a sessão dela é revogada
+    admin.post(f'/usuarios/{ana_id}/editar', data={'nome': 'Ana', 'email': 'ana_id@example.com',
+                                                   'usuario': 'ana_id', 'tipo_usuario': 'readonly'})
+    assert _versao_e_tipo(app, 'ana_id')[1:] == (3, 'readonly')
+    resposta = ana.get('/pedido-compra/')
+    assert resposta.status_code == 302 and '/auth/login' in resposta.headers['Location']
+    assert admin.get('/pedido-compra/').status_code == 200
+
+
+def test_id_sem_versao_vale_como_versao_inicial(app):
+    from app.auth.identidade_service import carregar_identidade
+    from app.extensoes import db
+
+    with app.app_context():
+        usuario = _criar_usuario(db, 'legado_id', 'usuario')
+        # Sessão/cookie "lembrar" emitido antes do versionamento: só o id
+        assert carregar_identidade(str(usuario.id)).id == usuario.id
+
+        usuario.set_senha('NovaSenha456')
+        db.session.commit()
+        assert usuario.versao_sessao == 2
+        assert carregar_identidade(str(usuario.id)) is None
+        assert carregar_identidade(f'{usuario.id}:2').id == usuario.id
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Importação em Lote
+============================
+
+Valida a conversão vetorizada, a gravação em blocos com contagem de
+erros por linha e a atualização do rollup de saldos mensais.
+
+Execução:
+    python -m pytest scripts/test_importacao_lote.py
+"""
+
+import json
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+CSV_LOTE = (
+    "Data;Historico;Valor;Tipo\n"
+    "05/01/2026;Venda balcão;R$ 1.500,00;Receita\n"
+    "06/01/2026;Aluguel;2000.00;despesa\n"
+    "07/01/2026;Energia;-350,40;\n"
+    "31/02/2026;Data inválida;10,00;receita\n"
+    "08/01/2026;;10,00;receita\n"
+    "09/01/2026;Sem valor;abc;receita\n"
+    "10/02/2026;Serviço;800,00;RECEITA\n"
+)
+
+MAPA = {'data': 'Data', 'descricao': 'Historico', 'valor': 'Valor', 'tipo': 'Tipo'}
+
+
+def test_conversoes_vetorizadas():
+    from app.financeiro.importacao_lote_service import converter_datas, converter_valores, normalizar_tipos
+
+    valores = converter_valores(pd.Series(['R$ 1.500,00', '2000.00', '-350,40', '1.234', '(12,50)', 'abc']))
+    assert valores.iloc[:5].tolist() == [1500.0, 2000.0, -350.40, 1234.0, -12.5]
+    assert pd.isna(valores.iloc[5])
+
+    datas = converter_datas(pd.Series(['05/01/2026', '2026-02-10', '31/02/2026']))
+    assert datas.iloc[0].date() == date(2026, 1, 5)
+    assert datas.iloc[1].date() == date(2026, 2, 10)
+    assert pd.isna(datas.iloc[2])
+
+    tipos = normalizar_tipos(pd.Series(['Receita', 'DESPESA', '', 'xyz']), pd.Series([1.0, 1.0, -5.0, 1.0]))
+    assert tipos.iloc[:3].tolist() == ['receita', 'despesa', 'despesa']
+    assert pd.isna(tipos.iloc[3])
+
+
+def test_processar_importacao_em_blocos(app_ctx, tmp_path):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import ImportacaoLote, LancamentoFinanceiro
+    from app.financeiro.importacao_lote_service import iniciar_importacao_lote
+    from app.financeiro.saldo_mensal_model import SaldoMensalLancamento
+
+    caminho = tmp_path / 'lancamentos.csv'
+    caminho.write_text(CSV_LOTE, encoding='utf-8')
+    importacao = ImportacaoLote(arquivo_nome='lancamentos.csv', arquivo_path=str(caminho),
+                                tipo_arquivo='CSV', status='PROCESSANDO')
+    db.session.add(importacao)
+    db.session.commit()
+
+    resultado = iniciar_importacao_lote(importacao, MAPA, tamanho_bloco=2, em_segundo_plano=False)
+
+    assert resultado.status == 'PARCIAL'
+    assert resultado.total_linhas == 7
+    assert resultado.linhas_importadas == 4
+    assert resultado.linhas_erro == 3
+    assert sorted(e['linha'] for e in json.loads(resultado.erros_detalhes)) == [5, 6, 7]
+
+    energia = LancamentoFinanceiro.query.filter_by(descricao='Energia').one()
+    assert energia.tipo == 'despesa'
+    assert energia.valor == Decimal('350.40')
+    assert energia.origem == 'IMPORTACAO'
+
+    receitas, _ = SaldoMensalLancamento.somar('competencia', 2026, 1, ['receita'], None)
+    despesas, quantidade = SaldoMensalLancamento.somar('competencia', 2026, 1, ['despesa'], None)
+    assert receitas == Decimal('1500.00')
+    assert despesas == Decimal('2350.40')
+    assert quantidade == 2
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Testes das Métricas de Desempenho
+=================================
+
+Valida que /status/metrics expõe latência, comandos SQL e tempo de
+templates no formato do Prometheus, que o N+1 é detectado, que as
+requisições lentas são registradas e que o endpoint fica fechado quando
+as métricas estão desligadas ou sem o token.
+
+Execução:
+    python -m pytest scripts/test_metricas.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def test_metricas_prometheus_n_mais_1_e_lentas(app):
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.services.metricas_service import instalar_metricas
+
+    app.config.update(METRICAS_TOKEN='segredo', METRICAS_LENTA_SEGUNDOS=0.0, METRICAS_AMOSTRAGEM_LENTAS=1.0, METRICAS_LIMITE_N_MAIS_1=10)
+    instalar_metricas(app)
+
+    with app.app_context():
+        for indice in range(12):
+            db.session.add(Cliente(nome=f'Cliente Métrica {indice}', cpf_cnpj=f'{indice:011d}', ativo=True))
+        db.session.commit()
+
+    @app.route('/_teste/n_mais_1')
+    def _n_mais_1():
+        # Um SELECT por cliente: o padrão que a detecção deve apontar
+        nomes = [Cliente.query.filter_by(id=cliente_id).first().nome for cliente_id in range(1, 13)]
+        return {'total': len(nomes)}
+
+    client = app.test_client()
+    autorizacao = {'Authorization': 'Bearer segredo'}
+    assert client.get('/_teste/n_mais_1').status_code == 200
+    assert client.get('/auth/login').status_code == 200
+
+    resposta = client.get('/status/metrics', headers=autorizacao)
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'text/plain'
+    texto = resposta.get_data(as_text=True)
+
+    assert '# TYPE erp_http_request_duration_seconds histogram' in texto
+    assert 'erp_http_request_duration_seconds_count{endpoint="_n_mais_1",metodo="GET"} 1' in texto
+    assert 'erp_http_requests_total{endpoint="_n_mais_1",metodo="GET",status="200"} 1' in texto
+    assert 'erp_sql_statements_total{endpoint="_n_mais_1"} 12' in texto
+    assert 'erp_sql_n_plus_one_total{endpoint="_n_mais_1"} 1' in texto
+    assert 'erp_sql_n_plus_one_total{endpoint="auth.login"}' not in texto
+    assert 'erp_template_render_seconds_count{template="auth/login.html"} 1' in texto
+    # A própria coleta fica fora das métricas
+    assert 'endpoint="status.metricas"' not in texto
+
+    lentas = client.get('/status/metrics/lentas', headers=autorizacao).get_json()
+    dump = next(item for item in lentas if item['endpoint'] == '_n_mais_1')
+    assert dump['comandos_sql'] == 12
+    assert dump['comandos_mais_pesados'][0]['vezes'] == 12
+    assert 'clientes.id = ?' in dump['comandos_mais_pesados'][0]['sql']
+
+
+def test_endpoint_fechado_sem_metricas_ou_sem_token(app):
+    from app import create_app
+    from app.services.metricas_service import instalar_metricas
+
+    # Desligadas por padrão, e sem token não são instaladas (exporiam rotas e SQL)
+    desligada = create_app('testing')
+    assert not desligada.config['METRICAS_HABILITADAS']
+    assert instalar_metricas(desligada) is None
+    assert desligada.test_client().get('/status/metrics').status_code == 404
+
+    app.config['METRICAS_TOKEN'] = 'segredo'
+    assert instalar_metricas(app) is not None
+    client = app.test_client()
+    assert client.get('/status/metrics').status_code == 401
+    assert client.get('/status/metrics', headers={'Authorization': 'Bearer errado'}).status_code == 401
+    assert client.get('/status/metrics/lentas').status_code == 401
+    assert client.get('/status/metrics?token=segredo').status_code == 401
+    assert client.get('/status/metrics', headers={'Authorization': 'Bearer segredo'}).status_code == 200
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Runner de Migrações
+=============================
+
+Valida o versionamento do banco (banco novo, banco legado sem
+alembic_version e segunda execução sem alterações) e que, em produção,
+o create_app não consulta o esquema do banco.
+
+Execução:
+    python -m pytest scripts/test_migracoes.py
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def test_banco_novo_fica_na_revisao_mais_recente():
+    from app import create_app
+    from app.extensoes import db
+    from app.services.migracoes_service import migrar_banco, revisao_atual, revisao_head
+
+    app = create_app('testing')
+    with app.app_context():
+        with db.engine.connect() as conexao:
+            assert revisao_atual(conexao) == revisao_head()
+        assert migrar_banco()['acao'] == 'em_dia'
+
+
+# Colunas que o código base não tinha: chegam pelas revisões 03 e 07
+COLUNAS_POSTERIORES = {'extratos_bancarios': {'hash_movimento'}, 'clientes': {'busca_normalizada'}}
+
+
+def _ddl_legado(tabela):
+    """CREATE TABLE da tabela como o create_all do código base deixava (sem as colunas novas)."""
+    import sqlalchemy as sa
+    from sqlalchemy.schema import CreateTable
+    from app.cliente.cliente_model import Cliente  # noqa: F401 (registra a tabela)
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import ExtratoBancario  # noqa: F401
+
+    colunas = [sa.Column(c.name, c.type, primary_key=c.primary_key)
+               for c in db.metadata.tables[tabela].columns if c.name not in COLUNAS_POSTERIORES[tabela]]
+    return str(CreateTable(sa.Table(tabela, sa.MetaData(), *colunas)).compile(dialect=sa.create_engine('sqlite://').dialect))
+
+
+def test_banco_legado_recebe_ajustes_uma_vez(tmp_path, monkeypatch):
+    from app.config import TestingConfig
+
+    caminho = tmp_path / 'legado.db'
+    # Banco da época do create_all: tabelas sem colunas que vinham dos ALTERs da inicialização
+    conexao = sqlite3.connect(caminho)
+    conexao.execute('CREATE TABLE colaborador (id INTEGER PRIMARY KEY, nome VARCHAR(100))')
+    conexao.execute("INSERT INTO colaborador (id, nome) VALUES (1, 'Ana')")
+    for tabela in COLUNAS_POSTERIORES:
+        conexao.execute(_ddl_legado(tabela))
+    conexao.execute("INSERT INTO clientes (id, nome, cpf_cnpj, ativo) VALUES (1, 'Cliente Legado', '12345678900', 1)")
+    conexao.commit()
+    conexao.close()
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{caminho.as_posix()}')
+
+    from app import create_app
+    from app.extensoes import db
+    from app.services.migracoes_service import migrar_banco, revisao_atual, revisao_head
+
+    app = create_app('testing')
+    with app.app_context():
+        inspector = inspect(db.engine)
+        assert 'salario_mensal' in [c['name'] for c in inspector.get_columns('colaborador')]
+        assert 'clientes' in inspector.get_table_names()
+        for tabela, colunas in COLUNAS_POSTERIORES.items():
+            assert colunas <= {c['name'] for c in inspector.get_columns(tabela)}, tabela
+        assert 'ix_extratos_bancarios_hash_movimento' in {i['name'] for i in inspector.get_indexes('extratos_bancarios')}
+        from app.cliente.cliente_model import Cliente
+        assert Cliente.query.one().busca_normalizada
+        with db.engine.connect() as conexao:
+            assert revisao_atual(conexao) == revisao_head()
+
+        # Segunda execução (novo deploy): nenhum DDL
+        comandos = []
+
+        def registrar(conn, cursor, sql, *args):
+            comandos.append(sql.split(None, 1)[0].upper())
+
+        event.listen(db.engine, 'before_cursor_execute', registrar)
+        try:
+            assert migrar_banco()['acao'] == 'em_dia'
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', registrar)
+        assert not {'CREATE', 'ALTER', 'DROP'} & set(comandos)
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_producao_nao_consulta_esquema_na_inicializacao(tmp_path, monkeypatch):
+    from app.config import ProductionConfig
+
+    monkeypatch.setattr(ProductionConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{(tmp_path / "prod.db").as_posix()}')
+    monkeypatch.setattr(ProductionConfig, 'SQLALCHEMY_ENGINE_OPTIONS', {})
+    monkeypatch.setattr(ProductionConfig, 'ALERTAS_INTERVALO_MINUTOS', 0)
+    assert ProductionConfig.MIGRAR_BANCO_NA_INICIALIZACAO is False
+
+    reflexao = []
+
+    def registrar(conn, cursor, sql, *args):
+        if 'sqlite_master' in sql or sql.upper().startswith(('PRAGMA', 'CREATE', 'ALTER')):
+            reflexao.append(sql)
+
+    from app import create_app
+
+    event.listen(Engine, 'before_cursor_execute', registrar)
+    try:
+        create_app('production')
+    finally:
+        event.remove(Engine, 'before_cursor_execute', registrar)
+    assert reflexao == []
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Varredura de Alertas
+==============================
+
+Valida que `Notificacao.verificar_todas` cria os alertas esperados em
+lote e que uma segunda varredura não duplica notificações abertas.
+
+Execução:
+    python -m pytest scripts/test_notificacoes_alertas.py
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def test_varredura_cria_alertas_uma_unica_vez(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import (
+        ContaBancaria, ExtratoBancario, LancamentoFinanceiro, Notificacao, OrcamentoAnual,
+    )
+
+    hoje = date.today()
+    conta = ContaBancaria(nome='Conta Negativa', tipo='corrente', saldo_atual=Decimal('-50.00'), ativa=True)
+    db.session.add(conta)
+    db.session.flush()
+    db.session.add_all([
+        LancamentoFinanceiro(descricao='Vence hoje', valor=Decimal('1234.50'), tipo='despesa',
+                             status='pendente', data_lancamento=hoje, data_vencimento=hoje),
+        LancamentoFinanceiro(descricao='Vence em 3 dias', valor=Decimal('10'), tipo='despesa',
+                             status='pendente', data_lancamento=hoje, data_vencimento=hoje + timedelta(days=3)),
+        LancamentoFinanceiro(descricao='Já pago', valor=Decimal('10'), tipo='despesa',
+                             status='pago', data_lancamento=hoje, data_vencimento=hoje),
+        LancamentoFinanceiro(descricao='Gasto material', valor=Decimal('950'), tipo='despesa',
+                             status='pago', categoria='Material', data_lancamento=hoje),
+        OrcamentoAnual(ano=hoje.year, mes=hoje.month, tipo='despesa', categoria='Material',
+                       valor_orcado=Decimal('2400')),  # realizado 2204,50 = 91,9%
+        ExtratoBancario(conta_bancaria_id=conta.id, data_movimento=hoje, descricao='Tarifa',
+                        valor=Decimal('5'), tipo_movimento='debito', conciliado=False),
+    ])
+    db.session.commit()
+
+    assert Notificacao.verificar_todas() == 5
+
+    por_tipo = {}
+    for notif in Notificacao.query.all():
+        por_tipo.setdefault(notif.tipo, []).append(notif)
+    assert sorted(n.prioridade for n in por_tipo['VENCIMENTO']) == ['ALTA', 'URGENTE']
+    urgente = next(n for n in por_tipo['VENCIMENTO'] if n.prioridade == 'URGENTE')
+    assert 'R$ 1.234,50' in urgente.mensagem
+    assert len(por_tipo['SALDO_NEGATIVO']) == 1
+    assert por_tipo['ESTOURO_ORCAMENTO'][0].prioridade == 'ALTA'
+    assert len(por_tipo['CONCILIACAO_PENDENTE']) == 1
+    assert Notificacao.get_nao_lidas().count() == 5
+
+    # Nada novo enquanto as notificações continuarem abertas
+    assert Notificacao.verificar_todas() == 0
+
+    urgente.marcar_como_lida()
+    assert Notificacao.verificar_vencimentos() == 1
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Numeração de Documentos
+=================================
+
+Valida a alocação pelo contador por série: semeadura a partir dos
+registros existentes, números pulados quando já usados, devolução do
+número em rollback e prévia sem reserva.
+
+Execução:
+    python -m pytest scripts/test_numeracao.py
+"""
+
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _criar_cliente():
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+
+    cliente = Cliente(nome='Cliente Numeração', cpf_cnpj='55544433322', ativo=True)
+    db.session.add(cliente)
+    db.session.commit()
+    return cliente.id
+
+
+def test_numero_os_sequencial_sem_lacunas(app_ctx):
+    from app.extensoes import db
+    from app.models import ContadorDocumento
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+
+    prefixo = f'OS{date.today().year}'
+    cliente_id = _criar_cliente()
+    # Dados anteriores ao contador, incluindo sufixo com mais de 4 dígitos
+    for numero in (f'{prefixo}0009', f'{prefixo}10000'):
+        db.session.add(OrdemServico(numero=numero, titulo='Antiga', cliente_id=cliente_id))
+    db.session.commit()
+
+    assert OrdemServico.prever_proximo_numero() == f'{prefixo}10001'
+    assert db.session.get(ContadorDocumento, prefixo) is None  # prévia não reserva
+
+    primeira = OrdemServico.gerar_proximo_numero()
+    db.session.add(OrdemServico(numero=primeira, titulo='Nova', cliente_id=cliente_id))
+    db.session.commit()
+    assert primeira == f'{prefixo}10001'
+
+    # Criação que falha devolve o número
+    assert OrdemServico.gerar_proximo_numero() == f'{prefixo}10002'
+    db.session.rollback()
+    # Número inserido por fora do contador é pulado
+    db.session.add(OrdemServico(numero=f'{prefixo}10002', titulo='Manual', cliente_id=cliente_id))
+    db.session.commit()
+    assert OrdemServico.prever_proximo_numero() == f'{prefixo}10002'
+    assert OrdemServico.gerar_proximo_numero() == f'{prefixo}10003'
+    db.session.commit()
+    assert db.session.get(ContadorDocumento, prefixo).valor == 10003
+
+
+def test_pedido_numerado_no_construtor(app_ctx):
+    from app.extensoes import db
+    from app.pedido.pedido_model import Pedido
+
+    cliente_id = _criar_cliente()
+    db.session.add(Pedido(numero='PED0041', cliente_id=cliente_id))
+    db.session.commit()
+
+    pedidos = [Pedido(cliente_id=cliente_id) for _ in range(2)]
+    db.session.add_all(pedidos)
+    db.session.commit()
+    assert [pedido.numero for pedido in pedidos] == ['PED0042', 'PED0043']
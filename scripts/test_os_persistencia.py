@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Persistência dos Itens da OS
+======================================
+
+Valida que salvar a OS grava só a diferença nos itens (serviços, parcelas
+e apontamentos de colaboradores), preservando os IDs existentes, e que os
+colaboradores referenciados são carregados numa única consulta.
+
+Execução:
+    python -m pytest scripts/test_os_persistencia.py
+"""
+
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture()
+def ordem(app_ctx):
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+
+    cliente = Cliente(nome='Cliente Itens', cpf_cnpj='44455566677', ativo=True)
+    db.session.add(cliente)
+    db.session.flush()
+    ordem = OrdemServico(numero='OS-ITENS-1', titulo='Instalação', cliente_id=cliente.id, tipo_os='operacional')
+    db.session.add(ordem)
+    db.session.commit()
+    return ordem
+
+
+class _Comandos:
+    """Registra os comandos SQL emitidos no bloco."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.sql = []
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany):
+        self.sql.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._registrar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._registrar)
+
+    def escritas(self, tabela):
+        return [s for s in self.sql if s.split()[0] in ('INSERT', 'UPDATE', 'DELETE') and tabela in s.split('(')[0]]
+
+
+def test_itens_e_parcelas_gravam_so_a_diferenca(ordem):
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServicoItem, OrdemServicoParcela
+    from app.ordem_servico.os_persistencia_service import (
+        CHAVE_PARCELA, CHAVE_SERVICO, sincronizar_itens
+    )
+
+    def servico(descricao, quantidade, valor='100'):
+        return {'descricao': descricao, 'tipo_servico': 'hora',
+                'quantidade': Decimal(quantidade), 'valor_unitario': Decimal(valor)}
+
+    def parcela(numero, valor):
+        return {'numero_parcela': numero, 'data_vencimento': date(2026, numero, 10),
+                'valor': Decimal(valor), 'ativo': True}
+
+    sincronizar_itens(ordem.servicos, [servico('Montagem', '1'), servico('Cabeamento', '2'), servico('Teste', '1')],
+                      CHAVE_SERVICO, OrdemServicoItem, OrdemServicoItem.calcular_total)
+    sincronizar_itens(ordem.parcelas, [parcela(1, '250'), parcela(2, '250')], CHAVE_PARCELA, OrdemServicoParcela)
+    db.session.commit()
+    ids_servicos = {item.descricao: item.id for item in ordem.servicos}
+    ids_parcelas = [p.id for p in ordem.parcelas]
+
+    # Cabeamento muda, Teste sai, Comissionamento entra; parcelas redistribuídas
+    resultado = sincronizar_itens(
+        ordem.servicos, [servico('Montagem', '1'), servico('Cabeamento', '3'), servico('Comissionamento', '1')],
+        CHAVE_SERVICO, OrdemServicoItem, OrdemServicoItem.calcular_total,
+    )
+    assert resultado == {'inseridos': 0, 'atualizados': 2, 'removidos': 0, 'inalterados': 1}
+    sincronizar_itens(ordem.parcelas, [parcela(1, '200'), parcela(2, '200'), parcela(3, '100')],
+                      CHAVE_PARCELA, OrdemServicoParcela)
+
+    with _Comandos(db.engine) as comandos:
+        db.session.commit()
+    assert [s.split()[0] for s in comandos.escritas('ordem_servico_itens')] == ['UPDATE', 'UPDATE']
+    # Parcelas 1 e 2 atualizadas no lugar, só a 3 é inserida
+    assert sorted(s.split()[0] for s in comandos.escritas('ordem_servico_parcelas')) == ['INSERT', 'UPDATE']
+
+    ids_depois = {item.descricao: item.id for item in ordem.servicos}
+    assert ids_depois['Montagem'] == ids_servicos['Montagem']
+    assert ids_depois['Cabeamento'] == ids_servicos['Cabeamento']
+    # Linha nova reaproveita o registro que sobrou, sem DELETE + INSERT
+    assert ids_depois['Comissionamento'] == ids_servicos['Teste']
+    assert [p.id for p in ordem.parcelas][:2] == ids_parcelas
+    assert ordem.valor_total_servicos == Decimal('500')
+
+
+def test_colaboradores_salvos_sem_alteracao_nao_geram_comandos(ordem):
+    from werkzeug.datastructures import MultiDict
+
+    from app.colaborador.colaborador_model import Colaborador
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_routes import processar_colaboradores_os
+
+    ana = Colaborador(nome='Ana', salario_mensal=Decimal('3000'), valor_hora=Decimal('110'))
+    bruno = Colaborador(nome='Bruno', salario_mensal=Decimal('2500'))
+    db.session.add_all([ana, bruno])
+    db.session.commit()
+
+    formulario = MultiDict()
+    for indice, (colaborador, dia) in enumerate([(ana, '2026-10-05'), (bruno, '2026-10-05'), (ana, '2026-10-06')]):
+        formulario[f'colaboradores[{indice}][colaborador_id]'] = str(colaborador.id)
+        formulario[f'colaboradores[{indice}][data_trabalho]'] = dia
+        formulario[f'colaboradores[{indice}][hora_entrada_manha]'] = '08:00'
+        formulario[f'colaboradores[{indice}][hora_saida_manha]'] = '12:00'
+
+    processar_colaboradores_os(ordem, formulario)
+    db.session.commit()
+    ids = sorted(t.id for t in ordem.colaboradores_trabalho)
+    assert len(ids) == 3
+    assert ordem.horas_normais == Decimal('12')
+
+    db.session.expire_all()
+    with _Comandos(db.engine) as comandos:
+        processar_colaboradores_os(ordem, formulario)
+        db.session.commit()
+    assert comandos.escritas('ordem_servico_colaborador') == []
+    assert len([s for s in comandos.sql if 'FROM colaborador' in s]) == 1
+    assert sorted(t.id for t in ordem.colaboradores_trabalho) == ids
+
+    # Saída da tarde num dia: um único UPDATE, IDs preservados
+    formulario['colaboradores[2][hora_entrada_tarde]'] = '13:00'
+    formulario['colaboradores[2][hora_saida_tarde]'] = '17:00'
+    with _Comandos(db.engine) as comandos:
+        processar_colaboradores_os(ordem, formulario)
+        db.session.commit()
+    assert len(comandos.escritas('ordem_servico_colaborador')) == 1
+    assert sorted(t.id for t in ordem.colaboradores_trabalho) == ids
+
+
+def test_parcelas_nao_herdam_pagamento_de_outra_parcela(ordem):
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServicoParcela
+    from app.ordem_servico.os_persistencia_service import sincronizar_parcelas
+
+    def parcela(numero, valor, dia=10):
+        return {'numero_parcela': numero, 'data_vencimento': date(2026, numero, dia),
+                'valor': Decimal(valor), 'ativo': True}
+
+    sincronizar_parcelas(ordem.parcelas, [parcela(1, '100'), parcela(2, '100'), parcela(3, '100')], OrdemServicoParcela)
+    db.session.commit()
+    for p in ordem.parcelas:
+        p.pago, p.data_pagamento = True, date(2026, p.numero_parcela, 9)
+    db.session.commit()
+    id_parcela_3 = next(p.id for p in ordem.parcelas if p.numero_parcela == 3)
+
+    # 1 muda de valor, 2 muda de vencimento, 3 sai e entra a 4
+    resultado = sincronizar_parcelas(
+        ordem.parcelas, [parcela(1, '150'), parcela(2, '100', dia=20), parcela(4, '50')], OrdemServicoParcela)
+    db.session.commit()
+    assert resultado == {'inseridos': 1, 'atualizados': 2, 'removidos': 1, 'inalterados': 0}
+
+    por_numero = {p.numero_parcela: p for p in ordem.parcelas}
+    assert sorted(por_numero) == [1, 2, 4]
+    for numero in (1, 2, 4):
+        assert (por_numero[numero].pago, por_numero[numero].data_pagamento) == (False, None), numero
+    # A parcela nova não reaproveita o registro (pago) da antiga 3
+    assert por_numero[4].id != id_parcela_3
+
+    # Parcela paga salva sem alteração continua paga
+    por_numero[1].pago, por_numero[1].data_pagamento = True, date(2026, 1, 9)
+    db.session.commit()
+    sincronizar_parcelas(ordem.parcelas, [parcela(1, '150'), parcela(2, '100', dia=20), parcela(4, '50')],
+                         OrdemServicoParcela)
+    db.session.commit()
+    assert (por_numero[1].pago, por_numero[1].data_pagamento) == (True, date(2026, 1, 9))
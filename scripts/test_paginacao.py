@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Paginação por Cursor das Listagens
+============================================
+
+Valida que as páginas seguintes não repetem nem pulam registros quando há
+inserções no meio da navegação, que a contagem é limitada e que as
+listagens respondem em HTML e na variante JSON (rolagem infinita).
+
+Execução:
+    python -m pytest scripts/test_paginacao.py
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _criar_ordens(db, quantidade, inicio=0):
+    from app.cliente.cliente_model import Cliente
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+
+    cliente = Cliente.query.first()
+    if cliente is None:
+        cliente = Cliente(nome='Cliente Paginação', cpf_cnpj='55566677788', ativo=True)
+        db.session.add(cliente)
+        db.session.flush()
+    for indice in range(inicio, inicio + quantidade):
+        # Várias OS no mesmo dia: o id desempata a ordenação
+        db.session.add(OrdemServico(numero=f'OS-PAG-{indice:03d}', titulo=f'Serviço {indice}',
+                                    cliente_id=cliente.id, data_abertura=date(2026, 10, 1) + timedelta(days=indice // 3)))
+    db.session.commit()
+    return cliente
+
+
+def test_cursor_estavel_com_insercoes_e_contagem_limitada(app_ctx):
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+    from app.services.paginacao_service import contar_limitado, paginar
+
+    _criar_ordens(db, 12)
+    query = OrdemServico.query.filter(OrdemServico.ativo.is_(True))
+    colunas = [OrdemServico.data_abertura, OrdemServico.id]
+
+    primeira = paginar(query, colunas, por_pagina=5)
+    assert primeira.total == 12 and not primeira.total_aproximado
+    assert primeira.tem_proxima
+
+    # OS novas (mais recentes) entram enquanto o usuário rola a lista
+    _criar_ordens(db, 3, inicio=40)
+    vistos = [o.numero for o in primeira.itens]
+    pagina = primeira
+    while pagina.tem_proxima:
+        pagina = paginar(query, colunas, cursor=pagina.proximo_cursor, por_pagina=5)
+        assert pagina.total is None
+        vistos.extend(o.numero for o in pagina.itens)
+
+    assert len(vistos) == len(set(vistos)) == 12
+    assert vistos == sorted(vistos, reverse=True)
+
+    # Cursor adulterado volta para a primeira página
+    assert paginar(query, colunas, cursor='lixo', por_pagina=5).primeira
+
+    assert contar_limitado(query, OrdemServico.id, limite=10) == (10, True)
+
+
+def test_listagens_em_html_e_json(app_ctx):
+    from app.auth.usuario_model import Usuario
+    from app.extensoes import db
+
+    cliente = _criar_ordens(db, 4)
+    admin = Usuario(nome='Admin Paginação', email='paginacao@example.com', usuario='admin_pag',
+                    tipo_usuario='admin', email_confirmado=True, primeiro_login=False)
+    admin.set_senha('SenhaSegura123')
+    db.session.add(admin)
+    db.session.commit()
+
+    with app_ctx.test_client() as client:
+        client.post('/auth/login', data={'identificador': 'admin_pag', 'senha': 'SenhaSegura123'})
+
+        resposta = client.get('/ordem_servico/listar?formato=json&por_pagina=3')
+        assert resposta.status_code == 200
+        dados = resposta.get_json()
+        assert [o['numero'] for o in dados['itens']] == ['OS-PAG-003', 'OS-PAG-002', 'OS-PAG-001']
+        assert dados['total'] == 4 and dados['tem_proxima']
+
+        seguinte = client.get(f"/ordem_servico/listar?formato=json&por_pagina=3&cursor={dados['proximo_cursor']}")
+        assert [o['numero'] for o in seguinte.get_json()['itens']] == ['OS-PAG-000']
+        assert seguinte.get_json()['tem_proxima'] is False
+
+        html = client.get(f'/ordem_servico/listar?por_pagina=3&cliente_id={cliente.id}').get_data(as_text=True)
+        assert 'Próxima página' in html
+        # Filtro de cliente traz só o selecionado, não o cadastro inteiro
+        assert f'<option value="{cliente.id}" selected>' in html
+
+        # Cadastros em ordem alfabética (cursor em nome, id)
+        from app.equipamento.equipamento_model import Equipamento
+        from app.servico.servico_model import Servico
+        for indice in range(3):
+            db.session.add(Equipamento(nome=f'Inversor {indice}', cliente_id=cliente.id, ativo=True))
+            db.session.add(Servico(codigo=f'SRV9{indice}', nome=f'Manutenção {indice}', valor_base=10, ativo=True))
+        db.session.commit()
+        equipamentos = client.get('/equipamentos/?formato=json&por_pagina=2').get_json()
+        assert [e['nome'] for e in equipamentos['itens']] == ['Inversor 0', 'Inversor 1']
+        assert equipamentos['itens'][0]['cliente_nome'] == 'Cliente Paginação'
+        seguinte = client.get(f"/equipamentos/?formato=json&por_pagina=2&cursor={equipamentos['proximo_cursor']}")
+        assert [e['nome'] for e in seguinte.get_json()['itens']] == ['Inversor 2']
+        servicos = client.get('/servico/?formato=json&por_pagina=2').get_json()
+        assert [s['nome'] for s in servicos['itens']] == ['Manutenção 0', 'Manutenção 1'] and servicos['tem_proxima']
+
+        html = client.get(f'/equipamentos/?por_pagina=2&cliente_id={cliente.id}').get_data(as_text=True)
+        assert 'Próxima página' in html and f'<option value="{cliente.id}" selected>' in html
+
+        for url in ('/cliente/listar', '/propostas/', '/pedido-compra/', '/financeiro/nfse/', '/servico/'):
+            assert client.get(url).status_code == 200, url
+        assert client.get('/cliente/listar?formato=json').get_json()['itens'][0]['nome'] == 'Cliente Paginação'
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Serviço de Renderização de PDF
+========================================
+
+Valida o cache de PDFs endereçado por conteúdo, o cache do logo, o pool
+de processos sem fork e o relatório da OS servido pelo cache.
+
+Execução:
+    python -m pytest scripts/test_pdf_render_service.py
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def test_cache_pdf_reaproveita_e_poda(tmp_path):
+    from app.services.pdf_render_service import CachePDF, obter_ou_gerar_pdf
+
+    renderizacoes = []
+
+    def renderizador(html, base_url, css):
+        renderizacoes.append(html)
+        return f'%PDF {html}'.encode('utf-8')
+
+    cache = CachePDF(diretorio=str(tmp_path), max_arquivos=2)
+    pdf1, etag1 = obter_ou_gerar_pdf('proposta:1', '<p>v1</p>', cache=cache, renderizador=renderizador)
+    pdf2, etag2 = obter_ou_gerar_pdf('proposta:1', '<p>v1</p>', cache=cache, renderizador=renderizador)
+    assert pdf1 == pdf2 == b'%PDF <p>v1</p>'
+    assert etag1 == etag2
+    assert len(renderizacoes) == 1
+
+    # Conteúdo alterado gera nova entrada; o cache mantém só as mais recentes
+    _, etag3 = obter_ou_gerar_pdf('proposta:1', '<p>v2</p>', cache=cache, renderizador=renderizador)
+    obter_ou_gerar_pdf('proposta:2', '<p>v1</p>', cache=cache, renderizador=renderizador)
+    assert etag3 != etag1
+    assert len(renderizacoes) == 3
+    assert len(list(tmp_path.glob('*.pdf'))) == 2
+
+
+def test_logo_empresa_normalizado_por_versao(tmp_path):
+    from app.services.pdf_render_service import logo_empresa
+
+    config = SimpleNamespace(id=1, atualizado_em='v1', logo=None, logo_base64='data:image/png;base64,QUJD')
+    logo = logo_empresa(config)
+    assert logo == {'data_uri': 'data:image/png;base64,QUJD', 'base64': 'QUJD'}
+    assert logo_empresa(config) is logo
+
+    padrao = tmp_path / 'logo.jpg'
+    padrao.write_bytes(b'ABC')
+    sem_logo = SimpleNamespace(id=1, atualizado_em='v2', logo=None, logo_base64=None)
+    assert logo_empresa(sem_logo, caminho_padrao=str(padrao)) == {
+        'data_uri': 'data:image/jpeg;base64,QUJD', 'base64': 'QUJD',
+    }
+
+
+def test_pool_usa_processos_limpos():
+    from app.services.pdf_render_service import CachePDF, _contexto_pool
+
+    contexto = _contexto_pool()
+    assert contexto.get_start_method() in ('forkserver', 'spawn')
+
+    # O filho importa o módulo (e o pacote app) sem executar a factory
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+        assert pool.submit(CachePDF.chave, 'os:1', '<p>.</p>').result(timeout=60) == CachePDF.chave('os:1', '<p>.</p>')
+
+
+@pytest.fixture()
+def cliente_logado(app):
+    from app.auth.usuario_model import Usuario
+    from app.cliente.cliente_model import Cliente
+    from app.extensoes import db
+    from app.ordem_servico.ordem_servico_model import OrdemServico
+
+    with app.app_context():
+        cliente = Cliente(nome='Cliente PDF', cpf_cnpj='12312312300', ativo=True)
+        admin = Usuario(nome='Admin PDF', email='pdf@example.com', usuario='admin_pdf',
+                        tipo_usuario='admin', email_confirmado=True, primeiro_login=False)
+        admin.set_senha('SenhaSegura123')
+        db.session.add_all([cliente, admin])
+        db.session.flush()
+        ordem = OrdemServico(numero='OS-PDF-1', titulo='Manutenção', cliente_id=cliente.id, tipo_os='operacional')
+        db.session.add(ordem)
+        db.session.commit()
+        ordem_id = ordem.id
+
+    with app.test_client() as client:
+        client.post('/auth/login', data={'identificador': 'admin_pdf', 'senha': 'SenhaSegura123'})
+        yield client, ordem_id
+
+
+def test_relatorio_os_passa_pelo_cache(cliente_logado, monkeypatch, tmp_path):
+    from app.services import pdf_render_service
+
+    client, ordem_id = cliente_logado
+    renderizacoes = []
+
+    def renderizador(html, base_url, css):
+        renderizacoes.append(html)
+        return b'%PDF-1.7 OS'
+
+    cache = pdf_render_service.CachePDF(diretorio=str(tmp_path))
+    original = pdf_render_service.obter_ou_gerar_pdf
+    monkeypatch.setattr(pdf_render_service, 'obter_ou_gerar_pdf',
+                        lambda *args: original(*args, cache=cache, renderizador=renderizador))
+
+    url = f'/ordem_servico/{ordem_id}/relatorio-pdf'
+    resposta = client.get(url)
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/pdf'
+    assert resposta.data == b'%PDF-1.7 OS'
+    etag = resposta.headers['ETag']
+
+    # Mesmo conteúdo: não renderiza de novo e o navegador revalida com 304
+    assert client.get(url).data == b'%PDF-1.7 OS'
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert len(renderizacoes) == 1
+
+
+def test_relatorio_os_sem_weasyprint_retorna_html(cliente_logado, monkeypatch):
+    from app.services import pdf_render_service
+
+    client, ordem_id = cliente_logado
+
+    def indisponivel(*args):
+        raise pdf_render_service.PDFIndisponivel('sem pango')
+
+    monkeypatch.setattr(pdf_render_service, 'obter_ou_gerar_pdf', indisponivel)
+    resposta = client.get(f'/ordem_servico/{ordem_id}/relatorio-pdf')
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'text/html'
+    assert 'window.print()' in resposta.get_data(as_text=True)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Testes dos Relatórios Customizados
+==================================
+
+Valida a paginação por keyset, a exportação em streaming, os
+relatórios agregados de fluxo de caixa e DRE e as telas do relatório.
+
+Execução:
+    python -m pytest scripts/test_relatorio_customizado.py
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture()
+def app_ctx(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import LancamentoFinanceiro
+
+    for i in range(23):
+        db.session.add(LancamentoFinanceiro(
+            descricao=f'Lançamento {i}',
+            valor=Decimal('100.00') + i,
+            tipo='receita' if i % 2 else 'despesa',
+            status='pendente',
+            data_lancamento=date(2026, 1, 1) + timedelta(days=i % 5),
+            # Alguns sem vencimento: nulos vão para o fim da ordenação
+            data_vencimento=None if i % 7 == 0 else date(2026, 2, 1) + timedelta(days=i % 4),
+        ))
+    db.session.commit()
+    return app_ctx
+
+
+def _relatorio(tipo, **kwargs):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import RelatorioCustomizado
+
+    relatorio = RelatorioCustomizado(nome=f'Teste {tipo}', tipo=tipo, total_execucoes=0, **kwargs)
+    relatorio.set_campos(['descricao', 'valor', 'data_vencimento'] if tipo == 'LANCAMENTOS' else [])
+    relatorio.set_filtros({})
+    db.session.add(relatorio)
+    db.session.commit()
+    return relatorio
+
+
+@pytest.mark.parametrize('direcao', ['ASC', 'DESC'])
+def test_paginacao_keyset_percorre_tudo_sem_repetir(app_ctx, direcao):
+    relatorio = _relatorio('LANCAMENTOS', ordenacao='data_vencimento', ordem_direcao=direcao)
+
+    vistos, cursor, paginas = [], None, 0
+    while True:
+        pagina = relatorio.executar(cursor=cursor, limite=5)
+        vistos.extend(linha['id'] for linha in pagina.linhas)
+        paginas += 1
+        if not pagina.tem_proxima:
+            break
+        cursor = pagina.proximo_cursor
+
+    assert paginas == 5
+    assert len(vistos) == len(set(vistos)) == 23
+    assert relatorio.total_execucoes == 1
+
+    # Mesma ordem de uma consulta única: nulos no fim, id como desempate
+    todas = list(relatorio.iterar_linhas())
+    assert [linha['id'] for linha in todas] == vistos
+    assert all(linha['data_vencimento'] is None for linha in todas[-4:])
+
+
+def test_exportacao_csv_e_agregados(app_ctx):
+    from app.financeiro.relatorio_customizado_service import gerar_csv
+
+    lancamentos = _relatorio('LANCAMENTOS', ordenacao='valor')
+    conteudo = ''.join(gerar_csv(lancamentos))
+    linhas = conteudo.lstrip('\ufeff').splitlines()
+    assert linhas[0] == 'Descrição;Valor;Data Vencimento'
+    assert len(linhas) == 24
+    assert linhas[1].startswith('Lançamento 0;100,00;')
+
+    fluxo = _relatorio('FLUXO_CAIXA').executar()
+    assert fluxo.colunas[0] == 'periodo'
+    assert sum(linha['receitas'] for linha in fluxo.linhas) == sum(Decimal('100') + i for i in range(1, 23, 2))
+    assert fluxo.linhas[-1]['saldo_acumulado'] == sum(linha['saldo'] for linha in fluxo.linhas)
+
+    dre = _relatorio('DRE')
+    dre.set_filtros({'data_inicio': '2026-01-01', 'data_fim': '2026-01-31'})
+    linhas_dre = {linha['linha']: linha['valor'] for linha in dre.executar().linhas}
+    assert linhas_dre['Receita Bruta'] == sum(Decimal('100') + i for i in range(1, 23, 2))
+
+
+def test_telas_renderizam_e_navegam_pelo_cursor(app_ctx):
+    from app.auth.usuario_model import Usuario
+    from app.extensoes import db
+
+    relatorio = _relatorio('LANCAMENTOS', ordenacao='data_vencimento', ordem_direcao='ASC')
+    admin = Usuario(nome='Admin Relatório', email='relatorio@example.com', usuario='admin_rel',
+                    tipo_usuario='admin', email_confirmado=True, primeiro_login=False)
+    admin.set_senha('SenhaSegura123')
+    db.session.add(admin)
+    db.session.commit()
+
+    with app_ctx.test_client() as client:
+        client.post('/auth/login', data={'identificador': 'admin_rel', 'senha': 'SenhaSegura123'})
+        assert client.get('/financeiro/relatorios-customizados').status_code == 200
+        assert client.get('/financeiro/relatorios-customizados/novo').status_code == 200
+
+        url = f'/financeiro/relatorios-customizados/{relatorio.id}/executar'
+        vistos = []
+        proxima = f'{url}?por_pagina=10'
+        while proxima:
+            resposta = client.get(proxima)
+            assert resposta.status_code == 200, proxima
+            html = resposta.get_data(as_text=True)
+            vistos.extend(linha for linha in html.split('<td>') if linha.startswith('Lançamento'))
+            proxima = None
+            if 'Próxima página' in html:
+                link = html[html.rindex('href="', 0, html.index('Próxima página')) + 6:]
+                proxima = link[:link.index('"')].replace('&amp;', '&')
+        assert len(vistos) == len(set(vistos)) == 23
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Rollup de Saldos Mensais
+==================================
+
+Valida a manutenção incremental de saldos_mensais_lancamentos e a
+equivalência com a reconstrução completa.
+
+Execução:
+    python -m pytest scripts/test_saldo_mensal.py
+"""
+
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _lancamento(**kwargs):
+    from app.financeiro.financeiro_model import LancamentoFinanceiro
+    dados = {
+        'descricao': 'Lançamento teste',
+        'valor': Decimal('100.00'),
+        'tipo': 'conta_receber',
+        'status': 'pendente',
+        'data_lancamento': date(2026, 3, 1),
+        'data_vencimento': date(2026, 3, 10),
+    }
+    dados.update(kwargs)
+    return LancamentoFinanceiro(**dados)
+
+
+def _fotografia():
+    from app.financeiro.saldo_mensal_model import COLUNAS_CHAVE, SaldoMensalLancamento
+    return sorted(
+        (tuple(getattr(s, c) for c in COLUNAS_CHAVE), Decimal(str(s.valor_total)), s.quantidade)
+        for s in SaldoMensalLancamento.query.all()
+        if s.quantidade
+    )
+
+
+def test_rollup_incremental_insere_atualiza_exclui(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import LancamentoFinanceiro
+    from app.financeiro.saldo_mensal_model import SaldoMensalLancamento
+
+    receita = _lancamento()
+    despesa = _lancamento(tipo='conta_pagar', valor=Decimal('40.00'), data_vencimento=None)
+    db.session.add_all([receita, despesa])
+    db.session.commit()
+
+    resumo = LancamentoFinanceiro.get_resumo_mes(mes=3, ano=2026)
+    assert resumo['total_receitas'] == pytest.approx(100.0)
+    assert resumo['total_despesas'] == pytest.approx(40.0)
+    assert resumo['qtd_receitas'] == 1
+
+    # Quitação move o valor entre status e cria a referência de pagamento
+    receita.status = 'recebido'
+    receita.data_pagamento = date(2026, 4, 2)
+    receita.valor = Decimal('120.00')
+    db.session.commit()
+
+    assert SaldoMensalLancamento.somar('competencia', 2026, 3, status=['pendente'], tipos=['conta_receber'])[0] == 0
+    assert SaldoMensalLancamento.somar('pagamento', 2026, 4, tipos=['conta_receber']) == (Decimal('120.00'), 1)
+
+    # Exclusão lógica e física removem a contribuição
+    receita.ativo = False
+    db.session.delete(despesa)
+    db.session.commit()
+
+    assert _fotografia() == []
+
+
+def test_rollup_incremental_igual_a_reconstrucao(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.saldo_mensal_model import SaldoMensalLancamento
+
+    db.session.add_all([
+        _lancamento(),
+        _lancamento(valor=Decimal('55.10'), categoria='Serviços', centro_custo_id=None),
+        _lancamento(tipo='despesa', status='pago', data_pagamento=date(2026, 3, 12), valor=Decimal('9.90')),
+        _lancamento(data_vencimento=date(2025, 12, 31), valor=Decimal('7.00')),
+    ])
+    db.session.commit()
+
+    incremental = _fotografia()
+    assert SaldoMensalLancamento.reconstruir() > 0
+    assert _fotografia() == incremental
+
+
+def test_orcamento_realizado_usa_rollup(app_ctx):
+    from app.extensoes import db
+    from app.financeiro.financeiro_model import OrcamentoAnual
+
+    db.session.add_all([
+        _lancamento(tipo='receita', status='recebido', data_pagamento=date(2026, 3, 10)),
+        _lancamento(tipo='conta_receber', valor=Decimal('50.00')),
+        _lancamento(tipo='conta_receber', status='cancelado', valor=Decimal('999.00')),
+        _lancamento(tipo='despesa', valor=Decimal('30.00')),
+    ])
+    receita = OrcamentoAnual(ano=2026, mes=3, tipo='RECEITA', categoria='Vendas', valor_orcado=Decimal('300'))
+    despesa = OrcamentoAnual(ano=2026, mes=3, tipo='DESPESA', categoria='Gerais', valor_orcado=Decimal('100'))
+    db.session.add_all([receita, despesa])
+    db.session.commit()
+
+    OrcamentoAnual.carregar_realizados([receita, despesa])
+    assert receita.valor_realizado == pytest.approx(150.0)
+    assert despesa.valor_realizado == pytest.approx(30.0)
+    assert receita.calcular_realizado() == pytest.approx(150.0)
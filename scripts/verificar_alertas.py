@@ -0,0 +1,19 @@
+"""
+Executa a varredura de alertas financeiros (vencimentos, saldo negativo,
+orçamentos e conciliação) uma vez.
+
+Para ambientes sem a thread do agendador (ALERTAS_INTERVALO_MINUTOS=0),
+agende no cron, por exemplo a cada hora:
+    0 * * * * cd /caminho/erp && python scripts/verificar_alertas.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.app import app
+from app.financeiro.alertas_agendador import executar_varredura
+
+with app.app_context():
+    print("🔔 Verificando alertas financeiros...")
+    criadas = executar_varredura()
+    print(f"✅ {criadas} notificação(ões) criada(s)")